@@ -1,5 +1,8 @@
+import json
+import sqlite3
 import threading
 import time
+from contextlib import closing
 from datetime import datetime, timedelta
 from threading import Event
 from typing import Any, Dict, List, Optional, Tuple, Union
@@ -72,6 +75,8 @@ class BrushManager(_PluginBase):
     _brush_tag = "刷流"
     # 整理Tag
     _organize_tag = "已整理"
+    # 单次调用的最大种子数量
+    _batch_size = 500
     # 退出事件
     _event = Event()
     # 定时器
@@ -579,124 +584,158 @@ class BrushManager(_PluginBase):
             else:
                 logger.warning("当前只支持qbittorrent")
 
-    def __organize_for_qb(self, torrent_hash_titles: dict, torrent_datas):
-        """针对QB进行种子整理"""
+    def __organize_for_qb(self, torrent_hash_titles: dict, torrent_datas: dict):
+        """
+        针对QB进行种子整理
+
+        基于同一份种子快照计算每个种子的目标状态，只对需要变更的属性按目标值分组批量调用，已符合目标的种子跳过
+        """
         # 获取下载器实例
         downloader = self.downloader
         if not downloader or not downloader.qbc:
             self.__log_and_notify_error("连接下载器出错，请检查连接")
             return
 
+        # 按动作顺序生成整理计划，每个动作内按目标值分组
+        plans = self.__plan_organize_actions(torrent_hash_titles=torrent_hash_titles, torrent_datas=torrent_datas)
+        planned_hashes = {torrent_hash for _, _, hashes in plans for torrent_hash in hashes}
+        logger.info(f"整理计划已生成，需要整理的种子 {len(planned_hashes)} 个，"
+                    f"已符合目标的种子 {len(torrent_hash_titles) - len(planned_hashes)} 个")
+
+        failed_hashes = set()
+        call_count = 0
+        for action, value, hashes in plans:
+            # 前一个动作失败的种子不再执行后续动作
+            hashes = [torrent_hash for torrent_hash in hashes if torrent_hash not in failed_hashes]
+            for start in range(0, len(hashes), self._batch_size):
+                batch_hashes = hashes[start:start + self._batch_size]
+                call_count += 1
+                if self.__execute_organize_action(downloader=downloader, action=action, value=value,
+                                                  torrent_hashes=batch_hashes):
+                    continue
+                # 关闭自动分类管理失败时仍继续修改保存路径
+                if action != "auto_management" or value:
+                    failed_hashes.update(batch_hashes)
+        logger.info(f"整理调用完成，共调用下载器 {call_count} 次")
+
         # 初始化成功和失败的计数器和列表
-        success_count = 0
-        failed_count = 0
         success_titles = []
         failed_titles = []
-
-        # 遍历所有种子
+        skipped_titles = []
         for torrent_hash, torrent_title in torrent_hash_titles.items():
-            success = True
-
-            if self._remove_brush_tag:
-                try:
-                    logger.info(f"正在为种子「{torrent_title}」[{torrent_hash}] 移除「{self._brush_tag}」标签")
-                    remove_result = downloader.remove_torrents_tag(ids=[torrent_hash], tag=self._brush_tag)
-                    if not remove_result:
-                        raise Exception(f"「{self._brush_tag}」标签移除失败，请检查下载器连接")
-                    logger.info(f"标签移除成功 - {torrent_hash}")
-                except Exception as e:
-                    logger.error(f"移除标签失败，种子哈希：{torrent_hash}，错误：{str(e)}")
-                    success = False
-
-            if self._mp_tag and success:
-                try:
-                    logger.info(f"正在为种子「{torrent_title}」[{torrent_hash}] "
-                                f"添加「{settings.TORRENT_TAG}」标签并移除「{self._organize_tag}」标签")
-                    remove_result = downloader.remove_torrents_tag(ids=[torrent_hash], tag=self._organize_tag)
-                    if not remove_result:
-                        raise Exception(f"「{self._organize_tag}」标签移除失败，请检查下载器连接")
-                    downloader.set_torrents_tag(ids=[torrent_hash], tags=[settings.TORRENT_TAG])
-                    logger.info(f"MP标签添加成功 - {torrent_hash}")
-                except Exception as e:
-                    logger.error(f"设置MP标签失败，种子哈希：{torrent_hash}，错误：{str(e)}")
-                    success = False
-
-            if self._tag and success:
-                try:
-                    logger.info(f"正在为种子「{torrent_title}」[{torrent_hash}] "
-                                f"添加「{self._tag}」标签")
-                    downloader.set_torrents_tag(ids=[torrent_hash], tags=[self._tag])
-                    logger.info(f"标签添加成功 - {torrent_hash}")
-                except Exception as e:
-                    logger.error(f"设置标签失败，种子哈希：{torrent_hash}，错误：{str(e)}")
-                    success = False
-
-            if self._category and success:
-                try:
-                    logger.info(f"正在为种子「{torrent_title}」[{torrent_hash}] 设置「{self._category}」分类")
-                    try:
-                        downloader.qbc.torrents_set_category(torrent_hashes=torrent_hash, category=self._category)
-                    except Exception as e:
-                        logger.warning(f"种子 「{torrent_title}」[{torrent_hash}] "
-                                    f"设置分类 {self._category} 失败：{str(e)}, 尝试创建分类再设置")
-                        downloader.qbc.torrents_create_category(name=self._category, save_path=self._move_path)
-                        downloader.qbc.torrents_set_category(torrent_hashes=torrent_hash, category=self._category)
-                    logger.info(f"分类设置成功 - {torrent_hash}")
-                except Exception as e:
-                    logger.error(f"设置分类失败，种子哈希：{torrent_hash}，错误：{str(e)}")
-                    success = False
-
-            # qb中的自动分类管理和目录为二选一的逻辑
-            if success:
-                if self._auto_category:
-                    try:
-                        logger.info(f"正在为种子「{torrent_title}」[{torrent_hash}] 开启自动分类管理")
-                        downloader.qbc.torrents_set_auto_management(torrent_hashes=torrent_hash,
-                                                                    enable=self._auto_category)
-                        logger.info(f"自动分类管理开启成功 - {torrent_hash}")
-                    except Exception as e:
-                        logger.error(f"自动分类管理开启失败，种子哈希：{torrent_hash}，错误：{str(e)}")
-                        success = False
-                else:
-                    if self._move_path:
-                        try:
-                            logger.info(f"正在为种子「{torrent_title}」[{torrent_hash}] 关闭自动分类管理")
-                            downloader.qbc.torrents_set_auto_management(torrent_hashes=torrent_hash,
-                                                                        enable=self._auto_category)
-                            logger.info(f"自动分类管理关闭成功 - {torrent_hash}")
-                        except Exception as e:
-                            logger.error(f"自动分类管理关闭失败，种子哈希：{torrent_hash}，错误：{str(e)}")
-                        try:
-                            logger.info(f"正在为种子「{torrent_title}」[{torrent_hash}] 修改保存路径 {self._move_path}")
-                            downloader.qbc.torrents_set_location(torrent_hashes=torrent_hash, location=self._move_path)
-                            logger.info(f"修改保存路径成功 - {torrent_hash}")
-                        except Exception as e:
-                            logger.error(f"修改保存路径失败，种子哈希：{torrent_hash}，错误：{str(e)}")
-                            success = False
-
-            # 更新成功或失败的计数器和列表
-            if success:
+            if torrent_hash in failed_hashes:
+                logger.error(f"「{torrent_title}」[{torrent_hash}] 操作失败，请检查日志调整")
+                failed_titles.append(torrent_title)
+            elif torrent_hash in planned_hashes:
                 logger.info(f"「{torrent_title}」[{torrent_hash}] 操作完成，请等待后续入库")
-                success_count += 1
                 success_titles.append(torrent_title)
             else:
-                logger.error(f"「{torrent_title}」[{torrent_hash}] 操作失败，请检查日志调整")
-                failed_count += 1
-                failed_titles.append(torrent_title)
+                logger.info(f"「{torrent_title}」[{torrent_hash}] 已符合整理目标，跳过")
+                skipped_titles.append(torrent_title)
 
         # 构建简要的汇总消息
         summary_message_parts = []
-        if success_count > 0:
+        if success_titles:
             success_details = "\n".join(success_titles)  # 使用换行符而不是逗号分隔种子标题
-            summary_message_parts.append(f"成功操作 {success_count} 个种子，请等待后续入库\n{success_details}")
-        if failed_count > 0:
+            summary_message_parts.append(f"成功操作 {len(success_titles)} 个种子，请等待后续入库\n{success_details}")
+        if skipped_titles:
+            skipped_details = "\n".join(skipped_titles)
+            summary_message_parts.append(f"已符合整理目标 {len(skipped_titles)} 个种子，无需操作\n{skipped_details}")
+        if failed_titles:
             failed_details = "\n".join(failed_titles)  # 使用换行符而不是逗号分隔种子标题
-            summary_message_parts.append(f"失败操作 {failed_count} 个种子，详细请查看日志\n{failed_details}")
+            summary_message_parts.append(f"失败操作 {len(failed_titles)} 个种子，详细请查看日志\n{failed_details}")
 
         summary_message = "\n\n".join(summary_message_parts)  # 使用两个换行符分隔成功和失败的部分
 
         self.__send_message(title="【刷流种子整理详情】", text=summary_message)
 
+    def __plan_organize_actions(self, torrent_hash_titles: dict, torrent_datas: dict) \
+            -> List[Tuple[str, Any, List[str]]]:
+        """
+        比较种子当前状态与目标状态，按动作顺序返回 (动作, 目标值, 种子Hash列表)
+        """
+        remove_tags = set()
+        if self._remove_brush_tag:
+            remove_tags.add(self._brush_tag)
+        add_tags = []
+        if self._mp_tag:
+            remove_tags.add(self._organize_tag)
+            add_tags.append(settings.TORRENT_TAG)
+        if self._tag and self._tag not in add_tags:
+            add_tags.append(self._tag)
+        # 同时需要移除和添加的标签以添加为准
+        remove_tags -= set(add_tags)
+
+        groups: Dict[Tuple[str, Any], List[str]] = {}
+
+        def __add(action: str, value: Any, torrent_hash: str):
+            groups.setdefault((action, value), []).append(torrent_hash)
+
+        for torrent_hash in torrent_hash_titles:
+            torrent = torrent_datas.get(torrent_hash)
+            if not torrent:
+                continue
+            tags = {str(tag).strip() for tag in (torrent.get("tags") or "").split(",") if str(tag).strip()}
+            category = (torrent.get("category") or "").strip()
+            auto_tmm = bool(torrent.get("auto_tmm", False))
+            save_path = (torrent.get("save_path") or "").rstrip("/\\")
+
+            tags_to_remove = tuple(sorted(tags & remove_tags))
+            if tags_to_remove:
+                __add("remove_tags", tags_to_remove, torrent_hash)
+            tags_to_add = tuple(tag for tag in add_tags if tag not in tags)
+            if tags_to_add:
+                __add("add_tags", tags_to_add, torrent_hash)
+            if self._category and self._category != category:
+                __add("category", self._category, torrent_hash)
+            # qb中的自动分类管理和目录为二选一的逻辑
+            if self._auto_category:
+                if not auto_tmm:
+                    __add("auto_management", True, torrent_hash)
+            elif self._move_path:
+                if auto_tmm:
+                    __add("auto_management", False, torrent_hash)
+                if self._move_path.rstrip("/\\") != save_path:
+                    __add("location", self._move_path, torrent_hash)
+
+        actions = ["remove_tags", "add_tags", "category", "auto_management", "location"]
+        return [(action, value, hashes)
+                for action in actions
+                for (group_action, value), hashes in groups.items() if group_action == action]
+
+    def __execute_organize_action(self, downloader: Any, action: str, value: Any, torrent_hashes: List[str]) -> bool:
+        """
+        对一组种子执行整理动作
+        """
+        try:
+            if action == "remove_tags":
+                logger.info(f"正在为 {len(torrent_hashes)} 个种子移除「{'、'.join(value)}」标签")
+                remove_result = downloader.remove_torrents_tag(ids=torrent_hashes, tag=list(value))
+                if not remove_result:
+                    raise Exception(f"「{'、'.join(value)}」标签移除失败，请检查下载器连接")
+            elif action == "add_tags":
+                logger.info(f"正在为 {len(torrent_hashes)} 个种子添加「{'、'.join(value)}」标签")
+                downloader.set_torrents_tag(ids=torrent_hashes, tags=list(value))
+            elif action == "category":
+                logger.info(f"正在为 {len(torrent_hashes)} 个种子设置「{value}」分类")
+                try:
+                    downloader.qbc.torrents_set_category(torrent_hashes=torrent_hashes, category=value)
+                except Exception as e:
+                    logger.warning(f"设置分类 {value} 失败：{str(e)}, 尝试创建分类再设置")
+                    downloader.qbc.torrents_create_category(name=value, save_path=self._move_path)
+                    downloader.qbc.torrents_set_category(torrent_hashes=torrent_hashes, category=value)
+            elif action == "auto_management":
+                logger.info(f"正在为 {len(torrent_hashes)} 个种子{'开启' if value else '关闭'}自动分类管理")
+                downloader.qbc.torrents_set_auto_management(torrent_hashes=torrent_hashes, enable=value)
+            elif action == "location":
+                logger.info(f"正在为 {len(torrent_hashes)} 个种子修改保存路径 {value}")
+                downloader.qbc.torrents_set_location(torrent_hashes=torrent_hashes, location=value)
+            logger.info(f"操作成功，共 {len(torrent_hashes)} 个种子")
+            return True
+        except Exception as e:
+            logger.error(f"操作失败，种子哈希：{torrent_hashes}，错误：{str(e)}")
+            return False
+
     def __get_torrent_options(self) -> List[dict]:
         """获取种子选项列表"""
         # 检查刷流插件是否已选择
@@ -704,8 +743,13 @@ class BrushManager(_PluginBase):
             logger.info("刷流插件尚未选择，无法获取到刷流任务")
             return []
 
-        # 获取刷流任务数据
-        torrent_tasks = self.get_data("torrents", self._brush_plugin)
+        # 获取刷流任务数据，优先通过插件方法读取（低频版已改为独立任务存储），插件未运行时读取其持久化数据
+        torrent_tasks = self.plugin_manager.run_plugin_method(self._brush_plugin, "get_brush_tasks")
+        if torrent_tasks is None:
+            torrent_tasks = self.__read_brush_tasks()
+        if torrent_tasks is None:
+            logger.warning(f"刷流插件：{self._brush_plugin}，无法读取刷流任务")
+            return []
         if not torrent_tasks:
             logger.info(f"刷流插件：{self._brush_plugin}，没有获取到刷流任务")
             return []
@@ -742,6 +786,24 @@ class BrushManager(_PluginBase):
 
         return torrent_options
 
+    def __read_brush_tasks(self) -> Optional[Dict[str, dict]]:
+        """
+        刷流插件未运行时读取其持久化的刷流任务
+        低频版迁移到任务库后旧插件数据不再更新，存在任务库时只读任务库中未删除的任务，读取失败返回 None
+        """
+        if self._brush_plugin == "BrushFlowLowFreq":
+            db_path = settings.PLUGIN_DATA_PATH / self._brush_plugin.lower() / "tasks.db"
+            if db_path.exists():
+                try:
+                    with closing(sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)) as conn:
+                        rows = conn.execute("SELECT hash, data FROM tasks "
+                                            "WHERE state = 'torrents' AND deleted = 0").fetchall()
+                    return {task_hash: json.loads(data) for task_hash, data in rows}
+                except Exception as e:
+                    logger.error(f"刷流插件：{self._brush_plugin}，读取任务库失败：{str(e)}")
+                    return None
+        return self.get_data("torrents", self._brush_plugin) or {}
+
     def __get_plugin_options(self) -> List[dict]:
         """获取插件选项列表"""
         # 获取运行的插件选项
@@ -1,11 +1,13 @@
 import concurrent.futures
+import functools
+import hashlib
 import json
 import re
 import threading
 import time
 from collections import defaultdict
 from datetime import datetime, timedelta
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Callable, Dict, List, Optional, Tuple
 from urllib.parse import quote
 
 import plexapi.utils
@@ -27,6 +29,11 @@ from app.schemas import ServiceInfo
 from app.schemas.types import EventType, NotificationType
 from app.utils.string import StringUtils
 
+from .engine import LocalizationEngine
+from .progress import SCOPE_FULL, SCOPE_TRANSFER, ScanProgress
+from .store import LocalizedItemStore
+from .writer import AdaptiveWriter
+
 lock = threading.Lock()
 TYPES = {"movie": [1], "show": [2], "artist": [8, 9, 10]}
 
@@ -89,6 +96,24 @@ class PlexLocalization(_PluginBase):
     _scheduler = None
     # 退出事件
     _event = threading.Event()
+    # 扫描断点持久化间隔（秒）
+    _checkpoint_interval = 30
+    # 本次运行的扫描进度
+    _scan_progress: Optional[ScanProgress] = None
+    # 条目本地化记录存储
+    _localized_store: Optional[LocalizedItemStore] = None
+    _localized_store_lock = threading.Lock()
+    # 拼音排序标题缓存的最大条目数
+    _pinyin_cache_size = 10000
+    # 本地化引擎
+    _engine: Optional[LocalizationEngine] = None
+    _engine_lock = threading.Lock()
+    # 同时进行的元数据写入数量上限，实际并发由写入器根据响应延迟和错误自适应调整
+    _max_write_concurrency = 8
+    # 写入成功后回读验证的比例，Plex 对部分标签编辑即使未生效也返回成功，默认抽样验证
+    _verify_ratio = 0.1
+    # 元数据写入器
+    _writer: Optional[AdaptiveWriter] = None
 
     # endregion
 
@@ -101,6 +126,15 @@ class PlexLocalization(_PluginBase):
             return default
         return parsed if parsed > 0 else default
 
+    @staticmethod
+    def __ratio(value: Any, default: float) -> float:
+        """读取 0 至 1 之间的比例配置，非法值回退默认值。"""
+        try:
+            parsed = float(value)
+        except (TypeError, ValueError):
+            return default
+        return parsed if 0 <= parsed <= 1 else default
+
     def init_plugin(self, config: dict = None):
         self.mediaserver_helper = MediaServerHelper()
         if not config:
@@ -114,12 +148,14 @@ class PlexLocalization(_PluginBase):
         self._execute_transfer = config.get("execute_transfer")
         self._tags_json = config.get("tags_json")
         self._tags = self.__get_tags()
+        self._engine = None
         self._thread_count = self.__positive_int(config.get("thread_count", 3), default=3)
         try:
             self._delay = int(config.get("delay", 300))
         except ValueError:
             self._delay = 300
         self._batch_size = self.__positive_int(config.get("batch_size", 100), default=100)
+        self._verify_ratio = self.__ratio(config.get("verify_ratio", 0.1), default=0.1)
 
         # 如果开启了入库后运行一次，延迟时间又不填，默认为300s
         if self._execute_transfer and not self._delay:
@@ -140,6 +176,20 @@ class PlexLocalization(_PluginBase):
             # 关闭一次性开关
             self._onlyonce = False
 
+        # 入库后运行被中断（如重启）时，延迟后从断点继续
+        if self._enabled and self._execute_transfer:
+            checkpoints = self.get_data("scan_checkpoint")
+            checkpoint = checkpoints.get(SCOPE_TRANSFER) if isinstance(checkpoints, dict) else None
+            if isinstance(checkpoint, dict) and checkpoint.get("added_time"):
+                logger.info(f"存在未完成的入库后本地化服务，{self._delay} 秒后从断点继续")
+                self._scheduler.add_job(
+                    func=self.localization,
+                    trigger="date",
+                    run_date=datetime.now(tz=pytz.timezone(settings.TZ)) + timedelta(seconds=self._delay),
+                    name="Plex中文本地化",
+                    kwargs={"added_time": checkpoint.get("added_time")}
+                )
+
         config_mapping = {
             "enabled": self._enabled,
             "onlyonce": False,
@@ -151,7 +201,8 @@ class PlexLocalization(_PluginBase):
             "thread_count": self._thread_count,
             "execute_transfer": self._execute_transfer,
             "delay": self._delay,
-            "batch_size": self._batch_size
+            "batch_size": self._batch_size,
+            "verify_ratio": self._verify_ratio
         }
         self.update_config(config=config_mapping)
 
@@ -422,7 +473,8 @@ class PlexLocalization(_PluginBase):
                             {
                                 'component': 'VCol',
                                 'props': {
-                                    'cols': 12
+                                    'cols': 12,
+                                    'md': 9
                                 },
                                 'content': [
                                     {
@@ -440,6 +492,25 @@ class PlexLocalization(_PluginBase):
                                     }
                                 ],
                             },
+                            {
+                                'component': 'VCol',
+                                'props': {
+                                    'cols': 12,
+                                    'md': 3
+                                },
+                                'content': [
+                                    {
+                                        'component': 'VTextField',
+                                        'props': {
+                                            'model': 'verify_ratio',
+                                            'label': '回读验证比例',
+                                            'placeholder': '0 至 1，默认 0.1',
+                                            'hint': '写入成功后抽样回读验证的比例，1 表示全部验证',
+                                            'persistent-hint': True
+                                        },
+                                    }
+                                ],
+                            },
                         ],
                     },
                     {
@@ -687,7 +758,8 @@ class PlexLocalization(_PluginBase):
             "thread_count": 3,
             "execute_transfer": False,
             "delay": 300,
-            "batch_size": 100
+            "batch_size": 100,
+            "verify_ratio": 0.1
         }
 
     def get_page(self) -> List[dict]:
@@ -727,6 +799,8 @@ class PlexLocalization(_PluginBase):
                 self._scheduler = None
         except Exception as e:
             logger.info(str(e))
+        self.__close_writer()
+        self.__close_localized_store()
 
     def __get_tags(self) -> dict:
         """获取标签信息"""
@@ -962,9 +1036,12 @@ class PlexLocalization(_PluginBase):
         return intersected_libraries if intersected_libraries else None
 
     def __list_rating_keys(self, plex: Plex, library: LibrarySection, type_id: int, is_collection: bool = False,
-                           added_time: Optional[int] = None):
+                           added_time: Optional[int] = None, start_offset: int = 0,
+                           page_info: Optional[Dict[str, Tuple[int, Any]]] = None):
         """
         分页获取媒体项目。返回 ratingKey 列表及 complete/failed/stopped 状态。
+        :param start_offset: 起始分页位置，从断点继续时使用
+        :param page_info: 传入时记录每个 ratingKey 所在分页的起始位置及 updatedAt
         """
         if not library:
             return [], "complete"
@@ -977,7 +1054,7 @@ class PlexLocalization(_PluginBase):
                 endpoint += f"&addedAt>={added_time}"
 
         rating_keys = []
-        offset = 0
+        offset = max(0, int(start_offset or 0))
         previous_page = None
         while True:
             if self._event.is_set():
@@ -1039,6 +1116,10 @@ class PlexLocalization(_PluginBase):
                 return rating_keys, "failed"
 
             rating_keys.extend(page_keys)
+            if page_info is not None:
+                for data in page_items:
+                    if data.get("ratingKey") is not None:
+                        page_info[str(data.get("ratingKey"))] = (offset, data.get("updatedAt"))
             logger.debug(f"媒体库 {library.title} 分页读取完成：offset={offset}，"
                          f"本页 {len(page_keys)} 条，累计 {len(rating_keys)} 条")
 
@@ -1143,7 +1224,12 @@ class PlexLocalization(_PluginBase):
         item = self.__fetch_item(plex=plex, rating_key=rating_key)
         if not item:
             return
-        self.__process_item(plex=plex, item=item)
+        try:
+            self.__process_item(plex=plex, item=item)
+        finally:
+            # 全量扫描期间写入器由扫描共享，扫描结束时统一关闭
+            if not self._scan_progress:
+                self.__close_writer()
 
     def __process_items_batch(self, plex: Plex, rating_keys):
         """
@@ -1176,7 +1262,7 @@ class PlexLocalization(_PluginBase):
         return self.__process_loaded_items(plex=plex, rating_keys=rating_keys, items=items)
 
     def __process_loaded_items(self, plex: Plex, rating_keys: List[str], items: List[dict]) -> Dict[str, int]:
-        """对已读取元数据执行逐条 PUT，并统一回读成功写入。"""
+        """对已读取元数据计算编辑计划，经自适应写入器执行逐条 PUT，并统一回读抽样验证的写入。"""
         result_counts = self.__empty_result_counts()
         items_by_rating_key = {
             str(item.get("ratingKey")): item
@@ -1184,6 +1270,7 @@ class PlexLocalization(_PluginBase):
             if item and item.get("ratingKey") is not None
         }
         pending_verification = []
+        edit_plans = []
 
         for index, rating_key in enumerate(rating_keys):
             if self._event.is_set():
@@ -1205,29 +1292,44 @@ class PlexLocalization(_PluginBase):
 
             if edit_plan is None:
                 result_counts["skipped"] += 1
+                self.__mark_localized(item=item)
                 continue
-
-            if self._event.is_set():
-                result_counts["unprocessed"] += len(rating_keys) - index
-                break
-
-            try:
-                updated = self.__put_item_metadata(
-                    plex=plex,
-                    rating_key=edit_plan["rating_key"],
-                    library_id=edit_plan["library_id"],
-                    params=edit_plan["params"],
-                    expected_sort_title=edit_plan["expected_sort_title"],
-                    expected_tags=edit_plan["expected_tags"]
-                )
-            except Exception as e:
+            edit_plans.append(edit_plan)
+
+        writer = self.__get_writer()
+        written_from = int(time.time())
+        write_results = writer.write(tasks=[
+            functools.partial(
+                self.__put_item_metadata,
+                plex=plex,
+                rating_key=edit_plan["rating_key"],
+                library_id=edit_plan["library_id"],
+                params=edit_plan["params"],
+                expected_sort_title=edit_plan["expected_sort_title"],
+                expected_tags=edit_plan["expected_tags"]
+            )
+            for edit_plan in edit_plans
+        ], stop_event=self._event)
+        written_to = int(time.time())
+        for edit_plan, updated in zip(edit_plans, write_results):
+            if updated is None:
+                result_counts["unprocessed"] += 1
+                continue
+            if isinstance(updated, Exception):
                 result_counts["failed"] += 1
-                logger.error(f"更新元数据异常，ratingKey={rating_key}: {e}", exc_info=True)
+                logger.error(f"更新元数据异常，ratingKey={edit_plan['rating_key']}: {updated}", exc_info=updated)
                 continue
             if not updated:
                 result_counts["failed"] += 1
                 continue
-            pending_verification.append(edit_plan)
+            if writer.should_verify():
+                pending_verification.append(edit_plan)
+                continue
+            # Plex 已明确返回成功且未被抽中验证，直接计为更新成功，并按写入时间段记录本地化完成
+            result_counts["updated"] += 1
+            self.__mark_written(edit_plan=edit_plan, written_from=written_from, written_to=written_to)
+            for message in edit_plan["success_logs"]:
+                logger.info(message)
 
         if not pending_verification:
             return result_counts
@@ -1265,10 +1367,28 @@ class PlexLocalization(_PluginBase):
                 continue
 
             result_counts["updated"] += 1
+            # 写入会刷新 Plex 的 updatedAt，以回读的最终状态为准
+            self.__mark_localized(item=final_items_by_key.get(rating_key))
             for message in plan["success_logs"]:
                 logger.info(message)
         return result_counts
 
+    def __mark_localized(self, item: Optional[dict]):
+        """记录条目本地化完成时的 updatedAt，下次扫描时未变化的条目直接跳过。"""
+        if not item or not self._scan_progress:
+            return
+        self._scan_progress.mark_localized(rating_key=item.get("ratingKey"), updated_at=item.get("updatedAt"))
+
+    def __mark_written(self, edit_plan: dict, written_from: int, written_to: int):
+        """
+        记录未回读验证的写入。写入会刷新 Plex 的 updatedAt 但新值只能回读获得，
+        这里记录写入时间段，下次扫描 updatedAt 落在该时间段内的条目视为本次写入后未变化。
+        """
+        if not self._scan_progress:
+            return
+        self._scan_progress.mark_written(rating_key=edit_plan["rating_key"],
+                                         written_from=written_from, written_to=written_to)
+
     def __process_item(self, plex: Plex, item: dict) -> Optional[bool]:
         """
         处理元数据。返回 True 表示更新成功，False 表示更新失败，None 表示无需处理。
@@ -1300,6 +1420,7 @@ class PlexLocalization(_PluginBase):
         if not item_type:
             return
 
+        engine = self.__get_engine()
         type_id = plexapi.utils.searchType(libtype=item_type)
         title = item.get("title", "")
         locked_fields = [field["name"] for field in item.get("Field") or [] if field.get("locked")]
@@ -1319,7 +1440,7 @@ class PlexLocalization(_PluginBase):
             logger.debug(f"{title}: titleSort is locked, skip")
         else:
             if not current_sort_title or StringUtils.is_chinese(current_sort_title):
-                generated_sort_title = self.__convert_to_pinyin(title)
+                generated_sort_title = engine.sort_title(title)
                 if generated_sort_title != title:
                     expected_sort_title = generated_sort_title
                     sort_title_changed = True
@@ -1341,19 +1462,11 @@ class PlexLocalization(_PluginBase):
                 if tag_type in locked_fields:
                     logger.debug(f"{title}: {tag_type} is locked, skip")
                 else:
-                    target_tags = []
-                    source_tags_to_remove = []
-                    for tag in tag_list:
-                        new_tag = self._tags.get(tag)
-                        if new_tag:
-                            tag_updates.append((tag, new_tag))
-                            source_tags_to_remove.append(tag)
-                        target_tag = new_tag or tag
-                        if target_tag not in target_tags:
-                            target_tags.append(target_tag)
+                    target_tags, source_tags_to_remove, updates = engine.translate_tags(tag_list)
+                    tag_updates.extend(updates)
 
                     if source_tags_to_remove:
-                        expected_tags[tag_type] = target_tags
+                        expected_tags[tag_type] = list(target_tags)
                         edit_params[f"{tag_type}.locked"] = 1 if self._lock else 0
                         for index, target_tag in enumerate(target_tags):
                             edit_params[f"{tag_type}[{index}].tag.tag"] = target_tag
@@ -1389,6 +1502,37 @@ class PlexLocalization(_PluginBase):
             "success_logs": success_logs
         }
 
+    def __get_engine(self) -> LocalizationEngine:
+        """获取本地化引擎，标签配置变化后重建缓存。"""
+        engine = self._engine
+        if engine and engine.tags is self._tags:
+            return engine
+        with self._engine_lock:
+            if not self._engine or self._engine.tags is not self._tags:
+                self._engine = LocalizationEngine(tags=self._tags, convert=self.__convert_to_pinyin,
+                                                  pinyin_cache_size=self._pinyin_cache_size)
+            return self._engine
+
+    def __get_writer(self) -> AdaptiveWriter:
+        """获取元数据写入器，多个批次线程共享同一并发上限。"""
+        with self._engine_lock:
+            if not self._writer:
+                self._writer = AdaptiveWriter(max_limit=self._max_write_concurrency,
+                                              verify_ratio=self._verify_ratio)
+            return self._writer
+
+    def __close_writer(self):
+        """关闭元数据写入器并输出写入统计。"""
+        with self._engine_lock:
+            writer, self._writer = self._writer, None
+        if not writer:
+            return
+        writer.close()
+        stats = writer.stats()
+        logger.info(f"元数据写入统计：成功 {stats['successes']}，失败 {stats['errors']}，"
+                    f"最终并发 {stats['concurrency']}，最高并发 {stats['max_in_flight']}，"
+                    f"降速 {stats['decreases']} 次，基准延迟 {stats['baseline_latency']} 秒")
+
     def __loop_all(self, service_libraries: Dict[str, Dict[int, Any]], thread_count: int = None,
                    added_time: Optional[int] = None):
         """
@@ -1403,59 +1547,108 @@ class PlexLocalization(_PluginBase):
         thread_count = thread_count or 3
         logger.info(f"正在运行中文本地化，线程数：{thread_count}，锁定元数据：{self._lock}")
 
+        progress = self.__load_scan_progress(added_time=added_time)
+        added_time = progress.added_time
+        if progress.resumed:
+            logger.info(f"从上次中断的位置继续本地化，已完成服务：{progress.completed}，"
+                        f"断点：{progress.service} {progress.position or ''}")
+        self._scan_progress = progress
+
         overall_results = {"updated": 0, "failed": 0, "skipped": 0, "unprocessed": 0}
         completed_services = 0
         discovered_items = 0
         failed_services = 0
         stopped = False
 
-        for service_name, libraries in service_libraries.items():
-            if self._event.is_set():
-                stopped = True
-                break
+        try:
+            for service_name, libraries in service_libraries.items():
+                if self._event.is_set():
+                    stopped = True
+                    break
 
-            service = self.service_info(name=service_name)
-            if not service or not service.instance:
-                failed_services += 1
-                logger.warning(f"获取媒体服务器 {service_name} 实例失败，跳过处理")
-                continue
+                if service_name in progress.completed:
+                    completed_services += 1
+                    logger.info(f"媒体服务器 {service_name} 已在上次运行中处理完成，跳过")
+                    continue
 
-            service_start_time = time.time()
-            logger.info(f"开始处理媒体服务器 {service.name}")
+                service = self.service_info(name=service_name)
+                if not service or not service.instance:
+                    failed_services += 1
+                    logger.warning(f"获取媒体服务器 {service_name} 实例失败，跳过处理")
+                    continue
 
-            # 生成所有需要处理的rating keys
-            rating_keys, scan_status = self.__generate_all_rating_keys(
-                plex=service.instance,
-                libraries=libraries,
-                with_collection=added_time is None,
-                added_time=added_time
-            )
-            if scan_status == "stopped":
-                stopped = True
-                break
-            if scan_status != "complete":
-                failed_services += 1
-                logger.warning(f"媒体服务器 {service.name} 枚举不完整，跳过本次处理")
-                continue
-            discovered_items += len(rating_keys)
-
-            # 分批处理rating keys
-            service_results = self.__process_rating_keys_in_batches(
-                plex=service.instance,
-                rating_keys=rating_keys,
-                thread_count=thread_count,
-                batch_size=self._batch_size
-            )
-            for key in overall_results:
-                overall_results[key] += service_results[key]
+                service_start_time = time.time()
+                logger.info(f"开始处理媒体服务器 {service.name}")
+                progress.current_service = service_name
+
+                # 生成所有需要处理的rating keys
+                positions = {}
+                rating_keys, scan_status = self.__generate_all_rating_keys(
+                    plex=service.instance,
+                    libraries=libraries,
+                    with_collection=added_time is None,
+                    added_time=added_time,
+                    checkpoint=progress.checkpoint_for(service_name),
+                    positions=positions
+                )
+                if scan_status == "stopped":
+                    stopped = True
+                    break
+                if scan_status != "complete":
+                    failed_services += 1
+                    logger.warning(f"媒体服务器 {service.name} 枚举不完整，跳过本次处理")
+                    continue
+                discovered_items += len(rating_keys)
+
+                # 跳过自上次本地化后 updatedAt 未变化的条目
+                pending_keys = [
+                    rating_key for rating_key in rating_keys
+                    if not progress.is_unchanged(service=service_name, rating_key=rating_key,
+                                                 updated_at=positions.get(rating_key, {}).get("updated_at"))
+                ]
+                unchanged_count = len(rating_keys) - len(pending_keys)
+                if unchanged_count:
+                    overall_results["skipped"] += unchanged_count
+                    logger.info(f"媒体服务器 {service.name} 共 {unchanged_count} 个条目自上次本地化后未变化，跳过")
+
+                def on_progress(rating_key: str, _service_name=service_name):
+                    """批次按顺序连续完成后推进断点。"""
+                    position = positions.get(rating_key)
+                    if not position:
+                        return
+                    progress.advance(service=_service_name, position={
+                        **{key: value for key, value in position.items() if key != "updated_at"},
+                        "rating_key": rating_key
+                    })
+                    self.__save_scan_progress(progress=progress)
+
+                # 分批处理rating keys
+                service_results = self.__process_rating_keys_in_batches(
+                    plex=service.instance,
+                    rating_keys=pending_keys,
+                    thread_count=thread_count,
+                    batch_size=self._batch_size,
+                    on_progress=on_progress
+                )
+                for key in overall_results:
+                    overall_results[key] += service_results[key]
 
-            service_elapsed_time = time.time() - service_start_time
-            if self._event.is_set():
-                stopped = True
-                logger.warning(f"媒体服务器 {service.name} 处理已停止，耗时 {service_elapsed_time:.2f} 秒")
-                break
-            completed_services += 1
-            logger.info(f"媒体服务器 {service.name} 处理完成，耗时 {service_elapsed_time:.2f} 秒")
+                service_elapsed_time = time.time() - service_start_time
+                if self._event.is_set():
+                    stopped = True
+                    logger.warning(f"媒体服务器 {service.name} 处理已停止，耗时 {service_elapsed_time:.2f} 秒")
+                    break
+                completed_services += 1
+                progress.complete_service(service=service_name)
+                self.__save_scan_progress(progress=progress, force=True)
+                logger.info(f"媒体服务器 {service.name} 处理完成，耗时 {service_elapsed_time:.2f} 秒")
+
+            if not stopped:
+                progress.finish()
+            self.__save_scan_progress(progress=progress, force=True)
+        finally:
+            self._scan_progress = None
+            self.__close_writer()
 
         overall_elapsed_time = time.time() - overall_start_time
         if added_time:
@@ -1475,51 +1668,140 @@ class PlexLocalization(_PluginBase):
         else:
             self.__send_message(title="【Plex中文本地化】", text=message_text)
             logger.info(f"{message_text}，{result_text}")
+        if self._engine:
+            stats = self._engine.stats()
+            logger.debug(f"本地化引擎缓存统计：拼音命中 {stats['pinyin_hits']}，未命中 {stats['pinyin_misses']}，"
+                         f"标签命中 {stats['tag_hits']}，未命中 {stats['tag_misses']}")
+
+    def __localization_signature(self) -> str:
+        """本地化配置签名，标签翻译、锁定选项或插件版本变化后已记录的 updatedAt 失效。"""
+        config = json.dumps({"tags": self._tags, "lock": bool(self._lock), "version": self.plugin_version},
+                            ensure_ascii=False, sort_keys=True)
+        return hashlib.md5(config.encode("utf-8")).hexdigest()
+
+    def __load_scan_progress(self, added_time: Optional[int] = None) -> ScanProgress:
+        """读取扫描断点及条目本地化记录，读取失败时从头扫描。"""
+        checkpoints, localized = None, None
+        try:
+            checkpoints = self.get_data("scan_checkpoint")
+            localized = self.__get_localized_store().load()
+        except Exception as e:
+            logger.warning(f"读取扫描断点失败，将从头开始扫描：{e}")
+        return ScanProgress.load(
+            scope=SCOPE_TRANSFER if added_time else SCOPE_FULL,
+            added_time=added_time,
+            signature=self.__localization_signature(),
+            checkpoints=checkpoints,
+            localized=localized,
+            interval=self._checkpoint_interval
+        )
+
+    def __save_scan_progress(self, progress: ScanProgress, force: bool = False):
+        """按持久化间隔保存扫描断点及条目本地化记录，停止或服务完成时立即保存。"""
+        if not force and not progress.due():
+            return
+        try:
+            data = progress.dump()
+            if data["scan_checkpoint"] is not None:
+                self.save_data("scan_checkpoint", data["scan_checkpoint"])
+            localized = data["localized_items"]
+            if localized is not None:
+                self.__get_localized_store().save(signature=localized["signature"], items=localized["items"])
+        except Exception as e:
+            logger.warning(f"保存扫描断点失败：{e}")
+
+    def __get_localized_store(self) -> LocalizedItemStore:
+        """获取条目本地化记录存储，首次打开时迁移旧版 localized_items 插件数据。"""
+        with self._localized_store_lock:
+            if not self._localized_store:
+                store = LocalizedItemStore(db_path=self.get_data_path() / "localized.db")
+                if store.migrate(lambda: self.get_data("localized_items")):
+                    self.del_data("localized_items")
+                self._localized_store = store
+            return self._localized_store
+
+    def __close_localized_store(self):
+        """关闭条目本地化记录存储，下次使用时重新打开。"""
+        with self._localized_store_lock:
+            if not self._localized_store:
+                return
+            try:
+                self._localized_store.close()
+            except Exception as e:
+                logger.warning(f"关闭本地化记录存储失败：{e}")
+            self._localized_store = None
 
     def __generate_all_rating_keys(self, plex: Plex, libraries, with_collection: bool = True,
-                                   added_time: Optional[int] = None):
+                                   added_time: Optional[int] = None, checkpoint: Optional[dict] = None,
+                                   positions: Optional[Dict[str, dict]] = None):
         """
         生成所有库中唯一且保持首次发现顺序的 ratingKey 列表。
+        :param checkpoint: 扫描断点，传入时跳过断点之前的媒体库和类型，并从断点所在分页继续
+        :param positions: 传入时记录每个 ratingKey 所在的媒体库、类型、分页位置及 updatedAt
         """
         rating_keys = []
         seen_keys = set()
 
-        def append_unique(keys):
+        def append_unique(keys, segment, page_info):
             """保留跨类型和合集首次出现的 ratingKey。"""
             for rating_key in keys:
                 if rating_key not in seen_keys:
                     seen_keys.add(rating_key)
                     rating_keys.append(rating_key)
+                    if positions is not None:
+                        offset, updated_at = page_info.get(rating_key, (0, None))
+                        positions[rating_key] = {**segment, "offset": offset, "updated_at": updated_at}
 
+        segments = []
         for library in libraries.values():
             library_types = TYPES.get(library.type, [])
             for type_id in library_types:
-                keys, status = self.__list_rating_keys(
-                    plex=plex,
-                    library=library,
-                    type_id=type_id,
-                    added_time=added_time
-                )
-                if status != "complete":
-                    return [], status
-                append_unique(keys)
-
+                segments.append((library, type_id, False))
             if with_collection and library_types:
-                keys, status = self.__list_rating_keys(
-                    plex=plex,
-                    library=library,
-                    type_id=library_types[0],
-                    is_collection=True
-                )
-                if status != "complete":
-                    return [], status
-                append_unique(keys)
+                segments.append((library, library_types[0], True))
+
+        resume_index = None
+        if checkpoint:
+            resume_index = next((index for index, (library, type_id, is_collection) in enumerate(segments)
+                                 if str(library.key) == str(checkpoint.get("library"))
+                                 and type_id == checkpoint.get("type")
+                                 and is_collection == bool(checkpoint.get("collection"))), None)
+            if resume_index is None:
+                logger.info(f"扫描断点 {checkpoint} 已不在本次处理范围内，从头开始扫描")
+
+        for index, (library, type_id, is_collection) in enumerate(segments):
+            if resume_index is not None and index < resume_index:
+                continue
+            resuming = index == resume_index
+            page_info = {}
+            keys, status = self.__list_rating_keys(
+                plex=plex,
+                library=library,
+                type_id=type_id,
+                is_collection=is_collection,
+                added_time=None if is_collection else added_time,
+                start_offset=checkpoint.get("offset", 0) if resuming else 0,
+                page_info=page_info
+            )
+            if status != "complete":
+                return [], status
+            if resuming:
+                # 断点所在分页中已处理的条目不再重复处理；条目位置变化未命中时由 updatedAt 兜底
+                last_key = checkpoint.get("rating_key")
+                if last_key in keys:
+                    keys = keys[keys.index(last_key) + 1:]
+                logger.info(f"从断点继续扫描 <{library.title}>，offset={checkpoint.get('offset', 0)}，"
+                            f"剩余 {len(keys)} 个条目")
+            append_unique(keys, {"library": str(library.key), "type": type_id, "collection": is_collection},
+                          page_info)
 
         return rating_keys, "complete"
 
-    def __process_rating_keys_in_batches(self, plex: Plex, rating_keys, thread_count, batch_size=100):
+    def __process_rating_keys_in_batches(self, plex: Plex, rating_keys, thread_count, batch_size=100,
+                                         on_progress: Optional[Callable[[str], None]] = None):
         """
         有界提交批次并汇总所有 ratingKey 的终态。
+        :param on_progress: 前序批次全部终结时回调，参数为已连续处理完成的最后一个 ratingKey
         """
         total_keys_count = len(rating_keys)
         total_batches = (total_keys_count + batch_size - 1) // batch_size
@@ -1532,6 +1814,9 @@ class PlexLocalization(_PluginBase):
         total_results = {"updated": 0, "failed": 0, "skipped": 0, "unprocessed": 0}
         next_start = 0
         max_pending = thread_count * 2
+        # 已终结但尚未连续的批次，以及连续终结的批次数
+        finished_batches = set()
+        finished_prefix = 0
 
         def collect_done(done_futures):
             """汇总已终结 Future，异常批次按失败处理。"""
@@ -1546,11 +1831,24 @@ class PlexLocalization(_PluginBase):
                     completed_batches += 1
                     for key in total_results:
                         total_results[key] += batch_results[key]
+                    if not batch_results["unprocessed"]:
+                        finished_batches.add(batch_index)
                 except Exception as e:
                     failed_batches += 1
                     total_results["failed"] += len(batch_keys)
+                    finished_batches.add(batch_index)
                     logger.error(f"第{batch_index + 1}批次处理过程中发生错误: {e}", exc_info=True)
 
+        def advance_progress():
+            """批次乱序完成，只有前序批次全部终结后才推进断点。"""
+            nonlocal finished_prefix
+            previous_prefix = finished_prefix
+            while finished_prefix in finished_batches:
+                finished_batches.discard(finished_prefix)
+                finished_prefix += 1
+            if on_progress and finished_prefix > previous_prefix:
+                on_progress(rating_keys[min(finished_prefix * batch_size, total_keys_count) - 1])
+
         with concurrent.futures.ThreadPoolExecutor(max_workers=thread_count) as executor:
             while next_start < total_keys_count or pending:
                 while next_start < total_keys_count and len(pending) < max_pending \
@@ -1574,6 +1872,7 @@ class PlexLocalization(_PluginBase):
                     return_when=concurrent.futures.FIRST_COMPLETED
                 )
                 collect_done(done)
+                advance_progress()
 
             if next_start < total_keys_count:
                 total_results["unprocessed"] += total_keys_count - next_start
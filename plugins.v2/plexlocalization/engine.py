@@ -0,0 +1,91 @@
+"""
+engine.py
+
+这个模块定义了本地化引擎 `LocalizationEngine`，以有界 LRU 缓存标题的拼音排序结果，并将标签翻译预先整理为翻译表，
+同一标签组合只计算一次翻译结果，剧集、多版本电影等标题和标签大量重复时无需逐条重新计算
+"""
+from functools import lru_cache
+from typing import Callable, Dict, Iterable, List, Tuple
+
+# 标签翻译结果：(目标标签, 需要移除的原标签, (原标签, 新标签) 翻译记录)
+TagTranslation = Tuple[Tuple[str, ...], Tuple[str, ...], Tuple[Tuple[str, str], ...]]
+
+
+class LocalizationEngine:
+    """
+    本地化引擎
+    拼音转换和标签翻译均为纯计算，缓存可在多个工作线程之间共享
+    """
+
+    def __init__(self, tags: Dict[str, str], convert: Callable[[str], str], pinyin_cache_size: int = 10000,
+                 tag_cache_size: int = 4096):
+        """
+        :param tags: 标签翻译配置，原标签 -> 中文标签
+        :param convert: 标题转换为拼音排序标题的函数
+        :param pinyin_cache_size: 拼音缓存的最大条目数
+        :param tag_cache_size: 标签组合缓存的最大条目数
+        """
+        self.tags = tags
+        # 预计算的翻译表，忽略翻译为空的配置项
+        self._table: Dict[str, str] = {source: target for source, target in (tags or {}).items() if target}
+        self._convert = convert
+        self._sort_title = lru_cache(maxsize=pinyin_cache_size)(self.__convert)
+        self._translate_tags = lru_cache(maxsize=tag_cache_size)(self.__translate)
+
+    def __convert(self, text: str) -> str:
+        """
+        转换拼音排序标题
+        """
+        return self._convert(text)
+
+    def __translate(self, tags: Tuple[str, ...]) -> TagTranslation:
+        """
+        按翻译表翻译一组标签，翻译后重复的标签只保留首次出现
+        """
+        target_tags: List[str] = []
+        source_tags_to_remove: List[str] = []
+        tag_updates: List[Tuple[str, str]] = []
+        for tag in tags:
+            new_tag = self._table.get(tag)
+            if new_tag:
+                tag_updates.append((tag, new_tag))
+                source_tags_to_remove.append(tag)
+            target_tag = new_tag or tag
+            if target_tag not in target_tags:
+                target_tags.append(target_tag)
+        return tuple(target_tags), tuple(source_tags_to_remove), tuple(tag_updates)
+
+    def sort_title(self, title: str) -> str:
+        """
+        获取标题的拼音排序标题
+        """
+        return self._sort_title(title)
+
+    def translate_tags(self, tags: Iterable[str]) -> TagTranslation:
+        """
+        翻译一组标签
+        :return: (目标标签, 需要移除的原标签, (原标签, 新标签) 翻译记录)
+        """
+        return self._translate_tags(tuple(tags))
+
+    def stats(self) -> Dict[str, int]:
+        """
+        缓存命中统计
+        """
+        pinyin = self._sort_title.cache_info()
+        tag = self._translate_tags.cache_info()
+        return {
+            "pinyin_hits": pinyin.hits,
+            "pinyin_misses": pinyin.misses,
+            "pinyin_size": pinyin.currsize,
+            "tag_hits": tag.hits,
+            "tag_misses": tag.misses,
+            "tag_size": tag.currsize
+        }
+
+    def clear(self):
+        """
+        清空缓存及命中统计
+        """
+        self._sort_title.cache_clear()
+        self._translate_tags.cache_clear()
@@ -0,0 +1,232 @@
+"""
+progress.py
+
+这个模块定义了扫描进度 `ScanProgress`，记录全量扫描的断点（媒体服务器、媒体库、类型、分页位置及最后处理的 ratingKey）
+以及每个条目最近一次本地化时的 updatedAt（未回读验证的写入记录写入时间段），重启后从断点继续扫描，并跳过自上次本地化后未变化的条目
+"""
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+# 断点范围：全量扫描与入库后扫描分别保存断点，互不覆盖
+SCOPE_FULL = "full"
+SCOPE_TRANSFER = "transfer"
+# 未回读验证的写入按写入时间段匹配 updatedAt，允许媒体服务器与本机存在的时钟偏差（秒）
+WRITTEN_CLOCK_TOLERANCE = 60
+
+
+class ScanProgress:
+    """
+    扫描进度
+    断点只在批次按顺序连续完成后推进，保证断点之前的条目都已处理；条目 updatedAt 由工作线程记录
+    """
+
+    def __init__(self, scope: str, added_time: Optional[int] = None, signature: Optional[str] = None,
+                 checkpoints: Optional[Dict[str, dict]] = None, localized: Optional[Dict[str, dict]] = None,
+                 interval: float = 30.0, clock: Callable[[], float] = time.monotonic):
+        """
+        :param scope: 断点范围，full 或 transfer
+        :param added_time: 入库后扫描的起始入库时间，全量扫描为 None
+        :param signature: 本地化配置签名，配置变化后已记录的 updatedAt 全部失效
+        :param checkpoints: 已保存的各范围断点
+        :param localized: 已保存的条目 updatedAt，媒体服务器 -> ratingKey -> updatedAt
+        :param interval: 持久化间隔（秒）
+        :param clock: 时钟函数，便于测试替换
+        """
+        self.scope = scope
+        self.added_time = added_time
+        self.signature = signature
+        self.interval = interval
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._checkpoints: Dict[str, dict] = dict(checkpoints or {})
+        self._localized: Dict[str, Dict[str, Any]] = {service: dict(items)
+                                                      for service, items in (localized or {}).items()}
+        # 自上次持久化后变化的条目记录，媒体服务器 -> ratingKey -> 记录
+        self._localized_changes: Dict[str, Dict[str, Any]] = {}
+        self._checkpoint_dirty = False
+        self._last_save = clock()
+        # 扫描是否已完整结束
+        self._finished = False
+        # 当前正在处理的媒体服务器
+        self.current_service: Optional[str] = None
+        # 已完整处理的媒体服务器
+        self.completed: List[str] = []
+        # 断点所在的媒体服务器及位置
+        self.service: Optional[str] = None
+        self.position: Optional[dict] = None
+        self.__restore()
+
+    @classmethod
+    def load(cls, scope: str, added_time: Optional[int], signature: str, checkpoints: Any, localized: Any,
+             **kwargs) -> "ScanProgress":
+        """
+        从插件数据恢复扫描进度，数据格式不正确或配置签名变化时丢弃对应数据
+        :param checkpoints: scan_checkpoint 插件数据
+        :param localized: localized_items 插件数据
+        """
+        checkpoints = checkpoints if isinstance(checkpoints, dict) else {}
+        localized = localized if isinstance(localized, dict) else {}
+        if localized.get("signature") != signature:
+            # 本地化配置变化后，断点之前的条目也需要按新配置重新处理
+            checkpoints = {key: value for key, value in checkpoints.items() if key != scope}
+            localized = {}
+        items = localized.get("items")
+        return cls(scope=scope, added_time=added_time, signature=signature, checkpoints=checkpoints,
+                   localized=items if isinstance(items, dict) else {}, **kwargs)
+
+    def __restore(self):
+        """
+        恢复当前范围的断点
+        入库后扫描的入库时间不一致时取更早的时间，分页位置随查询条件变化而失效，只能从头扫描
+        """
+        checkpoint = self._checkpoints.get(self.scope)
+        if not isinstance(checkpoint, dict):
+            return
+        if self.scope == SCOPE_TRANSFER:
+            stored_time = checkpoint.get("added_time")
+            if stored_time and self.added_time and stored_time != self.added_time:
+                self.added_time = min(stored_time, self.added_time)
+                self._checkpoint_dirty = True
+                return
+            self.added_time = self.added_time or stored_time
+        completed = checkpoint.get("completed")
+        self.completed = list(completed) if isinstance(completed, list) else []
+        position = checkpoint.get("position")
+        if checkpoint.get("service") and isinstance(position, dict):
+            self.service = checkpoint.get("service")
+            self.position = dict(position)
+
+    @property
+    def resumed(self) -> bool:
+        """
+        是否从上次中断的位置继续
+        """
+        return bool(self.completed or self.position)
+
+    def checkpoint_for(self, service: str) -> Optional[dict]:
+        """
+        获取指定媒体服务器的断点位置
+        """
+        if self.service != service or not self.position:
+            return None
+        return dict(self.position)
+
+    def is_unchanged(self, service: str, rating_key: str, updated_at: Any) -> bool:
+        """
+        条目自上次本地化后是否未变化
+        """
+        if updated_at is None:
+            return False
+        with self._lock:
+            recorded = self._localized.get(service, {}).get(rating_key)
+        if isinstance(recorded, dict):
+            return self.__within_written(recorded=recorded, updated_at=updated_at)
+        return recorded == updated_at
+
+    @staticmethod
+    def __within_written(recorded: dict, updated_at: Any) -> bool:
+        """
+        updatedAt 是否落在记录的写入时间段内
+        """
+        try:
+            updated_at = int(updated_at)
+            written_from, written_to = int(recorded["written_from"]), int(recorded["written_to"])
+        except (KeyError, TypeError, ValueError):
+            return False
+        return written_from - WRITTEN_CLOCK_TOLERANCE <= updated_at <= written_to + WRITTEN_CLOCK_TOLERANCE
+
+    def mark_localized(self, rating_key: str, updated_at: Any):
+        """
+        记录当前媒体服务器中条目本地化完成时的 updatedAt
+        """
+        if not self.current_service or rating_key is None or updated_at is None:
+            return
+        with self._lock:
+            items = self._localized.setdefault(self.current_service, {})
+            if items.get(str(rating_key)) != updated_at:
+                self.__record(rating_key=str(rating_key), value=updated_at)
+
+    def mark_written(self, rating_key: str, written_from: int, written_to: int):
+        """
+        记录当前媒体服务器中写入成功但未回读验证的条目，保存写入时间段代替 updatedAt
+        """
+        if not self.current_service or rating_key is None:
+            return
+        with self._lock:
+            self.__record(rating_key=str(rating_key),
+                          value={"written_from": int(written_from), "written_to": int(written_to)})
+
+    def __record(self, rating_key: str, value: Any):
+        """
+        在持有锁时记录当前媒体服务器中条目的本地化记录，并加入待持久化的变化
+        """
+        self._localized.setdefault(self.current_service, {})[rating_key] = value
+        self._localized_changes.setdefault(self.current_service, {})[rating_key] = value
+
+    def advance(self, service: str, position: dict):
+        """
+        推进断点
+        :param position: library、type、collection、offset、rating_key
+        """
+        with self._lock:
+            self.service = service
+            self.position = dict(position)
+            self._checkpoint_dirty = True
+
+    def complete_service(self, service: str):
+        """
+        标记媒体服务器已完整处理，清除其断点位置
+        """
+        with self._lock:
+            if service not in self.completed:
+                self.completed.append(service)
+            if self.service == service:
+                self.service = None
+                self.position = None
+            self._checkpoint_dirty = True
+
+    def finish(self):
+        """
+        扫描完整结束，移除当前范围的断点
+        """
+        with self._lock:
+            self.completed = []
+            self.service = None
+            self.position = None
+            self._finished = True
+            self._checkpoint_dirty = True
+
+    def due(self) -> bool:
+        """
+        距上次持久化是否已超过持久化间隔
+        """
+        return (self._checkpoint_dirty or bool(self._localized_changes)) \
+            and self._clock() - self._last_save >= self.interval
+
+    def dump(self) -> Dict[str, Optional[dict]]:
+        """
+        导出需要持久化的数据，未变化的数据为 None
+        :return: {"scan_checkpoint": 全部断点, "localized_items": 本地化配置签名及自上次导出后变化的条目记录}
+        """
+        with self._lock:
+            checkpoints = None
+            if self._checkpoint_dirty:
+                if self._finished:
+                    self._checkpoints.pop(self.scope, None)
+                else:
+                    self._checkpoints[self.scope] = {
+                        "added_time": self.added_time,
+                        "completed": list(self.completed),
+                        "service": self.service,
+                        "position": dict(self.position) if self.position else None,
+                        "time": int(time.time())
+                    }
+                checkpoints = dict(self._checkpoints)
+            localized = None
+            if self._localized_changes:
+                localized = {"signature": self.signature, "items": self._localized_changes}
+                self._localized_changes = {}
+            self._checkpoint_dirty = False
+            self._last_save = self._clock()
+            return {"scan_checkpoint": checkpoints, "localized_items": localized}
@@ -0,0 +1,94 @@
+"""
+store.py
+
+这个模块定义了条目本地化记录存储 `LocalizedItemStore`，按媒体服务器和 ratingKey 逐行保存条目最近一次本地化时的 updatedAt
+（或未回读验证的写入时间段），每次只写入发生变化的条目，避免大媒体库每个持久化间隔都整体重写插件数据
+"""
+import json
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Union
+
+
+class LocalizedItemStore:
+    """
+    条目本地化记录存储
+    本地化配置签名保存在 meta 表中，以新签名写入时清空旧签名下的全部记录
+    """
+
+    def __init__(self, db_path: Union[str, Path]):
+        """
+        :param db_path: SQLite 数据库文件路径，传入 ":memory:" 时仅保存在内存中
+        """
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(str(db_path), check_same_thread=False)
+        with self._conn:
+            self._conn.execute("CREATE TABLE IF NOT EXISTS items ("
+                               "service TEXT NOT NULL, "
+                               "rating_key TEXT NOT NULL, "
+                               "value TEXT NOT NULL, "
+                               "PRIMARY KEY (service, rating_key))")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+
+    def __meta(self, key: str) -> Optional[str]:
+        """
+        读取 meta 值
+        """
+        row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def load(self) -> Dict[str, Any]:
+        """
+        读取全部记录
+        :return: 与旧版 localized_items 插件数据一致的结构 {"signature": ..., "items": 媒体服务器 -> ratingKey -> 记录}
+        """
+        with self._lock:
+            items: Dict[str, Dict[str, Any]] = {}
+            for service, rating_key, value in self._conn.execute("SELECT service, rating_key, value FROM items"):
+                items.setdefault(service, {})[rating_key] = json.loads(value)
+            return {"signature": self.__meta("signature"), "items": items}
+
+    def save(self, signature: Optional[str], items: Dict[str, Dict[str, Any]]) -> int:
+        """
+        在单个事务中写入变化的记录，签名与已保存的不一致时先清空旧记录
+        :param items: 媒体服务器 -> ratingKey -> 记录
+        :return: 本次写入的记录数
+        """
+        rows = [(service, str(rating_key), json.dumps(value, ensure_ascii=False))
+                for service, service_items in items.items() for rating_key, value in service_items.items()]
+        with self._lock, self._conn:
+            if self.__meta("signature") != signature:
+                self._conn.execute("DELETE FROM items")
+                self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('signature', ?)",
+                                   (signature,))
+            if rows:
+                self._conn.executemany("INSERT OR REPLACE INTO items (service, rating_key, value) "
+                                       "VALUES (?, ?, ?)", rows)
+            return len(rows)
+
+    def migrate(self, get_data: Callable[[], Any]) -> int:
+        """
+        从旧版 localized_items 插件数据迁移记录，仅执行一次
+        :param get_data: 读取旧版插件数据的函数
+        :return: 迁移的记录数，已迁移过时返回 0
+        """
+        with self._lock:
+            if self.__meta("migrated"):
+                return 0
+            legacy = get_data()
+            migrated = 0
+            if isinstance(legacy, dict) and isinstance(legacy.get("items"), dict):
+                migrated = self.save(signature=legacy.get("signature"),
+                                     items={service: items for service, items in legacy["items"].items()
+                                            if isinstance(items, dict)})
+            with self._conn:
+                self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('migrated', '1')")
+            return migrated
+
+    def close(self):
+        """
+        关闭数据库连接
+        """
+        with self._lock:
+            self._conn.close()
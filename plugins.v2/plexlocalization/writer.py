@@ -0,0 +1,175 @@
+"""
+writer.py
+
+这个模块定义了自适应元数据写入器 `AdaptiveWriter`，按 AIMD（加性增、乘性减）方式根据 Plex 写入响应延迟和错误调整同时进行的
+PUT 数量：响应正常时逐步提高并发，延迟明显升高或出现错误时将并发减半，避免固定线程数过高导致请求超时
+"""
+import concurrent.futures
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Union
+
+# 单次写入结果：True 成功，False 失败，异常对象表示写入时抛出异常，None 表示停止后未开始
+WriteResult = Optional[Union[bool, Exception]]
+
+
+class AdaptiveWriter:
+    """
+    自适应写入器
+    多个批次线程共享同一写入器，同时进行的 PUT 总数不超过当前并发上限；初始为慢启动，每次成功并发加 1，
+    首次拥塞后进入拥塞避免，每个窗口并发加 1
+    """
+
+    def __init__(self, max_limit: int = 8, min_limit: int = 1, initial_limit: int = 1,
+                 latency_tolerance: float = 2.0, latency_floor: float = 0.05, verify_ratio: float = 1.0,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        :param max_limit: 并发上限的最大值
+        :param min_limit: 并发上限的最小值
+        :param initial_limit: 初始并发上限
+        :param latency_tolerance: 延迟超过基准延迟的倍数时视为拥塞
+        :param latency_floor: 拥塞判断的最低延迟（秒），避免低延迟时的正常抖动触发降速
+        :param verify_ratio: 写入成功后需要回读验证的比例，取值 0 至 1
+        :param clock: 时钟函数，便于测试替换
+        """
+        self.max_limit = max(1, int(max_limit))
+        self.min_limit = max(1, min(int(min_limit), self.max_limit))
+        self.limit = float(max(self.min_limit, min(int(initial_limit), self.max_limit)))
+        self.latency_tolerance = latency_tolerance
+        self.latency_floor = latency_floor
+        self.verify_ratio = max(0.0, min(float(verify_ratio), 1.0))
+        self._clock = clock
+        self._condition = threading.Condition()
+        self._in_flight = 0
+        # 基准延迟，取近期最低延迟并缓慢上浮，适应 Plex 整体变慢的情况
+        self._baseline: Optional[float] = None
+        self._slow_start = True
+        # 降速后需忽略的完成次数，这些请求在降速前已发出，不应再次触发降速
+        self._decrease_guard = 0
+        self._verify_credit = 0.0
+        self._executor: Optional[concurrent.futures.ThreadPoolExecutor] = None
+        self.successes = 0
+        self.errors = 0
+        self.decreases = 0
+        self.max_in_flight = 0
+
+    @property
+    def concurrency(self) -> int:
+        """
+        当前并发上限
+        """
+        return max(self.min_limit, int(self.limit))
+
+    def __get_executor(self) -> concurrent.futures.ThreadPoolExecutor:
+        """
+        获取写入线程池，线程数为并发上限的最大值
+        """
+        with self._condition:
+            if not self._executor:
+                self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=self.max_limit,
+                                                                       thread_name_prefix="plexlocalization-writer")
+            return self._executor
+
+    def write(self, tasks: List[Callable[[], bool]], stop_event: Optional[threading.Event] = None) \
+            -> List[WriteResult]:
+        """
+        按当前并发上限依次发出写入，等待全部完成
+        :param tasks: 写入函数列表，返回是否成功
+        :param stop_event: 停止事件，设置后不再发出新的写入
+        :return: 与 tasks 一一对应的写入结果
+        """
+        results: List[WriteResult] = [None] * len(tasks)
+        if not tasks:
+            return results
+        executor = self.__get_executor()
+        futures: Dict[concurrent.futures.Future, int] = {}
+        for index, task in enumerate(tasks):
+            with self._condition:
+                while self._in_flight >= self.concurrency and not (stop_event and stop_event.is_set()):
+                    self._condition.wait(timeout=0.5)
+                if stop_event and stop_event.is_set():
+                    break
+                self._in_flight += 1
+                self.max_in_flight = max(self.max_in_flight, self._in_flight)
+            futures[executor.submit(self.__run, task)] = index
+        for future in concurrent.futures.as_completed(futures):
+            results[futures[future]] = future.result()
+        return results
+
+    def __run(self, task: Callable[[], bool]) -> WriteResult:
+        """
+        执行单次写入并记录延迟
+        """
+        start = self._clock()
+        success = False
+        try:
+            success = bool(task())
+            return success
+        except Exception as e:
+            return e
+        finally:
+            self.__on_complete(latency=self._clock() - start, success=success)
+
+    def __on_complete(self, latency: float, success: bool):
+        """
+        根据写入延迟和结果调整并发上限
+        """
+        with self._condition:
+            self._in_flight -= 1
+            if success:
+                self.successes += 1
+                self._baseline = latency if self._baseline is None \
+                    else min(latency, self._baseline * 1.01)
+            else:
+                self.errors += 1
+
+            congested = not success or latency > max(self._baseline * self.latency_tolerance, self.latency_floor)
+            guarded = self._decrease_guard > 0
+            if guarded:
+                self._decrease_guard -= 1
+            if congested:
+                if not guarded:
+                    self.limit = max(float(self.min_limit), self.limit / 2)
+                    self._slow_start = False
+                    self._decrease_guard = self._in_flight
+                    self.decreases += 1
+            elif self._slow_start:
+                self.limit = min(float(self.max_limit), self.limit + 1)
+            else:
+                self.limit = min(float(self.max_limit), self.limit + 1 / self.limit)
+            self._condition.notify_all()
+
+    def should_verify(self) -> bool:
+        """
+        按验证比例均匀抽样，判断本次成功写入是否需要回读验证
+        """
+        with self._condition:
+            self._verify_credit += self.verify_ratio
+            # 容忍浮点累加误差，保证抽样数量与比例一致
+            if self._verify_credit >= 1 - 1e-9:
+                self._verify_credit -= 1
+                return True
+            return False
+
+    def stats(self) -> Dict[str, Union[int, float]]:
+        """
+        写入统计
+        """
+        with self._condition:
+            return {
+                "concurrency": self.concurrency,
+                "max_in_flight": self.max_in_flight,
+                "successes": self.successes,
+                "errors": self.errors,
+                "decreases": self.decreases,
+                "baseline_latency": round(self._baseline or 0, 4)
+            }
+
+    def close(self):
+        """
+        关闭写入线程池
+        """
+        with self._condition:
+            executor, self._executor = self._executor, None
+        if executor:
+            executor.shutdown(wait=True)
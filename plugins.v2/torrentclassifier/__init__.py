@@ -1,5 +1,4 @@
 import io
-import re
 import threading
 import time
 from datetime import datetime, timedelta
@@ -18,6 +17,9 @@ from app.modules.qbittorrent import Qbittorrent
 from app.modules.transmission import Transmission
 from app.plugins import _PluginBase
 from app.plugins.torrentclassifier.classifierconfig import ClassifierConfig, TorrentFilter, TorrentTarget
+from app.plugins.torrentclassifier.classifierdispatcher import ActionDispatcher, DEFAULT_BATCH_SIZE
+from app.plugins.torrentclassifier.classifierengine import ClassifierEngine, CompiledRule, TorrentState, \
+    get_configs_version
 from app.schemas import NotificationType, ServiceInfo
 
 lock = threading.Lock()
@@ -57,6 +59,12 @@ class TorrentClassifier(_PluginBase):
     _apply_all_rules = False
     # 分类配置
     _classifier_configs = None
+    # 规则引擎
+    _classifier_engine = None
+    # 单次调用的最大种子数量
+    _batch_size = DEFAULT_BATCH_SIZE
+    # 仅预览整理计划
+    _dry_run = False
     # 下载器
     _downloader = None
     # 退出事件
@@ -81,7 +89,13 @@ class TorrentClassifier(_PluginBase):
         self._cron = config.get("cron", None)
         self._downloader = config.get("downloader", None)
         self._apply_all_rules = config.get("apply_all_rules", False)
+        self._dry_run = config.get("dry_run", False)
+        try:
+            self._batch_size = max(int(config.get("batch_size") or DEFAULT_BATCH_SIZE), 1)
+        except ValueError:
+            self._batch_size = DEFAULT_BATCH_SIZE
         self._classifier_configs = self.__load_configs(config.get("classifier_configs", None))
+        self._classifier_engine = self.__get_classifier_engine(self._classifier_configs)
 
         if not self._downloader:
             self.__log_and_notify_error("没有配置下载器")
@@ -279,6 +293,49 @@ class TorrentClassifier(_PluginBase):
                             }
                         ]
                     },
+                    {
+                        'component': 'VRow',
+                        'content': [
+                            {
+                                'component': 'VCol',
+                                'props': {
+                                    'cols': 12,
+                                    'md': 6
+                                },
+                                'content': [
+                                    {
+                                        'component': 'VTextField',
+                                        'props': {
+                                            'model': 'batch_size',
+                                            'label': '批量大小',
+                                            'type': 'number',
+                                            "min": "1",
+                                            'hint': '目标相同的种子合并调用，单次调用的最大种子数量',
+                                            'persistent-hint': True
+                                        }
+                                    }
+                                ]
+                            },
+                            {
+                                'component': 'VCol',
+                                'props': {
+                                    'cols': 12,
+                                    'md': 6
+                                },
+                                'content': [
+                                    {
+                                        'component': 'VSwitch',
+                                        'props': {
+                                            'model': 'dry_run',
+                                            'label': '仅预览',
+                                            'hint': '只输出计划的调用，不实际修改种子',
+                                            'persistent-hint': True
+                                        }
+                                    }
+                                ]
+                            }
+                        ]
+                    },
                     {
                         'component': 'VRow',
                         'content': [
@@ -328,6 +385,8 @@ class TorrentClassifier(_PluginBase):
             "enabled": False,
             "notify": True,
             "only_once": False,
+            "batch_size": DEFAULT_BATCH_SIZE,
+            "dry_run": False,
             "classifier_configs": self.__get_demo_config()
         }
 
@@ -387,17 +446,20 @@ class TorrentClassifier(_PluginBase):
                 self.__log_and_notify_error("连接下载器出错，请检查连接")
                 return
 
-            if not self._classifier_configs:
+            if not self._classifier_configs or not self._classifier_engine:
                 logger.info("没有找到整理规则，跳过处理")
                 return
 
+            # 每次运行只获取一次种子快照，规则整理后直接更新快照中的种子状态
+            torrent_states = self.__get_torrent_states(downloader=downloader)
+            if not torrent_states:
+                return
+
             # 根据配置选择应用所有规则还是第一个匹配的规则
             if self._apply_all_rules:
-                self.__apply_rules_to_each_seeds(downloader=downloader)
+                self.__apply_rules_to_each_seeds(downloader=downloader, torrent_states=torrent_states)
             else:
-                torrents = self.__get_torrents(downloader=downloader)
-                torrent_datas = self.__get_all_hashes_and_torrents(torrents)
-                self.__apply_first_matching_rule_to_torrents(torrent_datas=torrent_datas)
+                self.__apply_first_matching_rule_to_torrents(downloader=downloader, torrent_states=torrent_states)
 
     def __get_torrents(self, downloader: Any) -> Optional[List[Any]]:
         """
@@ -414,57 +476,90 @@ class TorrentClassifier(_PluginBase):
 
         return torrents
 
-    def __apply_rules_to_each_seeds(self, downloader: Any):
+    def __get_torrent_states(self, downloader: Any) -> Optional[List[TorrentState]]:
         """
-        对每个种子应用所有配置的规则
+        获取当前所有种子的快照
         """
-        summary_messages = []
-        # 遍历所有规则并记录序号
-        for index, config in enumerate(self._classifier_configs, start=1):
-            torrents = self.__get_torrents(downloader=downloader)
-            if not torrents:
+        torrents = self.__get_torrents(downloader=downloader)
+        if not torrents:
+            return None
+
+        torrent_states = []
+        for torrent in torrents:
+            try:
+                state = TorrentState.from_qbittorrent(torrent)
+            except Exception as e:
+                logger.error(f"获取种子信息失败，错误：{str(e)}")
                 continue
+            if state:
+                torrent_states.append(state)
+        logger.info(f"已从下载器获取到种子共 {len(torrent_states)} 个")
+        return torrent_states
 
-            logger.info(f"正在准备执行规则 {index}")
+    def __get_classifier_engine(self, configs: List[ClassifierConfig]) -> Optional[ClassifierEngine]:
+        """
+        获取规则引擎，规则内容没有变化时复用已编译的规则
+        """
+        if not configs:
+            return None
+        if self._classifier_engine and self._classifier_engine.version == get_configs_version(configs):
+            return self._classifier_engine
+        engine = ClassifierEngine(configs)
+        logger.info(f"已编译整理规则共 {len(engine.rules)} 条")
+        return engine
 
-            torrent_datas = self.__get_all_hashes_and_torrents(torrents)
-            classifier_torrents = self.__get_should_classifier_torrents(torrent_datas=torrent_datas, config=config)
-            result = self.__torrent_classifier_for_qb(classifier_torrents=classifier_torrents)
+    def __apply_rules_to_each_seeds(self, downloader: Any, torrent_states: List[TorrentState]):
+        """
+        对每个种子应用所有配置的规则
+        """
+        summary_messages = []
+        # 遍历所有规则并记录序号，前一条规则整理后的种子状态会参与后续规则的匹配
+        for rule, classifier_torrents in self._classifier_engine.iter_rule_matches(torrent_states):
+            logger.info(f"正在准备执行规则 {rule.index}")
+
+            result = self.__torrent_classifier_for_qb(downloader=downloader, classifier_torrents=classifier_torrents)
             if not result:
                 continue
-            success_count, failed_count, success_titles, failed_titles = result
 
             # 构建当前规则的成功和失败消息
-            rule_summary_parts = []
-            if success_count > 0:
-                success_details = "\n".join(success_titles)
-                rule_summary_parts.append(f"成功整理 {success_count} 个种子\n{success_details}")
-            if failed_count > 0:
-                failed_details = "\n".join(failed_titles)
-                rule_summary_parts.append(f"失败整理 {failed_count} 个种子，详细请查看日志\n{failed_details}")
-
-            rule_summary_message = "\n\n".join(rule_summary_parts)
-            summary_messages.append(f"规则 {index} 的执行结果:\n{rule_summary_message}")
+            rule_summary_message = self.__build_summary_message(result=result)
+            summary_messages.append(f"规则 {rule.index} 的执行结果:\n{rule_summary_message}")
             summary_messages.append("————————————————————")
 
         if summary_messages:
             # 发送所有规则的汇总消息
             final_summary_message = "\n".join(summary_messages)
-            self.__send_message(title="【种子规则分类整理汇总】", text=final_summary_message)
+            title = "【种子规则分类整理预览】" if self._dry_run else "【种子规则分类整理汇总】"
+            self.__send_message(title=title, text=final_summary_message)
 
-    def __apply_first_matching_rule_to_torrents(self, torrent_datas: dict):
+    def __apply_first_matching_rule_to_torrents(self, downloader: Any, torrent_states: List[TorrentState]):
         """
         对每个种子应用第一个匹配的规则
         """
-        # 初始化成功和失败的计数器和列表
-        classifier_torrents = self.__get_should_classifier_torrents(torrent_datas=torrent_datas)
-        result = self.__torrent_classifier_for_qb(classifier_torrents=classifier_torrents)
+        classifier_torrents = self._classifier_engine.match_first(torrent_states)
+        result = self.__torrent_classifier_for_qb(downloader=downloader, classifier_torrents=classifier_torrents)
         if not result:
             return
-        success_count, failed_count, success_titles, failed_titles = result
 
-        # 构建简要的汇总消息
+        summary_message = self.__build_summary_message(result=result)
+        title = "【种子关键字分类整理预览】" if self._dry_run else "【种子关键字分类整理】"
+        self.__send_message(title=title, text=summary_message)
+
+    def __build_summary_message(self, result: Tuple[int, int, List[str], List[str], List[str]]) -> str:
+        """
+        构建整理结果的汇总消息
+        """
+        success_count, failed_count, success_titles, failed_titles, planned_calls = result
+
         summary_message_parts = []
+        if self._dry_run:
+            planned_details = "\n".join(planned_calls)
+            summary_message_parts.append(f"预览模式，计划调用 {len(planned_calls)} 次\n{planned_details}")
+            if success_count > 0:
+                success_details = "\n".join(success_titles)
+                summary_message_parts.append(f"计划整理 {success_count} 个种子\n{success_details}")
+            return "\n\n".join(summary_message_parts)
+
         if success_count > 0:
             success_details = "\n".join(success_titles)  # 使用换行符而不是逗号分隔种子标题
             summary_message_parts.append(f"成功整理 {success_count} 个种子\n{success_details}")
@@ -472,319 +567,39 @@ class TorrentClassifier(_PluginBase):
             failed_details = "\n".join(failed_titles)  # 使用换行符而不是逗号分隔种子标题
             summary_message_parts.append(f"失败整理 {failed_count} 个种子，详细请查看日志\n{failed_details}")
 
-        summary_message = "\n\n".join(summary_message_parts)  # 使用两个换行符分隔成功和失败的部分
-
-        self.__send_message(title="【种子关键字分类整理】", text=summary_message)
-
-    def __torrent_classifier_for_qb(self, classifier_torrents: dict) -> Optional[Tuple[int, int, List[str], List[str]]]:
-        """针对QB进行种子整理"""
-        # 获取下载器实例
-        downloader = self.downloader
-
-        success_count = 0
-        failed_count = 0
-        success_titles = []
-        failed_titles = []
+        return "\n\n".join(summary_message_parts)  # 使用两个换行符分隔成功和失败的部分
 
+    def __torrent_classifier_for_qb(self, downloader: Any,
+                                    classifier_torrents: Dict[str, Tuple[TorrentState, CompiledRule]]) \
+            -> Optional[Tuple[int, int, List[str], List[str], List[str]]]:
+        """针对QB进行种子整理，目标相同的种子合并为一次批量调用"""
         if classifier_torrents:
             logger.info(f"已获取到满足过滤方案的种子共 {len(classifier_torrents)} 个，继续整理")
             torrent_info = "\n".join(
-                f"{self.__get_torrent_title(torrent=torrent)}({torrent_hash})"
-                for torrent_hash, (torrent, _) in classifier_torrents.items()
+                f"{state.title}({torrent_hash})"
+                for torrent_hash, (state, _) in classifier_torrents.items()
             )
             logger.debug(f"正在准备整理的种子信息 \n {torrent_info}")
         else:
             logger.info("没有获取到任何满足过滤方案的种子，取消后续整理")
             return None
 
-        for torrent_hash, (torrent, config) in classifier_torrents.items():
-            config: ClassifierConfig
-            torrent_target = config.torrent_target
-            success = True
-
-            torrent_title = self.__get_torrent_title(torrent=torrent)
-            torrent_category = self.__get_torrent_category(torrent=torrent)
-            torrent_tags = self.__get_torrent_tags(torrent=torrent)
-
-            torrent_key = f"{torrent_title}({torrent_hash})"
-            logger.info(f"正在准备整理种子 {torrent_key}")
-
-            if torrent_target.remove_tags:
-                remove_tags = []
-                try:
-                    # 检查是否需要移除所有标签
-                    if '@all' in torrent_target.remove_tags:
-                        remove_tags = torrent_tags
-                        logger.info(f"正在为种子移除所有标签")
-                    else:
-                        remove_tags = torrent_target.remove_tags
-                        logger.info(f"正在为种子移除「{torrent_target.remove_tags}」标签")
-
-                    remove_result = downloader.remove_torrents_tag(ids=torrent_hash, tag=remove_tags)
-                    if not remove_result:
-                        raise Exception(f"标签移除失败，请检查下载器连接")
-                    logger.info(f"标签「{remove_tags}」移除成功")
-                except Exception as e:
-                    logger.error(f"标签「{remove_tags}」移除失败，错误：{str(e)}")
-                    success = False
-
-            if torrent_target.add_tags and success:
-                try:
-                    logger.info(f"正在为种子添加「{torrent_target.add_tags}」标签")
-                    downloader.set_torrents_tag(ids=torrent_hash, tags=torrent_target.add_tags)
-                    logger.info(f"标签「{torrent_target.add_tags}」添加成功")
-                except Exception as e:
-                    logger.error(f"标签「{torrent_target.add_tags}」添加失败，错误：{str(e)}")
-                    success = False
-
-            if torrent_target.change_category and success:
-                try:
-                    logger.info(f"正在为种子设置「{torrent_target.change_category}」分类")
-                    try:
-                        downloader.qbc.torrents_set_category(torrent_hashes=torrent_hash,
-                                                             category=torrent_target.change_category)
-                    except Exception as e:
-                        logger.warning(f"种子设置分类 {torrent_target.change_category} 失败：{str(e)}, 尝试创建分类再设置")
-                        downloader.qbc.torrents_create_category(name=torrent_target.change_category,
-                                                                save_path=torrent_target.change_directory)
-                        downloader.qbc.torrents_set_category(torrent_hashes=torrent_hash,
-                                                             category=torrent_target.change_category)
-                    logger.info(f"分类「{torrent_target.change_category}」设置成功")
-                except Exception as e:
-                    logger.error(f"分类「{torrent_target.change_category}」设置失败，错误：{str(e)}")
-                    success = False
-
-            # qb中的自动分类管理和目录为二选一的逻辑
-            if success:
-                if torrent_target.auto_category:
-                    try:
-                        logger.info(f"正在为种子开启自动分类管理")
-                        downloader.qbc.torrents_set_auto_management(torrent_hashes=torrent_hash,
-                                                                    enable=torrent_target.auto_category)
-                        logger.info(f"自动分类管理开启成功")
-                    except Exception as e:
-                        logger.error(f"自动分类管理开启失败，错误：{str(e)}")
-                        success = False
-                else:
-                    if torrent_target.change_directory:
-                        try:
-                            logger.info(f"正在为种子关闭自动分类管理")
-                            downloader.qbc.torrents_set_auto_management(torrent_hashes=torrent_hash,
-                                                                        enable=torrent_target.auto_category)
-                            logger.info(f"自动分类管理关闭成功")
-                        except Exception as e:
-                            logger.error(f"自动分类管理关闭失败，错误：{str(e)}")
-                        try:
-                            logger.info(f"正在为种子修改保存路径 {torrent_target.change_directory}")
-                            downloader.qbc.torrents_set_location(torrent_hashes=torrent_hash,
-                                                                 location=torrent_target.change_directory)
-                            logger.info(f"修改保存路径成功")
-                        except Exception as e:
-                            logger.error(f"修改保存路径失败，错误：{str(e)}")
-                            success = False
-
-                # 更新成功或失败的计数器和列表
-                if success:
-                    logger.info(f"{torrent_key} 整理成功")
-                    success_count += 1
-                    success_titles.append(torrent_title)
-                else:
-                    logger.error(f"{torrent_key} 整理失败，请检查日志")
-                    failed_count += 1
-                    failed_titles.append(torrent_title)
-
-        return success_count, failed_count, success_titles, failed_titles
-
-    def __get_should_classifier_torrents(self, torrent_datas: dict, config: Optional[ClassifierConfig] = None):
-        """获取需要整理的种子"""
-        classifier_torrents = {}
-        classifier_configs = self._classifier_configs if not config else [config]
-        # 遍历所有种子
-        for torrent_hash, torrent in torrent_datas.items():
-            torrent_title = self.__get_torrent_title(torrent=torrent)
-            should_classifier = True
-            for config in classifier_configs:
-                # 判断是否满足整理条件，不满足则跳过，满足则跳出
-                should, reason = self.__should_classifier(config=config, torrent=torrent)
-                if should:
-                    logger.debug(f"{torrent_title}({torrent_hash}) 满足过滤方案，已记录待后续整理")
-                    classifier_torrents[torrent_hash] = torrent, config
-                    should_classifier = True
-                    break
-                else:
-                    logger.debug(f"{torrent_title}({torrent_hash}) 不满足过滤方案，原因：{reason}")
-                    should_classifier = False
-                    continue
-
-            if not should_classifier:
-                logger.debug(f"{torrent_title}({torrent_hash}) 没有满足所有过滤方案，跳过")
-                continue
+        dispatcher = ActionDispatcher(downloader=downloader, batch_size=self._batch_size, dry_run=self._dry_run)
+        success_hashes, failed_hashes = dispatcher.dispatch(classifier_torrents=classifier_torrents)
+        planned_calls = dispatcher.report()
 
-        return classifier_torrents
-
-    def __should_classifier(self, config: ClassifierConfig, torrent: Any) -> (bool, str):
-        """判断是否满足整理条件"""
-        torrent_filter = config.torrent_filter
-        torrent_target = config.torrent_target
-        if not torrent_filter:
-            return False, "没有获取到整理规则"
-
-        torrent_title = self.__get_torrent_title(torrent=torrent)
-        torrent_category = self.__get_torrent_category(torrent=torrent)
-        torrent_tags = self.__get_torrent_tags(torrent=torrent)
-        torrent_auto_category = self.__get_torrent_auto_category(torrent=torrent)
-        torrent_path = self.__get_torrent_path(torrent=torrent)
-
-        # 判断当前属性是否已符合目标设置
-        match, reason = self.__matches_target_settings(torrent_target, torrent_path, torrent_category, torrent_tags,
-                                                       torrent_auto_category)
-        if match:
-            return False, "属性已完全符合目标设置，无需整理"
+        if self._dry_run:
+            planned_details = "\n".join(planned_calls)
+            logger.info(f"预览模式，计划调用 {len(planned_calls)} 次，未实际修改种子\n{planned_details}")
         else:
-            logger.debug(f"存在种子属性不符合目标设置，前置过滤通过，原因：{reason}")
-
-        # 继续检查其他过滤条件
-        return self.__check_filters(torrent_filter, torrent_title, torrent_category, torrent_tags)
-
-    @staticmethod
-    def __matches_target_settings(torrent_target, torrent_path, torrent_category, torrent_tags,
-                                  torrent_auto_category) -> (bool, str):
-        """检查种子的当前设置是否符合目标设置"""
-        if torrent_target.auto_category != torrent_auto_category:
-            return False, f"自动分类 不符合目标值 {torrent_target.auto_category}"
-        if not torrent_target.auto_category and not (
-                torrent_target.change_directory and torrent_target.change_directory == torrent_path):
-            return False, f"存储目录 不符合目标值 {torrent_target.change_directory}"
-        if torrent_target.change_category and torrent_target.change_category != torrent_category:
-            return False, f"分类 不符合目标值 {torrent_target.change_category}"
-
-        def __calculate_target_tags():
-            """计算调整后应有的标签集合"""
-            if '@all' in torrent_target.remove_tags:
-                # 如果 '@all' 存在于 remove_tags 中，移除所有标签
-                modified_tags = set()
-            else:
-                # 否则仅移除指定标签
-                modified_tags = set(torrent_tags) - set(torrent_target.remove_tags)
-            # 添加需要的标签
-            modified_tags.update(torrent_target.add_tags)
-            return modified_tags
-
-        # 计算目标标签集
-        target_tags = __calculate_target_tags()
-        if target_tags != set(torrent_tags):
-            return False, f"标签 不符合目标值 {target_tags}"
-
-        return True, ""
-
-    @staticmethod
-    def __check_filters(torrent_filter, torrent_title, torrent_category, torrent_tags) -> (bool, str):
-        """应用过滤条件检查是否需要整理"""
-        if torrent_filter.torrent_title:
-            try:
-                if not torrent_title:
-                    return False, f"标题为空，不符合标题「{torrent_filter.torrent_title}」条件"
-
-                if not re.search(torrent_filter.torrent_title, torrent_title, re.I):
-                    return False, f"不符合标题「{torrent_filter.torrent_title}」条件"
-            except Exception as e:
-                return False, f"标题过滤失败，错误：{str(e)}"
-
-        if torrent_filter.torrent_category:
-            try:
-                if not torrent_category:
-                    return False, f"分类为空，不符合分类「{torrent_filter.torrent_category}」条件"
-
-                if torrent_filter.torrent_category != torrent_category:
-                    return False, f"不符合分类「{torrent_filter.torrent_category}」条件"
-            except Exception as e:
-                return False, f"分类过滤失败，错误：{str(e)}"
-
-        if torrent_filter.torrent_tags:
-            try:
-                if not torrent_tags:
-                    return False, f"标签为空，不符合标签「{torrent_filter.torrent_tags}」条件"
-
-                # 检查种子的标签列表是否至少与过滤标签列表中的一个标签匹配
-                if not any(tag in torrent_tags for tag in torrent_filter.torrent_tags):
-                    return False, f"不符合标签「{torrent_filter.torrent_tags}」条件"
-            except Exception as e:
-                return False, f"标签过滤失败，错误：{str(e)}"
-
-        return True, "OK"
-
-    def __get_all_hashes_and_torrents(self, torrents):
-        """
-        获取torrents列表中所有种子的Hash值和对应的种子对象，存储在一个字典中
-
-        :param torrents: 包含种子信息的列表
-        :return: 一个字典，其中键是种子的Hash值，值是对应的种子对象
-        """
-        try:
-            all_hashes_torrents = {}
-            for torrent in torrents:
-                # 根据下载器类型获取Hash值
-                if self.__is_qbittorrent():
-                    hash_value = torrent.get("hash")
-                else:
-                    hash_value = torrent.hashString
-
-                if hash_value:
-                    all_hashes_torrents[hash_value] = torrent  # 直接将torrent对象存储为字典的值
-            return all_hashes_torrents
-        except Exception as e:
-            logger.error(f"get_all_hashes_and_torrents error: {e}")
-            return {}
-
-    def __get_torrent_title(self, torrent: Any) -> Optional[str]:
-        """获取种子标题"""
-        try:
-            if self.__is_qbittorrent():
-                return torrent.get("name")
-            else:
-                return torrent.name
-        except Exception as e:
-            print(str(e))
-            return None
-
-    def __get_torrent_category(self, torrent: Any) -> Optional[str]:
-        """获取种子分类"""
-        try:
-            return torrent.get("category").strip() if self.__is_qbittorrent() else None
-        except Exception as e:
-            print(str(e))
-            return None
-
-    def __get_torrent_tags(self, torrent: Any) -> List[str]:
-        """
-        获取种子标签
-        """
-        try:
-            return [str(tag).strip() for tag in torrent.get("tags").split(',')] \
-                if self.__is_qbittorrent() else torrent.labels or []
-        except Exception as e:
-            print(str(e))
-            return []
-
-    def __get_torrent_auto_category(self, torrent: Any) -> bool:
-        """
-        获取种子是否启用自动Torrent管理
-        """
-        try:
-            return torrent.get("auto_tmm", False) if self.__is_qbittorrent() else False
-        except Exception as e:
-            print(str(e))
-            return False
-
-    def __get_torrent_path(self, torrent: Any) -> Optional[str]:
-        """
-        获取种子保存路径
-        """
-        try:
-            return torrent.get("save_path", None) if self.__is_qbittorrent() else None
-        except Exception as e:
-            print(str(e))
-            return None
+            logger.info(f"整理完成，共调用 {len(planned_calls)} 次，成功 {len(success_hashes)} 个，"
+                        f"失败 {len(failed_hashes)} 个")
+            for torrent_hash in failed_hashes:
+                logger.error(f"{classifier_torrents[torrent_hash][0].title}({torrent_hash}) 整理失败，请检查日志")
+
+        success_titles = [classifier_torrents[torrent_hash][0].title for torrent_hash in success_hashes]
+        failed_titles = [classifier_torrents[torrent_hash][0].title for torrent_hash in failed_hashes]
+        return len(success_hashes), len(failed_hashes), success_titles, failed_titles, planned_calls
 
     def __get_torrent_info(self, torrent: Any) -> dict:
         """
@@ -0,0 +1,188 @@
+# 该模块定义了qBittorrent整理动作的批量调度，将种子的目标变更按相同目标值分组，每组按批量大小合并为一次接口调用。
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from app.log import logger
+from app.plugins.torrentclassifier.classifierconfig import TorrentTarget
+from app.plugins.torrentclassifier.classifierengine import CompiledRule, TorrentState
+
+# 整理动作，按执行顺序排列，单个种子在前一个动作失败后不再执行后续动作
+ACTION_REMOVE_TAGS = "remove_tags"
+ACTION_ADD_TAGS = "add_tags"
+ACTION_SET_CATEGORY = "set_category"
+ACTION_SET_AUTO_MANAGEMENT = "set_auto_management"
+ACTION_SET_LOCATION = "set_location"
+
+ACTIONS = (ACTION_REMOVE_TAGS, ACTION_ADD_TAGS, ACTION_SET_CATEGORY, ACTION_SET_AUTO_MANAGEMENT, ACTION_SET_LOCATION)
+
+ACTION_NAMES = {
+    ACTION_REMOVE_TAGS: "移除标签",
+    ACTION_ADD_TAGS: "添加标签",
+    ACTION_SET_CATEGORY: "设置分类",
+    ACTION_SET_AUTO_MANAGEMENT: "设置自动分类管理",
+    ACTION_SET_LOCATION: "修改保存路径",
+}
+
+# 默认单次调用的最大种子数量
+DEFAULT_BATCH_SIZE = 100
+
+# 移除所有标签的分组标记，同一批种子合并为一次调用，移除这批种子当前标签的并集
+REMOVE_ALL_TAGS = "@all"
+
+
+@dataclass(frozen=True)
+class PlannedCall:
+    """数据类，用于记录一次批量整理调用。"""
+    action: str  # 整理动作
+    value: Any  # 目标值，同一调用中的种子目标值相同
+    hashes: Tuple[str, ...]  # 种子Hash
+
+    def describe(self) -> str:
+        """调用描述"""
+        if self.action == ACTION_SET_CATEGORY:
+            value = self.value[0]
+        elif self.action == ACTION_SET_AUTO_MANAGEMENT:
+            value = "开启" if self.value else "关闭"
+        elif isinstance(self.value, tuple):
+            value = "、".join(self.value)
+        else:
+            value = self.value
+        return f"{ACTION_NAMES[self.action]}「{value}」，共 {len(self.hashes)} 个种子"
+
+
+class ActionDispatcher:
+    """
+    qBittorrent整理动作批量调度
+
+    按动作顺序逐阶段执行，每个阶段内目标值相同的种子合并为一组，每组按批量大小拆分调用
+    调用失败时该批种子标记为整理失败，不再执行后续阶段；整理成功的属性同步更新到种子快照
+    """
+
+    def __init__(self, downloader: Any, batch_size: int = DEFAULT_BATCH_SIZE, dry_run: bool = False):
+        self.downloader = downloader
+        self.batch_size = max(int(batch_size), 1)
+        self.dry_run = dry_run
+        self.planned_calls: List[PlannedCall] = []
+
+    def dispatch(self, classifier_torrents: Dict[str, Tuple[TorrentState, CompiledRule]]) \
+            -> Tuple[List[str], List[str]]:
+        """
+        执行整理，返回整理成功与失败的种子Hash
+
+        预览模式下只记录计划的调用，并按调用成功更新快照，以便后续规则基于预期状态继续匹配
+        """
+        failed: Set[str] = set()
+        for action in ACTIONS:
+            groups: Dict[Any, List[str]] = defaultdict(list)
+            for torrent_hash, (state, rule) in classifier_torrents.items():
+                if torrent_hash in failed:
+                    continue
+                value = self.__plan_value(action=action, state=state, torrent_target=rule.torrent_target)
+                if value is not None:
+                    groups[value].append(torrent_hash)
+
+            for value, hashes in groups.items():
+                for start in range(0, len(hashes), self.batch_size):
+                    batch = tuple(hashes[start:start + self.batch_size])
+                    if value == REMOVE_ALL_TAGS:
+                        call_value = tuple(sorted({tag for torrent_hash in batch
+                                                   for tag in classifier_torrents[torrent_hash][0].tags}))
+                    else:
+                        call_value = value
+                    call = PlannedCall(action=action, value=call_value, hashes=batch)
+                    self.planned_calls.append(call)
+                    if self.dry_run or self.__execute(call):
+                        for torrent_hash in call.hashes:
+                            self.__update_state(call=call, state=classifier_torrents[torrent_hash][0])
+                    elif not (action == ACTION_SET_AUTO_MANAGEMENT and not value):
+                        # 关闭自动分类管理失败时仍继续修改保存路径
+                        failed.update(call.hashes)
+
+        success = [torrent_hash for torrent_hash in classifier_torrents if torrent_hash not in failed]
+        return success, [torrent_hash for torrent_hash in classifier_torrents if torrent_hash in failed]
+
+    def report(self) -> List[str]:
+        """计划调用列表"""
+        return [call.describe() for call in self.planned_calls]
+
+    @staticmethod
+    def __plan_value(action: str, state: TorrentState, torrent_target: TorrentTarget) -> Optional[Any]:
+        """计算种子在该动作下的目标值，无需调用时返回None"""
+        if action == ACTION_REMOVE_TAGS:
+            if not torrent_target.remove_tags:
+                return None
+            if REMOVE_ALL_TAGS in torrent_target.remove_tags:
+                return REMOVE_ALL_TAGS if state.tags else None
+            if not any(tag in state.tags for tag in torrent_target.remove_tags):
+                return None
+            return tuple(torrent_target.remove_tags)
+
+        if action == ACTION_ADD_TAGS:
+            if not torrent_target.add_tags or all(tag in state.tags for tag in torrent_target.add_tags):
+                return None
+            return tuple(torrent_target.add_tags)
+
+        if action == ACTION_SET_CATEGORY:
+            if not torrent_target.change_category or torrent_target.change_category == state.category:
+                return None
+            return torrent_target.change_category, torrent_target.change_directory
+
+        # qb中的自动分类管理和目录为二选一的逻辑
+        if action == ACTION_SET_AUTO_MANAGEMENT:
+            if torrent_target.auto_category:
+                return None if state.auto_category else True
+            if torrent_target.change_directory and state.auto_category:
+                return False
+            return None
+
+        if action == ACTION_SET_LOCATION:
+            if torrent_target.auto_category or not torrent_target.change_directory \
+                    or torrent_target.change_directory == state.path:
+                return None
+            return torrent_target.change_directory
+
+        return None
+
+    def __execute(self, call: PlannedCall) -> bool:
+        """执行一次批量调用"""
+        hashes = list(call.hashes)
+        description = call.describe()
+        logger.info(f"正在{description}")
+        try:
+            if call.action == ACTION_REMOVE_TAGS:
+                if not self.downloader.remove_torrents_tag(ids=hashes, tag=list(call.value)):
+                    raise Exception("标签移除失败，请检查下载器连接")
+            elif call.action == ACTION_ADD_TAGS:
+                self.downloader.set_torrents_tag(ids=hashes, tags=list(call.value))
+            elif call.action == ACTION_SET_CATEGORY:
+                category, directory = call.value
+                try:
+                    self.downloader.qbc.torrents_set_category(torrent_hashes=hashes, category=category)
+                except Exception as e:
+                    logger.warning(f"种子设置分类 {category} 失败：{str(e)}, 尝试创建分类再设置")
+                    self.downloader.qbc.torrents_create_category(name=category, save_path=directory)
+                    self.downloader.qbc.torrents_set_category(torrent_hashes=hashes, category=category)
+            elif call.action == ACTION_SET_AUTO_MANAGEMENT:
+                self.downloader.qbc.torrents_set_auto_management(torrent_hashes=hashes, enable=call.value)
+            elif call.action == ACTION_SET_LOCATION:
+                self.downloader.qbc.torrents_set_location(torrent_hashes=hashes, location=call.value)
+            logger.info(f"{description}成功")
+            return True
+        except Exception as e:
+            logger.error(f"{description}失败，错误：{str(e)}")
+            return False
+
+    @staticmethod
+    def __update_state(call: PlannedCall, state: TorrentState):
+        """将调用成功的属性更新到种子快照"""
+        if call.action == ACTION_REMOVE_TAGS:
+            state.tags = [tag for tag in state.tags if tag not in call.value]
+        elif call.action == ACTION_ADD_TAGS:
+            state.tags = state.tags + [tag for tag in call.value if tag not in state.tags]
+        elif call.action == ACTION_SET_CATEGORY:
+            state.category = call.value[0]
+        elif call.action == ACTION_SET_AUTO_MANAGEMENT:
+            state.auto_category = call.value
+        elif call.action == ACTION_SET_LOCATION:
+            state.path = call.value
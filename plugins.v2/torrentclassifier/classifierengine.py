@@ -0,0 +1,187 @@
+# 该模块定义了种子分类整理的规则引擎，将分类配置预编译为正则和判断条件，并在单次种子快照上完成规则匹配。
+import hashlib
+import re
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, FrozenSet, Iterable, Iterator, List, Optional, Tuple
+
+from app.log import logger
+from app.plugins.torrentclassifier.classifierconfig import ClassifierConfig, TorrentTarget
+
+
+@dataclass
+class TorrentState:
+    """数据类，用于存储单次快照中种子的可整理属性，整理成功后就地更新，供后续规则判断。"""
+    torrent_hash: str  # 种子Hash
+    title: Optional[str] = None  # 种子标题
+    category: Optional[str] = None  # 种子分类
+    tags: List[str] = field(default_factory=list)  # 种子标签
+    auto_category: bool = False  # 是否启用自动Torrent管理
+    path: Optional[str] = None  # 种子保存路径
+    torrent: Any = None  # 下载器返回的原始种子对象
+
+    @classmethod
+    def from_qbittorrent(cls, torrent: Any) -> Optional["TorrentState"]:
+        """从qBittorrent种子信息构造快照，没有Hash时返回None"""
+        torrent_hash = torrent.get("hash")
+        if not torrent_hash:
+            return None
+        category = torrent.get("category")
+        tags = torrent.get("tags")
+        return cls(torrent_hash=torrent_hash,
+                   title=torrent.get("name"),
+                   category=category.strip() if category else category,
+                   tags=[str(tag).strip() for tag in tags.split(",") if str(tag).strip()] if tags else [],
+                   auto_category=bool(torrent.get("auto_tmm", False)),
+                   path=torrent.get("save_path", None),
+                   torrent=torrent)
+
+
+def calculate_target_tags(torrent_target: TorrentTarget, torrent_tags: Iterable[str]) -> List[str]:
+    """计算调整后应有的标签，保持原有标签顺序"""
+    if "@all" in torrent_target.remove_tags:
+        # 如果 '@all' 存在于 remove_tags 中，移除所有标签
+        target_tags = []
+    else:
+        # 否则仅移除指定标签
+        target_tags = [tag for tag in torrent_tags if tag not in torrent_target.remove_tags]
+    # 添加需要的标签
+    target_tags.extend(tag for tag in torrent_target.add_tags if tag not in target_tags)
+    return target_tags
+
+
+@dataclass(frozen=True)
+class CompiledRule:
+    """数据类，用于存储预编译后的整理规则，判断条件按开销从低到高排列。"""
+    index: int  # 规则序号，从1开始
+    config: ClassifierConfig  # 原始规则配置
+    predicates: Tuple[Callable[[TorrentState], bool], ...]  # 全部满足时种子需要按该规则整理
+
+    @property
+    def torrent_target(self) -> TorrentTarget:
+        return self.config.torrent_target
+
+    def matches(self, state: TorrentState) -> bool:
+        """判断种子是否需要按该规则整理"""
+        return all(predicate(state) for predicate in self.predicates)
+
+
+def compile_rule(index: int, config: ClassifierConfig) -> CompiledRule:
+    """将单条分类配置编译为判断条件"""
+    torrent_filter = config.torrent_filter
+    torrent_target = config.torrent_target
+    predicates = []
+
+    if not torrent_filter:
+        logger.warning(f"规则 {index} 没有获取到整理规则，已忽略")
+        return CompiledRule(index=index, config=config, predicates=(lambda state: False,))
+
+    if torrent_filter.torrent_category:
+        filter_category = torrent_filter.torrent_category
+        predicates.append(lambda state: bool(state.category) and state.category == filter_category)
+
+    if torrent_filter.torrent_tags:
+        filter_tags = frozenset(torrent_filter.torrent_tags)
+        predicates.append(lambda state: not filter_tags.isdisjoint(state.tags))
+
+    if torrent_filter.torrent_title:
+        try:
+            pattern = re.compile(torrent_filter.torrent_title, re.I)
+            predicates.append(lambda state: bool(state.title) and pattern.search(state.title) is not None)
+        except re.error as e:
+            logger.error(f"规则 {index} 标题「{torrent_filter.torrent_title}」编译失败，该规则不会匹配任何种子，错误：{e}")
+            predicates.append(lambda state: False)
+
+    # 属性已完全符合目标设置时无需整理
+    predicates.append(lambda state: not matches_target_settings(torrent_target, state))
+    return CompiledRule(index=index, config=config, predicates=tuple(predicates))
+
+
+def matches_target_settings(torrent_target: TorrentTarget, state: TorrentState) -> bool:
+    """检查种子的当前设置是否符合目标设置"""
+    if torrent_target.auto_category != state.auto_category:
+        return False
+    if not torrent_target.auto_category and not (
+            torrent_target.change_directory and torrent_target.change_directory == state.path):
+        return False
+    if torrent_target.change_category and torrent_target.change_category != state.category:
+        return False
+    return set(calculate_target_tags(torrent_target, state.tags)) == set(state.tags)
+
+
+def get_configs_version(configs: Iterable[ClassifierConfig]) -> str:
+    """根据规则内容计算配置版本"""
+    return hashlib.md5(repr(list(configs)).encode("utf-8")).hexdigest()
+
+
+class ClassifierEngine:
+    """
+    种子分类规则引擎，规则在构造时编译一次，之后对每次运行的种子快照只做匹配
+
+    按分类、标签为规则建立索引，每个种子只检查可能匹配的规则
+    """
+
+    def __init__(self, configs: List[ClassifierConfig]):
+        self.version = get_configs_version(configs)
+        self.rules = [compile_rule(index=index, config=config) for index, config in enumerate(configs, start=1)]
+        # 没有分类、标签过滤条件的规则对所有种子都是候选
+        self.__common_rules: List[CompiledRule] = []
+        self.__category_rules: Dict[str, List[CompiledRule]] = defaultdict(list)
+        self.__tag_rules: Dict[str, List[CompiledRule]] = defaultdict(list)
+        for rule in self.rules:
+            torrent_filter = rule.config.torrent_filter
+            if torrent_filter and torrent_filter.torrent_category:
+                self.__category_rules[torrent_filter.torrent_category].append(rule)
+            elif torrent_filter and torrent_filter.torrent_tags:
+                for tag in set(torrent_filter.torrent_tags):
+                    self.__tag_rules[tag].append(rule)
+            else:
+                self.__common_rules.append(rule)
+        self.__candidates: Dict[Tuple[Optional[str], FrozenSet[str]], Tuple[CompiledRule, ...]] = {}
+
+    def candidates(self, state: TorrentState) -> Tuple[CompiledRule, ...]:
+        """获取种子可能匹配的规则，按规则序号排列"""
+        key = (state.category if state.category in self.__category_rules else None,
+               frozenset(tag for tag in state.tags if tag in self.__tag_rules))
+        rules = self.__candidates.get(key)
+        if rules is None:
+            category, tags = key
+            selected = {rule.index: rule for rule in self.__common_rules}
+            if category is not None:
+                selected.update((rule.index, rule) for rule in self.__category_rules[category])
+            for tag in tags:
+                selected.update((rule.index, rule) for rule in self.__tag_rules[tag])
+            rules = tuple(selected[index] for index in sorted(selected))
+            self.__candidates[key] = rules
+        return rules
+
+    def match_first(self, states: Iterable[TorrentState]) -> Dict[str, Tuple[TorrentState, CompiledRule]]:
+        """为每个种子匹配第一个满足条件的规则"""
+        matched = {}
+        for state in states:
+            for rule in self.candidates(state):
+                if rule.matches(state):
+                    matched[state.torrent_hash] = state, rule
+                    break
+        return matched
+
+    def iter_rule_matches(self, states: Iterable[TorrentState]) \
+            -> Iterator[Tuple[CompiledRule, Dict[str, Tuple[TorrentState, CompiledRule]]]]:
+        """
+        按规则顺序依次返回每条规则匹配的种子
+
+        调用方在取下一条规则前整理并更新本条规则匹配的种子状态，整理后的种子会重新计算后续候选规则
+        """
+        pending: Dict[int, Dict[str, TorrentState]] = defaultdict(dict)
+        for state in states:
+            for rule in self.candidates(state):
+                pending[rule.index][state.torrent_hash] = state
+
+        for rule in self.rules:
+            matched = {torrent_hash: (state, rule)
+                       for torrent_hash, state in pending.pop(rule.index, {}).items() if rule.matches(state)}
+            yield rule, matched
+            for torrent_hash, (state, _) in matched.items():
+                for later_rule in self.candidates(state):
+                    if later_rule.index > rule.index:
+                        pending[later_rule.index][torrent_hash] = state
@@ -1,4 +1,5 @@
 import base64
+import concurrent.futures
 import json
 import random
 import re
@@ -28,6 +29,9 @@ from app.schemas import NotificationType, TorrentInfo, MediaType, ServiceInfo
 from app.schemas.types import EventType
 from app.sdk.network import RequestUtils
 from app.sdk.utilities import StringUtils
+from .matcher import SubscribeTitleMatcher
+from .sampler import BandwidthSampler
+from .store import BrushTaskStore
 
 lock = threading.Lock()
 
@@ -76,6 +80,10 @@ class BrushConfig:
         self.qb_category = config.get("qb_category")
         self.site_hr_active = config.get("site_hr_active", False)
         self.site_skip_tips = config.get("site_skip_tips", False)
+        # 后台带宽采样间隔（秒）、滑动窗口次数与采样结果最长有效时间（秒）
+        self.bandwidth_sample_interval = self.__parse_number(config.get("bandwidth_sample_interval")) or 30
+        self.bandwidth_sample_window = self.__parse_number(config.get("bandwidth_sample_window")) or 5
+        self.bandwidth_sample_max_age = self.__parse_number(config.get("bandwidth_sample_max_age")) or 300
 
         self.brush_tag = "刷流"
         # 站点独立配置
@@ -240,6 +248,35 @@ class BrushConfig:
         return self.__str__()
 
 
+class BrushSnapshot:
+    """
+    刷流周期内的下载器状态快照
+    周期开始时从下载器采集一次，新增种子后仅在本地累加，前置条件校验不再重复请求下载器
+    """
+
+    def __init__(self, downloading_count: int = 0, seeding_size: float = 0.0,
+                 upload_speed: Optional[float] = None, download_speed: Optional[float] = None):
+        # 正在下载的刷流任务数量
+        self.downloading_count = downloading_count
+        # 保种体积（字节）
+        self.seeding_size = seeding_size
+        # 平均上传速度，None 表示未采样
+        self.upload_speed = upload_speed
+        # 平均下载速度，None 表示未采样
+        self.download_speed = download_speed
+
+    def add_torrent(self, size: float):
+        """
+        新增刷流种子后更新快照
+        """
+        self.downloading_count += 1
+        self.seeding_size += size or 0
+
+    def __repr__(self):
+        return (f"BrushSnapshot(downloading_count={self.downloading_count}, seeding_size={self.seeding_size}, "
+                f"upload_speed={self.upload_speed}, download_speed={self.download_speed})")
+
+
 class BrushFlowLowFreq(_PluginBase):
     # region 全局定义
 
@@ -274,10 +311,26 @@ class BrushFlowLowFreq(_PluginBase):
     _task_brush_enable = False
     # 订阅缓存信息
     _subscribe_infos = None
+    # 订阅标题匹配器，订阅标题集合变化时才重建
+    _subscribe_matcher: Optional[SubscribeTitleMatcher] = None
+    # 当前刷流周期的下载器状态快照
+    _brush_snapshot: Optional[BrushSnapshot] = None
+    # 刷流任务存储
+    _task_store: Optional[BrushTaskStore] = None
+    _task_store_lock = threading.Lock()
     # Brush定时
     _brush_interval = 10
     # Check定时
     _check_interval = 5
+    # 并发获取站点种子的最大线程数
+    _browse_max_workers = 5
+    # 单个站点获取种子的超时时间（秒）
+    _browse_timeout = 120
+    # 仍在获取中的站点ID，超时放弃的获取线程结束前不再为该站点发起新的获取
+    _browse_inflight: Set[Any] = set()
+    _browse_inflight_lock = threading.Lock()
+    # 后台带宽采样器
+    _bandwidth_sampler: Optional[BandwidthSampler] = None
     # 退出事件
     _event = threading.Event()
     _scheduler = None
@@ -360,6 +413,10 @@ class BrushFlowLowFreq(_PluginBase):
         if not self.service_info:
             return
 
+        # 配置了带宽限制时，启动后台带宽采样，刷流时直接读取滑动平均值
+        if self._task_brush_enable and (brush_config.maxupspeed or brush_config.maxdlspeed):
+            self.__start_bandwidth_sampler()
+
         # 检查是否启用了一次性任务
         if brush_config.onlyonce:
             self._scheduler = BackgroundScheduler(timezone=settings.TZ)
@@ -1150,6 +1207,62 @@ class BrushFlowLowFreq(_PluginBase):
                                             }
                                         ]
                                     },
+                                    {
+                                        'component': 'VRow',
+                                        'content': [
+                                            {
+                                                'component': 'VCol',
+                                                'props': {
+                                                    "cols": 12,
+                                                    "md": 4
+                                                },
+                                                'content': [
+                                                    {
+                                                        'component': 'VTextField',
+                                                        'props': {
+                                                            'model': 'bandwidth_sample_interval',
+                                                            'label': '带宽采样间隔（秒）',
+                                                            'placeholder': '默认30，仅在开启时间段内采样'
+                                                        }
+                                                    }
+                                                ]
+                                            },
+                                            {
+                                                'component': 'VCol',
+                                                'props': {
+                                                    "cols": 12,
+                                                    "md": 4
+                                                },
+                                                'content': [
+                                                    {
+                                                        'component': 'VTextField',
+                                                        'props': {
+                                                            'model': 'bandwidth_sample_window',
+                                                            'label': '带宽采样次数',
+                                                            'placeholder': '默认5，取最近多次采样的平均值'
+                                                        }
+                                                    }
+                                                ]
+                                            },
+                                            {
+                                                'component': 'VCol',
+                                                'props': {
+                                                    "cols": 12,
+                                                    "md": 4
+                                                },
+                                                'content': [
+                                                    {
+                                                        'component': 'VTextField',
+                                                        'props': {
+                                                            'model': 'bandwidth_sample_max_age',
+                                                            'label': '带宽采样有效期（秒）',
+                                                            'placeholder': '默认300，过期采样不参与平均'
+                                                        }
+                                                    }
+                                                ]
+                                            }
+                                        ]
+                                    },
                                     {
                                         'component': 'VRow',
                                         'content': [
@@ -1851,13 +1964,16 @@ class BrushFlowLowFreq(_PluginBase):
             "proxy_delete": False,
             "freeleech": "free",
             "hr": "yes",
+            "bandwidth_sample_interval": 30,
+            "bandwidth_sample_window": 5,
+            "bandwidth_sample_max_age": 300,
             "enable_site_config": False,
             "site_config": BrushConfig.get_demo_site_config()
         }
 
     def get_page(self) -> List[dict]:
         # 种子明细
-        torrents = self.get_data("torrents") or {}
+        torrents = self.__get_task_store().tasks("torrents")
 
         if not torrents:
             return [
@@ -2036,6 +2152,7 @@ class BrushFlowLowFreq(_PluginBase):
         """
         退出插件
         """
+        self.__stop_bandwidth_sampler()
         try:
             if self._scheduler:
                 self._scheduler.remove_all_jobs()
@@ -2046,6 +2163,20 @@ class BrushFlowLowFreq(_PluginBase):
                 self._scheduler = None
         except Exception as e:
             print(str(e))
+        self.__close_task_store()
+
+    def __close_task_store(self):
+        """
+        关闭刷流任务存储，持久化剩余记录并释放数据库连接，下次使用时重新打开
+        """
+        with self._task_store_lock:
+            if not self._task_store:
+                return
+            try:
+                self._task_store.close()
+            except Exception as e:
+                logger.error(f"关闭刷流任务存储失败：{e}")
+            self._task_store = None
 
     # region Brush
 
@@ -2068,7 +2199,7 @@ class BrushFlowLowFreq(_PluginBase):
         with lock:
             logger.info(f"开始执行刷流任务 ...")
 
-            torrent_tasks: Dict[str, dict] = self.get_data("torrents") or {}
+            torrent_tasks: Dict[str, dict] = self.__get_task_store().tasks("torrents")
             torrents_size = self.__calculate_seeding_torrents_size(torrent_tasks=torrent_tasks)
 
             # 判断能否通过保种体积前置条件
@@ -2078,60 +2209,164 @@ class BrushFlowLowFreq(_PluginBase):
                 logger.info(f"刷流任务执行完成")
                 return
 
+            # 采集本轮刷流的下载器状态快照，后续前置条件校验均基于该快照
+            snapshot = self.__capture_brush_snapshot(torrents_size=torrents_size)
+
             # 判断能否通过刷流前置条件
-            pre_condition_passed, reason = self.__evaluate_pre_conditions_for_brush()
+            pre_condition_passed, reason = self.__evaluate_pre_conditions_for_brush(snapshot=snapshot)
             self.__log_brush_conditions(passed=pre_condition_passed, reason=reason)
             if not pre_condition_passed:
                 logger.info(f"刷流任务执行完成")
                 return
 
-            statistic_info = self.__get_statistic_info()
-
             # 获取所有站点的信息，并过滤掉不存在的站点
             site_infos = []
             for siteid in brush_config.brushsites:
                 siteinfo = self.site_oper.get(siteid)
                 if siteinfo:
                     site_infos.append(siteinfo)
+                else:
+                    logger.warning(f"站点不存在：{siteid}")
 
             # 根据是否开启顺序刷流来决定是否需要打乱顺序
             if not brush_config.brush_sequential:
                 random.shuffle(site_infos)
 
-            logger.info(f"即将针对站点 {', '.join(site.name for site in site_infos)} 开始刷流")
+            # 获取订阅标题匹配器，所有站点共用
+            subscribe_matcher = self.__get_subscribe_matcher(subscribe_titles=self.__get_subscribe_titles())
 
-            # 获取订阅标题
-            subscribe_titles = self.__get_subscribe_titles()
+        if not site_infos:
+            logger.info(f"刷流任务执行完成")
+            return
+
+        logger.info(f"即将针对站点 {', '.join(site.name for site in site_infos)} 开始刷流")
 
-            # 处理所有站点
+        # 并发获取各站点种子，获取阶段不持有全局锁，避免单个站点响应缓慢阻塞检查任务
+        site_torrents = self.__browse_sites_concurrently(site_infos=site_infos)
+
+        with lock:
+            # 获取阶段可能有检查任务更新了任务数据，这里重新读取后再统一准入
+            torrent_tasks: Dict[str, dict] = self.__get_task_store().tasks("torrents")
+            statistic_info = self.__get_statistic_info()
+            snapshot.seeding_size = self.__calculate_seeding_torrents_size(torrent_tasks=torrent_tasks)
+            # 获取阶段下载器中的任务可能已完成或被删除，准入前重新获取同时下载数
+            if brush_config.maxdlcount:
+                snapshot.downloading_count = self.__get_downloading_count()
+
+            # 按站点顺序串行准入，共享同时下载数、保种体积、带宽等限额
             for site in site_infos:
+                if site.id not in site_torrents:
+                    continue
                 # 如果站点刷流没有正确响应，说明没有通过前置条件，其他站点也不需要继续刷流了
-                if not self.__brush_site_torrents(siteid=site.id, torrent_tasks=torrent_tasks,
+                if not self.__brush_site_torrents(siteinfo=site, torrents=site_torrents.get(site.id),
+                                                  torrent_tasks=torrent_tasks, snapshot=snapshot,
                                                   statistic_info=statistic_info,
-                                                  subscribe_titles=subscribe_titles):
+                                                  subscribe_matcher=subscribe_matcher):
                     logger.info(f"站点 {site.name} 刷流中途结束，停止后续刷流")
                     break
                 else:
                     logger.info(f"站点 {site.name} 刷流完成")
 
             # 保存数据
-            self.save_data("torrents", torrent_tasks)
+            self.__get_task_store().save("torrents", torrent_tasks)
             # 保存统计数据
             self.save_data("statistic", statistic_info)
             logger.info(f"刷流任务执行完成")
 
-    def __brush_site_torrents(self, siteid, torrent_tasks: Dict[str, dict], statistic_info: Dict[str, int],
-                              subscribe_titles: Set[str]) -> bool:
+    def __browse_sites_concurrently(self, site_infos: List[Any]) -> Dict[Any, List[TorrentInfo]]:
         """
-        针对站点进行刷流
+        使用有界线程池并发获取站点种子，单个站点超时或异常时仅跳过该站点
+        :return: 站点ID与种子列表的映射，超时或异常的站点不包含在结果中
         """
-        siteinfo = self.site_oper.get(siteid)
-        if not siteinfo:
-            logger.warning(f"站点不存在：{siteid}")
-            return True
+        site_torrents: Dict[Any, List[TorrentInfo]] = {}
+        if not site_infos:
+            return site_torrents
+
+        # 上一轮超时放弃的获取线程仍未返回的站点本轮跳过，避免获取线程随刷流周期不断累积
+        with self._browse_inflight_lock:
+            busy_sites = [site for site in site_infos if site.id in self._browse_inflight]
+        if busy_sites:
+            logger.warning(f"站点 {', '.join(site.name for site in busy_sites)} 上一次获取种子仍未结束，本轮跳过")
+            site_infos = [site for site in site_infos if site not in busy_sites]
+            if not site_infos:
+                return site_torrents
+
+        max_workers = max(1, min(len(site_infos), self._browse_max_workers))
+        timeout = self._browse_timeout
+        # 记录各站点实际开始获取的时间，排队等待线程的站点不计入超时
+        started_at: Dict[Any, float] = {}
+        # 本轮获取的取消标记，超时、截止或插件停止后排队中的站点不再发起获取
+        cancelled = threading.Event()
+
+        def browse(site) -> List[TorrentInfo]:
+            if cancelled.is_set() or self._event.is_set():
+                return []
+            with self._browse_inflight_lock:
+                if site.id in self._browse_inflight:
+                    return []
+                self._browse_inflight.add(site.id)
+            try:
+                started_at[site.id] = time.time()
+                logger.info(f"开始获取站点 {site.name} 的新种子 ...")
+                torrents = self.torrents_chain.browse(domain=site.domain) or []
+            finally:
+                with self._browse_inflight_lock:
+                    self._browse_inflight.discard(site.id)
+            if cancelled.is_set():
+                logger.info(f"站点 {site.name} 的种子获取已被取消，丢弃获取结果")
+                return []
+            return torrents
 
-        logger.info(f"开始获取站点 {siteinfo.name} 的新种子 ...")
-        torrents = self.torrents_chain.browse(domain=siteinfo.domain)
+        start_time = time.time()
+        # 全部线程均被卡住时排队站点永远无法开始，这里按批次数给出整体截止时间兜底
+        deadline = start_time + timeout * -(-len(site_infos) // max_workers)
+        executor = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers,
+                                                         thread_name_prefix="brushflowlowfreq-browse")
+        pending = {executor.submit(browse, site): site for site in site_infos}
+        try:
+            while pending and not self._event.is_set():
+                done, _ = concurrent.futures.wait(pending, timeout=1,
+                                                  return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in done:
+                    site = pending.pop(future)
+                    try:
+                        torrents = future.result()
+                    except Exception as e:
+                        logger.error(f"获取站点 {site.name} 的种子失败，错误详情: {e}")
+                        continue
+                    if not torrents:
+                        logger.info(f"站点 {site.name} 没有获取到种子")
+                        continue
+                    site_torrents[site.id] = torrents
+
+                # 已开始获取但超过单站点超时时间的站点直接放弃，不再等待其结果
+                now = time.time()
+                for future, site in list(pending.items()):
+                    site_started_at = started_at.get(site.id)
+                    if site_started_at is not None and now - site_started_at > timeout:
+                        pending.pop(future)
+                        logger.warning(f"获取站点 {site.name} 的种子超过 {timeout} 秒，跳过该站点")
+
+                if pending and now > deadline:
+                    logger.warning(f"站点种子获取超过整体截止时间，跳过站点 "
+                                   f"{', '.join(site.name for site in pending.values())}")
+                    break
+        finally:
+            cancelled.set()
+            for future in pending:
+                future.cancel()
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        logger.info(f"站点种子获取完成，成功站点数 {len(site_torrents)}/{len(site_infos)}，"
+                    f"耗时 {time.time() - start_time:.2f} 秒")
+        return site_torrents
+
+    def __brush_site_torrents(self, siteinfo: Any, torrents: List[TorrentInfo], torrent_tasks: Dict[str, dict],
+                              snapshot: BrushSnapshot, statistic_info: Dict[str, int],
+                              subscribe_matcher: SubscribeTitleMatcher) -> bool:
+        """
+        针对站点已获取的种子进行刷流准入
+        """
         if not torrents:
             logger.info(f"站点 {siteinfo.name} 没有获取到种子")
             return True
@@ -2143,19 +2378,19 @@ class BrushFlowLowFreq(_PluginBase):
 
         # 排除包含订阅的种子
         if brush_config.except_subscribe:
-            torrents = self.__filter_torrents_contains_subscribe(torrents=torrents, subscribe_titles=subscribe_titles)
+            torrents = self.__filter_torrents_contains_subscribe(torrents=torrents,
+                                                                 subscribe_matcher=subscribe_matcher)
 
         # 按发布日期降序排列
         torrents.sort(key=lambda x: x.pubdate or '', reverse=True)
 
-        torrents_size = self.__calculate_seeding_torrents_size(torrent_tasks=torrent_tasks)
-
         logger.info(f"正在准备种子刷流，数量 {len(torrents)}")
 
         # 过滤种子
         for torrent in torrents:
             # 判断能否通过刷流前置条件
-            pre_condition_passed, reason = self.__evaluate_pre_conditions_for_brush(include_network_conditions=False)
+            pre_condition_passed, reason = self.__evaluate_pre_conditions_for_brush(snapshot=snapshot,
+                                                                                    include_network_conditions=False)
             self.__log_brush_conditions(passed=pre_condition_passed, reason=reason)
             if not pre_condition_passed:
                 return False
@@ -2163,8 +2398,8 @@ class BrushFlowLowFreq(_PluginBase):
             logger.debug(f"种子详情：{torrent}")
 
             # 判断能否通过保种体积刷流条件
-            size_condition_passed, reason = self.__evaluate_size_condition_for_brush(torrents_size=torrents_size,
-                                                                                     add_torrent_size=torrent.size)
+            size_condition_passed, reason = self.__evaluate_size_condition_for_brush(
+                torrents_size=snapshot.seeding_size, add_torrent_size=torrent.size)
             self.__log_brush_conditions(passed=size_condition_passed, reason=reason, torrent=torrent)
             if not size_condition_passed:
                 continue
@@ -2228,7 +2463,7 @@ class BrushFlowLowFreq(_PluginBase):
             torrent_tasks[hash_string] = torrent_task
 
             # 统计数据
-            torrents_size += torrent.size
+            snapshot.add_torrent(size=torrent.size)
             statistic_info["count"] += 1
             logger.info(f"站点 {siteinfo.name}，新增刷流种子下载：{torrent.title}|{torrent.description}")
             self.__send_add_message(torrent)
@@ -2280,19 +2515,32 @@ class BrushFlowLowFreq(_PluginBase):
 
         return True, None
 
-    def __evaluate_pre_conditions_for_brush(self, include_network_conditions: bool = True) \
+    def __capture_brush_snapshot(self, torrents_size: float) -> BrushSnapshot:
+        """
+        采集本轮刷流的下载器状态快照，准入前仅再刷新一次同时下载数，站点准入过程中不再请求下载器
+        """
+        brush_config = self.__get_brush_config()
+        downloading_count = self.__get_downloading_count() if brush_config.maxdlcount else 0
+        upload_speed, download_speed = None, None
+        if brush_config.maxupspeed or brush_config.maxdlspeed:
+            upload_speed, download_speed = self.__get_average_bandwidth()
+        self._brush_snapshot = BrushSnapshot(downloading_count=downloading_count, seeding_size=torrents_size,
+                                             upload_speed=upload_speed, download_speed=download_speed)
+        logger.debug(f"刷流下载器状态快照：{self._brush_snapshot}")
+        return self._brush_snapshot
+
+    def __evaluate_pre_conditions_for_brush(self, snapshot: BrushSnapshot, include_network_conditions: bool = True) \
             -> Tuple[bool, Optional[str]]:
         """
-        前置过滤不符合条件的种子
+        前置过滤不符合条件的种子，仅读取快照，不再请求下载器
         """
         reasons = [
-            ("maxdlcount", lambda config: self.__get_downloading_count() >= int(config),
+            ("maxdlcount", lambda config: snapshot.downloading_count >= int(config),
              lambda config: f"当前同时下载任务数已达到最大值 {config}，暂时停止新增任务")
         ]
 
         if include_network_conditions:
-            # 获取平均带宽
-            avg_upload_speed, avg_download_speed = self.__get_average_bandwidth()
+            avg_upload_speed, avg_download_speed = snapshot.upload_speed, snapshot.download_speed
             if avg_upload_speed is not None and avg_download_speed is not None:
                 reasons.extend([
                     ("maxupspeed", lambda config: avg_upload_speed >= float(config) * 1024,
@@ -2427,8 +2675,9 @@ class BrushFlowLowFreq(_PluginBase):
 
         with lock:
             logger.info("开始检查刷流下载任务 ...")
-            torrent_tasks: Dict[str, dict] = self.get_data("torrents") or {}
-            unmanaged_tasks: Dict[str, dict] = self.get_data("unmanaged") or {}
+            task_store = self.__get_task_store()
+            torrent_tasks: Dict[str, dict] = task_store.tasks("torrents")
+            unmanaged_tasks: Dict[str, dict] = task_store.tasks("unmanaged")
 
             downloader = self.downloader
             seeding_torrents, error = downloader.get_torrents()
@@ -2513,8 +2762,6 @@ class BrushFlowLowFreq(_PluginBase):
 
             self.__update_and_save_statistic_info(torrent_tasks)
 
-            self.save_data("torrents", torrent_tasks)
-
             logger.info("刷流下载任务检查完成")
 
     def __update_torrent_tasks_state(self, torrents: List[Any], torrent_tasks: Dict[str, dict]):
@@ -2591,8 +2838,9 @@ class BrushFlowLowFreq(_PluginBase):
                     logger.info(f"站点 {torrent_task.get('site_name')}，"
                                 f"刷流任务种子移除：{torrent_task.get('title')}|{torrent_task.get('description')}")
 
-        self.save_data("torrents", torrent_tasks)
-        self.save_data("unmanaged", unmanaged_tasks)
+        task_store = self.__get_task_store()
+        task_store.save("torrents", torrent_tasks)
+        task_store.save("unmanaged", unmanaged_tasks)
 
         # 发送汇总消息
         if added_tasks:
@@ -2976,7 +3224,7 @@ class BrushFlowLowFreq(_PluginBase):
         active_uploaded, active_downloaded, active_count, total_unarchived = 0, 0, 0, 0
 
         statistic_info = self.__get_statistic_info()
-        archived_tasks = self.get_data("archived") or {}
+        archived_tasks = self.__get_task_store().tasks("archived")
         combined_tasks = {**torrent_tasks, **archived_tasks}
 
         for task in combined_tasks.values():
@@ -3015,7 +3263,27 @@ class BrushFlowLowFreq(_PluginBase):
                     f"总下载量：{StringUtils.str_filesize(total_downloaded)}")
 
         self.save_data("statistic", statistic_info)
-        self.save_data("torrents", torrent_tasks)
+        saved_count = self.__get_task_store().save("torrents", torrent_tasks)
+        logger.debug(f"刷流任务已保存，本次写入记录数：{saved_count}")
+
+    def __get_task_store(self) -> BrushTaskStore:
+        """
+        获取刷流任务存储，首次使用时打开数据库并迁移旧版插件数据
+        """
+        with self._task_store_lock:
+            if not self._task_store:
+                task_store = BrushTaskStore(db_path=self.get_data_path() / "tasks.db")
+                migrated_count = task_store.migrate(get_data=self.get_data)
+                if migrated_count:
+                    logger.info(f"已将旧版刷流任务数据迁移至任务存储，迁移记录数：{migrated_count}")
+                self._task_store = task_store
+            return self._task_store
+
+    def get_brush_tasks(self) -> Dict[str, dict]:
+        """
+        获取刷流任务，供刷流种子整理等插件通过插件方法读取
+        """
+        return self.__get_task_store().tasks("torrents")
 
     def __get_brush_config(self, sitename: str = None) -> BrushConfig:
         """
@@ -3048,7 +3316,10 @@ class BrushFlowLowFreq(_PluginBase):
             "seed_inactivetime": "未活动时间",
             "up_speed": "单任务上传限速",
             "dl_speed": "单任务下载限速",
-            "auto_archive_days": "自动清理记录天数"
+            "auto_archive_days": "自动清理记录天数",
+            "bandwidth_sample_interval": "带宽采样间隔",
+            "bandwidth_sample_window": "带宽采样次数",
+            "bandwidth_sample_max_age": "带宽采样有效期"
         }
 
         config_range_number_attr_to_desc = {
@@ -3129,6 +3400,9 @@ class BrushFlowLowFreq(_PluginBase):
             "proxy_delete": brush_config.proxy_delete,
             "active_time_range": brush_config.active_time_range,
             "cron": brush_config.cron,
+            "bandwidth_sample_interval": brush_config.bandwidth_sample_interval,
+            "bandwidth_sample_window": brush_config.bandwidth_sample_window,
+            "bandwidth_sample_max_age": brush_config.bandwidth_sample_max_age,
             "qb_category": brush_config.qb_category,
             "enable_site_config": brush_config.enable_site_config,
             "site_config": brush_config.site_config,
@@ -3662,37 +3936,63 @@ class BrushFlowLowFreq(_PluginBase):
         获取任务中的种子总大小
         """
         # 读取种子记录
-        task_info = self.get_data("torrents") or {}
+        task_info = self.__get_task_store().tasks("torrents")
         if not task_info:
             return 0
         total_size = sum([task.get("size") or 0 for task in task_info.values()])
         return total_size
 
-    def __get_average_bandwidth(self, sample_count: int = 5, interval: float = 3.0) \
-            -> Tuple[Optional[float], Optional[float]]:
+    def __start_bandwidth_sampler(self):
         """
-        多次采样上传和下载带宽，取平均值
+        启动后台带宽采样
         """
-        upload_speeds = []
-        download_speeds = []
-        start_time = time.time()
-        for _ in range(sample_count):
+        self.__stop_bandwidth_sampler()
+
+        def fetch() -> Optional[Tuple[float, float]]:
+            # 下载器未连接时静默跳过本次采样，避免后台线程频繁发送错误通知
+            service = self.downloader_helper.get_service(name=self.__get_brush_config().downloader)
+            if not service or service.instance.is_inactive():
+                return None
             downloader_info = self.__get_downloader_info()
-            if downloader_info:
-                upload_speeds.append(downloader_info.upload_speed or 0)
-                download_speeds.append(downloader_info.download_speed or 0)
-            # 采样间隔
-            time.sleep(interval)
-        end_time = time.time()
-        total_duration = end_time - start_time
-        if not upload_speeds or not download_speeds:
+            return downloader_info.upload_speed or 0, downloader_info.download_speed or 0
+
+        brush_config = self.__get_brush_config()
+        # 仅在开启时间段内采样，时间段外不会刷流，也就不需要持续请求下载器
+        self._bandwidth_sampler = BandwidthSampler(fetch=fetch, window=brush_config.bandwidth_sample_window,
+                                                   interval=brush_config.bandwidth_sample_interval,
+                                                   max_age=brush_config.bandwidth_sample_max_age,
+                                                   active=self.__is_current_time_in_range)
+        self._bandwidth_sampler.start()
+        logger.info(f"后台带宽采样已启动，采样间隔 {brush_config.bandwidth_sample_interval} 秒，"
+                    f"窗口 {brush_config.bandwidth_sample_window} 次，"
+                    f"有效期 {brush_config.bandwidth_sample_max_age} 秒")
+
+    def __stop_bandwidth_sampler(self):
+        """
+        停止后台带宽采样
+        """
+        if self._bandwidth_sampler:
+            self._bandwidth_sampler.stop()
+            self._bandwidth_sampler = None
+
+    def __get_average_bandwidth(self) -> Tuple[Optional[float], Optional[float]]:
+        """
+        读取后台采样的上传和下载带宽滑动平均值，没有有效采样时实时采样一次
+        """
+        sampler = self._bandwidth_sampler
+        if sampler:
+            avg_upload_speed, avg_download_speed = sampler.average()
+            if avg_upload_speed is not None and avg_download_speed is not None:
+                logger.debug(f"平均上传带宽 {StringUtils.str_filesize(avg_upload_speed)}, "
+                             f"平均下载带宽 {StringUtils.str_filesize(avg_download_speed)}, "
+                             f"有效采样次数={len(sampler)}")
+                return avg_upload_speed, avg_download_speed
+            logger.debug("后台带宽采样暂无有效数据，实时采样一次")
+
+        downloader_info = self.__get_downloader_info()
+        if not downloader_info:
             return None, None
-        avg_upload_speed = sum(upload_speeds) / len(upload_speeds) if upload_speeds else 0
-        avg_download_speed = sum(download_speeds) / len(download_speeds) if download_speeds else 0
-        logger.debug(f"平均上传带宽 {StringUtils.str_filesize(avg_upload_speed)}, "
-                     f"平均下载带宽 {StringUtils.str_filesize(avg_download_speed)}, "
-                     f"采样次数={sample_count}, 时长={total_duration:.2f} 秒")
-        return avg_upload_speed, avg_download_speed
+        return downloader_info.upload_speed or 0, downloader_info.download_speed or 0
 
     def __get_downloader_info(self) -> schemas.DownloaderInfo:
         """
@@ -3856,8 +4156,20 @@ class BrushFlowLowFreq(_PluginBase):
         unique_titles = {title for titles in self._subscribe_infos.values() for title in titles}
         return unique_titles
 
+    def __get_subscribe_matcher(self, subscribe_titles: Set[str]) -> SubscribeTitleMatcher:
+        """
+        获取订阅标题匹配器，订阅标题集合未变化时复用已构建的自动机
+        """
+        matcher = self._subscribe_matcher
+        if matcher is None or matcher.titles != frozenset(subscribe_titles):
+            version = matcher.version + 1 if matcher else 1
+            matcher = SubscribeTitleMatcher(titles=subscribe_titles, version=version)
+            self._subscribe_matcher = matcher
+            logger.debug(f"订阅标题集合已变化，重建订阅标题匹配器，版本 {version}，标题数 {len(matcher)}")
+        return matcher
+
     @staticmethod
-    def __filter_torrents_contains_subscribe(torrents: Any, subscribe_titles: Set[str]):
+    def __filter_torrents_contains_subscribe(torrents: Any, subscribe_matcher: SubscribeTitleMatcher):
         # 初始化两个列表，一个用于收集未被排除的种子，一个用于记录被排除的种子
         included_torrents = []
         excluded_torrents = []
@@ -3868,7 +4180,7 @@ class BrushFlowLowFreq(_PluginBase):
             title = torrent.title or ''
             description = torrent.description or ''
 
-            if any(subscribe_title in title or subscribe_title in description for subscribe_title in subscribe_titles):
+            if subscribe_matcher.matches(title, description):
                 # 如果种子的标题或描述包含订阅标题中的任一项，则记录为被排除
                 excluded_torrents.append(torrent)
                 logger.info(f"命中订阅内容，排除种子：{title}|{description}")
@@ -3927,8 +4239,7 @@ class BrushFlowLowFreq(_PluginBase):
             logger.info("自动归档记录天数小于等于0，取消自动归档")
             return
 
-        # 用于存储已删除的数据
-        archived_tasks: Dict[str, dict] = self.get_data("archived") or {}
+        task_store = self.__get_task_store()
 
         current_time = time.time()
         archive_threshold_seconds = self._brush_config.auto_archive_days * 86400  # 将天数转换为秒数
@@ -3943,29 +4254,28 @@ class BrushFlowLowFreq(_PluginBase):
             if (value.get("deleted") and isinstance(deleted_time, (int, float)) and
                     current_time - deleted_time > archive_threshold_seconds):
                 keys_to_delete.add(key)
-                archived_tasks[key] = value
+                task_store.upsert("archived", key, value)
                 continue
 
             # 场景 2: 检查没有明确删除时间的历史数据
             if value.get("deleted") and deleted_time is None:
                 keys_to_delete.add(key)
-                archived_tasks[key] = value
+                task_store.upsert("archived", key, value)
                 continue
 
         # 从原始字典中移除已删除的条目
         for key in keys_to_delete:
             del torrent_tasks[key]
+            task_store.remove("torrents", key)
 
-        self.save_data("archived", archived_tasks)
+        task_store.flush()
 
     def __clear_tasks(self):
         """
         清除统计数据
         彻底重置所有刷流数据，如当前还存在正在做种的刷流任务，待定时检查任务执行后，会自动纳入刷流管理
         """
-        self.save_data("torrents", {})
-        self.save_data("archived", {})
-        self.save_data("unmanaged", {})
+        self.__get_task_store().clear()
         self.save_data("statistic", {})
 
     def __get_statistic_info(self) -> Dict[str, int]:
@@ -4087,9 +4397,10 @@ class BrushFlowLowFreq(_PluginBase):
         # 双向数据同步官方插件数据，以本地插件的数据为准
         if config.get("sync_official"):
             # 获取本地数据
-            from_torrents = self.get_data("torrents") or {}
-            from_archived = self.get_data("archived") or {}
-            from_unmanaged = self.get_data("unmanaged") or {}
+            task_store = self.__get_task_store()
+            from_torrents = task_store.tasks("torrents")
+            from_archived = task_store.tasks("archived")
+            from_unmanaged = task_store.tasks("unmanaged")
 
             # 获取官方插件数据
             to_torrents = self.get_data("torrents", "BrushFlow") or {}
@@ -4102,9 +4413,9 @@ class BrushFlowLowFreq(_PluginBase):
             merged_unmanaged = {**to_unmanaged, **from_unmanaged}
 
             # 双向保存插件数据
-            self.save_data("torrents", merged_torrents)
-            self.save_data("archived", merged_archived)
-            self.save_data("unmanaged", merged_unmanaged)
+            task_store.save("torrents", merged_torrents)
+            task_store.save("archived", merged_archived)
+            task_store.save("unmanaged", merged_unmanaged)
             self.save_data("torrents", merged_torrents, "BrushFlow")
             self.save_data("archived", merged_archived, "BrushFlow")
             self.save_data("unmanaged", merged_unmanaged, "BrushFlow")
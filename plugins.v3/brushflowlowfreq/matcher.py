@@ -0,0 +1,86 @@
+"""
+matcher.py
+
+这个模块定义了订阅标题多模式匹配器 `SubscribeTitleMatcher`，基于 Aho-Corasick 自动机，
+一次扫描即可判断文本是否包含任一订阅标题，匹配耗时只与文本长度相关，与订阅标题数量无关
+"""
+from collections import deque
+from typing import Dict, FrozenSet, Iterable, List, Optional
+
+
+class SubscribeTitleMatcher:
+    """
+    订阅标题匹配器
+    按订阅标题集合构建一次自动机，订阅标题集合不变时可在多个站点、多轮刷流之间复用
+    """
+
+    def __init__(self, titles: Iterable[str], version: int = 0):
+        """
+        :param titles: 订阅标题集合，空白标题会被忽略
+        :param version: 订阅标题集合版本，每次重建自动机时递增
+        """
+        self.titles: FrozenSet[str] = frozenset(title for title in titles if title)
+        self.version = version
+        # 状态转移表，goto[state][char] -> 下一状态
+        self._goto: List[Dict[str, int]] = [{}]
+        # 失败指针
+        self._fail: List[int] = [0]
+        # 命中的订阅标题，沿失败指针继承，保证后缀命中不会遗漏
+        self._output: List[Optional[str]] = [None]
+        self.__build()
+
+    def __build(self):
+        """
+        构建字典树并按层序计算失败指针
+        """
+        for title in self.titles:
+            state = 0
+            for char in title:
+                next_state = self._goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto[state][char] = next_state
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append(None)
+                state = next_state
+            self._output[state] = title
+
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                fail_state = self._goto[fail].get(char, 0)
+                self._fail[next_state] = fail_state if fail_state != next_state else 0
+                if self._output[next_state] is None:
+                    self._output[next_state] = self._output[self._fail[next_state]]
+
+    def search(self, text: str) -> Optional[str]:
+        """
+        查找文本中包含的第一个订阅标题
+        :return: 命中的订阅标题，未命中时返回 None
+        """
+        if not text or not self.titles:
+            return None
+        goto, fail, output = self._goto, self._fail, self._output
+        state = 0
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if output[state] is not None:
+                return output[state]
+        return None
+
+    def matches(self, *texts: str) -> bool:
+        """
+        判断任一文本是否包含订阅标题
+        """
+        return any(self.search(text) is not None for text in texts)
+
+    def __len__(self):
+        return len(self.titles)
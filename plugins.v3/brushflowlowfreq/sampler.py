@@ -0,0 +1,129 @@
+"""
+sampler.py
+
+这个模块定义了下载器带宽采样器 `BandwidthSampler`，在后台线程中按固定间隔采样上传、下载速度，
+以环形缓冲区保存最近的采样结果，刷流时直接读取滑动平均值，不再阻塞等待采样；
+可指定采样时段判断函数，时段外暂停请求下载器
+"""
+import threading
+import time
+from collections import deque
+from typing import Callable, Deque, Optional, Tuple
+
+from app.sdk.logging import logger
+
+# 采样结果：(上传速度, 下载速度)
+Bandwidth = Tuple[Optional[float], Optional[float]]
+
+
+class BandwidthSampler:
+    """
+    后台带宽采样器
+    """
+
+    def __init__(self, fetch: Callable[[], Optional[Tuple[float, float]]], window: int = 5,
+                 interval: float = 30.0, max_age: float = 300.0, clock: Callable[[], float] = time.monotonic,
+                 active: Optional[Callable[[], bool]] = None):
+        """
+        :param fetch: 获取一次实时上传、下载速度的函数，失败时返回 None
+        :param window: 滑动窗口保留的采样次数
+        :param interval: 采样间隔（秒）
+        :param max_age: 采样结果的最长有效时间（秒），超过后不再参与平均
+        :param clock: 时钟函数，便于测试替换
+        :param active: 判断当前是否需要采样的函数，返回 False 时跳过本次采样，不传则始终采样
+        """
+        self._fetch = fetch
+        self.window = max(1, int(window))
+        self.interval = max(0.1, float(interval))
+        self.max_age = float(max_age)
+        self._clock = clock
+        self._active = active
+        # 环形缓冲区，元素为 (采样时间, 上传速度, 下载速度)
+        self._samples: Deque[Tuple[float, float, float]] = deque(maxlen=self.window)
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        """
+        采样线程是否正在运行
+        """
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        """
+        启动后台采样线程，启动时立即采样一次
+        """
+        if self.running:
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self.__run, name="brushflowlowfreq-bandwidth", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None):
+        """
+        停止后台采样线程并清空采样结果
+        """
+        self._stop_event.set()
+        thread = self._thread
+        if thread and thread is not threading.current_thread():
+            thread.join(timeout=timeout if timeout is not None else self.interval)
+        self._thread = None
+        with self._lock:
+            self._samples.clear()
+
+    def __run(self):
+        """
+        采样循环
+        """
+        while not self._stop_event.is_set():
+            if self.__is_active():
+                self.sample_once()
+            self._stop_event.wait(self.interval)
+
+    def __is_active(self) -> bool:
+        """
+        当前是否处于需要采样的时段，判断失败时按需要采样处理
+        """
+        if not self._active:
+            return True
+        try:
+            return bool(self._active())
+        except Exception as e:
+            logger.debug(f"带宽采样时段判断失败：{e}")
+            return True
+
+    def sample_once(self) -> bool:
+        """
+        采样一次，并写入环形缓冲区
+        :return: 是否采样成功
+        """
+        try:
+            bandwidth = self._fetch()
+        except Exception as e:
+            logger.debug(f"带宽采样失败：{e}")
+            return False
+        if not bandwidth:
+            return False
+        upload_speed, download_speed = bandwidth
+        with self._lock:
+            self._samples.append((self._clock(), upload_speed or 0, download_speed or 0))
+        return True
+
+    def average(self) -> Bandwidth:
+        """
+        获取未过期采样结果的滑动平均值
+        :return: (平均上传速度, 平均下载速度)，没有有效采样时返回 (None, None)
+        """
+        now = self._clock()
+        with self._lock:
+            samples = [sample for sample in self._samples if now - sample[0] <= self.max_age]
+        if not samples:
+            return None, None
+        return (sum(sample[1] for sample in samples) / len(samples),
+                sum(sample[2] for sample in samples) / len(samples))
+
+    def __len__(self):
+        with self._lock:
+            return len(self._samples)
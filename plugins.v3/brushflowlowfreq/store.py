@@ -0,0 +1,194 @@
+"""
+store.py
+
+这个模块定义了刷流任务存储 `BrushTaskStore`，按状态和 hash 保存任务记录，
+只将发生变更的记录增量写入 SQLite，避免每次检查都重新序列化全部任务数据。
+数据库中的删除标记列供插件停用时其他插件（如刷流种子整理）直接按未删除任务读取
+"""
+import json
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Callable, Dict, Optional, Set, Tuple, Union
+
+# 任务状态，与旧版插件数据的 key 保持一致，便于迁移和同步官方插件数据
+TASK_STATES = ("torrents", "unmanaged", "archived")
+
+# 记录主键：(状态, hash)
+TaskKey = Tuple[str, str]
+
+
+class BrushTaskStore:
+    """
+    刷流任务存储
+    内存中保存全部任务供插件读取，写入时与上次持久化的记录逐条比对，仅持久化新增、变更或移除的记录
+    """
+
+    def __init__(self, db_path: Union[str, Path]):
+        """
+        :param db_path: SQLite 数据库文件路径，传入 ":memory:" 时仅保存在内存中
+        """
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(str(db_path), check_same_thread=False)
+        self._create_schema()
+        # 各状态下的任务记录，hash -> 任务
+        self._tasks: Dict[str, Dict[str, dict]] = {state: {} for state in TASK_STATES}
+        # 待持久化的记录，值为 None 表示需要移除
+        self._dirty: Dict[TaskKey, Optional[dict]] = {}
+        self._load()
+
+    def _create_schema(self):
+        """
+        创建任务表及索引
+        """
+        with self._conn:
+            self._conn.execute("CREATE TABLE IF NOT EXISTS tasks ("
+                               "state TEXT NOT NULL, "
+                               "hash TEXT NOT NULL, "
+                               "site TEXT, "
+                               "deleted INTEGER NOT NULL DEFAULT 0, "
+                               "data TEXT NOT NULL, "
+                               "PRIMARY KEY (state, hash))")
+            self._conn.execute("DROP INDEX IF EXISTS idx_tasks_site")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_tasks_deleted ON tasks (state, deleted)")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+
+    def _load(self):
+        """
+        从数据库加载全部任务
+        """
+        with self._lock:
+            for state, task_hash, data in self._conn.execute("SELECT state, hash, data FROM tasks"):
+                if state not in self._tasks:
+                    continue
+                self._tasks[state][task_hash] = json.loads(data)
+
+    def get(self, state: str, task_hash: str) -> Optional[dict]:
+        """
+        获取单条任务记录的副本
+        """
+        with self._lock:
+            task = self._tasks[state].get(task_hash)
+            return dict(task) if task is not None else None
+
+    def tasks(self, state: str = "torrents") -> Dict[str, dict]:
+        """
+        获取指定状态下全部任务的副本，调用方修改后通过 save 写回
+        """
+        with self._lock:
+            return {task_hash: dict(task) for task_hash, task in self._tasks[state].items()}
+
+    def count(self, state: str = "torrents") -> int:
+        """
+        获取指定状态下的任务数量
+        """
+        with self._lock:
+            return len(self._tasks[state])
+
+    def upsert(self, state: str, task_hash: str, task: dict):
+        """
+        新增或更新单条任务记录
+        """
+        with self._lock:
+            key = (state, task_hash)
+            if self._tasks[state].get(task_hash) == task:
+                return
+            task = dict(task)
+            self._tasks[state][task_hash] = task
+            self._dirty[key] = task
+
+    def remove(self, state: str, task_hash: str):
+        """
+        移除单条任务记录
+        """
+        with self._lock:
+            if self._tasks[state].pop(task_hash, None) is None:
+                return
+            self._dirty[(state, task_hash)] = None
+
+    def save(self, state: str, tasks: Dict[str, dict]) -> int:
+        """
+        将调用方修改后的任务集合写回存储，仅持久化发生变化的记录
+        :return: 本次持久化的记录数
+        """
+        with self._lock:
+            for task_hash in set(self._tasks[state]) - set(tasks):
+                self.remove(state, task_hash)
+            for task_hash, task in tasks.items():
+                self.upsert(state, task_hash, task)
+            return self.flush()
+
+    @property
+    def dirty(self) -> Set[TaskKey]:
+        """
+        尚未持久化的记录主键
+        """
+        with self._lock:
+            return set(self._dirty)
+
+    def flush(self) -> int:
+        """
+        在单个事务中持久化全部待写入记录
+        :return: 本次持久化的记录数
+        """
+        with self._lock:
+            if not self._dirty:
+                return 0
+            upserts = [(state, task_hash, self._site_value(task), 1 if task.get("deleted") else 0,
+                        json.dumps(task, ensure_ascii=False))
+                       for (state, task_hash), task in self._dirty.items() if task is not None]
+            removes = [key for key, task in self._dirty.items() if task is None]
+            with self._conn:
+                if removes:
+                    self._conn.executemany("DELETE FROM tasks WHERE state = ? AND hash = ?", removes)
+                if upserts:
+                    self._conn.executemany("INSERT OR REPLACE INTO tasks (state, hash, site, deleted, data) "
+                                           "VALUES (?, ?, ?, ?, ?)", upserts)
+            written = len(self._dirty)
+            self._dirty.clear()
+            return written
+
+    @staticmethod
+    def _site_value(task: dict) -> Optional[str]:
+        """
+        站点ID统一按字符串落库
+        """
+        site = task.get("site")
+        return str(site) if site is not None else None
+
+    def clear(self):
+        """
+        清空全部任务记录，保留迁移标记
+        """
+        with self._lock:
+            with self._conn:
+                self._conn.execute("DELETE FROM tasks")
+            self._tasks = {state: {} for state in TASK_STATES}
+            self._dirty.clear()
+
+    def migrate(self, get_data: Callable[[str], Optional[Dict[str, dict]]]) -> int:
+        """
+        从旧版插件数据（torrents、unmanaged、archived 三个整体 JSON）迁移任务记录，仅执行一次
+        :param get_data: 按 key 读取旧版插件数据的函数
+        :return: 迁移的记录数，已迁移过时返回 0
+        """
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM meta WHERE key = 'migrated'").fetchone()
+            if row:
+                return 0
+            for state in TASK_STATES:
+                for task_hash, task in (get_data(state) or {}).items():
+                    if isinstance(task, dict):
+                        self.upsert(state, task_hash, task)
+            migrated = self.flush()
+            with self._conn:
+                self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('migrated', '1')")
+            return migrated
+
+    def close(self):
+        """
+        持久化剩余记录并关闭数据库连接
+        """
+        with self._lock:
+            self.flush()
+            self._conn.close()
@@ -14,6 +14,7 @@ from app.sdk.logging import logger
 from app.sdk.media import MediaInfo, MetaBase
 from app.sdk.services import MediaServerHelper
 from app.plugins import _PluginBase
+from .helper import close_disk_cache, setup_disk_cache
 from .scrape import ScrapeHelper
 from app.schemas import ServiceInfo
 from app.schemas.types import EventType, NotificationType
@@ -59,6 +60,8 @@ class PlexPersonMeta(_PluginBase):
     _delay = None
     # 最近一次入库时间
     _transfer_time = None
+    # 最近一次刮削发出的 Plex 请求数
+    _plex_requests = 0
     # 清理缓存
     _clear_cache = None
     # 定时器
@@ -102,6 +105,13 @@ class PlexPersonMeta(_PluginBase):
         # 停止现有任务
         self.stop_service()
 
+        # 磁盘缓存作为内存缓存的二级缓存，重启后仍可复用识别结果
+        if self._enabled or self._clear_cache:
+            try:
+                setup_disk_cache(db_path=self.get_data_path() / "cache.db")
+            except Exception as e:
+                logger.warning(f"{self.plugin_name} 磁盘缓存初始化失败，仅使用内存缓存：{e}")
+
         # 启动服务
         self._scheduler = BackgroundScheduler(timezone=settings.TZ)
         if self._clear_cache:
@@ -217,6 +227,7 @@ class PlexPersonMeta(_PluginBase):
         except Exception as e:
             logger.info(str(e))
         finally:
+            close_disk_cache()
             self._event.clear()
 
     def get_form(self) -> Tuple[List[dict], Dict[str, Any]]:
@@ -476,7 +487,8 @@ class PlexPersonMeta(_PluginBase):
                             {
                                 'component': 'VCol',
                                 'props': {
-                                    'cols': 12
+                                    'cols': 12,
+                                    'md': 8
                                 },
                                 'content': [
                                     {
@@ -494,6 +506,71 @@ class PlexPersonMeta(_PluginBase):
                                     }
                                 ],
                             },
+                            {
+                                'component': 'VCol',
+                                'props': {
+                                    'cols': 12,
+                                    'md': 4
+                                },
+                                'content': [
+                                    {
+                                        'component': 'VTextField',
+                                        'props': {
+                                            'model': 'page_size',
+                                            'label': '分页大小',
+                                            'type': 'number',
+                                            'placeholder': '500',
+                                            'hint': '分页读取媒体库时每页的条目数',
+                                            'persistent-hint': True
+                                        },
+                                    }
+                                ],
+                            },
+                        ],
+                    },
+                    {
+                        'component': 'VRow',
+                        'content': [
+                            {
+                                'component': 'VCol',
+                                'props': {
+                                    'cols': 12,
+                                    'md': 4
+                                },
+                                'content': [
+                                    {
+                                        'component': 'VTextField',
+                                        'props': {
+                                            'model': 'douban_rate',
+                                            'label': '豆瓣查询速率',
+                                            'type': 'number',
+                                            'placeholder': '0.2',
+                                            'hint': '豆瓣每秒平均查询数，匹配及详情各计一次',
+                                            'persistent-hint': True
+                                        },
+                                    }
+                                ],
+                            },
+                            {
+                                'component': 'VCol',
+                                'props': {
+                                    'cols': 12,
+                                    'md': 4
+                                },
+                                'content': [
+                                    {
+                                        'component': 'VTextField',
+                                        'props': {
+                                            'model': 'douban_burst',
+                                            'label': '豆瓣连续查询数',
+                                            'type': 'number',
+                                            'placeholder': '3',
+                                            'hint': '空闲后允许连续发出的豆瓣查询数',
+                                            'persistent-hint': True
+                                        },
+                                    }
+                                ],
+                            },
                         ],
                     },
                     {
@@ -728,9 +805,12 @@ class PlexPersonMeta(_PluginBase):
             "execute_transfer": False,
             "delay": 200,
             "scrape_type": "all",
+            "page_size": 500,
             "remove_no_zh": False,
             # "reserve_tag_key": False,
-            "douban_scrape": True
+            "douban_scrape": True,
+            "douban_rate": 0.2,
+            "douban_burst": 3
         }
 
     def get_page(self) -> List[dict]:
@@ -891,6 +971,7 @@ class PlexPersonMeta(_PluginBase):
 
         with lock:
             overall_start_time = time.time()
+            self._plex_requests = 0
             plugin_config = self.get_config()
             service_libraries = self.__get_service_libraries()
             for service_name, libraries in service_libraries.items():
@@ -906,23 +987,31 @@ class PlexPersonMeta(_PluginBase):
                 for library_id, library in libraries.items():
                     logger.info(f"开始刮削媒体库 {library.title} 的演员信息 ...")
                     try:
-                        rating_items = scrape_helper.list_rating_items(library=library)
-                        if not rating_items:
+                        # 分页读取媒体库，读取到第一页后即开始刮削
+                        rating_items = scrape_helper.iter_rating_items(library=library)
+                        count = scrape_helper.scrape_rating_items(rating_items=rating_items)
+                        if scrape_helper.listing_incomplete:
+                            logger.warning(f"媒体库 {library.title} 分页获取失败，本次仅刮削了已读取的 {count} 个媒体项，"
+                                           f"扫描不完整，下次运行时将重新扫描")
+                            continue
+                        if not count:
                             logger.info(f"媒体库 {library.title} 没有找到任何媒体信息，跳过刮削")
                             continue
-
-                        scrape_helper.scrape_rating_items(rating_items=rating_items)
                         logger.info(f"媒体库 {library.title} 的演员信息刮削完成")
                     except Exception as e:
                         logger.error(f"媒体库 {library.title} 刮削过程中出现异常，{str(e)}")
 
                 service_elapsed_time = time.time() - service_start_time
-                logger.info(f"媒体服务器 {service.name} 处理完成，耗时 {service_elapsed_time:.2f} 秒")
+                scrape_helper.close()
+                self._plex_requests += scrape_helper.plex_requests
+                person_stats = scrape_helper.person_stats()
+                logger.info(f"媒体服务器 {service.name} 处理完成，耗时 {service_elapsed_time:.2f} 秒，"
+                            f"人物共出现 {person_stats['requested']} 次，实际获取 {person_stats['fetched']} 次")
 
             overall_elapsed_time = time.time() - overall_start_time
             message_text = f"演员信息刮削完成，用时 {overall_elapsed_time:.2f} 秒"
             self.__send_message(title="【媒体库演员信息刮削】", text=message_text)
-            logger.info(message_text)
+            logger.info(f"{message_text}，共发出 Plex 请求 {self._plex_requests} 次")
 
     def scrape_library_by_added_time(self, added_time: int):
         """根据入库时间刮削媒体库中的演员信息"""
@@ -931,6 +1020,7 @@ class PlexPersonMeta(_PluginBase):
 
         with lock:
             overall_start_time = time.time()
+            self._plex_requests = 0
             plugin_config = self.get_config()
             service_libraries = self.__get_service_libraries()
             for service_name, libraries in service_libraries.items():
@@ -943,16 +1033,18 @@ class PlexPersonMeta(_PluginBase):
                                              service=service, libraries=libraries)
                 logger.info(f"开始处理媒体服务器 {service.name} 的媒体库")
 
+                # 最近入库查询与媒体库无关，每个媒体服务器只查询一次，再按媒体库分组
+                try:
+                    recent_added_groups = scrape_helper.group_rating_items_by_added(added_time=added_time)
+                except Exception as e:
+                    logger.error(f"媒体服务器 {service.name} 获取最近入库媒体失败，{e}")
+                    recent_added_groups = {}
+
                 for library_id, library in libraries.items():
                     rating_items = {}
                     episode_items = {}
-                    recent_added_items = scrape_helper.list_rating_items_by_added(added_time=added_time)
-
-                    for rating_item in recent_added_items:
-                        section_id = rating_item.get("librarySectionID")
-                        if section_id != library_id:
-                            continue
 
+                    for rating_item in recent_added_groups.get(library_id, []):
                         rating_key = rating_item.get("ratingKey")
                         if not rating_key:
                             continue
@@ -983,13 +1075,17 @@ class PlexPersonMeta(_PluginBase):
                         scrape_helper.scrape_episode_items(episode_items=episode_items)
 
                 service_elapsed_time = time.time() - service_start_time
-                logger.info(f"媒体服务器 {service.name} 处理完成，耗时 {service_elapsed_time:.2f} 秒")
+                scrape_helper.close()
+                self._plex_requests += scrape_helper.plex_requests
+                person_stats = scrape_helper.person_stats()
+                logger.info(f"媒体服务器 {service.name} 处理完成，耗时 {service_elapsed_time:.2f} 秒，"
+                            f"人物共出现 {person_stats['requested']} 次，实际获取 {person_stats['fetched']} 次")
 
             overall_elapsed_time = time.time() - overall_start_time
             formatted_added_time = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(added_time))
             message_text = f"最近一次入库时间：{formatted_added_time}，演员信息刮削完成，用时 {overall_elapsed_time:.2f} 秒"
             self.__send_message(title="【媒体库演员信息刮削】", text=message_text)
-            logger.info(message_text)
+            logger.info(f"{message_text}，共发出 Plex 请求 {self._plex_requests} 次")
 
     def __send_message(self, title: str, text: str):
         """
@@ -0,0 +1,160 @@
+"""
+cache.py
+
+这个模块定义了磁盘缓存 `PersistentCache`，以 SQLite 按缓存区和键保存识别结果及过期时间，
+作为内存缓存之后的二级缓存，插件重启或升级后仍可复用此前获取的人物和媒体信息
+"""
+import pickle
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Optional, Tuple, Union
+
+from app.sdk.logging import logger
+
+# 缓存结构版本，结构调整后旧数据直接丢弃
+SCHEMA_VERSION = "1"
+# 磁盘缓存最大记录数，超出时优先淘汰最早过期的记录
+MAX_ROWS = 200000
+# 每写入多少条记录清理一次过期记录并检查记录数上限
+PURGE_INTERVAL = 1000
+
+
+class PersistentCache:
+    """
+    磁盘缓存
+    值以 pickle 序列化保存，读取时已过期或无法反序列化（如升级后数据结构变化）的记录视为未命中并移除
+    打开时及每写入 purge_interval 条记录时清理过期记录，记录数超过 max_rows 时淘汰最早过期的记录
+    """
+
+    def __init__(self, db_path: Union[str, Path], clock: Callable[[], float] = time.time,
+                 max_rows: int = MAX_ROWS, purge_interval: int = PURGE_INTERVAL):
+        """
+        :param db_path: SQLite 数据库文件路径，传入 ":memory:" 时仅保存在内存中
+        :param clock: 时钟函数，便于测试替换
+        :param max_rows: 最大记录数
+        :param purge_interval: 清理间隔（写入条数）
+        """
+        self._clock = clock
+        self._max_rows = max(1, max_rows)
+        self._purge_interval = max(1, purge_interval)
+        self._writes = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(db_path), check_same_thread=False)
+        self._create_schema()
+        self.purge_expired()
+
+    def _create_schema(self):
+        """
+        创建缓存表，结构版本不一致时重建
+        """
+        with self._conn:
+            self._conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+            row = self._conn.execute("SELECT value FROM meta WHERE key = 'schema_version'").fetchone()
+            if not row or row[0] != SCHEMA_VERSION:
+                self._conn.execute("DROP TABLE IF EXISTS entries")
+                self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('schema_version', ?)",
+                                   (SCHEMA_VERSION,))
+            self._conn.execute("CREATE TABLE IF NOT EXISTS entries ("
+                               "region TEXT NOT NULL, "
+                               "key TEXT NOT NULL, "
+                               "value BLOB NOT NULL, "
+                               "expires_at REAL NOT NULL, "
+                               "PRIMARY KEY (region, key))")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_entries_expires ON entries (expires_at)")
+
+    def get(self, key: str, region: str) -> Optional[Tuple[Any, float]]:
+        """
+        获取缓存
+        :return: 未命中时返回 None，命中时返回 (缓存值, 过期时间戳)
+        """
+        with self._lock:
+            row = self._conn.execute("SELECT value, expires_at FROM entries WHERE region = ? AND key = ?",
+                                     (region, key)).fetchone()
+            if not row:
+                return None
+            value, expires_at = row
+            if expires_at <= self._clock():
+                self.__delete(key=key, region=region)
+                return None
+            try:
+                return pickle.loads(value), expires_at
+            except Exception as e:
+                logger.debug(f"磁盘缓存 {region} 中的记录无法读取，已移除：{e}")
+                self.__delete(key=key, region=region)
+                return None
+
+    def set(self, key: str, value: Any, ttl: float, region: str) -> bool:
+        """
+        写入缓存
+        :param ttl: 有效期（秒）
+        :return: 是否写入成功，无法序列化的值不写入磁盘
+        """
+        try:
+            data = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception as e:
+            logger.debug(f"缓存值无法序列化，跳过写入磁盘缓存 {region}：{e}")
+            return False
+        with self._lock, self._conn:
+            self._conn.execute("INSERT OR REPLACE INTO entries (region, key, value, expires_at) VALUES (?, ?, ?, ?)",
+                               (region, key, data, self._clock() + ttl))
+            self._writes += 1
+            if self._writes >= self._purge_interval:
+                self._writes = 0
+                self.__purge()
+        return True
+
+    def __purge(self) -> int:
+        """
+        移除已过期的记录，并在超出记录数上限时淘汰最早过期的记录，调用方需持有锁并处于事务中
+        :return: 移除的记录数
+        """
+        removed = self._conn.execute("DELETE FROM entries WHERE expires_at <= ?", (self._clock(),)).rowcount
+        excess = self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0] - self._max_rows
+        if excess > 0:
+            removed += self._conn.execute("DELETE FROM entries WHERE rowid IN ("
+                                          "SELECT rowid FROM entries ORDER BY expires_at LIMIT ?)",
+                                          (excess,)).rowcount
+        return removed
+
+    def __delete(self, key: str, region: str):
+        """
+        移除单条记录，调用方需持有锁
+        """
+        with self._conn:
+            self._conn.execute("DELETE FROM entries WHERE region = ? AND key = ?", (region, key))
+
+    def clear(self, region: Optional[str] = None):
+        """
+        清理指定缓存区，未指定时清理全部
+        """
+        with self._lock, self._conn:
+            if region:
+                self._conn.execute("DELETE FROM entries WHERE region = ?", (region,))
+            else:
+                self._conn.execute("DELETE FROM entries")
+
+    def purge_expired(self) -> int:
+        """
+        移除全部已过期的记录，并将记录数控制在上限以内
+        :return: 移除的记录数
+        """
+        with self._lock, self._conn:
+            return self.__purge()
+
+    def count(self, region: Optional[str] = None) -> int:
+        """
+        统计缓存记录数
+        """
+        with self._lock:
+            if region:
+                return self._conn.execute("SELECT COUNT(*) FROM entries WHERE region = ?", (region,)).fetchone()[0]
+            return self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    def close(self):
+        """
+        关闭数据库连接
+        """
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,207 @@
+"""
+enrich.py
+
+这个模块定义了人物信息补全器 `PersonEnricher`、查询调度器 `LookupScheduler` 以及按数据来源共享的令牌桶限流器
+`RateLimiter`，同一批媒体中重复出现的人物只获取一次，并在限流范围内并发获取，刮削耗时取决于不同人物的数量而不是出现次数
+"""
+import concurrent.futures
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from app.sdk.logging import logger
+
+# 按数据来源共享的限流器
+_rate_limiters: Dict[str, "RateLimiter"] = {}
+_rate_limiters_lock = threading.Lock()
+
+
+class RateLimiter:
+    """
+    令牌桶限流器
+    多个线程共享，令牌按 rate 的速率补充，最多累积 burst 个；令牌不足时按预约顺序排队等待，
+    长期平均请求数不超过 rate，空闲后最多连续发出 burst 个请求
+    """
+
+    def __init__(self, rate: float, burst: int = 1, clock: Callable[[], float] = time.monotonic):
+        """
+        :param rate: 每秒允许的平均请求数
+        :param burst: 允许连续发出的最大请求数
+        :param clock: 时钟函数，便于测试替换
+        """
+        self.rate = rate
+        self.burst = max(1, int(burst))
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._tokens = float(self.burst)
+        self._updated = clock()
+
+    def reserve(self) -> float:
+        """
+        预约一个令牌，令牌可以预支，预支的令牌由后续补充抵扣
+        :return: 需要等待的秒数
+        """
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(float(self.burst), self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            return 0 if self._tokens >= 0 else -self._tokens / self.rate
+
+    def acquire(self, event: Optional[threading.Event] = None) -> bool:
+        """
+        等待至允许发出请求
+        :param event: 停止事件，等待期间设置后立即返回
+        :return: 是否允许发出请求
+        """
+        wait = self.reserve()
+        if wait <= 0:
+            return not (event and event.is_set())
+        if event:
+            return not event.wait(timeout=wait)
+        time.sleep(wait)
+        return True
+
+
+def get_rate_limiter(source: str, rate: float, burst: int = 1) -> RateLimiter:
+    """
+    获取数据来源对应的限流器，同一来源在多个媒体服务器、多次刮削之间共享
+    """
+    with _rate_limiters_lock:
+        limiter = _rate_limiters.get(source)
+        if not limiter:
+            limiter = _rate_limiters[source] = RateLimiter(rate=rate, burst=burst)
+        else:
+            limiter.rate = rate
+            limiter.burst = max(1, int(burst))
+        return limiter
+
+
+class LookupScheduler:
+    """
+    查询调度器
+    查询在后台线程中排队执行，调用方提交后即可继续处理其他条目；相同键的查询只执行一次，结果共享
+    """
+
+    def __init__(self, max_workers: int = 2, thread_name_prefix: str = "plexpersonmeta-lookup"):
+        """
+        :param max_workers: 同时执行的查询数
+        :param thread_name_prefix: 线程名前缀
+        """
+        self.max_workers = max(1, int(max_workers))
+        self._thread_name_prefix = thread_name_prefix
+        self._lock = threading.Lock()
+        self._executor: Optional[concurrent.futures.ThreadPoolExecutor] = None
+        self._futures: Dict[Any, concurrent.futures.Future] = {}
+        self.submitted = 0
+        self.deduplicated = 0
+
+    def submit(self, key: Any, fn: Callable[[], Any]) -> concurrent.futures.Future:
+        """
+        提交查询，相同键的查询已提交时直接返回之前的结果
+        """
+        with self._lock:
+            future = self._futures.get(key)
+            if future:
+                self.deduplicated += 1
+                return future
+            if not self._executor:
+                self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers,
+                                                                       thread_name_prefix=self._thread_name_prefix)
+            future = self._futures[key] = self._executor.submit(fn)
+            self.submitted += 1
+            return future
+
+    def stats(self) -> Dict[str, int]:
+        """
+        调度统计
+        """
+        with self._lock:
+            return {"submitted": self.submitted, "deduplicated": self.deduplicated}
+
+    def close(self):
+        """
+        关闭查询线程，尚未开始的查询直接取消
+        """
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+
+class PersonEnricher:
+    """
+    人物信息补全器
+    在单次刮削内保存已获取的人物信息，获取结果为 None 的人物同样记录，不在本次刮削中重复请求
+    """
+
+    def __init__(self, fetch: Callable[[Any], Any], max_workers: int = 4, event: Optional[threading.Event] = None):
+        """
+        :param fetch: 按人物 ID 获取人物信息的函数，限流由该函数在实际请求时自行处理
+        :param max_workers: 最大并发数
+        :param event: 停止事件，设置后不再发出新的请求
+        """
+        self._fetch = fetch
+        self.max_workers = max(1, int(max_workers))
+        self._event = event
+        self._lock = threading.Lock()
+        self._details: Dict[Any, Any] = {}
+        self.requested = 0
+        self.fetched = 0
+
+    def enrich(self, person_ids: Iterable[Any]) -> Dict[Any, Any]:
+        """
+        获取一批人物信息，去重后仅请求尚未获取的人物
+        :return: 人物 ID 与人物信息的映射，停止后未获取的人物不包含在内
+        """
+        person_ids = list(person_ids)
+        ids: List[Any] = []
+        for person_id in person_ids:
+            if person_id is None:
+                continue
+            self.requested += 1
+            if person_id not in self._details and person_id not in ids:
+                ids.append(person_id)
+        if ids:
+            if self.max_workers == 1 or len(ids) == 1:
+                for person_id in ids:
+                    self.__fetch(person_id)
+            else:
+                with concurrent.futures.ThreadPoolExecutor(max_workers=min(self.max_workers, len(ids)),
+                                                           thread_name_prefix="plexpersonmeta-person") as executor:
+                    list(executor.map(self.__fetch, ids))
+        with self._lock:
+            return {person_id: self._details[person_id] for person_id in person_ids if person_id in self._details}
+
+    def __fetch(self, person_id: Any):
+        """
+        获取单个人物信息
+        """
+        if self._event and self._event.is_set():
+            return
+        try:
+            detail = self._fetch(person_id)
+        except Exception as e:
+            logger.error(f"{person_id} 获取人物信息失败：{str(e)}")
+            return
+        with self._lock:
+            self._details[person_id] = detail
+            self.fetched += 1
+
+    def get(self, person_id: Any, default: Any = None) -> Any:
+        """
+        获取已补全的人物信息
+        """
+        with self._lock:
+            return self._details.get(person_id, default)
+
+    def __contains__(self, person_id: Any) -> bool:
+        with self._lock:
+            return person_id in self._details
+
+    def stats(self) -> Dict[str, int]:
+        """
+        补全统计
+        """
+        with self._lock:
+            return {"requested": self.requested, "fetched": self.fetched}
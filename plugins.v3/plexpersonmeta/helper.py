@@ -3,16 +3,58 @@ helper.py
 
 这个模块定义了用于存储媒体项目信息的 `RatingInfo` 数据类以及缓存、限流等装饰器
 """
+import enum
 import functools
 import hashlib
+import inspect
+import json
+import threading
+import time
 from dataclasses import dataclass
-from typing import Optional
+from pathlib import Path
+from typing import Any, Optional, Union
 
 from app.sdk.cache import Cache
 from app.sdk.logging import logger
+from .cache import PersistentCache
 
-# 创建缓存实例
-cache_backend = Cache(maxsize=100000, ttl=60 * 60 * 24 * 3)
+# 识别结果的缓存时间
+CACHE_TTL = 60 * 60 * 24 * 3
+# 结果为 None（通常是触发限流或网络异常）时的缓存时间
+NEGATIVE_CACHE_TTL = 60 * 5
+
+# 创建缓存实例，作为一级缓存
+cache_backend = Cache(maxsize=100000, ttl=CACHE_TTL)
+# 磁盘缓存，作为二级缓存，由插件初始化时设置
+disk_cache: Optional[PersistentCache] = None
+_disk_cache_lock = threading.Lock()
+# 被装饰函数返回该标记时向调用方返回 None 且不写入任何缓存，用于停止等并非真实结果的情况
+SKIP_CACHE = object()
+
+
+@dataclass(frozen=True)
+class NegativeResult:
+    """
+    内存缓存中结果为 None 的标记，自带过期时间，不依赖缓存后端是否支持单个键的 TTL
+    """
+    expires_at: float
+
+    @property
+    def expired(self) -> bool:
+        return self.expires_at <= time.time()
+
+
+@dataclass(frozen=True)
+class DiskResult:
+    """
+    从磁盘缓存回填到内存缓存的结果，保留磁盘中的剩余有效期，而不是按内存缓存的完整 TTL 重新计时
+    """
+    value: Any
+    expires_at: float
+
+    @property
+    def expired(self) -> bool:
+        return self.expires_at <= time.time()
 
 
 @dataclass
@@ -27,46 +69,154 @@ class RatingInfo:
     tmdbid: Optional[int] = None  # TMDB 的唯一标识，可选
 
 
-def cache_with_logging(region, source):
+def setup_disk_cache(db_path: Union[str, Path]):
+    """
+    设置磁盘缓存，重复设置时关闭之前的连接
+    """
+    global disk_cache
+    with _disk_cache_lock:
+        previous = disk_cache
+        try:
+            disk_cache = PersistentCache(db_path=db_path)
+        except Exception as e:
+            disk_cache = None
+            logger.warning(f"磁盘缓存初始化失败，仅使用内存缓存：{e}")
+    if previous:
+        previous.close()
+
+
+def close_disk_cache():
+    """
+    关闭磁盘缓存
+    """
+    global disk_cache
+    with _disk_cache_lock:
+        previous, disk_cache = disk_cache, None
+    if previous:
+        previous.close()
+
+
+def clear_disk_cache(region: str):
+    """
+    清理磁盘缓存中的缓存区
+    """
+    cache = disk_cache
+    if cache:
+        cache.clear(region=region)
+
+
+def _normalize(value: Any) -> Any:
+    """
+    将参数转换为可稳定序列化的结构，避免对象地址、字典顺序等因素导致缓存键变化
+    """
+    if isinstance(value, enum.Enum):
+        return _normalize(value.value)
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, dict):
+        return [[_normalize(k), _normalize(v)] for k, v in sorted(value.items(), key=lambda kv: str(kv[0]))]
+    if isinstance(value, (list, tuple)):
+        return [_normalize(item) for item in value]
+    if isinstance(value, (set, frozenset)):
+        return sorted((_normalize(item) for item in value), key=str)
+    return str(value)
+
+
+def make_cache_key(func, args: tuple, kwargs: dict) -> str:
+    """
+    生成缓存键
+    按函数签名绑定参数并补齐默认值，位置参数和关键字参数传参方式不同也得到相同的键；实例方法忽略 self
+    """
+    try:
+        bound = inspect.signature(func).bind(*args, **kwargs)
+        bound.apply_defaults()
+        arguments = {name: value for name, value in bound.arguments.items() if name not in ("self", "cls")}
+    except TypeError:
+        arguments = {"args": args, "kwargs": kwargs}
+    payload = json.dumps([func.__qualname__, _normalize(arguments)], ensure_ascii=False, sort_keys=True)
+    return hashlib.md5(payload.encode()).hexdigest()
+
+
+def cache_with_logging(region, source, ttl: int = CACHE_TTL, negative_ttl: int = NEGATIVE_CACHE_TTL):
     """
     装饰器，用于在函数执行时处理缓存逻辑和日志记录。
+    先查询内存缓存，未命中时查询磁盘缓存并回填内存缓存
     :param region: 缓存区，用于存储和检索缓存数据
     :param source: 数据来源，用于日志记录（例如：PERSON 或 MEDIA）
+    :param ttl: 结果不为 None 时的缓存时间（秒）
+    :param negative_ttl: 结果为 None 时的缓存时间（秒）
+    被装饰函数返回 SKIP_CACHE 时不缓存，并向调用方返回 None
     :return: 装饰器函数
     """
 
+    def log_hit(value, kwargs):
+        if value is None:
+            logger.info(f"从缓存中获取到 {source} 信息为 None，可能是之前触发限流或网络异常")
+        elif source == "PERSON":
+            logger.info(f"从缓存中获取到 {source} 人物信息")
+        else:
+            logger.info(f"从缓存中获取到 {source} 媒体信息: {kwargs.get('title', 'Unknown Title')}")
+
     def decorator(func):
 
         @functools.wraps(func)
         def wrapped_func(*args, **kwargs):
             # 生成缓存键
-            func_name = func.__name__
-            args_str = str(args) + str(sorted(kwargs.items()))
-            key = hashlib.md5((func_name + args_str).encode()).hexdigest()
+            key = make_cache_key(func, args, kwargs)
 
             exists_cache = cache_backend.exists(key, region=region)
             if exists_cache:
                 value = cache_backend.get(key, region=region)
-                if value is not None:
+                if isinstance(value, NegativeResult):
+                    if not value.expired:
+                        log_hit(None, kwargs)
+                        return None
+                elif isinstance(value, DiskResult):
+                    if not value.expired:
+                        log_hit(value.value, kwargs)
+                        return value.value
+                elif value is not None:
                     if value == "None":
-                        logger.info(f"从缓存中获取到 {source} 信息为 None，可能是之前触发限流或网络异常")
+                        log_hit(None, kwargs)
                         return None
-                    if source == "PERSON":
-                        logger.info(f"从缓存中获取到 {source} 人物信息")
-                    else:
-                        logger.info(f"从缓存中获取到 {source} 媒体信息: {kwargs.get('title', 'Unknown Title')}")
+                    log_hit(value, kwargs)
+                    return value
+                else:
+                    return None
+
+            cache = disk_cache
+            if cache:
+                try:
+                    entry = cache.get(key, region=region)
+                except Exception as e:
+                    logger.debug(f"读取磁盘缓存 {region} 失败：{e}")
+                    entry = None
+                if entry:
+                    value, expires_at = entry
+                    # 回填内存缓存，保留磁盘中的剩余有效期
+                    cache_backend.set(key, NegativeResult(expires_at=expires_at) if value is None
+                                      else DiskResult(value=value, expires_at=expires_at), region=region)
+                    log_hit(value, kwargs)
                     return value
-                return None
 
             # 执行被装饰的函数
             result = func(*args, **kwargs)
 
+            if result is SKIP_CACHE:
+                return None
             if result is None:
-                # 如果结果为 None，说明触发限流或网络等异常，缓存5分钟，以免高频次调用
-                cache_backend.set(key, "None", region=region)
+                # 如果结果为 None，说明触发限流或网络等异常，短时间缓存，以免高频次调用，过期后重新获取
+                cache_backend.set(key, NegativeResult(expires_at=time.time() + negative_ttl), region=region)
+                cache_ttl = negative_ttl
             else:
                 # 结果不为 None，使用默认 TTL 缓存
                 cache_backend.set(key, result, region=region)
+                cache_ttl = ttl
+            if cache:
+                try:
+                    cache.set(key, result, ttl=cache_ttl, region=region)
+                except Exception as e:
+                    logger.debug(f"写入磁盘缓存 {region} 失败：{e}")
 
             return result
 
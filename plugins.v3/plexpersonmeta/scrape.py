@@ -1,8 +1,9 @@
+import concurrent.futures
 import copy
+import itertools
 import re
 import threading
-import time
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
 
 import plexapi
 import plexapi.utils
@@ -16,7 +17,8 @@ from app.sdk.logging import logger
 from app.sdk.media import MediaInfo
 from app.sdk.utilities import StringUtils
 from app.plugins import PluginChian
-from .helper import RatingInfo, cache_backend, cache_with_logging
+from .enrich import LookupScheduler, PersonEnricher, get_rate_limiter
+from .helper import SKIP_CACHE, RatingInfo, cache_backend, cache_with_logging, clear_disk_cache
 from app.schemas import MediaPerson, ServiceInfo
 from app.schemas.types import MediaSource, MediaType
 
@@ -25,6 +27,35 @@ lock = threading.Lock()
 
 class ScrapeHelper:
     timeout: int = 10
+    # 分页获取媒体库时每页的条目数
+    page_size: int = 500
+    # 分页请求失败后的重试次数及重试间隔（秒）
+    page_retries: int = 2
+    page_retry_interval: float = 3
+    # 最近一次分页读取是否因分页请求失败而提前结束
+    listing_incomplete: bool = False
+    # 单批刮削的条目数，同一批条目中的人物去重后一并获取
+    batch_size: int = 50
+    # 并发获取 TMDB 人物信息的线程数
+    person_workers: int = 4
+    # TMDB 人物信息每秒请求数，多个媒体服务器共享
+    tmdb_person_rate: float = 10
+    # 人物信息补全器，同一次刮削中共享已获取的人物信息
+    _person_enricher: Optional[PersonEnricher] = None
+    # 豆瓣每秒平均查询数及允许连续发出的查询数，可通过配置调整，多个媒体服务器共享，匹配及详情请求各消耗一个令牌
+    douban_rate: float = 0.2
+    douban_burst: int = 3
+    # 同时进行的豆瓣查询数
+    douban_workers: int = 2
+    # 豆瓣查询调度器
+    _douban_scheduler: Optional[LookupScheduler] = None
+    # 等待豆瓣查询结果的条目，跨批次保留，查询完成后再写入
+    _douban_pending: Optional[list] = None
+    # 等待豆瓣查询结果的条目上限，超出后等待最早提交的查询完成
+    douban_pending_limit: int = 200
+    # 本次刮削发出的 Plex 请求数
+    plex_requests: int = 0
+    _plex_requests_lock = threading.Lock()
 
     def __init__(self, config: dict, event: threading.Event, chain: PluginChian,
                  service: ServiceInfo, libraries: dict[int, Any]):
@@ -43,36 +74,69 @@ class ScrapeHelper:
         self._scrape_type = config.get("scrape_type", "all")
         self._remove_no_zh = config.get("remove_no_zh", False)
         self._douban_scrape = config.get("douban_scrape", True)
+        try:
+            self.page_size = max(1, int(config.get("page_size") or ScrapeHelper.page_size))
+        except (TypeError, ValueError):
+            self.page_size = ScrapeHelper.page_size
+        try:
+            self.douban_rate = float(config.get("douban_rate") or ScrapeHelper.douban_rate)
+            if self.douban_rate <= 0:
+                self.douban_rate = ScrapeHelper.douban_rate
+        except (TypeError, ValueError):
+            self.douban_rate = ScrapeHelper.douban_rate
+        try:
+            self.douban_burst = max(1, int(config.get("douban_burst") or ScrapeHelper.douban_burst))
+        except (TypeError, ValueError):
+            self.douban_burst = ScrapeHelper.douban_burst
         # self._reserve_tag_key = config.get("reserve_tag_key", False)
         try:
             self._delay = int(config.get("delay", 200))
         except ValueError:
             self._delay = 200
 
-    def scrape_rating_items(self, rating_items: list):
-        """刮削媒体库中的媒体项"""
-        for rating_item in rating_items:
+    def scrape_rating_items(self, rating_items: Iterable[dict]) -> int:
+        """
+        刮削媒体库中的媒体项
+        :param rating_items: 媒体项列表或分页生成器，按批次逐步读取
+        :return: 读取的媒体项数量
+        """
+        rating_items = iter(rating_items)
+        count = 0
+        while True:
             if self.check_external_interrupt():
-                return
-            info = self.get_rating_info(item=rating_item)
-            if not info or info.type not in ["movie", "show"]:
-                continue
-            item = {}
-            try:
-                item = self.fetch_item(rating_key=info.key)
+                return count
+            batch = list(itertools.islice(rating_items, self.batch_size))
+            if not batch:
+                return count
+            count += len(batch)
+            entries = []
+            infos = []
+            for rating_item in batch:
+                if self.check_external_interrupt():
+                    return count
+                info = self.get_rating_info(item=rating_item)
+                if not info or info.type not in ["movie", "show"]:
+                    continue
+                try:
+                    item = self.fetch_item(rating_key=info.key)
+                except Exception as e:
+                    logger.error(f"媒体项 {info.title} 刮削过程中出现异常，{str(e)}")
+                    continue
                 if not item:
                     continue
-                logger.info(f"开始刮削 {info.title} 的演员信息 ...")
-                self.scrape_item(item=item)
-                logger.info(f"{info.title} 的演员信息刮削完成")
-            except Exception as e:
-                logger.error(f"媒体项 {info.title} 刮削过程中出现异常，{str(e)}")
+                entries.append((item, None))
+                infos.append(info)
 
-            if info.type != "show":
-                logger.info(f"<{info.title}> 类型为 {info.type}，非show类型，跳过剧集刮削")
-                continue
-            logger.info(f"<{info.title}> 类型为 show，准备进行剧集刮削")
-            self.scrape_episodes(item=item)
+            self.scrape_items(entries=entries)
+
+            for (item, _), info in zip(entries, infos):
+                if self.check_external_interrupt():
+                    return count
+                if info.type != "show":
+                    logger.info(f"<{info.title}> 类型为 {info.type}，非show类型，跳过剧集刮削")
+                    continue
+                logger.info(f"<{info.title}> 类型为 show，准备进行剧集刮削")
+                self.scrape_episodes(item=item)
 
     def scrape_episode_items(self, episode_items: dict):
         """刮削剧集的媒体信息"""
@@ -105,6 +169,7 @@ class ScrapeHelper:
                 else:
                     logger.info(f"<{info.title}> 共计 {len(episodes)} 集，准备进行剧集刮削")
 
+            entries = []
             for episode in episodes:
                 if self.check_external_interrupt():
                     return
@@ -113,13 +178,17 @@ class ScrapeHelper:
                     continue
                 try:
                     episode_item = self.fetch_item(rating_key=episode_info.key)
-                    if not episode_item:
-                        continue
-                    logger.info(f"开始刮削 {episode_info.title} 的演员信息 ...")
-                    self.scrape_item(item=episode_item, info=episode_info)
-                    logger.info(f"{episode_info.title} 的演员信息刮削完成")
                 except Exception as e:
                     logger.error(f"媒体项 {episode_info.title} 刮削过程中出现异常，{str(e)}")
+                    continue
+                if not episode_item:
+                    continue
+                entries.append((episode_item, episode_info))
+                if len(entries) >= self.batch_size:
+                    self.scrape_items(entries=entries)
+                    entries = []
+            if entries:
+                self.scrape_items(entries=entries)
         except Exception as e:
             logger.error(f"媒体项 {info.title} 刮削剧集过程中出现异常，{str(e)}")
 
@@ -129,16 +198,98 @@ class ScrapeHelper:
         """
         if not item:
             return
+        self.scrape_items(entries=[(item, info)])
+        self.__finish_douban_pending(wait=True)
 
-        if not info:
-            info = self.get_rating_info(item=item)
+    def scrape_items(self, entries: List[Tuple[dict, Optional[RatingInfo]]]):
+        """
+        批量刮削媒体服务器中的条目
+        先获取各条目的媒体信息，再对全部演员去重后并发获取人物信息，最后逐个更新条目；
+        需要豆瓣信息的条目在豆瓣查询完成后再写入，未完成的查询留到后续批次或关闭时处理，不阻塞其他条目及后续批次
+        """
+        prepared = []
+        for item, info in entries:
+            if self.check_external_interrupt():
+                return
+            if not info:
+                info = self.get_rating_info(item=item)
+            title = info.title if info else item.get("title")
+            logger.info(f"开始刮削 {title} 的演员信息 ...")
+            try:
+                mediainfo = self.__prepare_item(item=item, info=info)
+            except Exception as e:
+                logger.error(f"媒体项 {title} 刮削过程中出现异常，{str(e)}")
+                continue
+            if mediainfo:
+                prepared.append((item, info, mediainfo))
+            else:
+                logger.info(f"{title} 的演员信息刮削完成")
 
-        if not info or info.type not in {"movie", "show", "episode"}:
+        if not prepared:
             return
 
-        if not info or not info.tmdbid:
+        # 同一批条目中重复出现的人物只获取一次
+        person_ids = [actor.get("id") for _, _, mediainfo in prepared for actor in mediainfo.actors or []]
+        person_details = self.__get_person_enricher().enrich(person_ids=person_ids)
+
+        # 需要豆瓣信息的条目提交查询后排队等待，其余条目直接写入
+        pending = []
+        for item, info, mediainfo in prepared:
+            if self.check_external_interrupt():
+                return
+            try:
+                trans_actors = self.__update_peoples_by_tmdb(item=item, mediainfo=mediainfo, title=info.title,
+                                                             person_details=person_details)
+                if trans_actors is None:
+                    return
+                if self.__need_douban_actors(trans_actors=trans_actors, title=info.title):
+                    pending.append((item, info, trans_actors,
+                                    self.__submit_douban_lookup(mediainfo=mediainfo, title=info.title)))
+                    continue
+                self.__finish_peoples(item=item, trans_actors=trans_actors, douban_actors=None, title=info.title)
+            except Exception as e:
+                logger.error(f"{info.title} 更新人物信息时出错：{str(e)}")
+                continue
+            logger.info(f"{info.title} 的演员信息刮削完成")
+
+        if self._douban_pending is None:
+            self._douban_pending = []
+        self._douban_pending.extend(pending)
+        self.__finish_douban_pending(wait=False)
+
+    def __finish_douban_pending(self, wait: bool):
+        """
+        写入豆瓣查询已完成的条目，按提交顺序处理
+        :param wait: 是否等待全部查询完成；否则只在等待条目超过上限时等待最早提交的查询
+        """
+        pending = self._douban_pending or []
+        remaining = []
+        for index, (item, info, trans_actors, future) in enumerate(pending):
+            if self.check_external_interrupt():
+                remaining.extend(pending[index:])
+                break
+            if not (wait or future.done() or len(pending) - index > self.douban_pending_limit):
+                remaining.append((item, info, trans_actors, future))
+                continue
+            try:
+                self.__finish_peoples(item=item, trans_actors=trans_actors, douban_actors=future.result(),
+                                      title=info.title)
+            except Exception as e:
+                logger.error(f"{info.title} 更新人物信息时出错：{str(e)}")
+                continue
+            logger.info(f"{info.title} 的演员信息刮削完成")
+        self._douban_pending = remaining
+
+    def __prepare_item(self, item: dict, info: Optional[RatingInfo]) -> Optional[MediaInfo]:
+        """
+        获取条目对应的媒体信息，条目无需更新人物信息时返回 None
+        """
+        if not info or info.type not in {"movie", "show", "episode"}:
+            return None
+
+        if not info.tmdbid:
             logger.warning(f"{info.title} 未找到tmdbid，无法识别媒体信息")
-            return
+            return None
 
         logger.info(f"{info.title} 正在获取 TMDB 媒体信息")
         mediainfo = self.get_tmdb_media(tmdbid=info.tmdbid,
@@ -146,15 +297,42 @@ class ScrapeHelper:
                                         mtype=MediaType.MOVIE if info.type == "movie" else MediaType.TV)
         if not mediainfo:
             logger.warning(f"{info.title} TMDB 未识别到媒体信息")
-            return
+            return None
 
-        try:
-            if self.need_trans_actor(item):
-                self.update_peoples(item=item, mediainfo=mediainfo, info=info)
-            else:
-                logger.info(f"{info.title} 的人物信息已是中文，无需更新")
-        except Exception as e:
-            logger.error(f"{info.title} 更新人物信息时出错：{str(e)}")
+        if not self.need_trans_actor(item):
+            logger.info(f"{info.title} 的人物信息已是中文，无需更新")
+            return None
+        return mediainfo
+
+    def __get_person_enricher(self) -> PersonEnricher:
+        """
+        获取人物信息补全器
+        """
+        if not self._person_enricher:
+            self._person_enricher = PersonEnricher(
+                fetch=lambda person_tmdbid: self.get_tmdb_person_detail(person_tmdbid=person_tmdbid),
+                max_workers=self.person_workers,
+                event=self.event
+            )
+        return self._person_enricher
+
+    def person_stats(self) -> Dict[str, int]:
+        """
+        人物信息获取统计，requested 为演员出现次数，fetched 为实际获取次数
+        """
+        if not self._person_enricher:
+            return {"requested": 0, "fetched": 0}
+        return self._person_enricher.stats()
+
+    def close(self):
+        """
+        写入仍在等待豆瓣查询结果的条目后关闭豆瓣查询调度器，外部中断时未完成的条目直接放弃
+        """
+        self.__finish_douban_pending(wait=True)
+        self._douban_pending = None
+        scheduler, self._douban_scheduler = self._douban_scheduler, None
+        if scheduler:
+            scheduler.close()
 
     def need_trans_actor(self, item: dict) -> bool:
         """
@@ -187,8 +365,12 @@ class ScrapeHelper:
 
         return False
 
-    def update_peoples(self, item: dict, mediainfo: MediaInfo, info: Optional[RatingInfo] = None):
-        """处理媒体项中的人物信息"""
+    def update_peoples(self, item: dict, mediainfo: MediaInfo, info: Optional[RatingInfo] = None,
+                       person_details: Optional[dict] = None):
+        """
+        处理媒体项中的人物信息
+        :param person_details: 已批量获取的人物信息，人物 ID -> 人物信息，未包含的人物单独获取
+        """
         """
         item 的数据结构：
         {
@@ -227,6 +409,21 @@ class ScrapeHelper:
             return
 
         title = info.title if info and info.title else item.get("title")
+        trans_actors = self.__update_peoples_by_tmdb(item=item, mediainfo=mediainfo, title=title,
+                                                     person_details=person_details)
+        if trans_actors is None:
+            return
+
+        douban_actors = None
+        if self.__need_douban_actors(trans_actors=trans_actors, title=title):
+            douban_actors = self.__lookup_douban_actors(mediainfo=mediainfo, title=title)
+        self.__finish_peoples(item=item, trans_actors=trans_actors, douban_actors=douban_actors, title=title)
+
+    def __update_peoples_by_tmdb(self, item: dict, mediainfo: MediaInfo, title: str,
+                                 person_details: Optional[dict] = None) -> Optional[List[dict]]:
+        """
+        使用 TMDB 信息更新人物，外部中断时返回 None
+        """
         actors = item.get("Role", [])
         trans_actors = []
 
@@ -243,8 +440,11 @@ class ScrapeHelper:
                 actor_dict[original_name] = actor
             person_tmdbid = actor.get("id")
             if person_tmdbid:
-                logger.info(f"{name} 正在获取 TMDB 人物信息")
-                person_detail = self.get_tmdb_person_detail(person_tmdbid=person_tmdbid)
+                if person_details and person_tmdbid in person_details:
+                    person_detail = person_details[person_tmdbid]
+                else:
+                    logger.info(f"{name} 正在获取 TMDB 人物信息")
+                    person_detail = self.get_tmdb_person_detail(person_tmdbid=person_tmdbid)
                 if person_detail:
                     cn_name = self.get_chinese_name(person=person_detail)
                     if cn_name:
@@ -257,7 +457,7 @@ class ScrapeHelper:
         # 使用TMDB信息更新人物
         for actor in actors:
             if self.check_external_interrupt():
-                return
+                return None
             tag_value = actor.get("tag")
             role_value = actor.get("role")
             if not tag_value:
@@ -280,52 +480,81 @@ class ScrapeHelper:
                     trans_actors.append(actor)
             except Exception as e:
                 logger.error(f"{title} TMDB 更新人物信息失败：{str(e)}")
+        return trans_actors
 
-        # 使用豆瓣信息更新人物
-        if self._douban_scrape:
-            # 如果全部人物信息都已经是中文数据，无需使用豆瓣信息更新
-            if all(StringUtils.is_chinese(actor.get("tag", "")) and StringUtils.is_chinese(actor.get("role", "")) for
-                   actor in trans_actors):
-                logger.info(f"{title} 的人物信息已是中文，无需使用豆瓣信息更新")
-            else:
-                # 存在人物信息还不是中文数据，使用豆瓣信息进行更新
-                logger.info(f"{title} 正在获取豆瓣媒体信息")
-                douban_actors = self.get_douban_actors(imdbid=mediainfo.imdb_id,
-                                                       title=mediainfo.title,
-                                                       mtype=mediainfo.type,
-                                                       year=mediainfo.year,
-                                                       season=mediainfo.season,
-                                                       season_years=tuple(sorted(mediainfo.season_years.items())))
-                if douban_actors:
-                    # 将 douban_actors 转换为字典，以 latin_name 和 name 和拼音为键
-                    douban_actor_dict = {}
-                    for actor in douban_actors:
-                        name = actor.get("name")
-                        latin_name = actor.get("latin_name")
-                        if name:
-                            douban_actor_dict[name] = actor
-                            if StringUtils.is_chinese(name):
-                                douban_actor_dict[self.to_pinyin(name)] = actor
-                        if latin_name:
-                            douban_actor_dict[latin_name] = actor
-                            douban_actor_dict[self.standardize_name_order(latin_name)] = actor
-
-                    for actor in trans_actors:
-                        if self.check_external_interrupt():
-                            return
-                        try:
-                            tag_value = actor.get("tag")
-                            role_value = actor.get("role")
-                            if StringUtils.is_chinese(tag_value) and StringUtils.is_chinese(role_value):
-                                logger.debug(f"{tag_value} 已是中文数据，无需使用豆瓣信息更新")
-                                continue
-
-                            updated_actor = self.update_people_by_douban(people=actor,
-                                                                         people_dict=douban_actor_dict)
-                            if updated_actor:
-                                actor.update(updated_actor)
-                        except Exception as e:
-                            logger.error(f"{title} 豆瓣更新人物信息失败：{str(e)}")
+    def __need_douban_actors(self, trans_actors: List[dict], title: str) -> bool:
+        """
+        是否需要使用豆瓣信息更新人物
+        """
+        if not self._douban_scrape:
+            return False
+        # 如果全部人物信息都已经是中文数据，无需使用豆瓣信息更新
+        if all(StringUtils.is_chinese(actor.get("tag", "")) and StringUtils.is_chinese(actor.get("role", "")) for
+               actor in trans_actors):
+            logger.info(f"{title} 的人物信息已是中文，无需使用豆瓣信息更新")
+            return False
+        return True
+
+    def __lookup_douban_actors(self, mediainfo: MediaInfo, title: str) -> Optional[List[dict]]:
+        """
+        获取媒体对应的豆瓣演员信息
+        """
+        # 存在人物信息还不是中文数据，使用豆瓣信息进行更新
+        logger.info(f"{title} 正在获取豆瓣媒体信息")
+        return self.get_douban_actors(imdbid=mediainfo.imdb_id,
+                                      title=mediainfo.title,
+                                      mtype=mediainfo.type,
+                                      year=mediainfo.year,
+                                      season=mediainfo.season,
+                                      season_years=tuple(sorted(mediainfo.season_years.items())))
+
+    def __submit_douban_lookup(self, mediainfo: MediaInfo, title: str) -> concurrent.futures.Future:
+        """
+        提交豆瓣演员信息查询，查询在后台排队等待令牌，相同媒体的查询只执行一次
+        """
+        key = (mediainfo.imdb_id, mediainfo.title, getattr(mediainfo.type, "value", mediainfo.type),
+               mediainfo.year, mediainfo.season, tuple(sorted(mediainfo.season_years.items())))
+        if not self._douban_scheduler:
+            self._douban_scheduler = LookupScheduler(max_workers=self.douban_workers,
+                                                     thread_name_prefix="plexpersonmeta-douban")
+        return self._douban_scheduler.submit(
+            key=key, fn=lambda: self.__lookup_douban_actors(mediainfo=mediainfo, title=title))
+
+    def __finish_peoples(self, item: dict, trans_actors: List[dict], douban_actors: Optional[List[dict]],
+                         title: str):
+        """
+        使用豆瓣信息补充人物后写入媒体服务器
+        """
+        if douban_actors:
+            # 将 douban_actors 转换为字典，以 latin_name 和 name 和拼音为键
+            douban_actor_dict = {}
+            for actor in douban_actors:
+                name = actor.get("name")
+                latin_name = actor.get("latin_name")
+                if name:
+                    douban_actor_dict[name] = actor
+                    if StringUtils.is_chinese(name):
+                        douban_actor_dict[self.to_pinyin(name)] = actor
+                if latin_name:
+                    douban_actor_dict[latin_name] = actor
+                    douban_actor_dict[self.standardize_name_order(latin_name)] = actor
+
+            for actor in trans_actors:
+                if self.check_external_interrupt():
+                    return
+                try:
+                    tag_value = actor.get("tag")
+                    role_value = actor.get("role")
+                    if StringUtils.is_chinese(tag_value) and StringUtils.is_chinese(role_value):
+                        logger.debug(f"{tag_value} 已是中文数据，无需使用豆瓣信息更新")
+                        continue
+
+                    updated_actor = self.update_people_by_douban(people=actor,
+                                                                 people_dict=douban_actor_dict)
+                    if updated_actor:
+                        actor.update(updated_actor)
+                except Exception as e:
+                    logger.error(f"{title} 豆瓣更新人物信息失败：{str(e)}")
 
         if trans_actors:
             try:
@@ -365,7 +594,7 @@ class ScrapeHelper:
         params.update(actors_param)
 
         endpoint = f"library/metadata/{rating_key}"
-        self.plex.put_data(
+        self.__put_data(
             endpoint=endpoint,
             params=params,
             timeout=self.timeout
@@ -552,6 +781,11 @@ class ScrapeHelper:
     def get_tmdb_person_detail(self,
                                person_tmdbid: int) -> Optional[MediaPerson]:
         """获取TMDB媒体信息"""
+        # 仅缓存未命中、实际请求 TMDB 时才消耗限流令牌
+        limiter = get_rate_limiter(source="TMDB_PERSON", rate=self.tmdb_person_rate)
+        if not limiter.acquire(event=self.event):
+            # 刮削已停止，并非获取失败，不缓存结果
+            return SKIP_CACHE
         try:
             person_detail = self.tmdb_chain.person_detail(int(person_tmdbid))
             return person_detail
@@ -607,6 +841,9 @@ class ScrapeHelper:
             if actors:
                 douban_actors.extend(actors)
 
+        if not douban_actors and self.event.is_set():
+            # 等待令牌期间刮削已停止，并非未找到演员，不缓存结果
+            return SKIP_CACHE
         return douban_actors if douban_actors else None
 
     def fetch_douban_actors(self, fetch_title: str,
@@ -624,9 +861,10 @@ class ScrapeHelper:
         :return: 包含演员信息的字典列表，或 None
         """
         try:
-            sleep_time = 5 + int(time.time()) % 7
-            logger.debug(f"随机休眠 {sleep_time}秒 ...")
-            time.sleep(sleep_time)
+            # 匹配及详情各为一次豆瓣请求，发出前分别获取令牌
+            limiter = get_rate_limiter(source="DOUBAN", rate=self.douban_rate, burst=self.douban_burst)
+            if not limiter.acquire(event=self.event):
+                return None
             doubaninfo = self.chain.match_doubaninfo(name=fetch_title,
                                                      imdbid=fetch_imdbid,
                                                      mtype=fetch_mtype,
@@ -634,6 +872,8 @@ class ScrapeHelper:
                                                      season=fetch_season,
                                                      raise_exception=True)
             if doubaninfo:
+                if not limiter.acquire(event=self.event):
+                    return None
                 item = self.chain.douban_info(doubaninfo.get("id"), raise_exception=True) or {}
                 if item:
                     return (item.get("actors") or []) + (item.get("directors") or [])
@@ -734,27 +974,108 @@ class ScrapeHelper:
 
     def list_rating_items(self, library: LibrarySection):
         """获取所有媒体项目"""
+        return list(self.iter_rating_items(library=library))
+
+    def iter_rating_items(self, library: LibrarySection) -> Iterator[dict]:
+        """
+        分页获取媒体项目
+        调用方处理当前分页时在后台预取下一页，内存中最多保留两页数据
+        """
+        self.listing_incomplete = False
         if not library:
-            return []
+            return
 
         endpoint = f"/library/sections/{library.key}/all?type={plexapi.utils.searchType(libtype=library.TYPE)}"
+        page_size = max(1, int(self.page_size))
+        with concurrent.futures.ThreadPoolExecutor(max_workers=1,
+                                                   thread_name_prefix="plexpersonmeta-page") as executor:
+            offset = 0
+            future = executor.submit(self.__fetch_page, endpoint, offset, page_size)
+            while future:
+                page = future.result()
+                future = None
+                if page is None:
+                    # 分页请求重试后仍失败，不能当作读取完毕，标记本次读取不完整
+                    self.listing_incomplete = True
+                    logger.warning(f"分页获取媒体项目失败，媒体库：{library.title}，offset={offset}，"
+                                   f"已读取 {offset} 个，本次刮削不完整")
+                    return
+                page_items, total_size = page
+                if offset == 0 and total_size:
+                    logger.info(f"<{library.title} {library.TYPE}> "
+                                f"类型共计 {total_size} 个")
+
+                next_offset = offset + len(page_items)
+                if total_size is not None:
+                    has_next = next_offset < total_size
+                    if has_next and not page_items:
+                        logger.warning(f"分页响应提前结束，媒体库：{library.title}，offset={offset}，"
+                                       f"totalSize={total_size}")
+                        has_next = False
+                else:
+                    has_next = len(page_items) >= page_size
+                if has_next and not self.check_external_interrupt():
+                    future = executor.submit(self.__fetch_page, endpoint, next_offset, page_size)
+                offset = next_offset
+                yield from page_items
 
-        response = self.plex.get_data(endpoint=endpoint, timeout=self.timeout)
-        datas = (response
-                 .json()
-                 .get("MediaContainer", {})
-                 .get("Metadata", []))
+    def __fetch_page(self, endpoint: str, offset: int, page_size: int) -> Optional[Tuple[List[dict], Optional[int]]]:
+        """
+        获取一页媒体项目，请求失败时按间隔重试
+        :return: (当前页媒体项目, 总数)，Plex 未返回总数时为 None；重试后仍失败或外部中断时返回 None
+        """
+        response = None
+        for attempt in range(max(0, int(self.page_retries)) + 1):
+            if attempt:
+                logger.warning(f"分页获取媒体项目失败，offset={offset}，{self.page_retry_interval} 秒后第 {attempt} 次重试")
+                if self.event.wait(timeout=self.page_retry_interval):
+                    return None
+            response = self.__get_data(
+                endpoint=endpoint,
+                headers={
+                    "X-Plex-Container-Start": str(offset),
+                    "X-Plex-Container-Size": str(page_size)
+                },
+                timeout=self.timeout
+            )
+            if response is not None:
+                break
+        if response is None:
+            return None
+        container = response.json().get("MediaContainer", {})
+        total_size = container.get("totalSize")
+        return container.get("Metadata", []), int(total_size) if total_size is not None else None
 
-        if len(datas):
-            logger.info(f"<{library.title} {library.TYPE}> "
-                        f"类型共计 {len(datas)} 个")
+    def __get_data(self, **kwargs):
+        """
+        发出 Plex GET 请求并计数
+        """
+        with self._plex_requests_lock:
+            self.plex_requests += 1
+        return self.plex.get_data(**kwargs)
 
-        return datas
+    def __put_data(self, **kwargs):
+        """
+        发出 Plex PUT 请求并计数
+        """
+        with self._plex_requests_lock:
+            self.plex_requests += 1
+        return self.plex.put_data(**kwargs)
+
+    def group_rating_items_by_added(self, added_time: int) -> Dict[Any, List[dict]]:
+        """
+        获取最近入库媒体并按媒体库分组，多个媒体库共用同一次查询
+        :return: librarySectionID -> 该媒体库最近入库的媒体
+        """
+        grouped: Dict[Any, List[dict]] = {}
+        for rating_item in self.list_rating_items_by_added(added_time=added_time):
+            grouped.setdefault(rating_item.get("librarySectionID"), []).append(rating_item)
+        return grouped
 
     def list_rating_items_by_added(self, added_time: int):
         """获取最近入库媒体"""
         endpoint = f"/library/all?addedAt>={added_time}"
-        response = self.plex.get_data(endpoint=endpoint, timeout=self.timeout)
+        response = self.__get_data(endpoint=endpoint, timeout=self.timeout)
         datas = (response
                  .json()
                  .get("MediaContainer", {})
@@ -765,7 +1086,7 @@ class ScrapeHelper:
         """获取show的所有剧集"""
         endpoint = f"/library/metadata/{rating_key}/allLeaves"
 
-        response = self.plex.get_data(endpoint=endpoint, timeout=self.timeout)
+        response = self.__get_data(endpoint=endpoint, timeout=self.timeout)
         datas = (response
                  .json()
                  .get("MediaContainer", {})
@@ -778,7 +1099,7 @@ class ScrapeHelper:
         获取条目信息
         """
         endpoint = f"/library/metadata/{rating_key}"
-        response = self.plex.get_data(endpoint=endpoint, timeout=self.timeout)
+        response = self.__get_data(endpoint=endpoint, timeout=self.timeout)
         datas = (response
                  .json()
                  .get("MediaContainer", {})
@@ -792,7 +1113,7 @@ class ScrapeHelper:
         :return: 获取的所有条目列表。
         """
         endpoint = f"/library/metadata/{','.join(rating_keys)}"
-        response = self.plex.get_data(endpoint=endpoint, timeout=self.timeout)
+        response = self.__get_data(endpoint=endpoint, timeout=self.timeout)
         items = (response
                  .json()
                  .get("MediaContainer", {})
@@ -853,3 +1174,4 @@ class ScrapeHelper:
         """清理插件用于识别结果的缓存分区。"""
         for region in ("plex_tmdb_media", "plex_tmdb_person", "plex_douban_media"):
             cache_backend.clear(region=region)
+            clear_disk_cache(region=region)
@@ -7,7 +7,6 @@ import datetime
 import json
 import random
 import re
-import threading
 import time
 from types import SimpleNamespace
 from typing import Any, Dict, List, Tuple, Optional
@@ -32,8 +31,8 @@ from app.db.oper.subscribe import SubscribeOper
 from app.db.oper.transferhistory import TransferHistoryOper
 
 from .engine.types import CompletionSignal, SeasonScope
-from .engine.site import SiteEpisodesRefreshHandler, SiteEvidenceScanner, SiteEvidenceStore
-from .engine.volatility import VolatilityTracker
+from .engine.site import SITE_EVIDENCE_KEY, SiteEpisodesRefreshHandler, SiteEvidenceScanner, SiteEvidenceStore
+from .engine.volatility import VOLATILITY_KEY, VolatilityTracker
 from .engine.pipeline import CompletionEvidencePipeline
 from .guard import CompletionGuard
 from .lifecycle import SubscribeLifecycleCoordinator
@@ -48,11 +47,17 @@ from .best_version.priority import PriorityManager
 from .best_version.converter import BestVersionConverter
 from .best_version.orchestrator import BestVersionOrchestrator
 from .cleanup import SubscriptionCleanup
+from .cleanup.subscription import SUBSCRIPTION_CLEANUP_SNAPSHOT_KEY
 from .download.monitor import DownloadMonitor
 from .download.cleanup import TorrentCleanup
+from .download.snapshot import DownloaderHashIndex, DownloaderSnapshot
 from .recognition import RecognitionGuard, RecognitionRuntime, RecognitionSettings
+from .recognition.types import RECOGNITION_SECONDARY_WORKERS
 from .recognition.audit import redact_sensitive_text
 from .shared.deletes import DeletesStore
+from .shared.memo import InspectionMemo, inspection_pass
+from .shared.scheduler import SUBSCRIPTION_STATE, InspectionScheduler, InspectionTask
+from .shared.search_queue import DELAYED_SEARCH_KEY, DelayedSearchQueue
 from .shared.subscribe import (
     build_subscribe_meta,
     format_subscribe_label,
@@ -76,6 +81,11 @@ from .shared.config import (
 from .shared.log import detail, truncate_log_value
 from .shared.subscribe import format_subscribe
 
+# 订阅生命周期巡检（元数据检查、待定释放、待定一致性）读写的任务数据：
+# 完成守卫复核读取站点证据、集数变化和下载任务，状态流转写入订阅任务、观察记录、放行令牌和完成快照。
+_LIFECYCLE_READS = frozenset({SITE_EVIDENCE_KEY, VOLATILITY_KEY, "torrents"})
+_LIFECYCLE_WRITES = frozenset({SUBSCRIPTION_STATE, "subscribes", "blocks", "releases", "snapshots"})
+
 
 class SummaryPayload(BaseModel):
     """订阅助手概览接口的业务数据模型。"""
@@ -126,6 +136,7 @@ class SubscribeAssistantEnhanced(_PluginBase):
         self._task_manager: Optional[TaskDataManager] = None
         self._event_proxy: Optional[EventProxy] = None
         self._paused_probe_coordinator: Optional[PausedProbeCoordinator] = None
+        self._delayed_search_queue: Optional[DelayedSearchQueue] = None
         self._modules: dict = {}
         self._onlyonce = False
         # DB oper / chain 在 init_plugin 实例化后注入各业务域模块。
@@ -136,6 +147,8 @@ class SubscribeAssistantEnhanced(_PluginBase):
         self._transferhistory_oper: Optional[TransferHistoryOper] = None
         self._downloadhistory_oper: Optional[DownloadHistoryOper] = None
         self._downloader_helper: Optional[DownloaderHelper] = None
+        # 单轮巡检备忘：同一轮内重复的 TMDB 集信息与媒体识别只请求一次，轮次结束即丢弃。
+        self._inspection_memo = InspectionMemo()
 
     def init_plugin(self, config: dict = None):
         """解析配置 → 注入 DB/chain 依赖 → 初始化各业务域模块。"""
@@ -157,6 +170,7 @@ class SubscribeAssistantEnhanced(_PluginBase):
         self._task_manager = TaskDataManager(
             get_data_fn=self.get_data,
             save_data_fn=self.save_data,
+            on_clear_fn=self._cancel_delayed_search,
         )
 
         self._init_modules()
@@ -322,8 +336,11 @@ class SubscribeAssistantEnhanced(_PluginBase):
             state_coordinator=None,
             fetch_fn=self._fetch_downloader_torrent,
             present_fn=self._downloader_torrent_present,
+            snapshot_fn=self._downloader_snapshot,
             manual_delete_enabled=cfg.download_monitor_enabled and cfg.manual_delete_listen,
             pending_download_enabled=cfg.pending_download_enabled,
+            task_data_record=tm.get_record,
+            task_data_batch=tm.batch,
         )
 
         deletes_store = DeletesStore(tm.read, tm.update)
@@ -430,12 +447,15 @@ class SubscribeAssistantEnhanced(_PluginBase):
                 tmdb_recheck_mode=cfg.recognition_guard_tmdb_recheck_mode,
                 cache_maxsize=cfg.recognition_guard_cache_maxsize,
                 custom_config=cfg.recognition_guard_custom_config,
+                secondary_workers=RECOGNITION_SECONDARY_WORKERS,
             ),
             runtime=RecognitionRuntime(
                 target_mediainfo_resolver=self._recognize_mediainfo,
                 tmdb_episodes_fn=self._tmdb_episodes,
                 secondary_recognizer=self._recognize_by_meta_for_recognition,
                 logger_fn=detail,
+                secondary_cache_load_fn=lambda: tm.read("recognition_cache"),
+                secondary_cache_save_fn=lambda data: tm.write("recognition_cache", data),
             ),
         )
 
@@ -459,6 +479,7 @@ class SubscribeAssistantEnhanced(_PluginBase):
             notify_fn=self._notify_subscribe,
             get_subscribe_image_fn=self._get_subscribe_image,
             torrent_exists_fn=self._torrent_exists,
+            torrent_index_fn=self._torrent_hash_index,
             cleanup_history_type=cfg.subscription_cleanup_history_type,
             cleanup_history_scenes=cfg.subscription_cleanup_history_scenes,
         )
@@ -475,6 +496,12 @@ class SubscribeAssistantEnhanced(_PluginBase):
             download_monitor=download_monitor,
         )
         self._paused_probe_coordinator = paused_probe
+        self._delayed_search_queue = DelayedSearchQueue(
+            tm.read,
+            tm.update,
+            search_fn=lambda sid: self._subscribe_chain.search(sid=sid),
+        )
+        self._delayed_search_queue.start()
 
         self._event_proxy = EventProxy(
             task_manager=tm,
@@ -551,6 +578,12 @@ class SubscribeAssistantEnhanced(_PluginBase):
         if self._paused_probe_coordinator:
             self._paused_probe_coordinator.stop()
             self._paused_probe_coordinator = None
+        if self._delayed_search_queue:
+            self._delayed_search_queue.stop()
+            self._delayed_search_queue = None
+        recognition_guard = self._modules.get("recognition_guard")
+        if recognition_guard:
+            recognition_guard.flush_cache()
         self._event_proxy = None
         self._modules = {}
 
@@ -641,15 +674,23 @@ class SubscribeAssistantEnhanced(_PluginBase):
         ))
         return services
 
+    @inspection_pass
     def run_all_checks(self):
         """一次性执行所有周期检查；各检查会按功能开关自行跳过。"""
         logger.info("立即运行一次：开始全量巡检")
-        self.run_meta_check()
-        self.run_download_timeout_check()
-        self.run_best_version_check()
+        tasks = [
+            InspectionTask("元数据巡检", self.run_meta_check, reads=_LIFECYCLE_READS, writes=_LIFECYCLE_WRITES),
+            InspectionTask("下载任务检查", self.run_download_timeout_check,
+                           writes={SUBSCRIPTION_STATE, "subscribes", "torrents", "deletes"}),
+            InspectionTask("洗版巡检", self.run_best_version_check, writes={SUBSCRIPTION_STATE, "subscribes"}),
+        ]
         if self._config.verify_enabled:
-            self.run_completion_verify()
-        self.run_common_check()
+            tasks.append(InspectionTask("完成后验证", self.run_completion_verify,
+                                        writes={SUBSCRIPTION_STATE, "subscribes", "snapshots"}))
+        # 各检查都会改写订阅状态，只能按上面的顺序串行；通用巡检拆成子任务并入同一调度，
+        # 站点证据采样与各项本地清理按读写声明和订阅状态链路并发，不再整体排在最后。
+        tasks.extend(self._common_check_tasks())
+        self._run_inspection_tasks("全量巡检", tasks)
 
     def _reset_task_data(self):
         """先恢复增强版持有的订阅状态，再清空全部插件任务数据。"""
@@ -663,7 +704,11 @@ class SubscribeAssistantEnhanced(_PluginBase):
             self._notify_subscribe("订阅助手数据重置前已恢复订阅状态", text=summary)
         else:
             logger.info("重置任务：数据清空前未发现需要恢复的订阅状态")
-        for key in [
+        if self._delayed_search_queue:
+            self._delayed_search_queue.clear()
+        # 经 TaskDataManager 清空，同时作废巡检 batch 缓冲中尚未落盘的修改，避免退出 batch 时写回旧数据。
+        task_manager = self._task_manager or TaskDataManager(get_data_fn=self.get_data, save_data_fn=self.save_data)
+        task_manager.reset_all([
             "subscribes",
             "torrents",
             "blocks",
@@ -673,9 +718,12 @@ class SubscribeAssistantEnhanced(_PluginBase):
             "volatility",
             "site_evidence",
             "subscription_cleanup_histories",
-        ]:
-            self.save_data(key, {})
-        logger.info("重置任务：已清空全部插件任务数据（订阅、下载任务、完成前观察记录、放行令牌、完成快照、删除指纹、集数变化记录、站点证据、订阅清理记录）")
+            DELAYED_SEARCH_KEY,
+        ])
+        logger.info(
+            "重置任务：已清空全部插件任务数据（订阅、下载任务、完成前观察记录、放行令牌、完成快照、删除指纹、"
+            "集数变化记录、站点证据、订阅清理记录、延迟搜索）"
+        )
 
     def _run_backfill_now(self):
         """对现有分集洗版订阅执行一次下载事实回填，并推送扫描结果汇总。"""
@@ -772,6 +820,7 @@ class SubscribeAssistantEnhanced(_PluginBase):
         last = max(times + [anchor]) if times else anchor
         return (now - last) > days * 86400
 
+    @inspection_pass
     def run_best_version_check(self):
         """洗版巡检：处理洗版超时终止，并兜底推进分集洗版转全集。"""
         if self._config and self._config.best_version_type == "no":
@@ -829,6 +878,7 @@ class SubscribeAssistantEnhanced(_PluginBase):
             return "分集洗版"
         return ""
 
+    @inspection_pass
     def run_meta_check(self):
         """元数据检查巡检：枚举订阅并委托生命周期协调器处理单订阅状态流转。"""
         if not self._subscribe_oper:
@@ -920,27 +970,38 @@ class SubscribeAssistantEnhanced(_PluginBase):
         timeout_manager.clear_observation(subscribe.id)
         timeout_manager.clear_release_token(subscribe.id)
 
+    @inspection_pass
     def run_common_check(self):
         """统一执行待定、无下载及各类本地过期数据清理。
 
-        每个子任务独立捕获异常，避免单个检查失败阻断同轮其他检查。
+        每个子任务独立捕获异常，避免单个检查失败阻断同轮其他检查；读写不冲突的子任务并发执行。
         """
-        tasks = [("待定释放", self.run_pending_release)]
-        tasks.append(("待定状态一致性检查", self.run_pending_state_reconcile))
-        tasks.append(("无下载处理", self.run_no_download_check))
-        tasks.append(("暂停订阅低频补搜", self.run_paused_probe_check))
-        tasks.append(("站点证据采样", self.run_site_evidence_scan))
-        if self._config.download_monitor_enabled:
-            tasks.append(("删除记录清理", self.run_deletes_cleanup))
-        tasks.append(("完成快照清理", self.run_completion_snapshot_cleanup))
-        tasks.append(("订阅清理事务清理", self.run_subscription_cleanup_expired))
-
         detail("通用巡检：开始")
-        for task_name, task in tasks:
-            try:
-                task()
-            except Exception as err:
-                logger.error(f"通用巡检：{task_name}执行失败：{err}", exc_info=True)
+        self._run_inspection_tasks("通用巡检", self._common_check_tasks())
+
+    def _common_check_tasks(self) -> list[InspectionTask]:
+        """通用巡检子任务及其读写的任务数据，顺序即冲突子任务的执行顺序。"""
+        tasks = [
+            InspectionTask("待定释放", self.run_pending_release, reads=_LIFECYCLE_READS, writes=_LIFECYCLE_WRITES),
+            InspectionTask("待定状态一致性检查", self.run_pending_state_reconcile,
+                           reads=_LIFECYCLE_READS, writes=_LIFECYCLE_WRITES),
+            InspectionTask("无下载处理", self.run_no_download_check, writes={SUBSCRIPTION_STATE, "subscribes"}),
+            InspectionTask("暂停订阅低频补搜", self.run_paused_probe_check, writes={SUBSCRIPTION_STATE, "subscribes"}),
+            # 只按订阅列表筛选采样对象，同轮状态流转不影响证据，下一轮会按新状态重新采样。
+            InspectionTask("站点证据采样", self.run_site_evidence_scan, writes={SITE_EVIDENCE_KEY}),
+        ]
+        if self._config.download_monitor_enabled:
+            tasks.append(InspectionTask("删除记录清理", self.run_deletes_cleanup, writes={"deletes"}))
+        tasks.append(InspectionTask("完成快照清理", self.run_completion_snapshot_cleanup, writes={"snapshots"}))
+        tasks.append(InspectionTask("订阅清理事务清理", self.run_subscription_cleanup_expired,
+                                    writes={SUBSCRIPTION_CLEANUP_SNAPSHOT_KEY}))
+        return tasks
+
+    def _run_inspection_tasks(self, label: str, tasks: list[InspectionTask]) -> dict[str, float]:
+        """按读写声明调度巡检子任务，调用线程的巡检备忘随子任务带入工作线程。"""
+        memo = self._inspection_memo
+        scheduler = InspectionScheduler(label, propagate_fn=memo.propagate if memo else None)
+        return scheduler.run(tasks)
 
     def run_paused_probe_check(self):
         """暂停订阅低频补搜巡检：登记外部暂停，并按配置安排单订阅搜索。"""
@@ -964,6 +1025,7 @@ class SubscribeAssistantEnhanced(_PluginBase):
             ):
                 site_evidence.refresh_subscribe(subscribe)
 
+    @inspection_pass
     def run_completion_verify(self):
         """完成后自验证巡检：复查完成快照，发现 TMDB 增集后重建订阅并通知。"""
         verifier = self._modules.get("verifier")
@@ -1402,9 +1464,20 @@ class SubscribeAssistantEnhanced(_PluginBase):
         """查询 TMDB 季内集信息供完成证据流水线构建 SeasonScope；不可用时返回空列表。"""
         if not self._tmdb_chain or not tmdbid or season is None:
             return []
-        return self._tmdb_chain.tmdb_episodes(
-            tmdbid=tmdbid, season=season, episode_group=episode_group
-        ) or []
+        return self._inspection_lookup(
+            "tmdb_episodes",
+            (str(tmdbid), str(season), episode_group or None),
+            lambda: self._tmdb_chain.tmdb_episodes(
+                tmdbid=tmdbid, season=season, episode_group=episode_group
+            ) or [],
+        )
+
+    def _inspection_lookup(self, namespace: str, key: tuple, loader):
+        """巡检轮次内走备忘，轮次外直接请求上游。"""
+        memo = getattr(self, "_inspection_memo", None)
+        if memo is None:
+            return loader()
+        return memo.get_or_load(namespace, key, loader)
 
     @staticmethod
     def _site_cache_candidates(subscribe, **kwargs):
@@ -1443,13 +1516,22 @@ class SubscribeAssistantEnhanced(_PluginBase):
         meta = build_subscribe_meta(subscribe, failure_context="媒体识别失败")
         if meta is None:
             return None
+        # 同一轮巡检内按媒体身份复用识别结果；识别异常不入备忘，下次调用仍会重试。
+        identity = (
+            str(meta.type), subscribe.media_source, str(subscribe.media_id or ""), subscribe.episode_group or None,
+            subscribe.name, str(subscribe.year or ""), subscribe.season,
+        )
         try:
-            return self.chain.recognize_media(
-                meta=meta, mtype=meta.type,
-                media_source=subscribe.media_source,
-                media_id=subscribe.media_id,
-                episode_group=subscribe.episode_group,
-                cache=False)
+            return self._inspection_lookup(
+                "mediainfo",
+                identity,
+                lambda: self.chain.recognize_media(
+                    meta=meta, mtype=meta.type,
+                    media_source=subscribe.media_source,
+                    media_id=subscribe.media_id,
+                    episode_group=subscribe.episode_group,
+                    cache=False),
+            )
         except Exception as err:
             logger.warning(f"媒体识别失败：{format_subscribe(subscribe)}，错误：{redact_sensitive_text(err)}")
             return None
@@ -1604,21 +1686,37 @@ class SubscribeAssistantEnhanced(_PluginBase):
             return None
         return bool(torrents)
 
+    def _downloader_snapshot(self):
+        """为一轮下载巡检创建下载器快照；每个下载器只列一次种子，列种失败时回退逐 hash 查询。"""
+        if not self._downloader_helper:
+            return None
+        return DownloaderSnapshot(
+            service_fn=lambda name: self._downloader_helper.get_service(name=name),
+            fetch_fn=self._fetch_downloader_torrent,
+            present_fn=self._downloader_torrent_present,
+        )
+
     def _schedule_delayed_subscribe_search(self, subscribe, scene: str):
-        """随机延迟执行单订阅搜索，并返回实际延迟秒数供调用方展示。"""
-        if not self._subscribe_chain or not subscribe:
+        """随机延迟执行单订阅搜索，并返回实际延迟秒数供调用方展示。
+
+        搜索进入持久化延迟队列：同一订阅已有更早的安排时沿用原安排，重启后继续执行。
+        """
+        if not self._subscribe_chain or not self._delayed_search_queue or not subscribe:
             return None
         sid = subscribe.id
         if sid:
-            delay_minutes = random.uniform(3, 5)
-            delay_seconds = delay_minutes * 60
+            delay_seconds = self._delayed_search_queue.schedule(sid, random.uniform(3, 5) * 60, scene)
             logger.info(
-                f"{scene}：{format_subscribe(subscribe)} 将在 {delay_minutes:.2f} 分钟后触发补全搜索"
+                f"{scene}：{format_subscribe(subscribe)} 将在 {delay_seconds / 60:.2f} 分钟后触发补全搜索"
             )
-            threading.Timer(delay_seconds, lambda: self._subscribe_chain.search(sid=sid)).start()
             return delay_seconds
         return None
 
+    def _cancel_delayed_search(self, sid):
+        """订阅任务数据清理时取消其尚未执行的延迟搜索。"""
+        if self._delayed_search_queue:
+            self._delayed_search_queue.cancel(sid)
+
     def _search_subscribe(self, subscribe):
         """删种后随机延迟补搜，并返回实际延迟秒数供通知展示。"""
         return self._schedule_delayed_subscribe_search(subscribe, scene="种子删除处理")
@@ -1671,25 +1769,39 @@ class SubscribeAssistantEnhanced(_PluginBase):
             return None
         query_failed = False
         for name, service in services.items():
-            if not service or not service.instance:
-                query_failed = True
-                continue
-            try:
-                torrents, error = service.instance.get_torrents(ids=download_hash)
-            except Exception as err:
-                logger.warning(f"订阅清理：查询下载器 {name} 的旧任务失败 hash={download_hash}，错误信息：{err}")
-                query_failed = True
-                continue
-            if error:
-                logger.warning(f"订阅清理：下载器 {name} 查询旧任务失败 hash={download_hash}")
-                query_failed = True
-                continue
-            if torrents:
+            exists = self._query_downloader_hash(name, service, download_hash)
+            if exists:
                 return True
+            if exists is None:
+                query_failed = True
         if query_failed:
             return None
         return False
 
+    @staticmethod
+    def _query_downloader_hash(name, service, download_hash: str) -> Optional[bool]:
+        """在单个下载器按 hash 查询旧任务；服务缺失、报错或抛异常时返回 None。"""
+        if not service or not service.instance:
+            return None
+        try:
+            torrents, error = service.instance.get_torrents(ids=download_hash)
+        except Exception as err:
+            logger.warning(f"订阅清理：查询下载器 {name} 的旧任务失败 hash={download_hash}，错误信息：{err}")
+            return None
+        if error:
+            logger.warning(f"订阅清理：下载器 {name} 查询旧任务失败 hash={download_hash}")
+            return None
+        return bool(torrents)
+
+    def _torrent_hash_index(self, hashes: Optional[set[str]] = None) -> Optional[DownloaderHashIndex]:
+        """并发查询全部下载器一次，建立跨下载器旧 hash 索引供订阅清理批量确认；传入 hashes 时只按 ids 查询这些 hash。"""
+        if not self._downloader_helper:
+            return None
+        services = self._downloader_helper.get_services()
+        if not services:
+            return None
+        return DownloaderHashIndex(services, query_fn=self._query_downloader_hash, hashes=hashes)
+
     def _send_subscribe_added(self, subscribe_id, mediainfo=None, username=None):
         """发 SubscribeAdded 事件，让主程序和其他插件感知订阅创建。"""
         eventmanager.send_event(EventType.SubscribeAdded, {
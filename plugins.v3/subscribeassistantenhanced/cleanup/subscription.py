@@ -18,6 +18,9 @@ from ..shared.subscribe import (
 
 SUBSCRIPTION_CLEANUP_TTL_SECONDS = 36 * 3600
 SUBSCRIPTION_CLEANUP_SNAPSHOT_KEY = "subscription_cleanup_histories"
+# 待确认旧 hash 达到该数量时，本次清理列出一次全部种子建立跨下载器索引；
+# 其余轮次每个下载器按 ids 只查询仍未释放的 hash，单个 hash 逐个查询。
+TORRENT_INDEX_MIN_HASHES = 50
 
 
 class SubscriptionCleanup:
@@ -38,6 +41,7 @@ class SubscriptionCleanup:
                  get_subscribe_image_fn: Optional[Callable] = None,
                  season_of_fn: Optional[Callable] = None,
                  torrent_exists_fn: Optional[Callable] = None,
+                 torrent_index_fn: Optional[Callable] = None,
                  sleep_fn: Optional[Callable] = None,
                  cleanup_history_type: str = "no",
                  cleanup_history_scenes: Optional[list] = None):
@@ -52,6 +56,7 @@ class SubscriptionCleanup:
         self._get_subscribe_image = get_subscribe_image_fn
         self._season_of = season_of_fn
         self._torrent_exists = torrent_exists_fn
+        self._torrent_index = torrent_index_fn
         self._sleep = sleep_fn or time.sleep
         self._cleanup_history_type = cleanup_history_type
         self._cleanup_history_scenes = list(cleanup_history_scenes or [])
@@ -268,19 +273,24 @@ class SubscriptionCleanup:
 
     def _wait_for_torrents_removed(self, subscribe, download_hashes: set[str]) -> bool:
         """每 5 秒确认旧 hash：查询失败等 1 分钟，明确存在等 3 分钟，超限后放行。"""
-        if not download_hashes or not self._torrent_exists:
+        if not download_hashes or not (self._torrent_exists or self._torrent_index):
             # 删除事件由主程序异步处理，即使无法确认 hash，也保留固定的首轮处理窗口。
             self._sleep(5)
             return True
         pending_hashes = set(download_hashes)
         exists_wait = {download_hash: 0 for download_hash in pending_hashes}
         query_failure_wait = {download_hash: 0 for download_hash in pending_hashes}
+        listed = False
         for waited_seconds in range(5, 181, 5):
             self._sleep(5)
             next_pending_hashes = set()
+            full_listing = not listed and len(pending_hashes) >= TORRENT_INDEX_MIN_HASHES
+            listed = listed or full_listing
+            index = self._round_torrent_index(pending_hashes, full_listing=full_listing)
+            torrent_exists = index.exists if index is not None else (self._torrent_exists or (lambda _hash: None))
             for download_hash in pending_hashes:
                 # DownloadFileDeleted 会跨下载器删除旧任务，确认时也必须跨下载器查询。
-                exists = self._torrent_exists(download_hash)
+                exists = torrent_exists(download_hash)
                 if exists is None:
                     query_failure_wait[download_hash] += 5
                     if query_failure_wait[download_hash] >= 60:
@@ -302,6 +312,8 @@ class SubscriptionCleanup:
                         )
                         continue
                     next_pending_hashes.add(download_hash)
+            if index is not None:
+                detail(f"订阅清理：本轮确认 {len(pending_hashes)} 个旧 hash，{index.summary()}")
             pending_hashes = next_pending_hashes
             if not pending_hashes:
                 logger.info(
@@ -320,6 +332,19 @@ class SubscriptionCleanup:
         )
         return True
 
+    def _round_torrent_index(self, pending_hashes: set[str], full_listing: bool = False):
+        """为本轮建立跨下载器索引：full_listing 时列出全部种子，否则只按 ids 查询待确认的 hash。
+
+        单个 hash 或无法建立索引时返回 None 逐个查询。
+        """
+        if not self._torrent_index:
+            return None
+        if full_listing:
+            return self._torrent_index()
+        if len(pending_hashes) < 2 and self._torrent_exists:
+            return None
+        return self._torrent_index(set(pending_hashes))
+
     def _history_season(self, subscribe) -> Optional[str]:
         """按主程序整理历史口径把订阅季号转换为 Sxx。"""
         if self._season_of:
@@ -2,6 +2,7 @@
 import hashlib
 import re
 import time
+from contextlib import nullcontext
 from typing import Callable, Optional
 
 from app.sdk.logging import logger
@@ -27,14 +28,21 @@ class DownloadMonitor:
                  subscribe_oper=None,
                  fetch_fn: Optional[Callable] = None,
                  present_fn: Optional[Callable] = None,
+                 snapshot_fn: Optional[Callable] = None,
                  manual_delete_enabled: bool = True,
                  manual_miss_threshold: int = 2,
                  pending_download_enabled: bool = True,
                  state_coordinator=None,
-                 pending_hash_grace_seconds: int = 10 * 60):
+                 pending_hash_grace_seconds: int = 10 * 60,
+                 task_data_record: Optional[Callable] = None,
+                 task_data_batch: Optional[Callable] = None):
         """保存下载检查参数；下载中待定开关不影响自动删种检查。"""
         self._read = task_data_read
         self._update = task_data_update
+        # task_data_record(key, record_id) 按条读取，避免逐种子复制整块任务数据。
+        self._read_record = task_data_record
+        # task_data_batch() 返回写回缓冲上下文，一轮巡检内的任务数据修改合并落盘。
+        self._batch = task_data_batch
         self._timeout_seconds = timeout_minutes * 60
         self._progress_threshold = progress_threshold
         self._queue_grace_multiplier = max(int(queue_grace_multiplier or 0), 0)
@@ -46,6 +54,8 @@ class DownloadMonitor:
         self._fetch_fn = fetch_fn
         # present_fn(downloader, hash) -> Optional[bool]：True=存在，False=可达但不存在，None=不可判定。
         self._present_fn = present_fn
+        # snapshot_fn() -> DownloaderSnapshot：每轮巡检建一次快照，按下载器列种一次后在内存中判定。
+        self._snapshot_fn = snapshot_fn
         # 关闭监听手动删除时，仍清理本地失效任务，但不触发删种善后。
         self._manual_delete_enabled = manual_delete_enabled
         # 连续 miss 达阈值才判手动删除，避免下载器瞬断触发误删善后。
@@ -190,6 +200,11 @@ class DownloadMonitor:
         fetch_fn 未注入时安全空操作；完成或本地失效任务会释放下载待定。
         只有启用监听手动删除且 present_fn 明确返回 False，才进入删除善后。
         """
+        with self._batch() if self._batch else nullcontext():
+            self._run_timeout_check(cleanup)
+
+    def _run_timeout_check(self, cleanup=None):
+        """逐个下载任务判定实时状态，任务数据修改在外层 batch 内合并。"""
         torrents = self._read("torrents") or {}
         total = len(torrents)
         if total == 0:
@@ -208,9 +223,13 @@ class DownloadMonitor:
         cleanup_count = 0
         removed_count = 0
         triggered_subscribe_ids = set()
+        # 快照只覆盖本轮；无法列种的下载器由快照回退到逐 hash 查询。
+        snapshot = self._snapshot_fn() if self._snapshot_fn else None
+        fetch_fn = snapshot.fetch if snapshot else self._fetch_fn
+        present_fn = snapshot.present if snapshot and self._present_fn else self._present_fn
         for torrent_hash, task in list(torrents.items()):
             downloader = task.get("downloader")
-            info = self._fetch_fn(downloader, torrent_hash)
+            info = fetch_fn(downloader, torrent_hash)
             if info:
                 visible_count += 1
                 self._reset_missing(torrent_hash)
@@ -257,11 +276,11 @@ class DownloadMonitor:
                 continue
             # 拿不到实时状态时，只有下载器可达且连续确认种子不存在，才按用户手动删除处理。
             missing_realtime_count += 1
-            if not self._present_fn:
+            if not present_fn:
                 no_present_check_count += 1
                 skipped_count += 1
                 continue
-            present = self._present_fn(downloader, torrent_hash) if self._present_fn else None
+            present = present_fn(downloader, torrent_hash)
             if present is not False:
                 if present is True:
                     present_exists_count += 1
@@ -317,6 +336,8 @@ class DownloadMonitor:
             f"下载监控：本轮检查 {total} 个下载任务，下载器中仍存在 {visible_count} 个，"
             f"{skip_detail}，已处理删除 {cleanup_count} 个，从订阅下载任务移除 {removed_count} 个"
         )
+        if snapshot:
+            detail(f"下载监控：{snapshot.summary()}")
 
     def _format_task_subscribe_label(self, task: dict) -> str:
         """下载任务日志中的订阅标签；优先展示订阅名、季号和订阅 ID。"""
@@ -610,8 +631,13 @@ class DownloadMonitor:
             return keyword.lower() in response.lower()
 
     def _get_torrent_task(self, torrent_hash: str) -> Optional[dict]:
-        data = self._read("torrents")
-        return data.get(torrent_hash)
+        return self._get_record("torrents", torrent_hash)
+
+    def _get_record(self, key: str, record_id: str) -> Optional[dict]:
+        """读取单条任务记录；未注入按条读取时回退整块读取。"""
+        if self._read_record:
+            return self._read_record(key, record_id)
+        return (self._read(key) or {}).get(record_id)
 
     def _init_torrent_task(self, info: TorrentInfo):
         now = time.time()
@@ -761,7 +787,7 @@ class DownloadMonitor:
     def get_timeout_reason(self, subscribe_id: int, torrent_task: dict, torrent_info: TorrentInfo) -> str:
         """描述下载时长、观察窗口、进度增长和连续超时次数。"""
         scope_key = self._timeout_scope_key(subscribe_id, torrent_task)
-        subscribe_task = (self._read("subscribes") or {}).get(str(subscribe_id), {})
+        subscribe_task = self._get_record("subscribes", str(subscribe_id)) or {}
         timeout_state = (subscribe_task.get("timeout_states") or {}).get(scope_key, {})
         started_at = torrent_task.get("time") or torrent_task.get("baseline_at") or time.time()
         download_hours = max(time.time() - started_at, 0) / 3600
@@ -790,7 +816,7 @@ class DownloadMonitor:
         """读取人工保护期：同一 hash 在 ignore_until 前不再重复计数或处理。"""
         sid = str(subscribe_id)
         scope_key = self._timeout_scope_key(subscribe_id, torrent_task)
-        task = (self._read("subscribes") or {}).get(sid, {})
+        task = self._get_record("subscribes", sid) or {}
         state = (task.get("timeout_states") or {}).get(scope_key, {})
         try:
             ignore_until = float(state.get("ignore_until") or 0)
@@ -0,0 +1,184 @@
+"""单轮巡检的下载器种子快照：每个下载器只列一次全部种子，按 hash 在内存中回答取种与存在性查询。"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+from app.sdk.logging import logger
+
+from .torrent import TorrentAdapter, TorrentInfo, _get_attr
+from ..shared.log import detail
+
+HASH_INDEX_MAX_WORKERS = 4
+
+
+class DownloaderSnapshot:
+    """按下载器缓存一次全量种子列表，列种失败的下载器回退到逐 hash 查询。
+
+    快照只在一轮巡检内有效，不跨轮复用，避免用旧状态判定超时或手动删除。
+    原始种子按 hash 建索引，只在取种时才映射为 TorrentInfo，避免为无关种子读取 tracker 等惰性字段。
+    """
+
+    def __init__(self, service_fn: Callable[[str], Any],
+                 fetch_fn: Optional[Callable] = None,
+                 present_fn: Optional[Callable] = None):
+        """service_fn(downloader) 返回下载器服务；fetch_fn/present_fn 为逐 hash 查询回退。"""
+        self._service_fn = service_fn
+        self._fetch_fn = fetch_fn
+        self._present_fn = present_fn
+        self._lock = threading.Lock()
+        # downloader -> (下载器类型, {hash: 原始种子})；None 表示该下载器无法列种，需回退逐 hash 查询
+        self._indexes: dict[str, Optional[tuple[str, dict]]] = {}
+        self.list_calls = 0
+        self.fallback_calls = 0
+
+    def fetch(self, downloader, torrent_hash) -> Optional[TorrentInfo]:
+        """从快照取单个种子并映射为 TorrentInfo；快照中不存在返回 None。"""
+        index = self._index_for(downloader)
+        if index is None:
+            return self._fallback(self._fetch_fn, downloader, torrent_hash)
+        dl_type, torrents = index
+        torrent = torrents.get(str(torrent_hash or "").lower())
+        if torrent is None:
+            return None
+        return TorrentAdapter.get_info(torrent, dl_type)
+
+    def present(self, downloader, torrent_hash) -> Optional[bool]:
+        """True=在下载器中；False=下载器已列出全部种子但不含该 hash；None=不可判定。"""
+        index = self._index_for(downloader)
+        if index is None:
+            return self._fallback(self._present_fn, downloader, torrent_hash)
+        return str(torrent_hash or "").lower() in index[1]
+
+    def summary(self) -> str:
+        """快照查询统计，供巡检日志展示下载器调用次数。"""
+        listed = sum(1 for index in self._indexes.values() if index is not None)
+        return (f"列出下载器 {listed} 个，列种调用 {self.list_calls} 次，"
+                f"回退逐个查询 {self.fallback_calls} 次")
+
+    def _fallback(self, fn: Optional[Callable], downloader, torrent_hash):
+        """无法列种的下载器按原逐 hash 查询判定。"""
+        if not fn:
+            return None
+        self.fallback_calls += 1
+        return fn(downloader, torrent_hash)
+
+    def _index_for(self, downloader) -> Optional[tuple[str, dict]]:
+        """取下载器的种子索引，首次访问时列一次全部种子。"""
+        if not downloader:
+            return None
+        with self._lock:
+            if downloader not in self._indexes:
+                self._indexes[downloader] = self._build_index(downloader)
+            return self._indexes[downloader]
+
+    def _build_index(self, downloader) -> Optional[tuple[str, dict]]:
+        """列出下载器全部种子并按小写 hash 建索引；服务缺失、报错或无法识别类型时返回 None。"""
+        try:
+            service = self._service_fn(downloader)
+        except Exception as err:
+            logger.warning(f"下载器快照：获取下载器 {downloader} 服务失败，回退逐个查询，错误信息：{err}")
+            return None
+        if not service or not service.instance or service.type not in ("qbittorrent", "transmission"):
+            return None
+        self.list_calls += 1
+        try:
+            torrents, error = service.instance.get_torrents()
+        except Exception as err:
+            logger.warning(f"下载器快照：列出下载器 {downloader} 的种子失败，回退逐个查询，错误信息：{err}")
+            return None
+        if error:
+            detail(f"下载器快照：下载器 {downloader} 列种失败，本轮回退逐个查询")
+            return None
+        index = {}
+        for torrent in torrents or []:
+            torrent_hash = _get_attr(torrent, "hash", "hashString", default="")
+            if torrent_hash:
+                index[str(torrent_hash).lower()] = torrent
+        detail(f"下载器快照：下载器 {downloader} 共 {len(index)} 个种子")
+        return service.type, index
+
+
+class DownloaderHashIndex:
+    """跨下载器的旧 hash 索引：构造时并发列出每个下载器一次，按 hash 集合回答存在性查询。
+
+    判定口径与逐 hash 查询一致：任一下载器命中即存在；未命中且任一下载器不可判定
+    （服务缺失、列种报错或抛异常）时返回 None。无法从列种结果读取 hash 的下载器类型
+    回退 query_fn 逐 hash 查询。索引只代表构造时刻的下载器状态。
+    传入 hashes 时每个下载器只按 ids 查询这些 hash，不列出全部种子，范围外的 hash 按不可判定处理。
+    """
+
+    def __init__(self, services: dict, query_fn: Optional[Callable] = None,
+                 max_workers: int = HASH_INDEX_MAX_WORKERS, hashes: Optional[set[str]] = None):
+        """services 为 {下载器名: 服务}；query_fn(name, service, hash) 为逐 hash 查询回退；hashes 为查询范围。"""
+        self._services = dict(services or {})
+        self._query_fn = query_fn
+        self._scope = {str(torrent_hash).lower() for torrent_hash in hashes} if hashes is not None else None
+        self.fallback_calls = 0
+        listable = [name for name, service in self._services.items() if not self._needs_fallback(service)]
+        self.list_calls = sum(1 for name in listable if self._services[name] and self._services[name].instance)
+        if len(listable) > 1:
+            with ThreadPoolExecutor(max_workers=min(len(listable), max(int(max_workers or 1), 1)),
+                                    thread_name_prefix="downloader-hash-index") as executor:
+                results = list(executor.map(self._list_hashes, listable))
+        else:
+            results = [self._list_hashes(name) for name in listable]
+        # downloader -> hash 集合；None 表示该下载器不可判定，不在字典中表示需回退逐 hash 查询
+        self._hashes: dict[str, Optional[set[str]]] = dict(zip(listable, results))
+
+    def exists(self, torrent_hash) -> Optional[bool]:
+        """True=任一下载器含该 hash；False=全部下载器确认不存在；None=未命中且存在不可判定的下载器。"""
+        if not self._services or not torrent_hash:
+            return None
+        target = str(torrent_hash).lower()
+        if self._scope is not None and target not in self._scope:
+            return None
+        query_failed = False
+        for name, service in self._services.items():
+            if name in self._hashes:
+                hashes = self._hashes[name]
+                result = None if hashes is None else target in hashes
+            elif self._query_fn:
+                self.fallback_calls += 1
+                result = self._query_fn(name, service, torrent_hash)
+            else:
+                result = None
+            if result:
+                return True
+            if result is None:
+                query_failed = True
+        return None if query_failed else False
+
+    def summary(self) -> str:
+        """索引构建统计，供订阅清理日志展示下载器调用次数。"""
+        failed = sum(1 for hashes in self._hashes.values() if hashes is None)
+        return (f"列种调用 {self.list_calls} 次（失败 {failed} 个），"
+                f"回退逐个查询 {self.fallback_calls} 次")
+
+    @staticmethod
+    def _needs_fallback(service) -> bool:
+        """服务可用但类型无法从列种结果读取 hash 时回退逐 hash 查询；服务缺失按不可判定处理。"""
+        return bool(service and service.instance) and getattr(service, "type", None) not in (
+            "qbittorrent", "transmission")
+
+    def _list_hashes(self, name) -> Optional[set[str]]:
+        """列出单个下载器的全部种子 hash（有查询范围时只按 ids 查询范围内的 hash）；服务缺失、报错或抛异常时返回 None。"""
+        service = self._services.get(name)
+        if not service or not service.instance:
+            return None
+        try:
+            if self._scope is not None:
+                torrents, error = service.instance.get_torrents(ids=sorted(self._scope)) if self._scope else ([], False)
+            else:
+                torrents, error = service.instance.get_torrents()
+        except Exception as err:
+            logger.warning(f"旧任务索引：列出下载器 {name} 的种子失败，本轮按不可判定处理，错误信息：{err}")
+            return None
+        if error:
+            logger.warning(f"旧任务索引：下载器 {name} 列种失败，本轮按不可判定处理")
+            return None
+        hashes = set()
+        for torrent in torrents or []:
+            torrent_hash = _get_attr(torrent, "hash", "hashString", default="")
+            if torrent_hash:
+                hashes.add(str(torrent_hash).lower())
+        return hashes
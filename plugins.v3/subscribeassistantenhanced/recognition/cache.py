@@ -0,0 +1,162 @@
+"""二次识别结果缓存：进程内 LRU，可选持久化层跨重启复用。"""
+import threading
+import time
+from typing import Callable, Optional
+
+# 只持久化确定结果；识别失败多为网络或站点瞬时问题，重启后应重新识别。
+_PERSISTENT_STATUSES = {"recognized", "empty"}
+
+
+class SecondaryRecognitionCache:
+    """按 sha1 指纹缓存二次识别结果，超过 maxsize 按最久未使用淘汰。
+
+    注入 load_fn/save_fn 后启用持久化层：首次访问时载入，版本指纹不一致整体作废，
+    过期条目在载入、读取和写回时丢弃；新结果只标记待写，由 flush 一次性写回。
+    持久化层只保留最近使用的 persist_maxsize 条，flush_interval 内的重复 flush 不写，
+    避免每轮过滤都整体重写大缓存。读写由同一把锁保护，供并发二次识别共享。
+    """
+
+    def __init__(self, maxsize: int, ttl_seconds: float = 0, version: str = "",
+                 load_fn: Optional[Callable] = None, save_fn: Optional[Callable] = None,
+                 logger_fn: Optional[Callable] = None, persist_maxsize: int = 0, flush_interval: float = 0):
+        self.maxsize = max(1, int(maxsize or 1))
+        self.ttl_seconds = max(float(ttl_seconds or 0), 0)
+        self.version = version
+        # persist_maxsize 为 0 时持久化层与内存容量一致；flush_interval 为 0 时每次 flush 都写回。
+        self.persist_maxsize = min(max(int(persist_maxsize or 0), 0) or self.maxsize, self.maxsize)
+        self.flush_interval = max(float(flush_interval or 0), 0)
+        self._flushed_at = 0.0
+        self._load_fn = load_fn
+        self._save_fn = save_fn
+        self._logger_fn = logger_fn
+        self._entries: dict[str, dict] = {}
+        self._persisted_keys: set[str] = set()
+        self._loaded = not load_fn
+        self._lock = threading.RLock()
+        self._dirty = False
+        self.stats = {"hit": 0, "miss": 0, "evict": 0, "expired": 0, "persisted_hit": 0}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._entries
+
+    def get(self, key: str) -> Optional[dict]:
+        """读取缓存结果并刷新 LRU 顺序；未命中或已过期返回 None。"""
+        with self._lock:
+            return self._get(key)
+
+    def _get(self, key: str) -> Optional[dict]:
+        self._ensure_loaded()
+        entry = self._entries.get(key)
+        if entry is not None and self._expired(entry, time.time()):
+            self._drop(key)
+            self.stats["expired"] += 1
+            entry = None
+        if entry is None:
+            self.stats["miss"] += 1
+            return None
+        self._entries[key] = self._entries.pop(key)
+        self.stats["hit"] += 1
+        if key in self._persisted_keys:
+            self.stats["persisted_hit"] += 1
+            self._persisted_keys.discard(key)
+        return entry
+
+    def put(self, key: str, value: dict):
+        """写入缓存结果，超过容量时淘汰最久未使用的条目。"""
+        with self._lock:
+            self._put(key, value)
+
+    def _put(self, key: str, value: dict):
+        self._ensure_loaded()
+        self._entries.pop(key, None)
+        self._persisted_keys.discard(key)
+        self._entries[key] = {**value, "at": time.time()}
+        if value.get("status") in _PERSISTENT_STATUSES:
+            self._dirty = True
+        self._evict()
+
+    def flush(self, force: bool = False):
+        """把确定结果写回持久化层；没有新结果、未启用持久化或距上次写回不足 flush_interval 时不写。
+
+        force 为 True 时忽略写回间隔，供插件停止时落盘。
+        """
+        with self._lock:
+            self._flush(force)
+
+    def _flush(self, force: bool):
+        if not self._dirty or not self._save_fn:
+            return
+        now = time.time()
+        if not force and now - self._flushed_at < self.flush_interval:
+            return
+        # 条目按最久未使用在前排列，倒序取最近使用的 persist_maxsize 条确定结果。
+        entries = {}
+        for key in reversed(self._entries):
+            entry = self._entries[key]
+            if entry.get("status") in _PERSISTENT_STATUSES and not self._expired(entry, now):
+                entries[key] = entry
+                if len(entries) >= self.persist_maxsize:
+                    break
+        self._flushed_at = now
+        try:
+            self._save_fn({"version": self.version, "entries": dict(reversed(entries.items()))})
+            self._dirty = False
+        except Exception as err:
+            self._log(f"二次识别缓存写入失败，本轮结果仅保留在内存：{err}")
+
+    def summary(self) -> str:
+        """命中统计，供识别增强审计摘要展示。"""
+        return ",".join(f"{name}:{count}" for name, count in self.stats.items()) + f",size:{len(self._entries)}"
+
+    def _ensure_loaded(self):
+        """首次访问时载入持久化层，版本不一致或格式异常时整体作废并在下次 flush 覆盖。"""
+        if self._loaded:
+            return
+        self._loaded = True
+        try:
+            data = self._load_fn() or {}
+        except Exception as err:
+            self._log(f"二次识别缓存读取失败，本轮从空缓存开始：{err}")
+            return
+        entries = data.get("entries") if isinstance(data, dict) else None
+        if not isinstance(entries, dict):
+            return
+        if data.get("version") != self.version:
+            self._dirty = bool(entries)
+            self._log(f"二次识别缓存版本已变化，作废 {len(entries)} 条持久化结果")
+            return
+        now = time.time()
+        valid = [(key, entry) for key, entry in entries.items()
+                 if isinstance(entry, dict) and not self._expired(entry, now)]
+        self.stats["expired"] += len(entries) - len(valid)
+        self._dirty = len(valid) != len(entries)
+        valid.sort(key=lambda item: item[1].get("at") or 0)
+        for key, entry in valid[-self.maxsize:]:
+            self._entries[key] = entry
+            self._persisted_keys.add(key)
+
+    def _expired(self, entry: dict, now: float) -> bool:
+        if not self.ttl_seconds:
+            return False
+        try:
+            return now - float(entry.get("at") or 0) > self.ttl_seconds
+        except (TypeError, ValueError):
+            return True
+
+    def _evict(self):
+        while len(self._entries) > self.maxsize:
+            self._drop(next(iter(self._entries)))
+            self.stats["evict"] += 1
+
+    def _drop(self, key: str):
+        entry = self._entries.pop(key)
+        self._persisted_keys.discard(key)
+        if entry.get("status") in _PERSISTENT_STATUSES:
+            self._dirty = True
+
+    def _log(self, message: str):
+        if self._logger_fn:
+            self._logger_fn(message)
@@ -1,7 +1,9 @@
 """识别增强候选准入判定器。"""
 import re
+import threading
 import time
 from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import fields
 from hashlib import sha1
 from types import SimpleNamespace
@@ -9,7 +11,8 @@ from types import SimpleNamespace
 from app.sdk.media import MetaInfo
 
 from .audit import redact_sensitive_text, sanitize_candidate_summary
-from .keywords import load_keyword_groups, match_first
+from .cache import SecondaryRecognitionCache
+from .keywords import compile_keywords, load_keyword_groups
 from .scope import build_target, candidate_from_context
 from .strategy import parse_strategy
 from .types import (
@@ -32,6 +35,9 @@ _SECONDARY_CACHE_KEY_VERSION = "v2"
 _SECONDARY_ROUTE_TITLE = "title"
 _SECONDARY_ROUTE_TITLE_SUBTITLE = "title_subtitle"
 _SECONDARY_CONTROL_FIELDS = ("tmdbid", "doubanid", "episode_group", "type")
+# 用户关键字覆盖内置分组后仍保留的电影版 / 真人版兜底信号。
+_MOVIE_FALLBACK_KEYWORDS = compile_keywords(("电影版", "剧场版", "劇場版"))
+_LIVE_ACTION_FALLBACK_KEYWORDS = compile_keywords(("真人版", "实拍版", "真人剧"))
 _BRACED_CONTROL_TAG_RE = re.compile(
     r"\{\[[^\]]*(?:tmdbid|doubanid|type|g|s|e)\s*=[^\]]*]\}",
     re.IGNORECASE,
@@ -65,7 +71,23 @@ class RecognitionGuard:
         self.last_target: RecognitionTarget | None = None
         self.last_notification = None
         self._notification_cache: dict[tuple, float] = {}
-        self._secondary_cache: dict[str, dict] = {}
+        self._secondary_cache = SecondaryRecognitionCache(
+            maxsize=self.settings.cache_maxsize,
+            ttl_seconds=max(int(self.settings.cache_ttl_hours or 0), 0) * 3600,
+            version=self._secondary_cache_version(),
+            load_fn=self.runtime.secondary_cache_load_fn,
+            save_fn=self.runtime.secondary_cache_save_fn,
+            logger_fn=self.runtime.logger_fn,
+            persist_maxsize=self.settings.cache_persist_maxsize,
+            flush_interval=self.settings.cache_flush_interval,
+        )
+        # 二次识别并发上限：线程池宽度与同时在途的识别调用数都不超过该值，跨并发 filter 调用共享。
+        self._secondary_workers = max(int(self.settings.secondary_workers or 1), 1)
+        self._recognizer_slots = threading.BoundedSemaphore(self._secondary_workers)
+
+    def flush_cache(self):
+        """忽略写回间隔，把尚未落盘的二次识别结果写回持久化层。"""
+        self._secondary_cache.flush(force=True)
 
     def evaluate(self, target: RecognitionTarget, candidate: CandidateResource,
                  secondary_failed: bool = False) -> Decision:
@@ -97,10 +119,8 @@ class RecognitionGuard:
         )
         self.last_target = target
         raw_contexts = list(contexts or [])
-        candidates = [
-            self._candidate_with_secondary(target, context, candidate_from_context(context, order=index))
-            for index, context in enumerate(raw_contexts)
-        ]
+        candidates = self._candidates_with_secondary(target, raw_contexts)
+        self._secondary_cache.flush()
         batch = self.filter_candidate_dicts(
             target,
             candidates,
@@ -232,9 +252,9 @@ class RecognitionGuard:
     def _decide_enabled(self, target: RecognitionTarget, candidate: CandidateResource,
                         secondary_failed: bool = False) -> Decision:
         text = self._candidate_text(candidate)
-        allow_match = match_first(self.keyword_groups.allow, text)
-        hard_block_match = match_first(self.keyword_groups.hard_block, text)
-        block_match = match_first(self.keyword_groups.block, text)
+        allow_match = self.keyword_groups.matcher("allow").match_first(text)
+        hard_block_match = self.keyword_groups.matcher("hard_block").match_first(text)
+        block_match = self.keyword_groups.matcher("block").match_first(text)
         live_action_match = self._live_action_match(text)
         trusted_identity = self._trusted_same_identity(target, candidate)
 
@@ -335,7 +355,8 @@ class RecognitionGuard:
     def _type_decisions(self, target: RecognitionTarget, candidate: CandidateResource, trusted_identity: bool):
         text = self._candidate_text(candidate)
         episode_signal = bool(candidate.episodes or re.search(r"\bS\d{1,3}(?:E\d{1,4})?\b|第\s*\d+\s*集", text, re.I))
-        movie_match = match_first(self.keyword_groups.movie, text) or match_first(["电影版", "剧场版", "劇場版"], text)
+        movie_match = (self.keyword_groups.matcher("movie").match_first(text)
+                       or _MOVIE_FALLBACK_KEYWORDS.match_first(text))
         if target.media_type == "电视剧" and movie_match and not episode_signal:
             return (ACTION_BLOCK, "series_movie_conflict", f"剧集目标命中电影版资源信号：{movie_match}"), None
         if target.media_type != "电影" or trusted_identity:
@@ -524,6 +545,54 @@ class RecognitionGuard:
         stages.append({"stage": "recognition", "input": input_count, "output": output_count})
         return stages
 
+    def _candidates_with_secondary(self, target: RecognitionTarget, contexts: list) -> list[CandidateResource]:
+        """构建候选并执行二次识别，结果保持原始顺序。
+
+        开启并发时先按归一化标题去重，每组首个候选在线程池中识别；重复候选随后顺序执行并命中缓存，
+        因此输出与顺序执行一致。
+        """
+        candidates = [candidate_from_context(context, order=index) for index, context in enumerate(contexts)]
+        if (
+                self._secondary_workers <= 1
+                or len(candidates) <= 1
+                or not self._should_run_secondary()
+                or not self.runtime.secondary_recognizer
+        ):
+            return [
+                self._candidate_with_secondary(target, context, candidate)
+                for context, candidate in zip(contexts, candidates)
+            ]
+
+        first_indexes: dict[tuple, int] = {}
+        for index, (context, candidate) in enumerate(zip(contexts, candidates)):
+            first_indexes.setdefault(self._secondary_dedupe_key(context, candidate), index)
+        unique_indexes = sorted(first_indexes.values())
+        workers = min(self._secondary_workers, len(unique_indexes))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="recognition-secondary") as executor:
+            list(executor.map(
+                lambda index: self._candidate_with_secondary(target, contexts[index], candidates[index]),
+                unique_indexes,
+            ))
+        unique = set(unique_indexes)
+        return [
+            candidate if index in unique else self._candidate_with_secondary(target, contexts[index], candidate)
+            for index, candidate in enumerate(candidates)
+        ]
+
+    def _secondary_dedupe_key(self, context, candidate: CandidateResource) -> tuple:
+        """同一键的候选生成相同的二次识别路由与缓存键。"""
+        title_meta = getattr(context, "meta_info", None)
+        return (
+            self._normalize_route_text(self._meta_route_title(title_meta, candidate.title)),
+            self._normalize_route_text(self._meta_route_subtitle(title_meta, candidate.description)),
+            self._normalize_route_text(candidate.title),
+            self._normalize_route_text(candidate.description),
+            str(candidate.media_type or ""),
+            str(candidate.year or ""),
+            str(candidate.season or ""),
+            str(candidate.episode_group or ""),
+        )
+
     def _candidate_with_secondary(self, target: RecognitionTarget, context, candidate: CandidateResource
                                   ) -> CandidateResource:
         if not self._should_run_secondary():
@@ -630,7 +699,8 @@ class RecognitionGuard:
             return result
 
         try:
-            media_info = self.runtime.secondary_recognizer(meta)
+            with self._recognizer_slots:
+                media_info = self.runtime.secondary_recognizer(meta)
         except Exception as err:
             result.status = "failed"
             result.failure = redact_sensitive_text(err)
@@ -766,18 +836,22 @@ class RecognitionGuard:
         return sha1(RecognitionGuard._normalize_route_text(value).encode("utf-8")).hexdigest()
 
     def _remember_secondary(self, key: str, value: SecondaryRecognitionRouteResult):
-        maxsize = max(1, int(self.settings.cache_maxsize or 1))
-        if key in self._secondary_cache:
-            del self._secondary_cache[key]
-        self._secondary_cache[key] = {
+        self._secondary_cache.put(key, {
             "tmdb_id": value.tmdb_id,
             "douban_id": value.douban_id,
             "status": value.status,
             "failure": value.failure,
-        }
-        while len(self._secondary_cache) > maxsize:
-            oldest = next(iter(self._secondary_cache))
-            del self._secondary_cache[oldest]
+        })
+
+    def _secondary_cache_version(self) -> str:
+        """持久化缓存版本指纹：缓存键版本、策略版本、关键字版本或关键字分组变化时整体作废。"""
+        raw = "\n".join([
+            _SECONDARY_CACHE_KEY_VERSION,
+            str(self.settings.strategy_version),
+            str(self.settings.keyword_version),
+            repr(self.keyword_groups),
+        ])
+        return sha1(raw.encode("utf-8")).hexdigest()
 
     def _log_audit(self):
         """写出完整识别增强审计摘要；通知限频不影响该日志。"""
@@ -792,6 +866,7 @@ class RecognitionGuard:
             f"tmdb_recheck_mode={self.settings.tmdb_recheck_mode}",
             f"notify_mode={self.settings.notify_mode}",
             f"cache_maxsize={self.settings.cache_maxsize}",
+            f"cache_stats={self._secondary_cache.summary()}",
             f"strategy={self.strategy.summary}",
             f"selection_original_count={batch.selection_original_count}",
             f"recognition_input_count={batch.recognition_input_count}",
@@ -910,7 +985,8 @@ class RecognitionGuard:
         return int(target.season) != int(candidate.season)
 
     def _live_action_match(self, text: str) -> str | None:
-        return match_first(self.keyword_groups.live_action, text) or match_first(["真人版", "实拍版", "真人剧"], text)
+        return (self.keyword_groups.matcher("live_action").match_first(text)
+                or _LIVE_ACTION_FALLBACK_KEYWORDS.match_first(text))
 
     @staticmethod
     def _has_explicit_episode_signal(text: str) -> bool:
@@ -1,7 +1,8 @@
 """识别增强关键字配置加载与匹配。"""
+import functools
 import re
 from dataclasses import dataclass, field
-from typing import Any
+from typing import Any, Iterable, Optional
 
 from ruamel.yaml import YAML
 
@@ -40,6 +41,15 @@ class KeywordGroups:
     allow: list[str] = field(default_factory=list)
     block: list[str] = field(default_factory=list)
     hard_block: list[str] = field(default_factory=list)
+    # 构造时为每个分组编译一次匹配器，匹配时直接取用；不参与 repr / 比较，避免影响按 repr 生成的缓存键。
+    _matchers: dict[str, "KeywordMatcher"] = field(default_factory=dict, init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        self._matchers = {key: compile_keywords(getattr(self, key)) for key in GROUP_KEYS}
+
+    def matcher(self, group: str) -> "KeywordMatcher":
+        """返回分组构造时预编译的匹配器；分组列表应整体替换为新的 KeywordGroups，而不是原地修改。"""
+        return self._matchers[group]
 
 
 GROUP_KEYS = ("live_action", "animation", "movie", "tv", "allow", "block", "hard_block")
@@ -75,17 +85,63 @@ def load_keyword_groups(config_text: str) -> KeywordGroups:
     data = _load_yaml_mapping(source)
     if not data or not any(key in data for key in GROUP_KEYS):
         data = _load_yaml_mapping(DEFAULT_KEYWORD_CONFIG)
-    groups = {key: _normalize_patterns(data.get(key)) for key in GROUP_KEYS}
-    return KeywordGroups(**groups)
+    return KeywordGroups(**{key: _normalize_patterns(data.get(key)) for key in GROUP_KEYS})
 
 
-def match_first(patterns: list[str], text: str) -> str | None:
-    """返回第一个匹配的关键字；非法正则只跳过该条，避免整组失效。"""
-    haystack = text or ""
-    for pattern in patterns:
-        try:
-            if re.search(pattern, haystack, re.IGNORECASE):
+# 合并进交替式后语义会变化的写法：编号 / 命名反向引用会指向其他关键字的分组，行内全局标志会作用到整组。
+_UNMERGEABLE_PATTERN = re.compile(r"\\[1-9]|\(\?P=|\(\?[aiLmsux]+\)")
+
+
+class KeywordMatcher:
+    """一组关键字的预编译匹配器。
+
+    可安全合并的关键字拼成一条忽略大小写的交替式做预筛：预筛未命中时直接判定不匹配；
+    命中后仍按关键字原顺序逐条匹配，保证返回的是列表中第一个匹配的关键字。
+    非法正则在编译时跳过，不影响同组其他关键字。
+    """
+
+    def __init__(self, patterns: Iterable[str]):
+        self.patterns = tuple(patterns)
+        self._compiled: list[tuple[str, re.Pattern]] = []
+        for pattern in self.patterns:
+            try:
+                self._compiled.append((pattern, re.compile(pattern, re.IGNORECASE)))
+            except re.error:
+                continue
+        mergeable = [pattern for pattern, _ in self._compiled if not _UNMERGEABLE_PATTERN.search(pattern)]
+        self._prefilter: Optional[re.Pattern] = None
+        if len(mergeable) > 1:
+            try:
+                self._prefilter = re.compile("|".join(f"(?:{pattern})" for pattern in mergeable), re.IGNORECASE)
+            except re.error:
+                self._prefilter = None
+        merged = set(mergeable) if self._prefilter is not None else set()
+        # 预筛未命中时仍需检查的关键字（未参与合并），保持原顺序。
+        self._unmerged = [(pattern, regex) for pattern, regex in self._compiled if pattern not in merged]
+
+    def match_first(self, text: str) -> str | None:
+        """返回第一个匹配的关键字。"""
+        haystack = text or ""
+        candidates = self._compiled
+        if self._prefilter is not None and not self._prefilter.search(haystack):
+            candidates = self._unmerged
+        for pattern, regex in candidates:
+            if regex.search(haystack):
                 return pattern
-        except re.error:
-            continue
-    return None
+        return None
+
+
+@functools.lru_cache(maxsize=64)
+def _compile_keywords(patterns: tuple[str, ...]) -> KeywordMatcher:
+    return KeywordMatcher(patterns)
+
+
+def compile_keywords(patterns: Iterable[str]) -> KeywordMatcher:
+    """按关键字内容缓存预编译匹配器。"""
+    return _compile_keywords(tuple(patterns or ()))
+
+
+def match_first(patterns: Iterable[str] | KeywordMatcher, text: str) -> str | None:
+    """返回第一个匹配的关键字；非法正则只跳过该条，避免整组失效。"""
+    matcher = patterns if isinstance(patterns, KeywordMatcher) else compile_keywords(patterns)
+    return matcher.match_first(text)
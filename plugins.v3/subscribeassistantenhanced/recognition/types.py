@@ -9,6 +9,9 @@ ACTION_BLOCK = "block"
 ACTION_SKIP = "skip"
 ACTION_FAIL_OPEN = "fail_open"
 
+# 插件运行时二次识别的并发上限；RecognitionSettings 默认 1 保持顺序执行。
+RECOGNITION_SECONDARY_WORKERS = 4
+
 
 @dataclass
 class RecognitionSettings:
@@ -20,6 +23,11 @@ class RecognitionSettings:
     notify_interval: int = 3600
     tmdb_recheck_mode: str = "balanced_strict"
     cache_maxsize: int = 100000
+    cache_ttl_hours: int = 168
+    # 持久化层只保留最近使用的条目，并按间隔合并写回，避免每轮过滤整体重写大缓存。
+    cache_persist_maxsize: int = 10000
+    cache_flush_interval: int = 300
+    secondary_workers: int = 1
     custom_config: str = ""
     keyword_config: str = ""
 
@@ -31,6 +39,9 @@ class RecognitionRuntime:
     tmdb_episodes_fn: Optional[Callable] = None
     secondary_recognizer: Optional[Callable] = None
     logger_fn: Optional[Callable] = None
+    # 二次识别缓存持久化层：load_fn() -> dict，save_fn(dict)；未注入时只使用进程内缓存。
+    secondary_cache_load_fn: Optional[Callable] = None
+    secondary_cache_save_fn: Optional[Callable] = None
 
 
 @dataclass
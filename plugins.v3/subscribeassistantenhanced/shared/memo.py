@@ -0,0 +1,112 @@
+"""单轮巡检内的查询备忘：同一轮内重复的 TMDB 集信息与媒体识别只请求一次。"""
+import copy
+import functools
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Hashable
+
+from .log import detail
+
+_NAMESPACE_NAMES = {
+    "tmdb_episodes": "TMDB 集信息",
+    "mediainfo": "媒体识别",
+}
+
+
+class _PassMemo:
+    """一轮巡检的备忘数据与命中统计。"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.values: dict[tuple, Any] = {}
+        self.stats: dict[str, dict[str, int]] = {}
+
+    def count(self, namespace: str, name: str):
+        counter = self.stats.setdefault(namespace, {"hit": 0, "miss": 0})
+        counter[name] += 1
+
+    def summary(self) -> str:
+        return "；".join(
+            f"{_NAMESPACE_NAMES.get(namespace, namespace)}命中 {counter['hit']} 次、请求 {counter['miss']} 次"
+            for namespace, counter in self.stats.items()
+        )
+
+
+class InspectionMemo:
+    """巡检作用域备忘。
+
+    ``scope()`` 在当前线程开启一轮备忘，嵌套调用复用最外层，最外层退出即丢弃全部数据，
+    下一轮巡检重新请求上游。未开启作用域的线程（如事件回调）直接调用 loader，不读写备忘。
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+
+    @property
+    def active(self) -> bool:
+        return getattr(self._local, "memo", None) is not None
+
+    @contextmanager
+    def scope(self):
+        """开启或复用当前线程的巡检备忘。"""
+        if self.active:
+            yield
+            return
+        memo = _PassMemo()
+        self._local.memo = memo
+        try:
+            yield
+        finally:
+            self._local.memo = None
+            if memo.stats:
+                detail(f"巡检备忘：{memo.summary()}")
+
+    def propagate(self, fn: Callable) -> Callable:
+        """把当前线程的巡检备忘带到其他线程执行 fn；当前线程未开启作用域时原样返回。
+
+        需在开启作用域的线程内调用；工作线程执行结束后恢复其原有备忘，统计仍由外层作用域输出。
+        """
+        memo = getattr(self._local, "memo", None)
+        if memo is None:
+            return fn
+
+        @functools.wraps(fn)
+        def run(*args, **kwargs):
+            previous = getattr(self._local, "memo", None)
+            self._local.memo = memo
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self._local.memo = previous
+        return run
+
+    def get_or_load(self, namespace: str, key: Hashable, loader: Callable[[], Any]) -> Any:
+        """作用域内按 (namespace, key) 返回备忘结果的副本；未命中时调用 loader 并记录结果。
+
+        loader 抛出异常时不记录，同一轮后续调用仍会重试。
+        """
+        memo = getattr(self._local, "memo", None)
+        if memo is None:
+            return loader()
+        memo_key = (namespace, key)
+        with memo.lock:
+            if memo_key in memo.values:
+                memo.count(namespace, "hit")
+                return copy.deepcopy(memo.values[memo_key])
+        value = loader()
+        with memo.lock:
+            memo.values[memo_key] = value
+            memo.count(namespace, "miss")
+        return copy.deepcopy(value)
+
+
+def inspection_pass(method):
+    """插件巡检入口装饰器：整轮巡检共用一份备忘；实例未配置备忘时原样执行。"""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        memo = getattr(self, "_inspection_memo", None)
+        if memo is None:
+            return method(self, *args, **kwargs)
+        with memo.scope():
+            return method(self, *args, **kwargs)
+    return wrapper
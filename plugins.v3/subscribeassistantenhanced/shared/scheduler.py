@@ -0,0 +1,107 @@
+"""巡检子任务调度：按声明的任务数据读写冲突并发执行子任务，并记录各子任务耗时。"""
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Callable, Iterable, Optional
+
+from app.sdk.logging import logger
+
+from .log import detail
+
+INSPECTION_MAX_WORKERS = 4
+# 主程序订阅表（状态、优先级、订阅增删）不在 TaskDataManager 中，按伪 key 参与冲突判定。
+SUBSCRIPTION_STATE = "subscription_state"
+
+
+@dataclass
+class InspectionTask:
+    """巡检子任务：reads/writes 声明执行期间读写的 TaskDataManager key。"""
+    name: str
+    fn: Callable[[], object]
+    reads: Iterable[str] = field(default_factory=frozenset)
+    writes: Iterable[str] = field(default_factory=frozenset)
+
+    def __post_init__(self):
+        self.reads = frozenset(self.reads)
+        self.writes = frozenset(self.writes)
+
+    def conflicts(self, other: "InspectionTask") -> bool:
+        """任一方写入另一方读写的 key 时冲突；只读同一 key 不冲突。"""
+        return bool(self.writes & (other.reads | other.writes) or other.writes & self.reads)
+
+
+class InspectionScheduler:
+    """按声明顺序调度巡检子任务。
+
+    子任务只等待排在它之前且与它冲突的子任务完成，互相冲突的子任务保持原有先后顺序，
+    不冲突的子任务并发执行。每个子任务独立捕获异常，失败不阻断其他子任务，
+    其后依赖它的子任务照常执行。调用线程的巡检备忘随子任务带入工作线程。
+    """
+
+    def __init__(self, label: str, max_workers: int = INSPECTION_MAX_WORKERS,
+                 propagate_fn: Optional[Callable[[Callable], Callable]] = None):
+        """label 用于日志前缀；propagate_fn 把调用线程上下文（如巡检备忘）包装进子任务。"""
+        self._label = label
+        self._max_workers = max(int(max_workers or 1), 1)
+        self._propagate = propagate_fn
+        self._lock = threading.Lock()
+        self.durations: dict[str, float] = {}
+        self.critical_path_seconds = 0.0
+
+    def run(self, tasks: list[InspectionTask]) -> dict[str, float]:
+        """执行全部子任务并返回 {子任务名: 耗时秒数}。"""
+        tasks = list(tasks)
+        waits = [{index for index in range(position) if task.conflicts(tasks[index])}
+                 for position, task in enumerate(tasks)]
+        run_task = self._propagate(self._run_task) if self._propagate else self._run_task
+        self.durations = {}
+        started = time.perf_counter()
+        if self._max_workers == 1 or len(tasks) <= 1:
+            for task in tasks:
+                run_task(task)
+        else:
+            self._run_concurrently(tasks, waits, run_task)
+        elapsed = time.perf_counter() - started
+        self.critical_path_seconds = self._critical_path(tasks, waits)
+        if tasks:
+            detail(
+                f"{self._label}：完成，耗时 {elapsed:.2f} 秒，关键路径 {self.critical_path_seconds:.2f} 秒，"
+                f"子任务合计 {sum(self.durations.values()):.2f} 秒；"
+                + "、".join(f"{task.name} {self.durations.get(task.name, 0):.2f} 秒" for task in tasks)
+            )
+        return dict(self.durations)
+
+    def _run_concurrently(self, tasks: list[InspectionTask], waits: list[set[int]], run_task: Callable):
+        """依赖全部完成的子任务立即提交，直到所有子任务结束。"""
+        done: set[int] = set()
+        submitted: set[int] = set()
+        futures = {}
+        with ThreadPoolExecutor(max_workers=min(self._max_workers, len(tasks)),
+                                thread_name_prefix="inspection") as executor:
+            while len(done) < len(tasks):
+                for position, task in enumerate(tasks):
+                    if position not in submitted and waits[position] <= done:
+                        submitted.add(position)
+                        futures[executor.submit(run_task, task)] = position
+                finished, _ = wait(list(futures), return_when=FIRST_COMPLETED)
+                for future in finished:
+                    done.add(futures.pop(future))
+
+    def _run_task(self, task: InspectionTask):
+        started = time.perf_counter()
+        try:
+            task.fn()
+        except Exception as err:
+            logger.error(f"{self._label}：{task.name}执行失败：{err}", exc_info=True)
+        finally:
+            with self._lock:
+                self.durations[task.name] = time.perf_counter() - started
+
+    def _critical_path(self, tasks: list[InspectionTask], waits: list[set[int]]) -> float:
+        """按依赖关系累加耗时，得到理论最短完成时间。"""
+        finish: list[float] = []
+        for position, task in enumerate(tasks):
+            before = max((finish[index] for index in waits[position]), default=0.0)
+            finish.append(before + self.durations.get(task.name, 0.0))
+        return max(finish, default=0.0)
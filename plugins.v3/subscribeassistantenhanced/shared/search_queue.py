@@ -0,0 +1,226 @@
+"""单订阅延迟搜索队列：持久化小顶堆 + 单调度线程 + 全局搜索并发上限。"""
+import heapq
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Callable, Optional
+
+from app.sdk.logging import logger
+
+from .log import detail
+
+DELAYED_SEARCH_KEY = "delayed_searches"
+DELAYED_SEARCH_MAX_CONCURRENCY = 2
+# 调度线程单次等待的最长秒数，到期时间按 now_fn 重新计算，系统时钟调整后也能及时出队
+DELAYED_SEARCH_MAX_WAIT = 1.0
+
+# 进程内正在执行的搜索（订阅 id, run_at），跨队列实例共享：插件重新初始化时，
+# 旧队列仍在执行的搜索不会被新队列从持久化数据中恢复后再执行一次。
+_running: set[tuple[str, float]] = set()
+_running_lock = threading.Lock()
+
+
+class DelayedSearchQueue:
+    """按执行时间排序的单订阅搜索队列。
+
+    待执行搜索同时保存在内存堆和插件数据 ``delayed_searches`` 中，插件重启后由 ``start`` 恢复；
+    同一订阅重复安排时只保留最早的一次。调度线程只在有空闲搜索名额时才出队，
+    持久化条目在搜索结束后才移除，因此未完成的搜索始终留在持久化数据中，
+    线程数固定为 1 个调度线程加并发上限个搜索线程。停止时在超时内等待执行中的搜索结束，
+    超时仍未结束的搜索由 ``_running`` 标记，重新启动时不会再次恢复。
+    """
+
+    def __init__(self, task_data_read: Callable, task_data_update: Callable, search_fn: Callable,
+                 max_concurrency: int = DELAYED_SEARCH_MAX_CONCURRENCY,
+                 now_fn: Optional[Callable] = None):
+        """search_fn(sid) 执行单订阅搜索；max_concurrency 限制同时进行的搜索数量。"""
+        self._read = task_data_read
+        self._update = task_data_update
+        self._search = search_fn
+        self._max_concurrency = max(int(max_concurrency or 1), 1)
+        self._now = now_fn or time.time
+        self._cond = threading.Condition()
+        self._heap: list[tuple[float, str]] = []
+        self._pending: dict[str, dict] = {}
+        self._slots = threading.BoundedSemaphore(self._max_concurrency)
+        self._stopping = threading.Event()
+        self._dispatcher: Optional[threading.Thread] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._inflight: set[Future] = set()
+
+    @property
+    def pending_count(self) -> int:
+        with self._cond:
+            return len(self._pending)
+
+    def start(self):
+        """恢复持久化的待执行搜索并启动调度线程；重复调用无副作用。"""
+        with self._cond:
+            if self._dispatcher:
+                return
+            with _running_lock:
+                running = set(_running)
+            for sid, entry in (self._read(DELAYED_SEARCH_KEY) or {}).items():
+                if isinstance(entry, dict) and entry.get("run_at") is not None \
+                        and (str(sid), float(entry["run_at"])) not in running:
+                    self._push(str(sid), entry)
+            restored = len(self._pending)
+            self._stopping.clear()
+            self._executor = ThreadPoolExecutor(max_workers=self._max_concurrency,
+                                                thread_name_prefix="subscribe-delayed-search")
+            self._dispatcher = threading.Thread(target=self._dispatch_loop, name="subscribe-delayed-search-dispatcher",
+                                                daemon=True)
+            self._dispatcher.start()
+        if restored:
+            logger.info(f"延迟搜索：已恢复 {restored} 个待执行的单订阅搜索")
+
+    def stop(self, timeout: float = 5):
+        """停止调度并在超时内等待执行中的搜索结束；未开始的搜索保留在持久化数据中，下次启动继续执行。"""
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            dispatcher, executor = self._dispatcher, self._executor
+            self._dispatcher = None
+            self._executor = None
+            self._stopping.set()
+            self._cond.notify_all()
+        if dispatcher:
+            dispatcher.join(timeout)
+        if executor:
+            executor.shutdown(wait=False)
+            with self._cond:
+                inflight = set(self._inflight)
+            _, not_done = wait(inflight, timeout=max(deadline - time.monotonic(), 0))
+            if not_done:
+                logger.warning(f"延迟搜索：停止时仍有 {len(not_done)} 个搜索在执行，将在后台完成且不会重复执行")
+
+    def schedule(self, sid, delay_seconds: float, scene: str = "") -> float:
+        """安排单订阅搜索，返回距实际执行的秒数；已有更早的安排时沿用原安排。"""
+        sid = str(sid)
+        now = self._now()
+        run_at = now + max(float(delay_seconds or 0), 0)
+        with self._cond:
+            existing = self._pending.get(sid)
+            if existing and existing["run_at"] <= run_at:
+                return max(existing["run_at"] - now, 0)
+            entry = {"run_at": run_at, "scene": scene}
+            self._push(sid, entry)
+            self._cond.notify_all()
+
+        def updater(data: dict) -> dict:
+            data[sid] = entry
+            return data
+
+        self._update(DELAYED_SEARCH_KEY, updater)
+        return run_at - now
+
+    def cancel(self, sid) -> bool:
+        """取消尚未开始的单订阅搜索并移除持久化条目；已在执行的搜索不受影响。"""
+        sid = str(sid)
+        with self._cond:
+            entry = self._pending.pop(sid, None)
+            self._cond.notify_all()
+        if entry is None:
+            return False
+        self._remove_persisted(sid, entry)
+        return True
+
+    def clear(self):
+        """清空内存中的待执行搜索；持久化数据由调用方一并清空。"""
+        with self._cond:
+            self._heap.clear()
+            self._pending.clear()
+            self._cond.notify_all()
+
+    def _push(self, sid: str, entry: dict):
+        """写入内存堆；同一订阅的旧堆项在出队时按 run_at 失配丢弃。"""
+        self._pending[sid] = entry
+        heapq.heappush(self._heap, (float(entry["run_at"]), sid))
+
+    def _dispatch_loop(self):
+        """调度线程：拿到空闲搜索名额后等待最早到期的搜索并交给搜索线程。"""
+        while not self._stopping.is_set():
+            if not self._slots.acquire(timeout=1):
+                continue
+            item = self._wait_for_due()
+            if item is None:
+                self._slots.release()
+                continue
+            executor = self._executor
+            try:
+                if executor is not None:
+                    self._submit(executor, *item)
+                    continue
+            except RuntimeError:
+                pass
+            # 出队后队列已停止：放回内存堆，持久化条目仍在，下次启动继续执行。
+            self._requeue(*item)
+            self._slots.release()
+            return
+
+    def _submit(self, executor: ThreadPoolExecutor, sid: str, entry: dict):
+        """提交搜索并标记为执行中，直到搜索线程收尾。"""
+        key = (sid, float(entry["run_at"]))
+        with _running_lock:
+            _running.add(key)
+        try:
+            future = executor.submit(self._execute, sid, entry)
+        except RuntimeError:
+            with _running_lock:
+                _running.discard(key)
+            raise
+        with self._cond:
+            self._inflight.add(future)
+        future.add_done_callback(self._on_done)
+
+    def _on_done(self, future: Future):
+        """搜索线程收尾后移出执行中集合。"""
+        with self._cond:
+            self._inflight.discard(future)
+
+    def _requeue(self, sid: str, entry: dict):
+        """把出队但未提交的搜索放回内存堆；期间被重新安排或取消时以新状态为准。"""
+        with self._cond:
+            if sid not in self._pending:
+                self._push(sid, entry)
+
+    def _wait_for_due(self) -> Optional[tuple[str, dict]]:
+        """阻塞到堆顶搜索到期后出队；停止时返回 None。持久化条目在搜索结束后移除。"""
+        with self._cond:
+            while not self._stopping.is_set():
+                while self._heap and self._pending.get(self._heap[0][1], {}).get("run_at") != self._heap[0][0]:
+                    heapq.heappop(self._heap)
+                if not self._heap:
+                    self._cond.wait()
+                    continue
+                wait_seconds = self._heap[0][0] - self._now()
+                if wait_seconds > 0:
+                    self._cond.wait(timeout=min(wait_seconds, DELAYED_SEARCH_MAX_WAIT))
+                    continue
+                _, sid = heapq.heappop(self._heap)
+                return sid, self._pending.pop(sid)
+            return None
+
+    def _remove_persisted(self, sid: str, entry: dict):
+        """移除持久化条目；期间已被重新安排为其他时间的条目保留。"""
+        def updater(data: dict) -> dict:
+            if data.get(sid, {}).get("run_at") == entry["run_at"]:
+                data.pop(sid, None)
+            return data
+
+        self._update(DELAYED_SEARCH_KEY, updater)
+
+    def _execute(self, sid: str, entry: dict):
+        """执行单订阅搜索；异常只记录，不影响队列中其他搜索。"""
+        try:
+            detail(f"延迟搜索：{entry.get('scene') or '补全搜索'}，开始执行订阅 {sid} 的单订阅搜索")
+            self._search(int(sid))
+        except Exception as err:
+            logger.error(f"延迟搜索：订阅 {sid} 搜索失败：{err}", exc_info=True)
+        finally:
+            try:
+                self._remove_persisted(sid, entry)
+            except Exception as err:
+                logger.error(f"延迟搜索：订阅 {sid} 移除持久化记录失败：{err}")
+            with _running_lock:
+                _running.discard((sid, float(entry["run_at"])))
+            self._slots.release()
@@ -1,16 +1,48 @@
 """插件持久化数据管理，封装 get_data/save_data + per-key RLock。"""
+import copy
 import threading
+from contextlib import contextmanager
+from dataclasses import dataclass
 from typing import Any, Callable
 
+from app.sdk.logging import logger
+
+from .search_queue import DELAYED_SEARCH_KEY
+
+
+@dataclass
+class _BufferedKey:
+    """batch 缓冲中的单个 key：data 为当前数据，original 为载入时的副本，用于落盘时计算本轮改动的记录。"""
+    data: Any
+    original: Any
+    generation: int
+    dirty: bool = False
+    # 整块写入（write）时落盘直接覆盖，不与最新数据按记录合并
+    replace: bool = False
+
 
 class TaskDataManager:
-    """线程安全的 JSON 数据读写，每个 key 独立 RLock。"""
+    """线程安全的 JSON 数据读写，每个 key 独立 RLock。
+
+    ``batch()`` 期间开启写回缓冲，缓冲只属于开启 batch 的线程：各 key 首次访问时载入内存，之后该线程的
+    读写都在缓冲上进行。退出最外层 batch 时把本轮改动的记录合并到最新数据上，每个被修改的 key 只落盘一次，
+    其他线程期间直接落盘的其他记录不会被覆盖；reset 后各线程缓冲中该 key 的修改作废。
+    """
 
-    def __init__(self, get_data_fn: Callable, save_data_fn: Callable):
+    def __init__(self, get_data_fn: Callable, save_data_fn: Callable, on_clear_fn: Callable | None = None):
+        """on_clear_fn(sid) 在 clear_tasks 清理订阅时调用，用于取消内存中的待执行操作。"""
         self._get = get_data_fn
         self._save = save_data_fn
+        self._on_clear = on_clear_fn
         self._locks: dict[str, threading.RLock] = {}
         self._meta_lock = threading.Lock()
+        # 线程私有的写回缓冲：depth 支持嵌套 batch，buffer 为 key -> _BufferedKey。
+        self._local = threading.local()
+        # key -> reset 次数，缓冲载入后该 key 被 reset 过则落盘时丢弃缓冲中的修改。
+        self._generations: dict[str, int] = {}
+        # 落盘失败的数据，之后读写该 key 时以它为准，下次落盘成功后移除。
+        self._unsaved: dict[str, Any] = {}
+        self.save_count = 0
 
     def _lock_for(self, key: str) -> threading.RLock:
         """获取或创建指定 key 的 RLock，创建过程由 _meta_lock 保护。"""
@@ -19,28 +51,175 @@ class TaskDataManager:
                 self._locks[key] = threading.RLock()
             return self._locks[key]
 
+    def _buffer(self) -> dict[str, _BufferedKey] | None:
+        """当前线程的写回缓冲，不在 batch 内时返回 None。"""
+        if getattr(self._local, "depth", 0) > 0:
+            return self._local.buffer
+        return None
+
+    def _read_stored(self, key: str) -> Any:
+        """在 key 锁内读取已落盘数据；存在落盘失败的数据时返回其副本。"""
+        if key in self._unsaved:
+            return copy.deepcopy(self._unsaved[key])
+        return self._get(key) or {}
+
+    def _load(self, key: str) -> Any:
+        """在 key 锁内读取数据；batch 期间返回当前线程缓冲中的对象，首次读取时载入缓冲。"""
+        buffer = self._buffer()
+        if buffer is None:
+            return self._read_stored(key)
+        entry = buffer.get(key)
+        if entry is None:
+            # 缓冲持有独立副本，就地修改不会影响 get_data_fn 返回的对象
+            original = self._read_stored(key)
+            entry = buffer[key] = _BufferedKey(data=copy.deepcopy(original), original=original,
+                                               generation=self._generations.get(key, 0))
+        return entry.data
+
+    def _store(self, key: str, data: Any, replace: bool = False):
+        """在 key 锁内写入数据；batch 期间只写当前线程的缓冲。"""
+        buffer = self._buffer()
+        if buffer is None:
+            self._persist(key, data)
+            return
+        entry = buffer.get(key)
+        if entry is None:
+            entry = buffer[key] = _BufferedKey(data=data, original=None,
+                                               generation=self._generations.get(key, 0), replace=True)
+        entry.data = data
+        entry.dirty = True
+        entry.replace = entry.replace or replace
+
+    def _persist(self, key: str, data: Any):
+        """在 key 锁内落盘；失败时保留数据供后续读写沿用，并向调用方抛出异常。"""
+        try:
+            self._save(key, data)
+        except Exception:
+            self._unsaved[key] = data
+            raise
+        self._unsaved.pop(key, None)
+        self.save_count += 1
+
+    @contextmanager
+    def batch(self):
+        """合并当前线程一段流程内的全部修改，退出最外层 batch 时每个脏 key 落盘一次。"""
+        local = self._local
+        depth = getattr(local, "depth", 0)
+        if depth == 0:
+            local.buffer = {}
+        local.depth = depth + 1
+        try:
+            yield self
+        except BaseException:
+            self._end_batch(raise_error=False)
+            raise
+        self._end_batch(raise_error=True)
+
+    def _end_batch(self, raise_error: bool):
+        """退出一层 batch；最外层退出时清空当前线程缓冲并逐个落盘，单个 key 失败不影响其他 key。"""
+        local = self._local
+        local.depth -= 1
+        if local.depth > 0:
+            return
+        buffer, local.buffer = local.buffer, {}
+        error = None
+        for key, entry in buffer.items():
+            if not entry.dirty:
+                continue
+            try:
+                self._flush_key(key, entry)
+            except Exception as err:
+                logger.error(f"任务数据 {key} 落盘失败，已保留在内存中等待下次写入：{err}")
+                error = error or err
+        if error and raise_error:
+            raise error
+
+    def _flush_key(self, key: str, entry: _BufferedKey):
+        """持有 key 锁把缓冲中改动的记录合并到最新数据后落盘，保证与其他线程的读-改-写串行。"""
+        with self._lock_for(key):
+            if self._generations.get(key, 0) != entry.generation:
+                return
+            data = entry.data
+            if not entry.replace:
+                data = self._merge(self._read_stored(key), entry.original, entry.data)
+            self._persist(key, data)
+
+    @staticmethod
+    def _merge(current: Any, original: Any, data: Any) -> Any:
+        """按记录把 original -> data 的改动应用到 current 上；非 dict 数据直接以 data 覆盖。"""
+        if not all(isinstance(value, dict) for value in (current, original, data)):
+            return data
+        merged = dict(current)
+        for record_id in original.keys() - data.keys():
+            merged.pop(record_id, None)
+        for record_id, record in data.items():
+            if record_id not in original or original[record_id] != record:
+                merged[record_id] = record
+        return merged
+
     def read(self, key: str) -> Any:
-        """线程安全读取，key 不存在时返回空 dict。"""
+        """线程安全读取，key 不存在时返回空 dict；batch 期间返回缓冲数据的副本。"""
         with self._lock_for(key):
-            return self._get(key) or {}
+            data = self._load(key)
+            return copy.deepcopy(data) if self._buffer() is not None else data
 
     def write(self, key: str, data: Any):
         """线程安全写入。"""
         with self._lock_for(key):
-            self._save(key, data)
+            self._store(key, data, replace=True)
 
     def update(self, key: str, updater: Callable[[Any], Any]):
-        """线程安全读-改-写。"""
+        """线程安全读-改-写；batch 期间 updater 作用于缓冲数据的副本，成功返回后才写回缓冲。"""
         with self._lock_for(key):
-            data = self._get(key) or {}
+            data = self._load(key)
+            if self._buffer() is not None:
+                data = copy.deepcopy(data)
             updated = updater(data)
-            self._save(key, updated)
+            self._store(key, updated)
             return updated
 
+    def get_record(self, key: str, record_id: str, default: Any = None) -> Any:
+        """读取 key 下的单条记录；batch 期间只复制该条记录，不复制整个数据块。"""
+        with self._lock_for(key):
+            record = self._load(key).get(record_id)
+            return default if record is None else copy.deepcopy(record)
+
+    def put_record(self, key: str, record_id: str, record: Any):
+        """写入 key 下的单条记录。"""
+        with self._lock_for(key):
+            data = self._load(key)
+            data[record_id] = record
+            self._store(key, data)
+
+    def delete_record(self, key: str, record_id: str) -> bool:
+        """删除 key 下的单条记录；记录不存在时不写入，返回是否删除。"""
+        with self._lock_for(key):
+            data = self._load(key)
+            if record_id not in data:
+                return False
+            data.pop(record_id)
+            self._store(key, data)
+            return True
+
+    def _delete_records_where(self, key: str, predicate: Callable[[str, Any], bool]) -> int:
+        """删除 key 下满足条件的记录；没有命中时不写入，返回删除条数。"""
+        with self._lock_for(key):
+            data = self._load(key)
+            record_ids = [record_id for record_id, record in data.items() if predicate(record_id, record)]
+            for record_id in record_ids:
+                data.pop(record_id)
+            if record_ids:
+                self._store(key, data)
+            return len(record_ids)
+
     def reset(self, key: str):
-        """清空指定 key 的数据。"""
+        """清空指定 key 的数据并立即落盘，各线程 batch 缓冲中该 key 尚未落盘的修改一并作废。"""
         with self._lock_for(key):
-            self._save(key, {})
+            self._generations[key] = self._generations.get(key, 0) + 1
+            buffer = self._buffer()
+            if buffer is not None:
+                buffer.pop(key, None)
+            self._persist(key, {})
 
     def reset_all(self, keys: list[str]):
         """批量清空多个 key。"""
@@ -52,23 +231,18 @@ class TaskDataManager:
 
         固定 subscribes→torrents 顺序，避免中途失败留下"订阅没了但种子任务还在"的半清理态。
         种子任务按 ``subscribe_id`` 归属匹配（统一 str 比较，兼容 JSON 落盘后 key 字符串化）。
+        同时移除该订阅尚未执行的延迟搜索，并通过 on_clear_fn 取消内存中的安排。
         """
         sid = str(subscribe_id)
-
-        def _clear_subscribe(data: dict) -> dict:
-            data.pop(sid, None)
-            return data
-
-        def _clear_torrents(data: dict) -> dict:
-            for torrent_hash in list(data.keys()):
-                if str(data[torrent_hash].get("subscribe_id")) == sid:
-                    del data[torrent_hash]
-            return data
-
-        self.update("subscribes", _clear_subscribe)
-        self.update("torrents", _clear_torrents)
-        for key in ("volatility", "blocks", "releases", "site_evidence"):
-            self.update(key, _clear_subscribe)
+        # 逐条删除只改动确实存在该订阅记录的 key，整体在一个 batch 内合并落盘。
+        with self.batch():
+            self.delete_record("subscribes", sid)
+            self._delete_records_where(
+                "torrents", lambda _, task: str(task.get("subscribe_id")) == sid)
+            for key in ("volatility", "blocks", "releases", "site_evidence", DELAYED_SEARCH_KEY):
+                self.delete_record(key, sid)
+            if self._on_clear:
+                self._on_clear(sid)
 
     def clear_tasks_for_pause(self, subscribe_id, preserve_subscribe_keys: list[str] | None = None):
         """清理暂停前无效任务，同时保留指定订阅任务字段。
@@ -0,0 +1,104 @@
+"""BrushManager 基于快照比较的批量整理测试。"""
+from types import SimpleNamespace
+from unittest.mock import MagicMock, PropertyMock, patch
+
+from app.plugins.brushmanager import BrushManager
+
+
+def _torrent(torrent_hash, tags="刷流", category="", save_path="/downloads", auto_tmm=False):
+    return {"hash": torrent_hash, "name": f"Title.{torrent_hash}", "tags": tags, "category": category,
+            "save_path": save_path, "auto_tmm": auto_tmm}
+
+
+def _plugin(**config):
+    plugin = object.__new__(BrushManager)
+    plugin._notify = False
+    plugin._remove_brush_tag = config.get("remove_brush_tag", True)
+    plugin._mp_tag = config.get("mp_tag", True)
+    plugin._tag = config.get("tag")
+    plugin._category = config.get("category", "电影")
+    plugin._auto_category = config.get("auto_category", False)
+    plugin._move_path = config.get("move_path", "/media/movies")
+    return plugin
+
+
+def _downloader():
+    downloader = MagicMock()
+    downloader.remove_torrents_tag.return_value = True
+    return downloader
+
+
+def _organize(plugin, downloader, torrents):
+    torrent_datas = {torrent["hash"]: torrent for torrent in torrents}
+    torrent_hash_titles = {torrent["hash"]: torrent["name"] for torrent in torrents}
+    with patch.object(BrushManager, "downloader", new_callable=PropertyMock, return_value=downloader), \
+            patch("app.plugins.brushmanager.settings", SimpleNamespace(TORRENT_TAG="MOVIEPILOT")):
+        plugin._BrushManager__organize_for_qb(torrent_hash_titles=torrent_hash_titles, torrent_datas=torrent_datas)
+
+
+def test_torrents_in_desired_state_are_skipped():
+    """已符合目标状态的种子不发起任何调用。"""
+    downloader = _downloader()
+    done = _torrent("h1", tags="MOVIEPILOT", category="电影", save_path="/media/movies/")
+
+    _organize(_plugin(), downloader, [done])
+
+    assert downloader.method_calls == []
+
+
+def test_only_missing_changes_are_sent_grouped_by_target():
+    """只发送需要的变更，相同目标的种子合并为一次调用。"""
+    downloader = _downloader()
+    torrents = [
+        _torrent("h1"),
+        _torrent("h2", tags="刷流, 已整理", auto_tmm=True),
+        _torrent("h3", tags="MOVIEPILOT", category="电影"),
+    ]
+
+    _organize(_plugin(), downloader, torrents)
+
+    assert sorted((tuple(call.kwargs["tag"]), tuple(call.kwargs["ids"]))
+                  for call in downloader.remove_torrents_tag.call_args_list) == \
+           [(("刷流",), ("h1",)), (("刷流", "已整理"), ("h2",))]
+    downloader.set_torrents_tag.assert_called_once_with(ids=["h1", "h2"], tags=["MOVIEPILOT"])
+    downloader.qbc.torrents_set_category.assert_called_once_with(torrent_hashes=["h1", "h2"], category="电影")
+    downloader.qbc.torrents_set_auto_management.assert_called_once_with(torrent_hashes=["h2"], enable=False)
+    downloader.qbc.torrents_set_location.assert_called_once_with(torrent_hashes=["h1", "h2", "h3"],
+                                                                location="/media/movies")
+
+
+def test_failed_group_skips_later_actions_for_its_torrents():
+    """调用失败的种子不再执行后续动作，其他种子不受影响。"""
+    downloader = _downloader()
+    downloader.qbc.torrents_set_category.side_effect = Exception("boom")
+    torrents = [_torrent("h1", tags="MOVIEPILOT"), _torrent("h2", tags="MOVIEPILOT", category="电影")]
+
+    _organize(_plugin(), downloader, torrents)
+
+    downloader.qbc.torrents_set_location.assert_called_once_with(torrent_hashes=["h2"], location="/media/movies")
+
+
+def test_auto_category_only_enables_management_where_needed():
+    """开启自动分类管理时不修改保存路径，已开启的种子不再调用。"""
+    downloader = _downloader()
+    torrents = [_torrent("h1", tags="", auto_tmm=True), _torrent("h2", tags="")]
+
+    _organize(_plugin(mp_tag=False, category=None, auto_category=True), downloader, torrents)
+
+    downloader.qbc.torrents_set_auto_management.assert_called_once_with(torrent_hashes=["h2"], enable=True)
+    downloader.qbc.torrents_set_location.assert_not_called()
+    downloader.remove_torrents_tag.assert_not_called()
+
+
+def test_bulk_organize_5k_torrents_uses_few_calls():
+    """5000 个种子按目标分组批量调用，调用次数只取决于目标分组和批量大小。"""
+    downloader = _downloader()
+    torrents = [_torrent(f"h{index}", tags="刷流" if index % 2 else "刷流,已整理",
+                         category="电影" if index % 3 == 0 else "") for index in range(5000)]
+
+    _organize(_plugin(tag="入库"), downloader, torrents)
+
+    assert downloader.remove_torrents_tag.call_count == 2 * 5
+    assert downloader.set_torrents_tag.call_count == 10
+    assert downloader.qbc.torrents_set_category.call_count == 7
+    assert downloader.qbc.torrents_set_location.call_count == 10
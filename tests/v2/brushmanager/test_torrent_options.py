@@ -0,0 +1,63 @@
+"""BrushManager 刷流任务选项读取测试。"""
+import json
+import sqlite3
+from contextlib import closing
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+from app.plugins.brushmanager import BrushManager
+
+
+def _plugin(brush_plugin, data=None):
+    plugin = object.__new__(BrushManager)
+    plugin._brush_plugin = brush_plugin
+    plugin.plugin_manager = MagicMock()
+    plugin.plugin_manager.run_plugin_method.return_value = None
+    plugin.get_data = MagicMock(return_value=data)
+    return plugin
+
+
+def _task(title, deleted=False):
+    return {"title": title, "description": "", "size": 1024 ** 3, "deleted": deleted, "time": 1}
+
+
+def _options(plugin, data_path):
+    with patch("app.plugins.brushmanager.settings", SimpleNamespace(PLUGIN_DATA_PATH=data_path)):
+        return plugin._BrushManager__get_torrent_options()
+
+
+def test_stopped_low_freq_plugin_reads_task_database(tmp_path):
+    """低频版未运行时读取任务库中未删除的任务，不再读取迁移后停止更新的旧插件数据。"""
+    db_dir = tmp_path / "brushflowlowfreq"
+    db_dir.mkdir()
+    with closing(sqlite3.connect(db_dir / "tasks.db")) as conn, conn:
+        conn.execute("CREATE TABLE tasks (state TEXT, hash TEXT, site TEXT, deleted INTEGER, data TEXT)")
+        conn.executemany("INSERT INTO tasks VALUES (?, ?, NULL, ?, ?)", [
+            ("torrents", "h1", 0, json.dumps(_task("Current"))),
+            ("torrents", "h2", 1, json.dumps(_task("Deleted", deleted=True))),
+            ("archived", "h3", 0, json.dumps(_task("Archived"))),
+        ])
+    plugin = _plugin("BrushFlowLowFreq", data={"stale": _task("Stale")})
+
+    options = _options(plugin, tmp_path)
+
+    assert [option["value"] for option in options] == ["h1"]
+    plugin.get_data.assert_not_called()
+
+
+def test_unreadable_task_database_reports_no_tasks(tmp_path):
+    """任务库无法读取时不回退到旧插件数据。"""
+    db_dir = tmp_path / "brushflowlowfreq"
+    db_dir.mkdir()
+    (db_dir / "tasks.db").write_bytes(b"not a database")
+    plugin = _plugin("BrushFlowLowFreq", data={"stale": _task("Stale")})
+
+    assert _options(plugin, tmp_path) == []
+    plugin.get_data.assert_not_called()
+
+
+def test_official_plugin_falls_back_to_plugin_data(tmp_path):
+    """官方刷流插件仍读取插件数据。"""
+    plugin = _plugin("BrushFlow", data={"h1": _task("Official")})
+
+    assert [option["value"] for option in _options(plugin, tmp_path)] == ["h1"]
@@ -0,0 +1,233 @@
+"""Plex 中文本地化自适应元数据写入测试。"""
+
+import threading
+import time
+import urllib.error
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import ModuleType, SimpleNamespace
+
+import pytest
+
+from app.testing import stub_modules
+
+
+_pypinyin = ModuleType("pypinyin")
+_pypinyin.Style = SimpleNamespace(FIRST_LETTER="first_letter")
+_pypinyin.lazy_pinyin = lambda *args, **kwargs: []
+
+with stub_modules({"pypinyin": _pypinyin}):
+    from app.plugins.plexlocalization import PlexLocalization
+    from app.plugins.plexlocalization.writer import AdaptiveWriter
+
+
+class _SlowPlexHandler(BaseHTTPRequestHandler):
+    """同时处理的请求越多响应越慢，超过承载上限时直接返回 503。"""
+
+    capacity = 4
+    base_latency = 0.03
+    lock = threading.Lock()
+    in_flight = 0
+
+    def do_PUT(self):
+        """模拟 Plex 元数据写入。"""
+        cls = type(self)
+        with cls.lock:
+            cls.in_flight += 1
+            in_flight = cls.in_flight
+        try:
+            if in_flight > cls.capacity * 2:
+                self.send_response(503)
+            else:
+                time.sleep(cls.base_latency * max(1.0, in_flight / cls.capacity))
+                self.send_response(200)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+        finally:
+            with cls.lock:
+                cls.in_flight -= 1
+
+    def log_message(self, *args):
+        """测试中不输出访问日志。"""
+
+
+@pytest.fixture
+def slow_plex_url():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _SlowPlexHandler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}/library/sections/1/all"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def _put(url):
+    request = urllib.request.Request(url, method="PUT", data=b"")
+    try:
+        with urllib.request.urlopen(request, timeout=5) as response:
+            return response.status < 400
+    except urllib.error.HTTPError:
+        return False
+
+
+def _run_writer(writer, url, count):
+    results = writer.write(tasks=[lambda: _put(url) for _ in range(count)])
+    writer.close()
+    return results, writer.stats()
+
+
+def test_slow_start_grows_and_errors_halve_concurrency():
+    """慢启动阶段每次成功并发加 1，出现错误后并发减半并转入加性增长。"""
+    writer = AdaptiveWriter(max_limit=16, latency_floor=0.05)
+    on_complete = writer._AdaptiveWriter__on_complete
+
+    for _ in range(7):
+        writer._in_flight += 1
+        on_complete(latency=0.01, success=True)
+    assert writer.concurrency == 8
+
+    writer._in_flight += 1
+    on_complete(latency=0.01, success=False)
+    assert writer.concurrency == 4
+
+    for _ in range(4):
+        writer._in_flight += 1
+        on_complete(latency=0.01, success=True)
+    assert writer.concurrency == 4
+    assert writer.stats()["decreases"] == 1
+
+
+def test_latency_spike_counts_as_congestion_once_per_window():
+    """延迟超过基准两倍视为拥塞；降速前已发出的请求不再重复触发降速。"""
+    writer = AdaptiveWriter(max_limit=16, initial_limit=8, latency_floor=0.05)
+    writer._slow_start = False
+    on_complete = writer._AdaptiveWriter__on_complete
+    writer._in_flight = 4
+    on_complete(latency=0.05, success=True)
+
+    on_complete(latency=0.2, success=True)
+    on_complete(latency=0.2, success=True)
+    on_complete(latency=0.2, success=True)
+
+    assert writer.concurrency == 4
+    assert writer.stats()["decreases"] == 1
+
+
+def test_write_stops_dispatching_after_stop_event():
+    """停止后未发出的写入结果为 None。"""
+    writer = AdaptiveWriter(max_limit=4)
+    stop_event = threading.Event()
+    results = writer.write(tasks=[lambda: stop_event.set() or True, lambda: True, lambda: True],
+                           stop_event=stop_event)
+    writer.close()
+
+    assert results == [True, None, None]
+
+
+def test_adaptive_writer_against_slow_http_server(slow_plex_url):
+    """对随并发变慢的本地 HTTP 服务，自适应并发的错误少于固定高并发，且仍会并发写入。"""
+    count = 120
+    adaptive_results, adaptive_stats = _run_writer(AdaptiveWriter(max_limit=16), slow_plex_url, count)
+    fixed_results, _ = _run_writer(AdaptiveWriter(max_limit=16, min_limit=16, initial_limit=16), slow_plex_url, count)
+    serial_results, serial_stats = _run_writer(AdaptiveWriter(max_limit=1), slow_plex_url, count)
+
+    assert adaptive_results.count(False) < fixed_results.count(False)
+    assert serial_results.count(False) == 0
+    assert adaptive_stats["max_in_flight"] > serial_stats["max_in_flight"] == 1
+
+
+class _Response:
+    """提供插件 HTTP 调用所需的最小响应。"""
+
+    def __init__(self, metadata=None, status_code=200):
+        self.status_code = status_code
+        self._metadata = metadata or []
+
+    def json(self):
+        """返回 Plex JSON 包装结构。"""
+        return {"MediaContainer": {"Metadata": self._metadata}}
+
+
+class _WritePlex:
+    """记录写入与回读验证请求。"""
+
+    def __init__(self, count):
+        self.items = {str(index): {"ratingKey": str(index), "librarySectionID": 1, "type": "movie",
+                                   "title": f"标题{index}", "titleSort": f"标题{index}", "Field": [],
+                                   "Genre": [], "Style": [], "Mood": []}
+                      for index in range(count)}
+        self.verify_sizes = []
+
+    def get_data(self, *, endpoint, timeout):
+        """返回写入后的最终状态。"""
+        keys = endpoint.rsplit("/", 1)[-1].split(",")
+        self.verify_sizes.append(len(keys))
+        return _Response([self.items[key] for key in keys])
+
+    def put_data(self, *, endpoint, params, timeout):
+        """应用排序标题。"""
+        self.items[str(params["id"])]["titleSort"] = params["titleSort.value"]
+        return _Response()
+
+
+@pytest.mark.parametrize("verify_ratio, verify_sizes", [(1.0, [10]), (0.3, [3]), (0.0, [])])
+def test_successful_writes_only_verify_sampled_fraction(verify_ratio, verify_sizes):
+    """Plex 明确返回成功的写入只按比例抽样回读验证，其余直接计为更新成功。"""
+    plugin = object.__new__(PlexLocalization)
+    plugin._timeout = 10
+    plugin._lock = False
+    plugin._tags = {"Action": "动作"}
+    plugin._writer = None
+    plugin._verify_ratio = verify_ratio
+    plugin._PlexLocalization__convert_to_pinyin = lambda _title: "PX"
+    plugin._event.clear()
+    plex = _WritePlex(count=10)
+    source_items = [dict(item) for item in plex.items.values()]
+
+    result = plugin._PlexLocalization__process_loaded_items(
+        plex=plex, rating_keys=list(plex.items), items=source_items)
+    plugin._PlexLocalization__close_writer()
+
+    assert result == {"updated": 10, "failed": 0, "skipped": 0, "unprocessed": 0}
+    assert plex.verify_sizes == verify_sizes
+
+
+def _single_item_plugin():
+    plugin = object.__new__(PlexLocalization)
+    plugin._timeout = 10
+    plugin._lock = False
+    plugin._tags = {"Action": "动作"}
+    plugin._writer = None
+    plugin._scan_progress = None
+    plugin._verify_ratio = 1.0
+    plugin._PlexLocalization__convert_to_pinyin = lambda _title: "PX"
+    plugin._event.clear()
+    return plugin
+
+
+def test_single_item_run_closes_writer():
+    """非全量扫描的单条目处理结束后关闭写入器，不遗留写入线程池。"""
+    plugin = _single_item_plugin()
+    plex = _WritePlex(count=1)
+
+    plugin._PlexLocalization__process_rating_key(plex=plex, rating_key="0")
+
+    assert plex.items["0"]["titleSort"] == "PX"
+    assert plugin._writer is None
+
+
+def test_stop_service_closes_writer():
+    """停止插件时关闭写入器。"""
+    plugin = _single_item_plugin()
+    plugin._scheduler = None
+    plugin._localized_store = None
+    writer = plugin._PlexLocalization__get_writer()
+    writer.write(tasks=[lambda: True])
+
+    plugin.stop_service()
+
+    assert plugin._writer is None
+    assert writer._executor is None
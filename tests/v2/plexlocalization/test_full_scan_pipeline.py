@@ -147,6 +147,7 @@ class _ConcurrentPlex:
 def _plugin():
     plugin = object.__new__(PlexLocalization)
     plugin._timeout = 10
+    plugin._verify_ratio = 1.0
     plugin._event.clear()
     return plugin
 
@@ -0,0 +1,120 @@
+"""Plex 中文本地化引擎缓存测试。"""
+
+import unicodedata
+from types import ModuleType, SimpleNamespace
+
+from app.testing import stub_modules
+
+
+_pypinyin = ModuleType("pypinyin")
+_pypinyin.Style = SimpleNamespace(FIRST_LETTER="first_letter")
+_pypinyin.lazy_pinyin = lambda *args, **kwargs: []
+
+with stub_modules({"pypinyin": _pypinyin}):
+    from app.plugins.plexlocalization import PlexLocalization
+    from app.plugins.plexlocalization.engine import LocalizationEngine
+
+
+_TAGS = {"Action": "动作", "Drama": "剧情", "Sci-Fi & Fantasy": "科幻与奇幻", "Crime": "犯罪", "Empty": ""}
+
+
+def _slow_pinyin(text):
+    """模拟 pypinyin 逐字查表的转换开销。"""
+    letters = []
+    for char in text:
+        for _ in range(20):
+            name = unicodedata.name(char, "?")
+        letters.append(name[0])
+    return "".join(letters)
+
+
+def _plugin(convert=_slow_pinyin, tags=None):
+    plugin = object.__new__(PlexLocalization)
+    plugin._lock = False
+    plugin._tags = tags if tags is not None else dict(_TAGS)
+    plugin._engine = None
+    plugin._PlexLocalization__convert_to_pinyin = convert
+    return plugin
+
+
+def _item(index, title):
+    return {
+        "ratingKey": str(index),
+        "librarySectionID": 1,
+        "type": "episode",
+        "title": title,
+        "titleSort": title,
+        "Field": [],
+        "Genre": [{"tag": "Drama"}, {"tag": "Crime"}],
+        "Style": [{"tag": "Action"}] if index % 2 else [],
+        "Mood": [],
+    }
+
+
+def test_translate_tags_uses_precomputed_table_and_deduplicates():
+    """空翻译被忽略，翻译后重复的标签只保留一次。"""
+    engine = LocalizationEngine(tags=_TAGS, convert=_slow_pinyin)
+
+    target, removed, updates = engine.translate_tags(["Action", "动作", "Empty", "Other"])
+
+    assert target == ("动作", "Empty", "Other")
+    assert removed == ("Action",)
+    assert updates == (("Action", "动作"),)
+
+
+def test_engine_counts_hits_and_misses():
+    """重复标题和标签组合命中缓存，未命中只计算一次。"""
+    calls = []
+    engine = LocalizationEngine(tags=_TAGS, convert=lambda text: calls.append(text) or text.upper())
+
+    for _ in range(3):
+        assert engine.sort_title("abc") == "ABC"
+        engine.translate_tags(["Drama"])
+
+    assert calls == ["abc"]
+    assert engine.stats() == {"pinyin_hits": 2, "pinyin_misses": 1, "pinyin_size": 1,
+                              "tag_hits": 2, "tag_misses": 1, "tag_size": 1}
+
+
+def test_engine_pinyin_cache_is_bounded():
+    """拼音缓存超过上限时淘汰最久未使用的标题。"""
+    engine = LocalizationEngine(tags={}, convert=str.upper, pinyin_cache_size=2)
+
+    for title in ("a", "b", "c", "a"):
+        engine.sort_title(title)
+
+    assert engine.stats()["pinyin_size"] == 2
+    assert engine.stats()["pinyin_misses"] == 4
+
+
+def test_prepare_item_edit_reuses_engine_until_tags_change():
+    """同一标题只转换一次拼音；标签配置替换后重建引擎。"""
+    calls = []
+    plugin = _plugin(convert=lambda text: calls.append(text) or "JQ")
+
+    for index in range(5):
+        plan = plugin._PlexLocalization__prepare_item_edit(item=_item(index, "剧情"))
+        assert plan["expected_sort_title"] == "JQ"
+        assert plan["expected_tags"]["genre"] == ["剧情", "犯罪"]
+    engine = plugin._engine
+
+    plugin._tags = {"Drama": "戏剧"}
+    plan = plugin._PlexLocalization__prepare_item_edit(item=_item(1, "剧情"))
+
+    assert calls == ["剧情", "剧情"]
+    assert plugin._engine is not engine
+    assert plan["expected_tags"]["genre"] == ["戏剧", "Crime"]
+
+
+def test_prepare_item_edit_reuses_engine_cache_across_items():
+    """5 万条目、2000 个不同标题时，每个标题只计算一次拼音，标签翻译只计算一次。"""
+    items = [_item(index, f"剧集标题{index % 2000}") for index in range(50_000)]
+    plugin = _plugin()
+    plugin._pinyin_cache_size = 10_000
+    for item in items:
+        plugin._PlexLocalization__prepare_item_edit(item=item)
+    stats = plugin._engine.stats()
+
+    assert stats["pinyin_misses"] == 2000
+    assert stats["pinyin_hits"] == 48_000
+    assert stats["tag_misses"] == 2
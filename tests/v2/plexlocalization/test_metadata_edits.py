@@ -54,6 +54,7 @@ def _plugin(sort_title="TSXK"):
     plugin = object.__new__(PlexLocalization)
     plugin._lock = False
     plugin._timeout = 10
+    plugin._verify_ratio = 1.0
     plugin._tags = {
         "Action": "动作",
         "Adventure": "冒险",
@@ -260,6 +261,21 @@ def test_positive_int_config_supports_new_thread_default():
     assert parse("8", default=3) == 8
 
 
+def test_verify_ratio_config_defaults_to_sampling():
+    """回读验证比例可配置，超出 0 至 1 或非法值回退抽样默认值。"""
+    parse = PlexLocalization._PlexLocalization__ratio
+    plugin = object.__new__(PlexLocalization)
+
+    with patch.object(plugin, "_PlexLocalization__get_service_library_options", return_value=[]):
+        _, defaults = plugin.get_form()
+
+    assert defaults["verify_ratio"] == 0.1
+    assert parse("0.5", default=0.1) == 0.5
+    assert parse(0, default=0.1) == 0
+    assert parse(1.5, default=0.1) == 0.1
+    assert parse("invalid", default=0.1) == 0.1
+
+
 def test_form_defaults_to_three_threads():
     """表单默认线程数应限制 Plex 的初始并发压力。"""
     plugin = object.__new__(PlexLocalization)
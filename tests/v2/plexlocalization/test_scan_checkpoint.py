@@ -0,0 +1,270 @@
+"""Plex 中文本地化扫描断点与 updatedAt 跳过测试。"""
+
+import time
+from types import ModuleType, SimpleNamespace
+from unittest.mock import patch
+
+from app.testing import stub_modules
+
+
+_pypinyin = ModuleType("pypinyin")
+_pypinyin.Style = SimpleNamespace(FIRST_LETTER="first_letter")
+_pypinyin.lazy_pinyin = lambda *args, **kwargs: []
+
+with stub_modules({"pypinyin": _pypinyin}):
+    from app.plugins.plexlocalization import PlexLocalization
+    from app.plugins.plexlocalization.progress import ScanProgress
+    from app.plugins.plexlocalization.store import LocalizedItemStore
+
+
+class _Response:
+    """提供插件 HTTP 调用所需的最小响应。"""
+
+    def __init__(self, container, status_code=200):
+        self.status_code = status_code
+        self._container = container
+
+    def json(self):
+        """返回 Plex JSON 包装结构。"""
+        return {"MediaContainer": self._container}
+
+
+class _LibraryPlex:
+    """模拟单个电影库的分页列表、批量详情和元数据写入，写入会刷新 updatedAt。"""
+
+    def __init__(self, count):
+        self.items = {
+            str(index): {
+                "ratingKey": str(index),
+                "librarySectionID": 1,
+                "type": "movie",
+                "title": f"标题{index}",
+                "titleSort": f"标题{index}",
+                "updatedAt": 1000,
+                "Field": [],
+                "Genre": [],
+                "Style": [],
+                "Mood": [],
+            }
+            for index in range(count)
+        }
+        self.list_starts = []
+        self.detail_keys = []
+        self.put_keys = []
+        self.on_put = None
+        # 按真实时间刷新 updatedAt，模拟 Plex 写入后以服务器时间更新
+        self.stamp_put_time = False
+
+    def get_data(self, *, endpoint, headers=None, timeout):
+        """按 endpoint 区分分页列表与批量详情。"""
+        if endpoint.startswith("/library/sections/"):
+            if endpoint.endswith("/collections"):
+                return _Response({"offset": 0, "totalSize": 0, "Metadata": []})
+            start = int(headers["X-Plex-Container-Start"])
+            size = int(headers["X-Plex-Container-Size"])
+            self.list_starts.append(start)
+            page = [
+                {"ratingKey": item["ratingKey"], "updatedAt": item["updatedAt"]}
+                for item in list(self.items.values())[start:start + size]
+            ]
+            return _Response({"offset": start, "totalSize": len(self.items), "Metadata": page})
+        keys = endpoint.rsplit("/", 1)[-1].split(",")
+        self.detail_keys.extend(keys)
+        return _Response({"Metadata": [dict(self.items[key]) for key in keys if key in self.items]})
+
+    def put_data(self, *, endpoint, params, timeout):
+        """应用排序标题并刷新 updatedAt。"""
+        item = self.items[str(params["id"])]
+        item["titleSort"] = params.get("titleSort.value", item["titleSort"])
+        item["updatedAt"] = int(time.time()) if self.stamp_put_time else item["updatedAt"] + 1
+        self.put_keys.append(item["ratingKey"])
+        if self.on_put:
+            self.on_put(len(self.put_keys))
+        return _Response({})
+
+
+def _plugin(storage):
+    plugin = object.__new__(PlexLocalization)
+    plugin._timeout = 10
+    plugin._lock = False
+    plugin._notify = False
+    plugin._batch_size = 100
+    plugin._checkpoint_interval = 0
+    plugin._verify_ratio = 1.0
+    plugin._tags = {"Action": "动作"}
+    plugin._PlexLocalization__convert_to_pinyin = lambda _title: "PX"
+    plugin.get_data = lambda key: storage.get(key)
+    plugin.save_data = lambda key, value: storage.__setitem__(key, value)
+    plugin._localized_store = LocalizedItemStore(":memory:")
+    plugin._event.clear()
+    return plugin
+
+
+def _library(key=1):
+    return SimpleNamespace(key=key, title="Movies", type="movie")
+
+
+def _run(plugin, plex, added_time=None):
+    service = SimpleNamespace(name="Plex", instance=plex)
+    plugin._event.clear()
+    with patch.object(plugin, "service_info", return_value=service):
+        plugin._PlexLocalization__loop_all(
+            service_libraries={"plex": {1: _library()}}, thread_count=1, added_time=added_time
+        )
+
+
+def test_interrupted_scan_resumes_from_checkpoint_and_skips_unchanged_items():
+    """中断后从断点所在分页继续；完整结束后再次运行只列出分页，不再读取未变化条目。"""
+    storage = {}
+    plex = _LibraryPlex(count=1200)
+    plugin = _plugin(storage)
+    plex.on_put = lambda count: count == 650 and plugin._event.set()
+
+    _run(plugin, plex)
+
+    checkpoint = storage["scan_checkpoint"]["full"]
+    assert checkpoint["service"] == "plex"
+    assert checkpoint["position"] == {"library": "1", "type": 1, "collection": False,
+                                      "offset": 500, "rating_key": "599"}
+
+    plex.on_put = None
+    plex.list_starts.clear()
+    plex.detail_keys.clear()
+    _run(plugin, plex)
+
+    assert plex.list_starts == [500, 1000]
+    assert plex.detail_keys[0] == "600"
+    assert sorted(plex.put_keys, key=int) == list(plex.items)
+    assert all(item["titleSort"] == "PX" for item in plex.items.values())
+    assert "full" not in storage["scan_checkpoint"]
+
+    plex.list_starts.clear()
+    plex.detail_keys.clear()
+    _run(plugin, plex)
+
+    assert plex.list_starts == [0, 500, 1000]
+    assert plex.detail_keys == []
+
+
+def test_unverified_writes_are_skipped_by_written_time_window():
+    """未抽中回读验证的写入按写入时间段记录，下次扫描不再读取；写入后再变化的条目重新处理。"""
+    storage = {}
+    plex = _LibraryPlex(count=20)
+    plex.stamp_put_time = True
+    plugin = _plugin(storage)
+    plugin._verify_ratio = 0.0
+    plugin._writer = None
+
+    _run(plugin, plex)
+
+    assert len(plex.put_keys) == 20
+    assert plex.detail_keys == [str(index) for index in range(20)]
+    recorded = plugin._localized_store.load()["items"]["plex"]["0"]
+    assert recorded["written_from"] <= plex.items["0"]["updatedAt"] <= recorded["written_to"]
+
+    plex.detail_keys.clear()
+    plex.items["3"]["updatedAt"] += 3600
+    _run(plugin, plex)
+
+    assert plex.detail_keys == ["3"]
+    assert len(plex.put_keys) == 20
+
+
+def test_changed_tags_invalidate_recorded_updated_at():
+    """标签翻译配置变化后，未变化的 updatedAt 也不能跳过条目。"""
+    storage = {}
+    plex = _LibraryPlex(count=10)
+    plugin = _plugin(storage)
+    _run(plugin, plex)
+    plex.detail_keys.clear()
+
+    plugin._tags = {"Action": "动作", "Drama": "剧情"}
+    _run(plugin, plex)
+
+    assert len(plex.detail_keys) == 10
+
+
+def test_batches_only_advance_checkpoint_past_contiguous_finished_batches():
+    """后序批次先完成或批次含未处理条目时，断点不能越过未完成批次。"""
+    plugin = _plugin({})
+    rating_keys = [str(index) for index in range(300)]
+    progress = []
+
+    def process_batch(_plex, batch_keys):
+        if batch_keys[0] == "100":
+            plugin._event.set()
+            return {"updated": 0, "failed": 0, "skipped": 50, "unprocessed": 50}
+        return {"updated": 0, "failed": 0, "skipped": len(batch_keys), "unprocessed": 0}
+
+    with patch.object(plugin, "_PlexLocalization__process_items_batch", side_effect=process_batch):
+        plugin._PlexLocalization__process_rating_keys_in_batches(
+            plex=SimpleNamespace(), rating_keys=rating_keys, thread_count=1, batch_size=100,
+            on_progress=progress.append
+        )
+
+    assert progress == ["99"]
+
+
+def test_generate_keys_skips_segments_before_checkpoint():
+    """断点之前的媒体库和类型不再请求，断点分页中已处理的条目被丢弃。"""
+    plugin = _plugin({})
+    plex = _LibraryPlex(count=700)
+    libraries = {1: _library(key=1), 2: _library(key=2)}
+    positions = {}
+
+    keys, status = plugin._PlexLocalization__generate_all_rating_keys(
+        plex=plex, libraries=libraries, with_collection=False,
+        checkpoint={"library": "2", "type": 1, "collection": False, "offset": 500, "rating_key": "509"},
+        positions=positions
+    )
+
+    assert status == "complete"
+    assert plex.list_starts == [500]
+    assert keys[0] == "510" and keys[-1] == "699"
+    assert positions["510"] == {"library": "2", "type": 1, "collection": False, "offset": 500,
+                                "updated_at": 1000}
+
+
+def test_transfer_checkpoint_with_newer_added_time_rescans_earlier_window():
+    """入库后扫描再次触发时取更早的入库时间，原分页位置随查询条件变化失效。"""
+    checkpoints = {"transfer": {"added_time": 100, "completed": [], "service": "plex",
+                                "position": {"library": "1", "type": 1, "offset": 500, "rating_key": "1"}}}
+    localized = {"signature": "sig", "items": {"plex": {"1": 5}}}
+
+    progress = ScanProgress.load(scope="transfer", added_time=200, signature="sig",
+                                 checkpoints=checkpoints, localized=localized)
+
+    assert progress.added_time == 100
+    assert progress.checkpoint_for("plex") is None
+    assert progress.is_unchanged(service="plex", rating_key="1", updated_at=5)
+    assert progress.dump()["scan_checkpoint"]["transfer"]["added_time"] == 100
+
+
+def test_progress_dump_only_exports_items_changed_since_last_dump():
+    """持久化只导出自上次导出后变化的条目记录，而不是全部媒体服务器的记录。"""
+    localized = {"signature": "sig", "items": {"plex": {str(index): 1000 for index in range(1000)}}}
+    progress = ScanProgress.load(scope="full", added_time=None, signature="sig", checkpoints={}, localized=localized)
+    progress.current_service = "plex"
+
+    progress.mark_localized(rating_key="1", updated_at=1000)
+    progress.mark_localized(rating_key="2", updated_at=2000)
+
+    assert progress.dump()["localized_items"] == {"signature": "sig", "items": {"plex": {"2": 2000}}}
+    assert progress.dump()["localized_items"] is None
+    assert progress.is_unchanged(service="plex", rating_key="2", updated_at=2000)
+
+
+def test_localized_store_migrates_legacy_data_and_resets_on_new_signature():
+    """首次打开时迁移旧版插件数据；以新签名写入时清空旧签名下的记录。"""
+    store = LocalizedItemStore(":memory:")
+    legacy = {"signature": "old", "items": {"plex": {"1": 5, "2": {"written_from": 1, "written_to": 2}}}}
+
+    assert store.migrate(lambda: legacy) == 2
+    assert store.migrate(lambda: legacy) == 0
+    assert store.load() == legacy
+
+    store.save(signature="old", items={"plex": {"3": 7}})
+    assert store.load()["items"]["plex"] == {"1": 5, "2": {"written_from": 1, "written_to": 2}, "3": 7}
+
+    store.save(signature="new", items={"plex": {"9": 1}})
+    assert store.load() == {"signature": "new", "items": {"plex": {"9": 1}}}
@@ -0,0 +1,157 @@
+"""TorrentClassifier qBittorrent 整理动作批量调度测试。"""
+from types import SimpleNamespace
+from unittest.mock import MagicMock, PropertyMock, patch
+
+from app.plugins.torrentclassifier import TorrentClassifier
+from app.plugins.torrentclassifier.classifierconfig import ClassifierConfig, TorrentFilter, TorrentTarget
+from app.plugins.torrentclassifier.classifierdispatcher import ActionDispatcher
+from app.plugins.torrentclassifier.classifierengine import ClassifierEngine, TorrentState
+
+
+def _rule(title, change_category=None, change_directory=None, add_tags=None, remove_tags=None,
+          auto_category=False):
+    return ClassifierConfig(
+        torrent_filter=TorrentFilter(torrent_title=title),
+        torrent_target=TorrentTarget(change_directory=change_directory, change_category=change_category,
+                                     add_tags=add_tags or [], remove_tags=remove_tags or [],
+                                     auto_category=auto_category),
+    )
+
+
+def _torrent(torrent_hash, name, category="", tags="", save_path="/downloads", auto_tmm=False):
+    return {"hash": torrent_hash, "name": name, "category": category, "tags": tags,
+            "save_path": save_path, "auto_tmm": auto_tmm}
+
+
+def _classifier_torrents(configs, torrents):
+    engine = ClassifierEngine(configs)
+    return engine.match_first([TorrentState.from_qbittorrent(torrent) for torrent in torrents])
+
+
+def _downloader():
+    downloader = MagicMock()
+    downloader.remove_torrents_tag.return_value = True
+    return downloader
+
+
+def test_same_target_is_sent_once_per_batch():
+    """1000 个目标相同的种子按批量大小合并调用，调用次数与种子数量无关。"""
+    configs = [_rule("Movie", change_category="电影", change_directory="/movies", add_tags=["整理"],
+                     remove_tags=["待整理"])]
+    torrents = [_torrent(f"h{index}", f"Movie.{index}", tags="待整理", auto_tmm=True) for index in range(1000)]
+    classifier_torrents = _classifier_torrents(configs, torrents)
+    downloader = _downloader()
+
+    dispatcher = ActionDispatcher(downloader=downloader, batch_size=400)
+    success, failed = dispatcher.dispatch(classifier_torrents)
+
+    assert len(success) == 1000 and failed == []
+    assert downloader.remove_torrents_tag.call_count == 3
+    assert downloader.set_torrents_tag.call_count == 3
+    assert downloader.qbc.torrents_set_category.call_count == 3
+    assert downloader.qbc.torrents_set_auto_management.call_count == 3
+    assert downloader.qbc.torrents_set_location.call_count == 3
+    assert [len(call.kwargs["torrent_hashes"]) for call in downloader.qbc.torrents_set_location.call_args_list] == \
+           [400, 400, 200]
+    assert len(dispatcher.planned_calls) == 15
+
+
+def test_torrents_are_grouped_by_target_and_noop_changes_are_skipped():
+    """不同目标分别调用，已符合目标的属性不再调用。"""
+    configs = [_rule("Movie", change_category="电影", change_directory="/movies"),
+               _rule("Show", change_category="剧集", change_directory="/shows")]
+    torrents = [_torrent("m1", "Movie.1"), _torrent("m2", "Movie.2", category="电影"),
+                _torrent("s1", "Show.1"), _torrent("s2", "Show.2", save_path="/shows")]
+    downloader = _downloader()
+
+    ActionDispatcher(downloader=downloader).dispatch(_classifier_torrents(configs, torrents))
+
+    assert sorted((call.kwargs["category"], tuple(call.kwargs["torrent_hashes"]))
+                  for call in downloader.qbc.torrents_set_category.call_args_list) == \
+           [("剧集", ("s1", "s2")), ("电影", ("m1",))]
+    assert sorted((call.kwargs["location"], tuple(call.kwargs["torrent_hashes"]))
+                  for call in downloader.qbc.torrents_set_location.call_args_list) == \
+           [("/movies", ("m1", "m2")), ("/shows", ("s1",))]
+    downloader.qbc.torrents_set_auto_management.assert_not_called()
+
+
+def test_remove_all_tags_merges_torrents_into_one_call():
+    """移除所有标签时不同标签组合的种子合并为一次调用，移除标签的并集，没有标签的种子不调用。"""
+    configs = [_rule("Movie", change_directory="/movies", remove_tags=["@all"])]
+    torrents = [_torrent("h1", "Movie.1", tags="A,B"), _torrent("h2", "Movie.2", tags="B, A"),
+                _torrent("h3", "Movie.3", tags="C"), _torrent("h4", "Movie.4")]
+    downloader = _downloader()
+    classifier_torrents = _classifier_torrents(configs, torrents)
+
+    ActionDispatcher(downloader=downloader).dispatch(classifier_torrents)
+
+    downloader.remove_torrents_tag.assert_called_once_with(ids=["h1", "h2", "h3"], tag=["A", "B", "C"])
+    assert all(not state.tags for state, _ in classifier_torrents.values())
+
+
+def test_remove_all_tags_unions_tags_per_batch():
+    """移除所有标签按批量大小拆分，每批只移除该批种子的标签。"""
+    configs = [_rule("Movie", change_directory="/movies", remove_tags=["@all"])]
+    torrents = [_torrent("h1", "Movie.1", tags="A"), _torrent("h2", "Movie.2", tags="B"),
+                _torrent("h3", "Movie.3", tags="C")]
+    downloader = _downloader()
+
+    ActionDispatcher(downloader=downloader, batch_size=2).dispatch(_classifier_torrents(configs, torrents))
+
+    assert [(call.kwargs["ids"], call.kwargs["tag"]) for call in downloader.remove_torrents_tag.call_args_list] == \
+           [(["h1", "h2"], ["A", "B"]), (["h3"], ["C"])]
+
+
+def test_failed_batch_stops_later_actions_for_its_torrents():
+    """批量调用失败的种子标记为失败，不再执行后续动作；关闭自动分类管理失败不影响修改路径。"""
+    configs = [_rule("Movie", change_category="电影", change_directory="/movies")]
+    torrents = [_torrent("h1", "Movie.1", auto_tmm=True), _torrent("h2", "Movie.2", category="电影", auto_tmm=True)]
+    downloader = _downloader()
+    downloader.qbc.torrents_set_category.side_effect = Exception("boom")
+    downloader.qbc.torrents_set_auto_management.side_effect = Exception("boom")
+
+    success, failed = ActionDispatcher(downloader=downloader).dispatch(_classifier_torrents(configs, torrents))
+
+    assert (success, failed) == (["h2"], ["h1"])
+    downloader.qbc.torrents_set_auto_management.assert_called_once_with(torrent_hashes=["h2"], enable=False)
+    downloader.qbc.torrents_set_location.assert_called_once_with(torrent_hashes=["h2"], location="/movies")
+
+
+def test_category_is_created_when_setting_fails():
+    """设置分类失败时创建分类后重试。"""
+    configs = [_rule("Movie", change_category="电影", change_directory="/movies")]
+    downloader = _downloader()
+    downloader.qbc.torrents_set_category.side_effect = [Exception("missing"), None]
+
+    success, _ = ActionDispatcher(downloader=downloader).dispatch(
+        _classifier_torrents(configs, [_torrent("h1", "Movie.1")]))
+
+    assert success == ["h1"]
+    downloader.qbc.torrents_create_category.assert_called_once_with(name="电影", save_path="/movies")
+
+
+def test_dry_run_reports_planned_calls_without_calling_downloader():
+    """预览模式只生成计划调用，不调用下载器，并通过通知发送计划。"""
+    plugin = object.__new__(TorrentClassifier)
+    plugin.downloader_helper = MagicMock()
+    plugin.downloader_helper.is_downloader.return_value = True
+    plugin._notify = True
+    plugin._dry_run = True
+    plugin._batch_size = 2
+    plugin._apply_all_rules = False
+    plugin._classifier_configs = [_rule("Movie", change_category="电影", change_directory="/movies")]
+    plugin._classifier_engine = ClassifierEngine(plugin._classifier_configs)
+    plugin.post_message = MagicMock()
+    downloader = _downloader()
+    downloader.get_torrents.return_value = ([_torrent(f"h{index}", f"Movie.{index}") for index in range(3)], False)
+
+    with patch.object(TorrentClassifier, "service_info", new_callable=PropertyMock,
+                      return_value=SimpleNamespace(instance=downloader)):
+        plugin.torrent_classifier()
+
+    downloader.qbc.torrents_set_category.assert_not_called()
+    downloader.qbc.torrents_set_location.assert_not_called()
+    text = plugin.post_message.call_args.kwargs["text"]
+    assert "预览模式，计划调用 4 次" in text
+    assert "设置分类「电影」，共 2 个种子" in text
+    assert "修改保存路径「/movies」，共 1 个种子" in text
@@ -0,0 +1,150 @@
+"""TorrentClassifier 规则引擎与单次快照整理测试。"""
+from types import SimpleNamespace
+from unittest.mock import MagicMock, PropertyMock, patch
+
+from app.plugins.torrentclassifier import TorrentClassifier
+from app.plugins.torrentclassifier.classifierconfig import ClassifierConfig, TorrentFilter, TorrentTarget
+from app.plugins.torrentclassifier.classifierengine import ClassifierEngine, TorrentState
+
+
+def _rule(title=None, category=None, tags=None, change_category=None, change_directory="/data",
+          add_tags=None, remove_tags=None, auto_category=False):
+    return ClassifierConfig(
+        torrent_filter=TorrentFilter(torrent_title=title, torrent_category=category, torrent_tags=tags or []),
+        torrent_target=TorrentTarget(change_directory=change_directory, change_category=change_category,
+                                     add_tags=add_tags or [], remove_tags=remove_tags or [],
+                                     auto_category=auto_category),
+    )
+
+
+def _torrent(torrent_hash, name, category="", tags="", save_path="/downloads", auto_tmm=False):
+    return {"hash": torrent_hash, "name": name, "category": category, "tags": tags,
+            "save_path": save_path, "auto_tmm": auto_tmm}
+
+
+def _state(torrent_hash, name, **kwargs):
+    return TorrentState.from_qbittorrent(_torrent(torrent_hash, name, **kwargs))
+
+
+def test_from_qbittorrent_skips_empty_tags():
+    """空标签字符串不会产生空标签。"""
+    state = _state("h1", "Movie", category=" 电影 ", tags="A, B,")
+
+    assert state.category == "电影"
+    assert state.tags == ["A", "B"]
+    assert _state("h2", "Movie").tags == []
+
+
+def test_match_first_uses_rule_order_and_candidate_index():
+    """按规则顺序取第一个匹配的规则，分类、标签不符的规则不会匹配。"""
+    engine = ClassifierEngine([
+        _rule(category="电影", change_category="电影-整理"),
+        _rule(tags=["Rock"], change_category="音乐"),
+        _rule(title=r"\.S\d{2}E\d{2}\.", change_category="剧集"),
+        _rule(title="movie", change_category="其他"),
+    ])
+    states = [
+        _state("h1", "A.Movie.2024", category="电影"),
+        _state("h2", "B.Album", tags="Rock,FLAC"),
+        _state("h3", "C.S01E02.1080p"),
+        _state("h4", "d.MOVIE.2023"),
+        _state("h5", "E.Album", tags="Jazz"),
+    ]
+
+    matched = engine.match_first(states)
+
+    assert {torrent_hash: rule.index for torrent_hash, (_, rule) in matched.items()} == \
+           {"h1": 1, "h2": 2, "h3": 3, "h4": 4}
+
+
+def test_rules_already_satisfied_or_invalid_do_not_match():
+    """属性已符合目标设置时跳过；标题正则无效时该规则不匹配任何种子。"""
+    engine = ClassifierEngine([
+        _rule(title="[", change_category="坏规则"),
+        _rule(title="Movie", change_category="电影", change_directory="/movies", add_tags=["整理"]),
+    ])
+    done = _state("h1", "Movie", category="电影", save_path="/movies", tags="整理")
+    pending = _state("h2", "Movie", category="电影", save_path="/movies")
+
+    assert set(engine.match_first([done, pending])) == {"h2"}
+
+
+def _plugin(torrents, configs, apply_all_rules):
+    plugin = object.__new__(TorrentClassifier)
+    plugin.downloader_helper = MagicMock()
+    plugin.downloader_helper.is_downloader.return_value = True
+    plugin._notify = False
+    plugin._apply_all_rules = apply_all_rules
+    plugin._classifier_configs = configs
+    plugin._classifier_engine = plugin._TorrentClassifier__get_classifier_engine(configs)
+    downloader = MagicMock()
+    downloader.get_torrents.return_value = (torrents, False)
+    downloader.remove_torrents_tag.return_value = True
+    return plugin, downloader
+
+
+def _run(plugin, downloader):
+    with patch.object(TorrentClassifier, "service_info", new_callable=PropertyMock,
+                      return_value=SimpleNamespace(instance=downloader)):
+        plugin.torrent_classifier()
+
+
+def test_apply_all_rules_uses_one_snapshot_and_chains_updated_state():
+    """应用所有规则时只获取一次种子列表，前一条规则整理后的分类参与后续规则匹配。"""
+    configs = [
+        _rule(title="Movie", change_category="电影", change_directory="/movies"),
+        _rule(category="电影", change_category="电影", change_directory="/movies", add_tags=["已整理"]),
+    ]
+    plugin, downloader = _plugin([_torrent("h1", "A.Movie"), _torrent("h2", "B.Show")], configs,
+                                 apply_all_rules=True)
+
+    _run(plugin, downloader)
+
+    downloader.get_torrents.assert_called_once_with()
+    downloader.qbc.torrents_set_category.assert_called_once_with(torrent_hashes=["h1"], category="电影")
+    downloader.set_torrents_tag.assert_called_once_with(ids=["h1"], tags=["已整理"])
+
+
+def test_failed_step_keeps_snapshot_state():
+    """整理失败的属性不会写入快照，后续规则仍按下载器中的实际状态判断。"""
+    configs = [
+        _rule(title="Movie", change_category="电影", change_directory="/movies"),
+        _rule(category="电影", change_category="电影", change_directory="/movies", add_tags=["已整理"]),
+    ]
+    plugin, downloader = _plugin([_torrent("h1", "A.Movie")], configs, apply_all_rules=True)
+    downloader.qbc.torrents_set_category.side_effect = Exception("boom")
+
+    _run(plugin, downloader)
+
+    downloader.set_torrents_tag.assert_not_called()
+
+
+def test_engine_is_reused_while_configs_are_unchanged():
+    """规则内容不变时复用已编译的规则引擎，变化后重新编译。"""
+    configs = [_rule(title="Movie", change_category="电影")]
+    plugin, _ = _plugin([], configs, apply_all_rules=False)
+    engine = plugin._classifier_engine
+
+    same = plugin._TorrentClassifier__get_classifier_engine([_rule(title="Movie", change_category="电影")])
+    changed = plugin._TorrentClassifier__get_classifier_engine([_rule(title="Show", change_category="剧集")])
+
+    assert same is engine
+    assert changed is not engine
+
+
+def test_10k_torrents_50_rules_use_single_snapshot():
+    """10000 个种子、50 条规则，单次快照完成匹配。"""
+    configs = [_rule(title=rf"\.Site{index}\.", category=f"分类{index % 10}", change_category=f"整理{index}")
+               for index in range(40)]
+    configs += [_rule(title=rf"Group{index}$", change_category=f"整理组{index}") for index in range(10)]
+    torrents = [_torrent(f"h{index}", f"Title.{index}.Site{index % 60}.Group{index % 15}",
+                         category=f"分类{index % 12}", tags=f"标签{index % 7}")
+                for index in range(10_000)]
+    plugin, downloader = _plugin(torrents, configs, apply_all_rules=False)
+
+    states = plugin._TorrentClassifier__get_torrent_states(downloader=downloader)
+    matched = plugin._classifier_engine.match_first(states)
+
+    assert downloader.get_torrents.call_count == 1
+    assert plugin.downloader_helper.get_service.call_count == 0
+    assert len(matched) > 0
@@ -0,0 +1,129 @@
+"""BrushFlowLowFreq 后台带宽采样器测试。"""
+import threading
+import time
+from unittest.mock import MagicMock
+
+from app.plugins.brushflowlowfreq import BrushConfig, BrushFlowLowFreq
+from app.plugins.brushflowlowfreq.sampler import BandwidthSampler
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_sampler_keeps_rolling_window_average():
+    """环形缓冲区只保留最近窗口内的采样，平均值随新采样滚动。"""
+    readings = iter([(100, 10), (200, 20), (300, 30), (400, 40)])
+    sampler = BandwidthSampler(fetch=lambda: next(readings), window=3, clock=_Clock())
+
+    for _ in range(4):
+        assert sampler.sample_once() is True
+
+    assert len(sampler) == 3
+    assert sampler.average() == (300, 30)
+
+
+def test_sampler_ignores_stale_and_failed_samples():
+    """过期采样不参与平均，采样失败不写入缓冲区。"""
+    clock = _Clock()
+    fetch = MagicMock(side_effect=[(100, 10), None, RuntimeError("offline"), (300, 30)])
+    sampler = BandwidthSampler(fetch=fetch, window=5, max_age=30, clock=clock)
+
+    assert sampler.sample_once() is True
+    assert sampler.sample_once() is False
+    assert sampler.sample_once() is False
+    clock.now += 20
+    assert sampler.sample_once() is True
+    assert sampler.average() == (200, 20)
+
+    clock.now += 20
+    assert sampler.average() == (300, 30)
+    clock.now += 20
+    assert sampler.average() == (None, None)
+
+
+def test_sampler_background_thread_starts_and_stops():
+    """后台线程启动后立即采样，停止后线程退出并清空采样。"""
+    sampled = threading.Event()
+
+    def fetch():
+        sampled.set()
+        return 1024, 512
+
+    sampler = BandwidthSampler(fetch=fetch, interval=0.1)
+    sampler.start()
+    try:
+        assert sampled.wait(1)
+        assert sampler.running
+        assert sampler.average() == (1024, 512)
+    finally:
+        sampler.stop()
+
+    assert not sampler.running
+    assert len(sampler) == 0
+
+
+def test_sampler_skips_fetch_outside_active_period():
+    """采样时段判断返回 False 时后台线程不请求下载器，恢复后继续采样。"""
+    active = threading.Event()
+    sampled = threading.Event()
+    fetch = MagicMock(side_effect=lambda: sampled.set() or (1024, 512))
+    sampler = BandwidthSampler(fetch=fetch, interval=0.1, active=active.is_set)
+    sampler.start()
+    try:
+        time.sleep(0.3)
+        assert fetch.call_count == 0
+        active.set()
+        assert sampled.wait(1)
+    finally:
+        sampler.stop()
+
+
+def test_bandwidth_sampler_uses_configured_window():
+    """采样间隔、窗口和有效期从配置读取，未配置时使用较长的默认间隔。"""
+    plugin = object.__new__(BrushFlowLowFreq)
+    plugin.downloader_helper = MagicMock()
+    plugin.downloader_helper.get_service.return_value = None
+    plugin._bandwidth_sampler = None
+    plugin._brush_config = BrushConfig(config={"bandwidth_sample_interval": "60", "bandwidth_sample_window": 3,
+                                               "bandwidth_sample_max_age": 600})
+    try:
+        plugin._BrushFlowLowFreq__start_bandwidth_sampler()
+        sampler = plugin._bandwidth_sampler
+        assert (sampler.interval, sampler.window, sampler.max_age) == (60, 3, 600)
+    finally:
+        plugin._BrushFlowLowFreq__stop_bandwidth_sampler()
+
+    defaults = BrushConfig(config={})
+    assert (defaults.bandwidth_sample_interval, defaults.bandwidth_sample_window,
+            defaults.bandwidth_sample_max_age) == (30, 5, 300)
+
+
+def test_average_bandwidth_reads_sampler_without_blocking():
+    """刷流读取带宽时直接取滑动平均值，不再等待多次采样。"""
+    plugin = object.__new__(BrushFlowLowFreq)
+    plugin._bandwidth_sampler = BandwidthSampler(fetch=lambda: (2048, 1024))
+    plugin._bandwidth_sampler.sample_once()
+    plugin._BrushFlowLowFreq__get_downloader_info = MagicMock()
+
+    start = time.perf_counter()
+    bandwidth = plugin._BrushFlowLowFreq__get_average_bandwidth()
+
+    assert time.perf_counter() - start < 0.5
+    assert bandwidth == (2048, 1024)
+    plugin._BrushFlowLowFreq__get_downloader_info.assert_not_called()
+
+
+def test_average_bandwidth_falls_back_to_single_sample():
+    """采样器没有有效数据时实时采样一次，而不是跳过带宽限制。"""
+    plugin = object.__new__(BrushFlowLowFreq)
+    plugin._bandwidth_sampler = BandwidthSampler(fetch=lambda: None)
+    plugin._BrushFlowLowFreq__get_downloader_info = MagicMock(
+        return_value=MagicMock(upload_speed=4096, download_speed=None))
+
+    assert plugin._BrushFlowLowFreq__get_average_bandwidth() == (4096, 0)
+    plugin._BrushFlowLowFreq__get_downloader_info.assert_called_once_with()
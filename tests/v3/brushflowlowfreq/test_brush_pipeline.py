@@ -0,0 +1,232 @@
+"""BrushFlowLowFreq 刷流并发获取与串行准入测试。"""
+import threading
+import time
+from types import SimpleNamespace
+from unittest.mock import MagicMock, PropertyMock, patch
+
+from app.plugins.brushflowlowfreq import BrushConfig, BrushFlowLowFreq, BrushSnapshot
+from app.plugins.brushflowlowfreq.matcher import SubscribeTitleMatcher
+from app.plugins.brushflowlowfreq.store import BrushTaskStore
+
+
+def _site(site_id, delay=0.0):
+    return SimpleNamespace(id=site_id, name=f"site{site_id}", domain=f"site{site_id}.test", delay=delay)
+
+
+def _plugin(sites, browse=None):
+    plugin = object.__new__(BrushFlowLowFreq)
+    delays = {site.domain: site.delay for site in sites}
+
+    def default_browse(domain):
+        time.sleep(delays[domain])
+        return [SimpleNamespace(title=domain)]
+
+    plugin.torrents_chain = SimpleNamespace(browse=browse or default_browse)
+    return plugin
+
+
+def test_browse_sites_concurrently_tracks_slowest_site():
+    """多个站点并发获取，总耗时取决于最慢站点而非各站点耗时之和。"""
+    sites = [_site(1, 0.3), _site(2, 0.3), _site(3, 0.3)]
+    plugin = _plugin(sites)
+
+    start = time.time()
+    result = plugin._BrushFlowLowFreq__browse_sites_concurrently(site_infos=sites)
+    elapsed = time.time() - start
+
+    assert set(result) == {1, 2, 3}
+    assert result[1][0].title == "site1.test"
+    assert elapsed < 0.8
+
+
+def test_browse_sites_concurrently_skips_timeout_and_failed_sites():
+    """超时、异常或无种子的站点只跳过自身，不影响其他站点结果。"""
+    sites = [_site(1), _site(2), _site(3), _site(4)]
+    release = threading.Event()
+
+    def browse(domain):
+        if domain == "site2.test":
+            release.wait(5)
+            return [SimpleNamespace(title=domain)]
+        if domain == "site3.test":
+            raise RuntimeError("boom")
+        if domain == "site4.test":
+            return []
+        return [SimpleNamespace(title=domain)]
+
+    plugin = _plugin(sites, browse=browse)
+    plugin._browse_timeout = 0.5
+    try:
+        result = plugin._BrushFlowLowFreq__browse_sites_concurrently(site_infos=sites)
+    finally:
+        release.set()
+
+    assert list(result) == [1]
+
+
+def test_browse_sites_concurrently_skips_sites_still_browsing_from_timed_out_cycle():
+    """超时放弃的站点获取线程未结束前，后续周期跳过该站点，排队站点在取消后不再发起获取。"""
+    sites = [_site(1), _site(2)]
+    release = threading.Event()
+    calls = []
+
+    def browse(domain):
+        calls.append(domain)
+        if domain == "site1.test":
+            release.wait(5)
+        return [SimpleNamespace(title=domain)]
+
+    plugin = _plugin(sites, browse=browse)
+    plugin._browse_timeout = 0.3
+    plugin._browse_max_workers = 1
+    plugin._browse_inflight = set()
+    try:
+        first = plugin._BrushFlowLowFreq__browse_sites_concurrently(site_infos=sites)
+        second = plugin._BrushFlowLowFreq__browse_sites_concurrently(site_infos=[sites[0]])
+    finally:
+        release.set()
+    for _ in range(50):
+        if not plugin._browse_inflight:
+            break
+        time.sleep(0.02)
+    third = plugin._BrushFlowLowFreq__browse_sites_concurrently(site_infos=[sites[0]])
+
+    assert first == {} and second == {}
+    assert calls == ["site1.test", "site1.test"]
+    assert list(third) == [1]
+
+
+def test_brush_admits_sites_serially_in_configured_order():
+    """获取阶段结束后按站点顺序串行准入，前一站点触发限额时停止后续站点。"""
+    sites = [_site(1), _site(2), _site(3)]
+    plugin = _plugin(sites)
+    plugin._brush_config = SimpleNamespace(brushsites=[1, 2, 3], downloader="qb", brush_sequential=True,
+                                           except_subscribe=False, maxdlcount=None, maxupspeed=None,
+                                           maxdlspeed=None)
+    plugin.site_oper = MagicMock()
+    plugin.site_oper.get.side_effect = lambda site_id: sites[site_id - 1]
+    plugin.get_data = MagicMock(return_value={})
+    plugin.save_data = MagicMock()
+    plugin._task_store = BrushTaskStore(":memory:")
+
+    admitted = []
+
+    def brush_site(siteinfo, torrents, **_kwargs):
+        admitted.append((siteinfo.id, [torrent.title for torrent in torrents]))
+        return siteinfo.id != 2
+
+    plugin._BrushFlowLowFreq__check_and_resolve_plugin_conflict = lambda: True
+    plugin._BrushFlowLowFreq__is_current_time_in_range = lambda: True
+    plugin._BrushFlowLowFreq__evaluate_size_condition_for_brush = lambda **_kwargs: (True, None)
+    plugin._BrushFlowLowFreq__evaluate_pre_conditions_for_brush = lambda **_kwargs: (True, None)
+    plugin._BrushFlowLowFreq__get_subscribe_titles = lambda: set()
+    plugin._BrushFlowLowFreq__brush_site_torrents = brush_site
+    with patch.object(BrushFlowLowFreq, "downloader", new_callable=PropertyMock, return_value=object()):
+        plugin.brush()
+
+    assert admitted == [(1, ["site1.test"]), (2, ["site2.test"])]
+    saved_keys = [call.args[0] for call in plugin.save_data.call_args_list]
+    assert saved_keys == ["statistic"]
+
+
+def test_brush_refreshes_downloading_count_before_admission():
+    """获取阶段不持有锁，准入前在锁内重新获取同时下载数。"""
+    sites = [_site(1)]
+    plugin = _plugin(sites)
+    plugin._brush_config = SimpleNamespace(brushsites=[1], downloader="qb", brush_sequential=True,
+                                           except_subscribe=False, maxdlcount=5, maxupspeed=None,
+                                           maxdlspeed=None)
+    plugin.site_oper = MagicMock()
+    plugin.site_oper.get.side_effect = lambda site_id: sites[site_id - 1]
+    plugin.get_data = MagicMock(return_value={})
+    plugin.save_data = MagicMock()
+    plugin._task_store = BrushTaskStore(":memory:")
+    counts = iter([1, 4])
+    admitted = []
+
+    plugin._BrushFlowLowFreq__check_and_resolve_plugin_conflict = lambda: True
+    plugin._BrushFlowLowFreq__is_current_time_in_range = lambda: True
+    plugin._BrushFlowLowFreq__evaluate_size_condition_for_brush = lambda **_kwargs: (True, None)
+    plugin._BrushFlowLowFreq__evaluate_pre_conditions_for_brush = lambda **_kwargs: (True, None)
+    plugin._BrushFlowLowFreq__get_subscribe_titles = lambda: set()
+    plugin._BrushFlowLowFreq__get_downloading_count = lambda: next(counts)
+    plugin._BrushFlowLowFreq__brush_site_torrents = \
+        lambda snapshot, **_kwargs: admitted.append(snapshot.downloading_count) or True
+    with patch.object(BrushFlowLowFreq, "downloader", new_callable=PropertyMock, return_value=object()):
+        plugin.brush()
+
+    assert admitted == [4]
+
+
+def _candidate(index, size=1024 ** 3):
+    return SimpleNamespace(title=f"Torrent.{index}", description="", size=size, site_name="site1",
+                           pubdate="", page_url=f"https://site1.test/details.php?id={index}",
+                           imdbid=None, date_elapsed=None, freedate=None, uploadvolumefactor=1,
+                           downloadvolumefactor=0, hit_and_run=False, volume_factor="免费", freedate_diff=None)
+
+
+def _snapshot_plugin(config: dict, downloading_torrents: list):
+    plugin = object.__new__(BrushFlowLowFreq)
+    plugin._brush_config = BrushConfig(config={"brushsites": [1], "downloader": "qb", **config})
+    downloader = MagicMock()
+    downloader.get_downloading_torrents.return_value = downloading_torrents
+    plugin.eventmanager = MagicMock()
+    plugin.post_message = MagicMock()
+    plugin._BrushFlowLowFreq__evaluate_conditions_for_brush = lambda **_kwargs: (True, None)
+    plugin._BrushFlowLowFreq__download = lambda torrent: f"hash-{torrent.title}"
+    return plugin, downloader
+
+
+def test_brush_snapshot_keeps_downloader_calls_constant_per_cycle():
+    """整个刷流周期只采集一次下载器状态，新增种子后在快照本地累加并触发限额。"""
+    plugin, downloader = _snapshot_plugin({"maxdlcount": 5, "notify": False}, downloading_torrents=[object()] * 2)
+    torrent_tasks = {}
+    statistic_info = {"count": 0}
+    siteinfo = SimpleNamespace(id=1, name="site1")
+    candidates = [_candidate(index) for index in range(200)]
+
+    with patch.object(BrushFlowLowFreq, "service_info", new_callable=PropertyMock,
+                      return_value=SimpleNamespace(name="qb", instance=downloader)):
+        snapshot = plugin._BrushFlowLowFreq__capture_brush_snapshot(torrents_size=0)
+        passed = plugin._BrushFlowLowFreq__brush_site_torrents(
+            siteinfo=siteinfo, torrents=candidates, torrent_tasks=torrent_tasks, snapshot=snapshot,
+            statistic_info=statistic_info, subscribe_matcher=SubscribeTitleMatcher(titles=set()))
+
+    assert passed is False
+    assert downloader.get_downloading_torrents.call_count == 1
+    assert plugin._brush_snapshot is snapshot
+    assert snapshot.downloading_count == 5
+    assert snapshot.seeding_size == 3 * 1024 ** 3
+    assert len(torrent_tasks) == 3
+    assert statistic_info["count"] == 3
+
+
+def test_brush_snapshot_applies_disksize_with_local_updates():
+    """保种体积按快照累加判断，超出上限的种子被跳过且不请求下载器。"""
+    plugin, downloader = _snapshot_plugin({"disksize": 2, "notify": False}, downloading_torrents=[])
+    snapshot = BrushSnapshot(seeding_size=0)
+    torrent_tasks = {}
+    candidates = [_candidate(index, size=1024 ** 3) for index in range(4)]
+
+    with patch.object(BrushFlowLowFreq, "service_info", new_callable=PropertyMock,
+                      return_value=SimpleNamespace(name="qb", instance=downloader)):
+        passed = plugin._BrushFlowLowFreq__brush_site_torrents(
+            siteinfo=SimpleNamespace(id=1, name="site1"), torrents=candidates, torrent_tasks=torrent_tasks,
+            snapshot=snapshot, statistic_info={"count": 0}, subscribe_matcher=SubscribeTitleMatcher(titles=set()))
+
+    assert passed is True
+    assert len(torrent_tasks) == 2
+    assert snapshot.downloading_count == 2
+    downloader.get_downloading_torrents.assert_not_called()
+
+
+def test_brush_snapshot_evaluates_bandwidth_without_sampling():
+    """带宽前置条件直接读取快照中的平均速度。"""
+    plugin = object.__new__(BrushFlowLowFreq)
+    plugin._brush_config = BrushConfig(config={"maxupspeed": 100})
+    snapshot = BrushSnapshot(upload_speed=200 * 1024, download_speed=0)
+
+    passed, reason = plugin._BrushFlowLowFreq__evaluate_pre_conditions_for_brush(snapshot=snapshot)
+
+    assert passed is False
+    assert "100 KB/s" in reason
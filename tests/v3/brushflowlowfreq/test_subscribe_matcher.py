@@ -0,0 +1,83 @@
+"""BrushFlowLowFreq 订阅标题多模式匹配器测试。"""
+import random
+from types import SimpleNamespace
+
+import pytest
+
+from app.plugins.brushflowlowfreq import BrushFlowLowFreq
+from app.plugins.brushflowlowfreq.matcher import SubscribeTitleMatcher
+
+
+def test_matcher_agrees_with_substring_semantics():
+    """自动机匹配结果与逐个子串判断一致，包括重叠与后缀命中。"""
+    rng = random.Random(20261017)
+    for _ in range(500):
+        titles = {"".join(rng.choice("abc") for _ in range(rng.randint(1, 4))) for _ in range(rng.randint(0, 6))}
+        matcher = SubscribeTitleMatcher(titles=titles)
+        for _ in range(10):
+            text = "".join(rng.choice("abcd") for _ in range(rng.randint(0, 12)))
+            hit = matcher.search(text)
+            assert (hit is not None) == any(title in text for title in titles)
+            assert hit is None or hit in text
+
+
+def test_matcher_handles_cjk_titles_and_empty_input():
+    matcher = SubscribeTitleMatcher(titles={"凡人修仙传", "Mortal", ""})
+
+    assert len(matcher) == 2
+    assert matcher.matches("", "[凡人修仙传][第120集]") is True
+    assert matcher.matches("A.Record.of.a.Mortals.Journey", "") is True
+    assert matcher.matches("Other.Show.2160p", None) is False
+    assert SubscribeTitleMatcher(titles=set()).search("Mortal") is None
+
+
+def test_plugin_rebuilds_matcher_only_when_subscriptions_change():
+    """订阅标题集合不变时复用同一自动机，变化后才重建并递增版本。"""
+    plugin = object.__new__(BrushFlowLowFreq)
+    plugin._subscribe_matcher = None
+
+    first = plugin._BrushFlowLowFreq__get_subscribe_matcher(subscribe_titles={"A", "B"})
+    same = plugin._BrushFlowLowFreq__get_subscribe_matcher(subscribe_titles={"B", "A"})
+    changed = plugin._BrushFlowLowFreq__get_subscribe_matcher(subscribe_titles={"A", "C"})
+
+    assert same is first
+    assert first.version == 1
+    assert changed is not first
+    assert changed.version == 2
+
+
+def test_filter_torrents_excludes_title_or_description_hits():
+    torrents = [
+        SimpleNamespace(title="Show.A.S01E01", description=None),
+        SimpleNamespace(title="Other", description="包含 订阅B 的描述"),
+        SimpleNamespace(title="Keep.Me", description="普通描述"),
+    ]
+    matcher = SubscribeTitleMatcher(titles={"Show.A", "订阅B"})
+
+    kept = BrushFlowLowFreq._BrushFlowLowFreq__filter_torrents_contains_subscribe(
+        torrents=torrents, subscribe_matcher=matcher)
+
+    assert [torrent.title for torrent in kept] == ["Keep.Me"]
+
+
+@pytest.mark.parametrize("subscribe_count, torrent_count", [(500, 2000)])
+def test_matcher_agrees_with_substring_scan(subscribe_count, torrent_count):
+    """500 个订阅标题 × 2000 个种子，自动机匹配结果与逐标题子串扫描一致。"""
+    rng = random.Random(42)
+    alphabet = "abcdefghijklmnopqrstuvwxyz"
+    titles = {"".join(rng.choice(alphabet) for _ in range(rng.randint(6, 14))) for _ in range(subscribe_count)}
+    texts = [
+        (".".join("".join(rng.choice(alphabet) for _ in range(6)) for _ in range(8)) + ".2160p.WEB-DL",
+         "".join(rng.choice(alphabet) for _ in range(30)))
+        for _ in range(torrent_count)
+    ]
+    sample_titles = rng.sample(sorted(titles), 20)
+    texts[::100] = [(f"{title}.S01E01.1080p", "") for title in sample_titles]
+
+    matcher = SubscribeTitleMatcher(titles=titles)
+
+    naive = [any(title in text or title in desc for title in titles) for text, desc in texts]
+    automaton = [matcher.matches(text, desc) for text, desc in texts]
+
+    assert automaton == naive
+    assert sum(automaton) >= 20
@@ -0,0 +1,165 @@
+"""BrushFlowLowFreq 刷流任务存储的增量持久化与迁移测试。"""
+import time
+from unittest.mock import MagicMock
+
+import pytest
+
+from app.plugins.brushflowlowfreq import BrushConfig, BrushFlowLowFreq
+from app.plugins.brushflowlowfreq.store import BrushTaskStore
+
+
+def _task(index: int, site: int = 1, deleted: bool = False, **overrides) -> dict:
+    task = {
+        "site": site,
+        "site_name": f"site{site}",
+        "title": f"Brush.Task.{index}.2160p.WEB-DL",
+        "size": 8 * 1024 ** 3,
+        "pubdate": "2026-10-01 00:00:00",
+        "description": f"刷流任务 {index}",
+        "page_url": f"https://site{site}.test/details.php?id={index}",
+        "hit_and_run": False,
+        "ratio": 1.5,
+        "downloaded": 8 * 1024 ** 3,
+        "uploaded": 12 * 1024 ** 3,
+        "seeding_time": 3600,
+        "deleted": deleted,
+        "time": 1_790_000_000 + index,
+    }
+    task.update(overrides)
+    return task
+
+
+def _tasks(count: int) -> dict:
+    return {f"hash{index:08d}": _task(index, site=index % 7, deleted=index % 5 == 0) for index in range(count)}
+
+
+def test_store_tracks_records_per_state():
+    """行级写入按状态分别保存，移除只影响对应状态。"""
+    store = BrushTaskStore(":memory:")
+    store.upsert("torrents", "a", _task(1, site=1))
+    store.upsert("torrents", "b", _task(2, site=2, deleted=True))
+    store.upsert("archived", "c", _task(3, site=1, deleted=True))
+
+    store.upsert("torrents", "a", _task(1, site=2, deleted=True))
+    store.remove("torrents", "b")
+
+    assert store.tasks("torrents") == {"a": _task(1, site=2, deleted=True)}
+    assert store.get("archived", "c") == _task(3, site=1, deleted=True)
+    assert store.count("torrents") == 1
+
+
+def test_store_save_persists_only_changed_records(tmp_path):
+    """写回任务集合时仅持久化新增、变更和移除的记录，重新打开后数据一致。"""
+    db_path = tmp_path / "tasks.db"
+    store = BrushTaskStore(db_path)
+    assert store.save("torrents", _tasks(100)) == 100
+
+    tasks = store.tasks("torrents")
+    tasks["hash00000001"]["uploaded"] += 1
+    tasks["hash00000002"]["deleted"] = True
+    tasks.pop("hash00000003")
+    tasks["new"] = _task(1000)
+    assert store.save("torrents", tasks) == 4
+    assert store.save("torrents", tasks) == 0
+    assert not store.dirty
+    store.close()
+
+    reopened = BrushTaskStore(db_path)
+    assert reopened.tasks("torrents") == tasks
+    assert reopened.get("torrents", "hash00000002")["deleted"] is True
+
+
+def test_stop_service_closes_task_store(tmp_path):
+    """退出插件时持久化剩余记录并关闭数据库连接，下次使用重新打开。"""
+    plugin = object.__new__(BrushFlowLowFreq)
+    plugin._scheduler = None
+    plugin._bandwidth_sampler = None
+    store = BrushTaskStore(tmp_path / "tasks.db")
+    store.upsert("torrents", "a", _task(1))
+    plugin._task_store = store
+
+    plugin.stop_service()
+    plugin.stop_service()
+
+    assert plugin._task_store is None
+    assert BrushTaskStore(tmp_path / "tasks.db").tasks("torrents") == {"a": _task(1)}
+
+
+def test_store_tasks_returns_copies():
+    """调用方修改读取结果后未写回时，不影响存储中的记录。"""
+    store = BrushTaskStore(":memory:")
+    store.upsert("torrents", "a", _task(1))
+    assert store.dirty == {("torrents", "a")}
+    assert store.flush() == 1
+
+    store.tasks("torrents")["a"]["deleted"] = True
+
+    assert store.get("torrents", "a")["deleted"] is False
+    assert not store.dirty
+
+
+def test_store_migrates_legacy_blobs_once(tmp_path):
+    """旧版 torrents/unmanaged/archived 整体数据只迁移一次。"""
+    legacy = {
+        "torrents": {"a": _task(1)},
+        "unmanaged": {"b": _task(2)},
+        "archived": {"c": _task(3, deleted=True)},
+    }
+    get_data = MagicMock(side_effect=legacy.get)
+    store = BrushTaskStore(tmp_path / "tasks.db")
+
+    assert store.migrate(get_data=get_data) == 3
+    assert store.migrate(get_data=get_data) == 0
+    assert get_data.call_count == 3
+
+    store.clear()
+    assert store.migrate(get_data=get_data) == 0
+    assert store.count("archived") == 0
+
+
+def test_auto_archive_moves_rows_without_rewriting_archive():
+    """自动归档仅写入被归档的记录，不再整体重写归档数据。"""
+    plugin = object.__new__(BrushFlowLowFreq)
+    plugin._brush_config = BrushConfig(config={"auto_archive_days": 1})
+    plugin._task_store = BrushTaskStore(":memory:")
+    plugin._task_store.save("archived", _tasks(1000))
+    torrent_tasks = {
+        "old": _task(1, deleted=True, deleted_time=time.time() - 3 * 86400),
+        "recent": _task(2, deleted=True, deleted_time=time.time()),
+        "active": _task(3),
+    }
+    plugin._task_store.save("torrents", torrent_tasks)
+    plugin.save_data = MagicMock()
+
+    plugin._BrushFlowLowFreq__auto_archive_tasks(torrent_tasks=torrent_tasks)
+
+    assert set(torrent_tasks) == {"recent", "active"}
+    assert plugin._task_store.count("archived") == 1001
+    assert plugin._task_store.get("archived", "old")["title"] == _task(1)["title"]
+    assert plugin._task_store.get("torrents", "old") is None
+    plugin.save_data.assert_not_called()
+
+
+def test_get_brush_tasks_exposes_managed_tasks():
+    """刷流种子整理等插件通过插件方法读取当前刷流任务。"""
+    plugin = object.__new__(BrushFlowLowFreq)
+    plugin._task_store = BrushTaskStore(":memory:")
+    plugin._task_store.upsert("torrents", "a", _task(1))
+    plugin._task_store.upsert("archived", "b", _task(2))
+
+    assert plugin.get_brush_tasks() == {"a": _task(1)}
+
+
+@pytest.mark.parametrize("task_count", [10_000, 50_000])
+def test_store_save_only_writes_changed_tasks(task_count, tmp_path):
+    """检查任务只变更 5 个任务时，增量保存只写 5 条记录，而不是整体重写。"""
+    store = BrushTaskStore(tmp_path / "tasks.db")
+    store.save("torrents", _tasks(task_count))
+
+    current = store.tasks("torrents")
+    for index in range(5):
+        current[f"hash{index:08d}"]["uploaded"] += 1024
+    written = store.save("torrents", current)
+
+    assert written == 5
+    assert store.tasks("torrents") == current
@@ -0,0 +1,230 @@
+"""PlexPersonMeta 豆瓣令牌桶限流与异步查询调度测试。"""
+
+import threading
+from types import ModuleType, SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from app.testing import stub_modules
+
+
+_pypinyin = ModuleType("pypinyin")
+_pypinyin.lazy_pinyin = lambda *_args, **_kwargs: []
+
+with stub_modules({"pypinyin": _pypinyin}):
+    from app.plugins.plexpersonmeta import helper as _cache_helper
+    from app.plugins.plexpersonmeta import scrape as _scrape
+    from app.plugins.plexpersonmeta.enrich import LookupScheduler, RateLimiter
+    from app.plugins.plexpersonmeta.helper import RatingInfo
+
+
+class _Clock:
+    """可手动推进的时钟。"""
+
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_token_bucket_allows_burst_then_enforces_average_rate():
+    """空闲时可连续发出 burst 个请求，之后按平均速率排队，空闲期间累积的令牌不超过 burst。"""
+    clock = _Clock()
+    limiter = RateLimiter(rate=2, burst=3, clock=clock)
+
+    assert [limiter.reserve() for _ in range(5)] == [0, 0, 0, 0.5, 1.0]
+
+    clock.now += 60
+    assert [limiter.reserve() for _ in range(4)] == [0, 0, 0, 0.5]
+
+
+def test_token_bucket_reservations_across_threads_follow_average_rate():
+    """多个线程共享令牌桶，预约的等待时间按平均速率依次排开，而不是各线程分别计时。"""
+    limiter = RateLimiter(rate=100, burst=5, clock=_Clock())
+    waits = []
+    lock = threading.Lock()
+
+    def worker():
+        for _ in range(10):
+            wait = limiter.reserve()
+            with lock:
+                waits.append(wait)
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(waits) == pytest.approx([0] * 5 + [index / 100 for index in range(1, 36)])
+
+
+def test_lookup_scheduler_shares_result_of_identical_keys():
+    """相同键的查询只执行一次。"""
+    scheduler = LookupScheduler(max_workers=2)
+    calls = []
+
+    futures = [scheduler.submit(key=("tt1", 1), fn=lambda: calls.append(1) or ["actor"]) for _ in range(3)]
+    results = [future.result() for future in futures]
+    scheduler.close()
+
+    assert results == [["actor"]] * 3
+    assert calls == [1]
+    assert scheduler.stats() == {"submitted": 1, "deduplicated": 2}
+
+
+def _helper():
+    helper = object.__new__(_scrape.ScrapeHelper)
+    helper.event = threading.Event()
+    helper._scrape_type = "all"
+    helper._douban_scrape = True
+    helper._lock = False
+    helper.tmdb_person_rate = 10_000
+    helper.get_tmdb_person_detail = lambda person_tmdbid: SimpleNamespace(name="演员一", also_known_as=[])
+    return helper
+
+
+def _entry(rating_key, tag, role):
+    item = {"ratingKey": rating_key, "type": "episode", "title": rating_key, "Role": [{"tag": tag, "role": role}]}
+    return item, RatingInfo(key=rating_key, type="episode", title=rating_key, search_title="Show", tmdbid=100)
+
+
+def test_items_without_douban_need_are_written_while_douban_lookup_waits():
+    """无需豆瓣信息的条目不等待豆瓣查询；同一媒体的多个条目共享一次豆瓣查询。"""
+    helper = _helper()
+    mediainfo = SimpleNamespace(actors=[{"id": 1, "name": "Actor 1", "original_name": "Actor 1",
+                                         "character": "角色一"}],
+                                imdb_id="tt1", title="Show", type="电视剧", year="2020", season=1, season_years={})
+    written = []
+    first_written = threading.Event()
+    douban_calls = []
+
+    def put_actors(item, actors):
+        written.append((item["ratingKey"], [(actor["tag"], actor["role"]) for actor in actors]))
+        first_written.set()
+
+    def get_douban_actors(**kwargs):
+        douban_calls.append(kwargs)
+        assert first_written.wait(timeout=5)
+        return [{"name": "某人", "latin_name": "Unknown Person", "character": "饰 某角色"}]
+
+    entries = [_entry("b", "Unknown Person", "Someone"), _entry("a", "Actor 1", "Role"),
+               _entry("c", "Unknown Person", "Someone")]
+    with patch.object(helper, "to_pinyin", side_effect=str.lower), \
+            patch.object(helper, "get_tmdb_media", return_value=mediainfo), \
+            patch.object(helper, "get_douban_actors", side_effect=get_douban_actors), \
+            patch.object(helper, "put_actors", side_effect=put_actors):
+        helper.scrape_items(entries=entries)
+        helper.close()
+
+    assert written == [("a", [("演员一", "角色一")]),
+                       ("b", [("某人", "某角色")]),
+                       ("c", [("某人", "某角色")])]
+    assert len(douban_calls) == 1
+
+
+def test_pending_douban_lookups_carry_over_to_later_batches():
+    """批次结束时不等待未完成的豆瓣查询，后续批次照常写入，查询完成后在后续批次或关闭时写入。"""
+    helper = _helper()
+    mediainfo = SimpleNamespace(actors=[{"id": 1, "name": "Actor 1", "original_name": "Actor 1",
+                                         "character": "角色一"}],
+                                imdb_id="tt1", title="Show", type="电视剧", year="2020", season=1, season_years={})
+    release = threading.Event()
+    written = []
+
+    def get_douban_actors(**_kwargs):
+        assert release.wait(timeout=5)
+        return [{"name": "某人", "latin_name": "Unknown Person", "character": "饰 某角色"}]
+
+    with patch.object(helper, "to_pinyin", side_effect=str.lower), \
+            patch.object(helper, "get_tmdb_media", return_value=mediainfo), \
+            patch.object(helper, "get_douban_actors", side_effect=get_douban_actors), \
+            patch.object(helper, "put_actors", side_effect=lambda item, actors: written.append(item["ratingKey"])):
+        helper.scrape_items(entries=[_entry("b", "Unknown Person", "Someone")])
+        helper.scrape_items(entries=[_entry("a", "Actor 1", "Role")])
+        assert written == ["a"]
+
+        release.set()
+        helper.close()
+
+    assert written == ["a", "b"]
+    assert helper._douban_pending is None
+
+
+def test_fetch_douban_actors_takes_tokens_instead_of_sleeping():
+    """匹配及详情请求发出前各获取一个令牌，不再固定休眠。"""
+    helper = _helper()
+    helper.chain = MagicMock()
+    helper.chain.match_doubaninfo.return_value = {"id": "1"}
+    helper.chain.douban_info.return_value = {"actors": [{"name": "A"}], "directors": [{"name": "B"}]}
+    limiter = MagicMock()
+    limiter.acquire.return_value = True
+
+    with patch.object(_scrape, "get_rate_limiter", return_value=limiter) as get_rate_limiter, \
+            patch("time.sleep") as sleep:
+        actors = helper.fetch_douban_actors(fetch_title="Show")
+
+    assert actors == [{"name": "A"}, {"name": "B"}]
+    assert limiter.acquire.call_count == 2
+    get_rate_limiter.assert_called_once_with(source="DOUBAN", rate=helper.douban_rate, burst=helper.douban_burst)
+    sleep.assert_not_called()
+
+
+def test_fetch_douban_actors_stops_when_waiting_for_token_is_interrupted():
+    """等待令牌期间外部中断时不再发出请求。"""
+    helper = _helper()
+    helper.chain = MagicMock()
+    limiter = MagicMock()
+    limiter.acquire.return_value = False
+
+    with patch.object(_scrape, "get_rate_limiter", return_value=limiter):
+        assert helper.fetch_douban_actors(fetch_title="Show") is None
+
+    helper.chain.match_doubaninfo.assert_not_called()
+
+
+def test_fetch_douban_actors_stops_before_detail_request():
+    """匹配后等待详情请求令牌期间外部中断时不再请求详情。"""
+    helper = _helper()
+    helper.chain = MagicMock()
+    helper.chain.match_doubaninfo.return_value = {"id": "1"}
+    limiter = MagicMock()
+    limiter.acquire.side_effect = [True, False]
+
+    with patch.object(_scrape, "get_rate_limiter", return_value=limiter):
+        assert helper.fetch_douban_actors(fetch_title="Show") is None
+
+    helper.chain.douban_info.assert_not_called()
+
+
+def test_douban_rate_and_burst_come_from_config():
+    """豆瓣查询速率及连续查询数可通过配置调整，无效值使用默认值。"""
+    with patch.object(_scrape, "TmdbChain"), patch.object(_scrape, "MediaServerChain"):
+        configured = _scrape.ScrapeHelper(config={"douban_rate": "0.5", "douban_burst": "5"}, event=threading.Event(),
+                                          chain=MagicMock(), service=None, libraries={})
+        invalid = _scrape.ScrapeHelper(config={"douban_rate": "-1", "douban_burst": "abc"}, event=threading.Event(),
+                                       chain=MagicMock(), service=None, libraries={})
+
+    assert (configured.douban_rate, configured.douban_burst) == (0.5, 5)
+    assert (invalid.douban_rate, invalid.douban_burst) == (_scrape.ScrapeHelper.douban_rate,
+                                                           _scrape.ScrapeHelper.douban_burst)
+
+
+def test_douban_lookup_interrupted_by_stop_is_not_cached():
+    """停止导致豆瓣查询放弃时不写入缓存，下次刮削重新查询。"""
+    helper = _helper()
+    helper.chain = MagicMock()
+    helper.event.set()
+    limiter = MagicMock()
+    limiter.acquire.return_value = False
+    cache_backend = MagicMock()
+    cache_backend.exists.return_value = False
+
+    with patch.object(_scrape, "get_rate_limiter", return_value=limiter), \
+            patch.object(_cache_helper, "cache_backend", cache_backend), \
+            patch.object(_cache_helper, "disk_cache", None):
+        assert helper.get_douban_actors(title="Show") is None
+
+    cache_backend.set.assert_not_called()
@@ -0,0 +1,178 @@
+"""PlexPersonMeta 媒体库分页流式读取测试。"""
+
+import threading
+from types import ModuleType, SimpleNamespace
+from unittest.mock import patch
+
+from app.testing import stub_modules
+
+
+_pypinyin = ModuleType("pypinyin")
+_pypinyin.lazy_pinyin = lambda *_args, **_kwargs: []
+
+with stub_modules({"pypinyin": _pypinyin}):
+    from app.plugins.plexpersonmeta import scrape as _scrape
+
+
+class _Response:
+    """提供插件 HTTP 调用所需的最小响应。"""
+
+    def __init__(self, container):
+        self._container = container
+
+    def json(self):
+        """返回 Plex JSON 包装结构。"""
+        return {"MediaContainer": self._container}
+
+
+class _PagedPlex:
+    """按 X-Plex-Container-Start/Size 分页返回媒体项目，记录已返回但尚未被读取的条目数。"""
+
+    def __init__(self, count, with_total=True):
+        self.items = [{"ratingKey": str(index), "type": "movie", "title": f"Movie {index}"} for index in range(count)]
+        self.with_total = with_total
+        self.starts = []
+        self.endpoints = []
+        self.returned = 0
+        self.consumed = 0
+        self.max_buffered = 0
+        self.lock = threading.Lock()
+        self.gate = None
+        # 分页起始位置 -> 剩余失败次数，失败时返回 None 模拟请求异常
+        self.failures = {}
+
+    def get_data(self, *, endpoint, headers, timeout):
+        """返回指定分页，gate 设置时第二页之后等待放行。"""
+        start = int(headers["X-Plex-Container-Start"])
+        size = int(headers["X-Plex-Container-Size"])
+        if start and self.gate is not None:
+            assert self.gate.wait(timeout=5), "第一页被读取前不应等待后续分页"
+        with self.lock:
+            if self.failures.get(start):
+                self.failures[start] -= 1
+                self.starts.append(start)
+                return None
+        page = self.items[start:start + size]
+        with self.lock:
+            self.starts.append(start)
+            self.endpoints.append(endpoint)
+            self.returned += len(page)
+            self.max_buffered = max(self.max_buffered, self.returned - self.consumed)
+        container = {"offset": start, "Metadata": [dict(item) for item in page]}
+        if self.with_total:
+            container["totalSize"] = len(self.items)
+        return _Response(container)
+
+    def consume(self):
+        with self.lock:
+            self.consumed += 1
+
+
+def _helper(plex, page_size=100):
+    helper = object.__new__(_scrape.ScrapeHelper)
+    helper.event = threading.Event()
+    helper.plex = plex
+    helper.page_size = page_size
+    helper.page_retry_interval = 0
+    return helper
+
+
+def _library():
+    return SimpleNamespace(key=1, title="Movies", TYPE="movie")
+
+
+def test_iter_rating_items_requests_every_page_in_order():
+    """按分页大小依次请求，返回全部条目且顺序不变。"""
+    plex = _PagedPlex(count=1234)
+    helper = _helper(plex, page_size=500)
+
+    items = list(helper.iter_rating_items(library=_library()))
+
+    assert [item["ratingKey"] for item in items] == [str(index) for index in range(1234)]
+    assert plex.starts == [0, 500, 1000]
+    assert all(endpoint == "/library/sections/1/all?type=1" for endpoint in plex.endpoints)
+
+
+def test_iter_rating_items_stops_on_short_page_without_total_size():
+    """Plex 未返回 totalSize 时，读取到不满一页的分页即结束。"""
+    plex = _PagedPlex(count=250, with_total=False)
+    helper = _helper(plex, page_size=100)
+
+    assert len(helper.list_rating_items(library=_library())) == 250
+    assert plex.starts == [0, 100, 200]
+
+
+def test_failed_page_is_retried_before_continuing():
+    """分页请求失败时重试，重试成功后继续读取，扫描完整。"""
+    plex = _PagedPlex(count=250)
+    plex.failures = {100: 2}
+    helper = _helper(plex, page_size=100)
+
+    items = list(helper.iter_rating_items(library=_library()))
+
+    assert len(items) == 250
+    assert plex.starts == [0, 100, 100, 100, 200]
+    assert helper.listing_incomplete is False
+
+
+def test_page_failure_after_retries_marks_listing_incomplete():
+    """重试后仍失败的分页不当作读取完毕，已读取的条目照常返回并标记扫描不完整。"""
+    plex = _PagedPlex(count=250)
+    plex.failures = {100: 3}
+    helper = _helper(plex, page_size=100)
+
+    items = list(helper.iter_rating_items(library=_library()))
+
+    assert [item["ratingKey"] for item in items] == [str(index) for index in range(100)]
+    assert plex.starts == [0, 100, 100, 100]
+    assert helper.listing_incomplete is True
+
+    plex.failures = {}
+    assert len(list(helper.iter_rating_items(library=_library()))) == 250
+    assert helper.listing_incomplete is False
+
+
+def test_first_page_is_consumed_while_later_pages_are_fetched():
+    """第一页返回后即可开始处理，后续分页在后台获取，缓冲的条目不超过两页。"""
+    plex = _PagedPlex(count=1000)
+    plex.gate = threading.Event()
+    helper = _helper(plex, page_size=100)
+
+    items = helper.iter_rating_items(library=_library())
+    first = next(items)
+    plex.gate.set()
+    plex.consume()
+    for _ in items:
+        plex.consume()
+
+    assert first["ratingKey"] == "0"
+    assert plex.consumed == 1000
+    assert plex.max_buffered <= 2 * helper.page_size
+
+
+def test_scrape_rating_items_consumes_generator_in_batches():
+    """刮削按批次从分页生成器读取，返回读取的条目数。"""
+    plex = _PagedPlex(count=120)
+    helper = _helper(plex, page_size=50)
+    helper.batch_size = 40
+    batches = []
+
+    with patch.object(helper, "fetch_item", side_effect=lambda rating_key: {"ratingKey": rating_key}), \
+            patch.object(helper, "get_rating_info",
+                         side_effect=lambda item: SimpleNamespace(key=item["ratingKey"], type="movie",
+                                                                  title=item.get("title"))), \
+            patch.object(helper, "scrape_items", side_effect=lambda entries: batches.append(len(entries))):
+        count = helper.scrape_rating_items(rating_items=helper.iter_rating_items(library=_library()))
+
+    assert count == 120
+    assert batches == [40, 40, 40]
+    assert plex.starts == [0, 50, 100]
+
+
+def test_scrape_rating_items_returns_zero_for_empty_library():
+    """空媒体库不发起后续分页请求，返回 0 以便跳过。"""
+    plex = _PagedPlex(count=0)
+    helper = _helper(plex)
+
+    assert helper.scrape_rating_items(rating_items=helper.iter_rating_items(library=_library())) == 0
+    assert plex.starts == [0]
@@ -0,0 +1,263 @@
+"""PlexPersonMeta 磁盘二级缓存、稳定缓存键与 None 结果短期缓存测试。"""
+
+import sqlite3
+import threading
+from types import ModuleType, SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+from app.schemas.types import MediaType
+from app.testing import stub_modules
+
+
+_pypinyin = ModuleType("pypinyin")
+_pypinyin.lazy_pinyin = lambda *_args, **_kwargs: []
+
+with stub_modules({"pypinyin": _pypinyin}):
+    from app.plugins.plexpersonmeta import helper as _helper
+    from app.plugins.plexpersonmeta import scrape as _scrape
+    from app.plugins.plexpersonmeta.cache import PersistentCache
+
+
+class _MemoryCache:
+    """按缓存区保存的内存缓存，模拟进程内的一级缓存。"""
+
+    def __init__(self):
+        self.regions = {}
+
+    def exists(self, key, region):
+        return key in self.regions.get(region, {})
+
+    def get(self, key, region):
+        return self.regions.get(region, {}).get(key)
+
+    def set(self, key, value, region):
+        self.regions.setdefault(region, {})[key] = value
+
+    def clear(self, region):
+        self.regions.pop(region, None)
+
+
+class _Clock:
+    """可手动推进的时钟。"""
+
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def _person_lookup(calls, result):
+    @_helper.cache_with_logging("plex_tmdb_person", "PERSON", ttl=3600, negative_ttl=60)
+    def get_person(self, person_tmdbid, mtype=MediaType.MOVIE):
+        calls.append(person_tmdbid)
+        return result
+
+    return get_person
+
+
+def test_cache_key_ignores_instance_and_argument_style():
+    """不同实例、位置参数与关键字参数、默认值是否显式传入都得到相同的缓存键。"""
+
+    def fetch(self, title, mtype=MediaType.TV, season_years=None):
+        return None
+
+    base = _helper.make_cache_key(fetch, (object(), "标题"), {"season_years": ((1, "2020"), (2, "2021"))})
+
+    assert _helper.make_cache_key(
+        fetch, (object(),), {"season_years": [[1, "2020"], [2, "2021"]], "mtype": MediaType.TV, "title": "标题"}
+    ) == base
+    assert _helper.make_cache_key(fetch, (object(), "标题", MediaType.MOVIE), {}) != base
+
+
+def test_positive_result_survives_restart(tmp_path):
+    """正常结果写入磁盘缓存，重启后内存缓存为空时从磁盘读取并回填内存缓存。"""
+    calls = []
+    db_path = tmp_path / "cache.db"
+    get_person = _person_lookup(calls, result={"name": "基利安·墨菲"})
+
+    with patch.object(_helper, "cache_backend", _MemoryCache()), \
+            patch.object(_helper, "disk_cache", PersistentCache(db_path)):
+        assert get_person(object(), 2037) == {"name": "基利安·墨菲"}
+        _helper.disk_cache.close()
+
+    memory = _MemoryCache()
+    with patch.object(_helper, "cache_backend", memory), \
+            patch.object(_helper, "disk_cache", PersistentCache(db_path)):
+        assert get_person(object(), person_tmdbid=2037) == {"name": "基利安·墨菲"}
+        assert get_person(object(), 2037) == {"name": "基利安·墨菲"}
+        _helper.disk_cache.close()
+
+    assert calls == [2037]
+    assert len(memory.regions["plex_tmdb_person"]) == 1
+
+
+def test_none_result_uses_short_ttl_in_memory_and_on_disk(tmp_path):
+    """None 结果只在短时间内命中，过期后重新获取。"""
+    calls = []
+    clock = _Clock()
+    get_person = _person_lookup(calls, result=None)
+
+    with patch.object(_helper.time, "time", clock), \
+            patch.object(_helper, "cache_backend", _MemoryCache()), \
+            patch.object(_helper, "disk_cache", PersistentCache(tmp_path / "cache.db", clock=clock)):
+        assert get_person(object(), 1) is None
+        clock.now += 30
+        assert get_person(object(), 1) is None
+        assert calls == [1]
+
+        clock.now += 31
+        assert get_person(object(), 1) is None
+        assert calls == [1, 1]
+
+        # 内存缓存丢失时，磁盘中的 None 结果同样按短期有效期判断
+        _helper.cache_backend.clear(region="plex_tmdb_person")
+        clock.now += 59
+        assert get_person(object(), 1) is None
+        assert calls == [1, 1]
+        assert _helper.disk_cache.count(region="plex_tmdb_person") == 1
+
+        clock.now += 2
+        _helper.cache_backend.clear(region="plex_tmdb_person")
+        assert get_person(object(), 1) is None
+        assert calls == [1, 1, 1]
+        _helper.disk_cache.close()
+
+
+def test_disk_cache_discards_expired_and_unreadable_rows(tmp_path):
+    """重新打开时清理过期记录，无法反序列化的记录视为未命中并移除。"""
+    clock = _Clock()
+    db_path = tmp_path / "cache.db"
+    cache = PersistentCache(db_path, clock=clock)
+    cache.set("expired", "a", ttl=10, region="r")
+    cache.set("broken", "b", ttl=100, region="r")
+    cache.close()
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("UPDATE entries SET value = ? WHERE key = 'broken'", (b"not a pickle",))
+
+    clock.now += 20
+    cache = PersistentCache(db_path, clock=clock)
+
+    assert cache.count() == 1
+    assert cache.get("broken", region="r") is None
+    assert cache.count() == 0
+    cache.close()
+
+
+def test_disk_cache_purges_periodically_and_caps_rows(tmp_path):
+    """写入达到清理间隔时移除过期记录，超出记录数上限时淘汰最早过期的记录。"""
+    clock = _Clock()
+    cache = PersistentCache(tmp_path / "cache.db", clock=clock, max_rows=2, purge_interval=4)
+    cache.set("expired", "a", ttl=10, region="r")
+    clock.now += 20
+    cache.set("k0", 0, ttl=300, region="r")
+    cache.set("k1", 1, ttl=100, region="r")
+
+    assert cache.count() == 3
+    cache.set("k2", 2, ttl=200, region="r")
+
+    assert cache.count() == 2
+    assert cache.get("k1", region="r") is None
+    assert [cache.get(f"k{index}", region="r")[0] for index in (0, 2)] == [0, 2]
+    cache.close()
+
+
+def test_disk_hit_keeps_remaining_ttl_in_memory(tmp_path):
+    """磁盘缓存回填内存缓存时沿用剩余有效期，到期后重新获取。"""
+    calls = []
+    clock = _Clock()
+    db_path = tmp_path / "cache.db"
+    get_person = _person_lookup(calls, result={"name": "A"})
+    disk = PersistentCache(db_path, clock=clock)
+    disk.set(_helper.make_cache_key(get_person.__wrapped__, (object(), 1), {}), {"name": "A"},
+             ttl=100, region="plex_tmdb_person")
+
+    with patch.object(_helper.time, "time", clock), \
+            patch.object(_helper, "cache_backend", _MemoryCache()), \
+            patch.object(_helper, "disk_cache", disk):
+        clock.now += 90
+        assert get_person(object(), 1) == {"name": "A"}
+        clock.now += 5
+        assert get_person(object(), 1) == {"name": "A"}
+        assert calls == []
+
+        clock.now += 10
+        assert get_person(object(), 1) == {"name": "A"}
+        assert calls == [1]
+    disk.close()
+
+
+def test_unavailable_disk_cache_falls_back_to_memory(tmp_path):
+    """磁盘缓存读写失败时不影响业务函数和内存缓存。"""
+    calls = []
+    disk = MagicMock()
+    disk.get.side_effect = sqlite3.OperationalError("database is locked")
+    disk.set.side_effect = sqlite3.OperationalError("database is locked")
+    get_person = _person_lookup(calls, result={"name": "A"})
+
+    with patch.object(_helper, "cache_backend", _MemoryCache()), patch.object(_helper, "disk_cache", disk):
+        assert get_person(object(), 1) == {"name": "A"}
+        assert get_person(object(), 1) == {"name": "A"}
+
+    assert calls == [1]
+
+
+def test_clear_cache_also_clears_disk_regions(tmp_path):
+    """清理缓存同时清理磁盘缓存中插件使用的缓存区。"""
+    disk = PersistentCache(tmp_path / "cache.db")
+    for region in ("plex_tmdb_media", "plex_tmdb_person", "plex_douban_media", "other"):
+        disk.set("key", "value", ttl=100, region=region)
+
+    with patch.object(_scrape, "cache_backend", MagicMock()), patch.object(_helper, "disk_cache", disk):
+        _scrape.ScrapeHelper.clear_cache()
+
+    assert disk.count() == 1
+    assert disk.count(region="other") == 1
+    disk.close()
+
+
+def test_tmdb_person_limiter_is_only_charged_on_cache_miss(tmp_path):
+    """缓存命中的人物不消耗 TMDB 人物限流令牌，只有实际请求 TMDB 时才等待限流。"""
+    helper = object.__new__(_scrape.ScrapeHelper)
+    helper.event = threading.Event()
+    helper.tmdb_person_rate = 10
+    helper.tmdb_chain = MagicMock()
+    helper.tmdb_chain.person_detail.return_value = SimpleNamespace(name="人物")
+    limiter = MagicMock()
+    limiter.acquire.return_value = True
+
+    with patch.object(_helper, "cache_backend", _MemoryCache()), \
+            patch.object(_helper, "disk_cache", PersistentCache(tmp_path / "cache.db")), \
+            patch.object(_scrape, "get_rate_limiter", return_value=limiter) as get_rate_limiter:
+        for _ in range(3):
+            assert helper.get_tmdb_person_detail(person_tmdbid=287).name == "人物"
+        _helper.disk_cache.close()
+
+    helper.tmdb_chain.person_detail.assert_called_once_with(287)
+    limiter.acquire.assert_called_once_with(event=helper.event)
+    get_rate_limiter.assert_called_once_with(source="TMDB_PERSON", rate=10)
+
+
+def test_stopped_tmdb_person_lookup_is_not_cached(tmp_path):
+    """停止时放弃的人物请求不写入内存缓存和磁盘缓存，下次刮削重新获取。"""
+    helper = object.__new__(_scrape.ScrapeHelper)
+    helper.event = threading.Event()
+    helper.tmdb_person_rate = 10
+    helper.tmdb_chain = MagicMock()
+    helper.tmdb_chain.person_detail.return_value = SimpleNamespace(name="人物")
+    limiter = MagicMock()
+    limiter.acquire.return_value = False
+    memory = _MemoryCache()
+
+    with patch.object(_helper, "cache_backend", memory), \
+            patch.object(_helper, "disk_cache", PersistentCache(tmp_path / "cache.db")), \
+            patch.object(_scrape, "get_rate_limiter", return_value=limiter):
+        assert helper.get_tmdb_person_detail(person_tmdbid=287) is None
+        assert memory.regions == {}
+        assert _helper.disk_cache.count() == 0
+
+        limiter.acquire.return_value = True
+        assert helper.get_tmdb_person_detail(person_tmdbid=287).name == "人物"
+        _helper.disk_cache.close()
+
+    helper.tmdb_chain.person_detail.assert_called_once_with(287)
@@ -0,0 +1,138 @@
+"""PlexPersonMeta 人物信息批量去重、并发获取与限流测试。"""
+
+import threading
+import time
+from types import ModuleType, SimpleNamespace
+from unittest.mock import patch
+
+from app.testing import stub_modules
+
+
+_pypinyin = ModuleType("pypinyin")
+_pypinyin.lazy_pinyin = lambda *_args, **_kwargs: []
+
+with stub_modules({"pypinyin": _pypinyin}):
+    from app.plugins.plexpersonmeta import scrape as _scrape
+    from app.plugins.plexpersonmeta.enrich import PersonEnricher, RateLimiter
+
+
+class _Clock:
+    """可手动推进的时钟。"""
+
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+class _PersonSource:
+    """记录请求次数与最大并发数的人物信息来源。"""
+
+    def __init__(self, latency=0.01):
+        self.latency = latency
+        self.calls = []
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def __call__(self, person_tmdbid):
+        with self.lock:
+            self.calls.append(person_tmdbid)
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            time.sleep(self.latency)
+            return SimpleNamespace(name=f"人物{person_tmdbid}", also_known_as=[])
+        finally:
+            with self.lock:
+                self.in_flight -= 1
+
+
+def test_rate_limiter_spaces_reservations_across_callers():
+    """同一来源的请求按速率依次排队，空闲后不累积额外额度。"""
+    clock = _Clock()
+    limiter = RateLimiter(rate=4, clock=clock)
+
+    assert [limiter.reserve() for _ in range(3)] == [0, 0.25, 0.5]
+
+    clock.now += 10
+    assert limiter.reserve() == 0
+    assert limiter.reserve() == 0.25
+
+
+def test_enricher_dedupes_within_and_across_batches():
+    """同一人物在批次内和批次之间都只获取一次，并发数不超过上限。"""
+    source = _PersonSource()
+    enricher = PersonEnricher(fetch=source, max_workers=4)
+
+    first = enricher.enrich([1, 2, 2, 3, None, 1, 4, 5, 6, 7, 8])
+    second = enricher.enrich([8, 9, 1])
+
+    assert sorted(source.calls) == [1, 2, 3, 4, 5, 6, 7, 8, 9]
+    assert 1 < source.max_in_flight <= 4
+    assert set(first) == {1, 2, 3, 4, 5, 6, 7, 8}
+    assert set(second) == {1, 8, 9}
+    assert enricher.stats() == {"requested": 13, "fetched": 9}
+
+
+def test_enricher_stops_dispatching_after_stop_event():
+    """停止后不再发出请求，未获取的人物不包含在结果中。"""
+    event = threading.Event()
+    calls = []
+
+    def fetch(person_tmdbid):
+        calls.append(person_tmdbid)
+        event.set()
+        return None
+
+    enricher = PersonEnricher(fetch=fetch, max_workers=1, event=event)
+
+    assert enricher.enrich([1, 2, 3]) == {1: None}
+    assert calls == [1]
+
+
+def _cast(count):
+    return [{"id": index, "name": f"Actor {index}", "original_name": f"Actor {index}", "character": f"Role {index}"}
+            for index in range(count)]
+
+
+def _episode_item(rating_key, cast_count):
+    return {
+        "ratingKey": str(rating_key),
+        "type": "episode",
+        "title": f"Episode {rating_key}",
+        "Role": [{"tag": f"Actor {index}", "role": f"Role {index}"} for index in range(cast_count)],
+    }
+
+
+def test_show_scrape_fetches_each_unique_person_once():
+    """40 位演员、200 集的剧集，人物请求数等于不同人物数量，而不是出现次数。"""
+    cast_count, episode_count = 40, 200
+    source = _PersonSource(latency=0.002)
+    helper = object.__new__(_scrape.ScrapeHelper)
+    helper.event = threading.Event()
+    helper._scrape_type = "all"
+    helper._douban_scrape = False
+    helper._lock = False
+    helper.tmdb_person_rate = 10_000
+    helper.get_tmdb_person_detail = source
+    mediainfo = SimpleNamespace(actors=_cast(cast_count))
+    put_keys = []
+
+    show = {"ratingKey": "1", "type": "show", "title": "Show", "childCount": 1,
+            "Guid": [{"id": "tmdb://100"}]}
+    episodes = [{"ratingKey": str(1000 + index), "type": "episode", "title": f"Episode {index}",
+                 "parentIndex": 1, "index": index} for index in range(episode_count)]
+
+    with patch.object(helper, "to_pinyin", side_effect=str.lower), \
+            patch.object(helper, "list_episodes", return_value=episodes), \
+            patch.object(helper, "fetch_item", side_effect=lambda rating_key: _episode_item(rating_key, cast_count)), \
+            patch.object(helper, "get_tmdb_media", return_value=mediainfo), \
+            patch.object(helper, "put_actors", side_effect=lambda item, actors: put_keys.append(item["ratingKey"])):
+        helper.scrape_episodes(item=show)
+
+    assert len(put_keys) == episode_count
+    assert sorted(source.calls) == list(range(cast_count))
+    assert helper.person_stats() == {"requested": cast_count * episode_count, "fetched": cast_count}
+    assert source.max_in_flight > 1
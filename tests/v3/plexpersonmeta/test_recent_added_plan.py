@@ -0,0 +1,99 @@
+"""PlexPersonMeta 最近入库查询共享与 Plex 请求计数测试。"""
+
+import threading
+from types import ModuleType, SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+from app.testing import stub_modules
+
+
+_pypinyin = ModuleType("pypinyin")
+_pypinyin.lazy_pinyin = lambda *_args, **_kwargs: []
+
+with stub_modules({"pypinyin": _pypinyin}):
+    from app.plugins import plexpersonmeta as _plugin
+    from app.plugins.plexpersonmeta import scrape as _scrape
+
+
+class _Response:
+    """提供插件 HTTP 调用所需的最小响应。"""
+
+    def __init__(self, metadata):
+        self._metadata = metadata
+
+    def json(self):
+        """返回 Plex JSON 包装结构。"""
+        return {"MediaContainer": {"Metadata": self._metadata}}
+
+
+class _RecentPlex:
+    """三个媒体库的最近入库数据，记录每次请求的 endpoint。"""
+
+    def __init__(self):
+        self.items = {
+            str(key): {"ratingKey": str(key), "librarySectionID": key // 100, "type": "movie",
+                       "title": f"Movie {key}", "Role": [{"tag": "演员", "role": "角色"}]}
+            for key in (101, 102, 201, 301, 302, 303)
+        }
+        self.endpoints = []
+
+    def get_data(self, *, endpoint, timeout, headers=None):
+        """按 endpoint 返回最近入库列表或条目详情。"""
+        self.endpoints.append(endpoint)
+        if endpoint.startswith("/library/all?addedAt>="):
+            return _Response(list(self.items.values()))
+        return _Response([self.items[endpoint.rsplit("/", 1)[-1]]])
+
+
+def _run(plex, libraries):
+    plugin = object.__new__(_plugin.PlexPersonMeta)
+    plugin._event = threading.Event()
+    plugin._notify = False
+    plugin.chain = MagicMock()
+    plugin.get_config = lambda: {"douban_scrape": False}
+    scraped = []
+    service = SimpleNamespace(name="Plex", instance=plex)
+
+    plugin.service_info = lambda name: service
+    with patch.object(plugin, "_PlexPersonMeta__get_service_libraries", return_value={"Plex": libraries}), \
+            patch.object(_scrape, "TmdbChain"), patch.object(_scrape, "MediaServerChain"), \
+            patch.object(_scrape.ScrapeHelper, "scrape_items",
+                         side_effect=lambda self, entries: scraped.extend(item["ratingKey"] for item, _ in entries),
+                         autospec=True):
+        plugin.scrape_library_by_added_time(added_time=1_700_000_000)
+    return plugin, scraped
+
+
+def test_recently_added_query_is_issued_once_per_server():
+    """多个媒体库共用同一次最近入库查询，各媒体库只处理自己的分组。"""
+    plex = _RecentPlex()
+    libraries = {1: SimpleNamespace(title="A"), 2: SimpleNamespace(title="B"), 3: SimpleNamespace(title="C")}
+
+    plugin, scraped = _run(plex, libraries)
+
+    added_queries = [endpoint for endpoint in plex.endpoints if endpoint.startswith("/library/all")]
+    assert added_queries == ["/library/all?addedAt>=1700000000"]
+    assert scraped == ["101", "102", "201", "301", "302", "303"]
+    assert plugin._plex_requests == len(plex.endpoints) == 1 + len(scraped)
+
+
+def test_unselected_libraries_are_ignored():
+    """未选择的媒体库的最近入库条目不会被刮削。"""
+    plex = _RecentPlex()
+
+    plugin, scraped = _run(plex, {3: SimpleNamespace(title="C")})
+
+    assert scraped == ["301", "302", "303"]
+    assert plugin._plex_requests == 4
+
+
+def test_group_rating_items_by_added_partitions_by_section():
+    """按 librarySectionID 分组，保持原有顺序。"""
+    helper = object.__new__(_scrape.ScrapeHelper)
+    helper.plex = _RecentPlex()
+
+    groups = helper.group_rating_items_by_added(added_time=0)
+
+    assert {section: [item["ratingKey"] for item in items] for section, items in groups.items()} == {
+        1: ["101", "102"], 2: ["201"], 3: ["301", "302", "303"]}
+    assert helper.plex_requests == 1
@@ -1,5 +1,6 @@
 """PlexPersonMeta V3 媒体身份与专用数据源边界测试。"""
 
+import threading
 from pathlib import Path
 from types import ModuleType
 from unittest.mock import MagicMock
@@ -91,6 +92,8 @@ def test_tmdb_media_rejects_invalid_source_id():
 def test_tmdb_person_detail_keeps_dedicated_tmdb_chain():
     """人物详情属于 TMDB 专用能力，不经过通用媒体识别链。"""
     helper = object.__new__(_scrape.ScrapeHelper)
+    helper.event = threading.Event()
+    helper.tmdb_person_rate = 10_000
     helper.tmdb_chain = MagicMock()
     expected = object()
     helper.tmdb_chain.person_detail.return_value = expected
@@ -0,0 +1,283 @@
+"""download/snapshot.py 单轮下载器快照单测。"""
+import threading
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+from app.plugins.subscribeassistantenhanced import SubscribeAssistantEnhanced
+from app.plugins.subscribeassistantenhanced.download.monitor import DownloadMonitor
+from app.plugins.subscribeassistantenhanced.download.snapshot import DownloaderHashIndex, DownloaderSnapshot
+from app.plugins.subscribeassistantenhanced.download.torrent import _get_attr
+
+
+def _qb_torrent(torrent_hash, downloaded=50, size=100, state="downloading"):
+    return {"hash": torrent_hash, "name": f"T.{torrent_hash}", "state": state,
+            "size": size, "total_size": size, "downloaded": downloaded}
+
+
+def _service(torrents=None, error=False, dl_type="qbittorrent"):
+    instance = MagicMock()
+    instance.get_torrents.return_value = (torrents or [], error)
+    return SimpleNamespace(instance=instance, type=dl_type)
+
+
+def test_snapshot_lists_each_downloader_once():
+    """同一下载器的多次取种与存在性查询只列一次种子，hash 大小写不敏感。"""
+    services = {"qb": _service([_qb_torrent("aa"), _qb_torrent("bb", downloaded=100, state="uploading")]),
+                "tr": _service([SimpleNamespace(hashString="CC")], dl_type="transmission")}
+    snapshot = DownloaderSnapshot(service_fn=services.get)
+
+    info = snapshot.fetch("qb", "AA")
+    assert info.hash == "aa" and info.progress == 0.5
+    assert snapshot.fetch("qb", "bb").completed is True
+    assert snapshot.fetch("qb", "zz") is None
+    assert snapshot.present("qb", "aa") is True
+    assert snapshot.present("qb", "zz") is False
+    assert snapshot.present("tr", "cc") is True
+
+    services["qb"].instance.get_torrents.assert_called_once_with()
+    services["tr"].instance.get_torrents.assert_called_once_with()
+    assert snapshot.summary() == "列出下载器 2 个，列种调用 2 次，回退逐个查询 0 次"
+
+
+def test_unlistable_downloader_falls_back_to_per_hash_queries():
+    """列种报错、抛异常或服务缺失时回退逐 hash 查询，且同一轮不再重复列种。"""
+    services = {"err": _service(error=True), "boom": _service()}
+    services["boom"].instance.get_torrents.side_effect = RuntimeError("down")
+    fetch_fn = MagicMock(return_value=None)
+    present_fn = MagicMock(return_value=None)
+    snapshot = DownloaderSnapshot(service_fn=services.get, fetch_fn=fetch_fn, present_fn=present_fn)
+
+    for downloader in ("err", "boom", "missing"):
+        assert snapshot.fetch(downloader, "h1") is None
+        assert snapshot.present(downloader, "h1") is None
+        assert snapshot.fetch(downloader, "h2") is None
+
+    assert fetch_fn.call_count == 6
+    assert present_fn.call_count == 3
+    services["err"].instance.get_torrents.assert_called_once_with()
+    services["boom"].instance.get_torrents.assert_called_once_with()
+    assert snapshot.fetch(None, "h1") is None
+    assert "回退逐个查询 10 次" in snapshot.summary()
+
+
+def test_service_lookup_error_and_missing_fallback_are_undecided():
+    """获取服务异常时回退；未注入回退函数时不可判定。"""
+    snapshot = DownloaderSnapshot(service_fn=MagicMock(side_effect=RuntimeError("helper")))
+
+    assert snapshot.fetch("qb", "h1") is None
+    assert snapshot.present("qb", "h1") is None
+    assert snapshot.fallback_calls == 0
+
+
+def _store(torrent_tasks):
+    store = {"torrents": torrent_tasks}
+    read = lambda key: store.get(key, {})
+    update = lambda key, updater: store.__setitem__(key, updater(store.get(key, {})))
+    return read, update, store
+
+
+def test_timeout_check_calls_each_downloader_once_per_run():
+    """1000 个下载任务分布在两个下载器上，每轮巡检只列两次种子。"""
+    tasks = {f"h{index}": {"hash": f"h{index}", "downloader": "qb" if index % 2 else "tr", "subscribe_id": None}
+             for index in range(1000)}
+    services = {"qb": _service([_qb_torrent(f"h{index}") for index in range(1, 1000, 2)]),
+                "tr": _service([_qb_torrent(f"h{index}") for index in range(0, 1000, 2)])}
+    fetch_fn = MagicMock()
+    present_fn = MagicMock()
+    read, update, _ = _store(tasks)
+    monitor = DownloadMonitor(read, update, fetch_fn=fetch_fn, present_fn=present_fn,
+                              snapshot_fn=lambda: DownloaderSnapshot(service_fn=services.get,
+                                                                     fetch_fn=fetch_fn, present_fn=present_fn))
+
+    monitor.run_timeout_check()
+    monitor.run_timeout_check()
+
+    assert services["qb"].instance.get_torrents.call_count == 2
+    assert services["tr"].instance.get_torrents.call_count == 2
+    fetch_fn.assert_not_called()
+    present_fn.assert_not_called()
+
+
+def test_timeout_check_uses_snapshot_for_missing_torrents():
+    """快照确认下载器可达但种子不存在时，按失效任务清理。"""
+    read, update, store = _store({"gone": {"hash": "gone", "downloader": "qb", "subscribe_id": None}})
+    services = {"qb": _service([_qb_torrent("other")])}
+    monitor = DownloadMonitor(read, update, fetch_fn=MagicMock(), present_fn=MagicMock(),
+                              manual_delete_enabled=False,
+                              snapshot_fn=lambda: DownloaderSnapshot(service_fn=services.get))
+
+    monitor.run_timeout_check()
+
+    assert store["torrents"] == {}
+
+
+def test_timeout_check_without_present_fn_keeps_skipping_missing_torrents():
+    """未注入存在性检查时，即使使用快照也不清理缺失任务。"""
+    read, update, store = _store({"gone": {"hash": "gone", "downloader": "qb", "subscribe_id": None}})
+    services = {"qb": _service([])}
+    monitor = DownloadMonitor(read, update, fetch_fn=MagicMock(), manual_delete_enabled=False,
+                              snapshot_fn=lambda: DownloaderSnapshot(service_fn=services.get))
+
+    monitor.run_timeout_check()
+
+    assert "gone" in store["torrents"]
+
+
+def test_plugin_snapshot_factory_uses_downloader_helper():
+    """入口按下载器名称获取服务构建快照，缺少下载器助手时不建快照。"""
+    plugin = object.__new__(SubscribeAssistantEnhanced)
+    plugin._downloader_helper = None
+    assert plugin._downloader_snapshot() is None
+
+    plugin._downloader_helper = MagicMock()
+    plugin._downloader_helper.get_service.return_value = _service([_qb_torrent("h1")])
+    snapshot = plugin._downloader_snapshot()
+
+    assert snapshot.present("qb", "h1") is True
+    plugin._downloader_helper.get_service.assert_called_once_with(name="qb")
+
+
+def _plugin_with_services(services):
+    plugin = object.__new__(SubscribeAssistantEnhanced)
+    plugin._downloader_helper = MagicMock()
+    plugin._downloader_helper.get_services.return_value = services
+    return plugin
+
+
+def _lookup_service(torrents=(), error=False, dl_type="qbittorrent"):
+    """同时支持列全部种子和按 ids 查询的下载器服务。"""
+    torrents = list(torrents)
+    by_hash = {str(_get_attr(torrent, "hash", "hashString", default="")).lower(): torrent for torrent in torrents}
+
+    def get_torrents(ids=None):
+        if ids is None:
+            return torrents, error
+        wanted = [ids] if isinstance(ids, str) else ids
+        found = [by_hash[str(torrent_hash).lower()] for torrent_hash in wanted if str(torrent_hash).lower() in by_hash]
+        return found, error
+
+    instance = MagicMock()
+    instance.get_torrents.side_effect = get_torrents
+    return SimpleNamespace(instance=instance, type=dl_type)
+
+
+def test_hash_index_matches_per_hash_semantics():
+    """跨下载器索引与逐 hash 查询判定一致：命中即存在，未命中且有下载器不可判定时返回 None。"""
+    cases = [
+        {"a": _lookup_service([_qb_torrent("aa")]), "b": _lookup_service(error=True)},
+        {"a": _lookup_service(error=True),
+         "b": _lookup_service([SimpleNamespace(hashString="BB")], dl_type="transmission")},
+        {"a": _lookup_service([_qb_torrent("aa")]), "b": _lookup_service(dl_type="transmission")},
+        {"a": _lookup_service([_qb_torrent("aa")]), "b": None},
+        {"a": _lookup_service([_qb_torrent("aa")]), "b": SimpleNamespace(instance=None, type="qbittorrent")},
+    ]
+    for services in cases:
+        plugin = _plugin_with_services(services)
+        index = DownloaderHashIndex(services, query_fn=SubscribeAssistantEnhanced._query_downloader_hash)
+        for torrent_hash in ("aa", "BB", "zz"):
+            assert index.exists(torrent_hash) is plugin._torrent_exists(torrent_hash), (services, torrent_hash)
+
+    assert DownloaderHashIndex({}).exists("aa") is None
+    assert DownloaderHashIndex(cases[0]).exists("") is None
+
+
+def test_hash_index_lists_downloaders_in_parallel_once():
+    """构造时每个下载器只列一次且并发执行，列种抛异常的下载器按不可判定处理。"""
+    barrier = threading.Barrier(3, timeout=2)
+
+    def listing(torrents):
+        def get_torrents(ids=None):
+            barrier.wait()
+            return torrents, False
+        return get_torrents
+
+    services = {name: _service() for name in ("qb1", "qb2", "qb3")}
+    services["qb1"].instance.get_torrents.side_effect = listing([_qb_torrent("aa")])
+    services["qb2"].instance.get_torrents.side_effect = listing([])
+    services["qb3"].instance.get_torrents.side_effect = listing([])
+    index = DownloaderHashIndex(services)
+
+    assert index.exists("AA") is True
+    assert index.exists("zz") is False
+    for service in services.values():
+        service.instance.get_torrents.assert_called_once_with()
+
+    broken = {"qb": _service([_qb_torrent("aa")]), "boom": _service()}
+    broken["boom"].instance.get_torrents.side_effect = RuntimeError("down")
+    index = DownloaderHashIndex(broken)
+    assert index.exists("aa") is True
+    assert index.exists("zz") is None
+    assert index.summary() == "列种调用 2 次（失败 1 个），回退逐个查询 0 次"
+
+
+def test_hash_index_falls_back_for_unknown_downloader_types():
+    """无法从列种结果读取 hash 的下载器类型不列种，按原逐 hash 查询判定。"""
+    services = {"qb": _service([]), "other": _service([{"hash": "aa"}], dl_type="custom")}
+    query_fn = MagicMock(side_effect=lambda name, service, torrent_hash: torrent_hash == "aa")
+    index = DownloaderHashIndex(services, query_fn=query_fn)
+
+    assert index.exists("aa") is True
+    assert index.exists("zz") is False
+    services["other"].instance.get_torrents.assert_not_called()
+    assert query_fn.call_count == 2
+    assert index.summary() == "列种调用 1 次（失败 0 个），回退逐个查询 2 次"
+    assert DownloaderHashIndex(services).exists("aa") is None
+
+
+def test_hash_index_2000_hashes_three_downloaders():
+    """2000 个旧 hash、三个下载器：逐 hash 查询最多 6000 次调用（命中即停），索引只列种 3 次且结果一致。"""
+    hashes = [f"{index:040x}" for index in range(2000)]
+
+    def services():
+        return {
+            "qb1": _lookup_service([_qb_torrent(torrent_hash) for torrent_hash in hashes[:500]]),
+            "qb2": _lookup_service([_qb_torrent(torrent_hash) for torrent_hash in hashes[500:900]]),
+            "tr": _lookup_service([SimpleNamespace(hashString=torrent_hash) for torrent_hash in hashes[900:1000]],
+                                  dl_type="transmission"),
+        }
+
+    per_hash_services = services()
+    plugin = _plugin_with_services(per_hash_services)
+    expected = [plugin._torrent_exists(torrent_hash) for torrent_hash in hashes]
+    per_hash_calls = sum(service.instance.get_torrents.call_count for service in per_hash_services.values())
+
+    indexed_services = services()
+    index = DownloaderHashIndex(indexed_services)
+    results = [index.exists(torrent_hash) for torrent_hash in hashes]
+    indexed_calls = sum(service.instance.get_torrents.call_count for service in indexed_services.values())
+
+    assert results == expected
+    assert results.count(True) == 1000 and results.count(False) == 1000
+    assert per_hash_calls == 500 * 1 + 400 * 2 + 100 * 3 + 1000 * 3
+    assert indexed_calls == 3
+
+
+def test_hash_index_scoped_to_hashes_queries_by_ids():
+    """限定 hash 范围的索引每个下载器只按 ids 查询一次，范围外的 hash 不可判定。"""
+    services = {
+        "qb": _lookup_service([_qb_torrent("aa"), _qb_torrent("cc")]),
+        "tr": _lookup_service([SimpleNamespace(hashString="BB")], dl_type="transmission"),
+    }
+    index = DownloaderHashIndex(services, hashes={"BB", "aa", "dd"})
+
+    assert index.exists("aa") is True
+    assert index.exists("bb") is True
+    assert index.exists("dd") is False
+    assert index.exists("cc") is None
+    for service in services.values():
+        service.instance.get_torrents.assert_called_once_with(ids=["aa", "bb", "dd"])
+
+    empty = {"qb": _lookup_service([_qb_torrent("aa")])}
+    assert DownloaderHashIndex(empty, hashes=set()).exists("aa") is None
+    empty["qb"].instance.get_torrents.assert_not_called()
+
+
+def test_plugin_hash_index_factory_uses_all_downloader_services():
+    """入口用全部下载器服务构建索引，缺少下载器助手或服务时不建索引。"""
+    plugin = object.__new__(SubscribeAssistantEnhanced)
+    plugin._downloader_helper = None
+    assert plugin._torrent_hash_index() is None
+
+    assert _plugin_with_services({})._torrent_hash_index() is None
+    index = _plugin_with_services({"qb": _service([_qb_torrent("h1")])})._torrent_hash_index()
+    assert index.exists("h1") is True
@@ -0,0 +1,124 @@
+"""shared/memo.py 单轮巡检备忘单测。"""
+import threading
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+
+from app.schemas.types import MediaType
+
+from app.plugins.subscribeassistantenhanced import SubscribeAssistantEnhanced
+from app.plugins.subscribeassistantenhanced.shared.memo import InspectionMemo, inspection_pass
+
+
+def test_memo_only_applies_inside_scope_and_resets_per_pass():
+    """作用域内重复查询只调用一次 loader，作用域外和下一轮都重新请求。"""
+    memo = InspectionMemo()
+    loader = MagicMock(side_effect=lambda: [1, 2])
+
+    assert memo.get_or_load("tmdb_episodes", ("1", "1", None), loader) == [1, 2]
+    with memo.scope():
+        with memo.scope():
+            first = memo.get_or_load("tmdb_episodes", ("1", "1", None), loader)
+        first.append(3)
+        assert memo.get_or_load("tmdb_episodes", ("1", "1", None), loader) == [1, 2]
+        assert memo.active
+    assert not memo.active
+    with memo.scope():
+        memo.get_or_load("tmdb_episodes", ("1", "1", None), loader)
+
+    assert loader.call_count == 3
+
+
+def test_loader_errors_are_not_memoized():
+    """loader 抛异常时不记录结果，同一轮后续调用继续重试。"""
+    memo = InspectionMemo()
+    loader = MagicMock(side_effect=[RuntimeError("tmdb"), None])
+    with memo.scope():
+        with pytest.raises(RuntimeError):
+            memo.get_or_load("mediainfo", ("tv", "100"), loader)
+        assert memo.get_or_load("mediainfo", ("tv", "100"), loader) is None
+        assert memo.get_or_load("mediainfo", ("tv", "100"), loader) is None
+
+    assert loader.call_count == 2
+
+
+def test_scope_is_thread_local():
+    """其他线程（如事件回调）不读取巡检备忘。"""
+    memo = InspectionMemo()
+    loader = MagicMock(return_value="value")
+    with memo.scope():
+        memo.get_or_load("mediainfo", ("k",), loader)
+        worker = threading.Thread(target=lambda: memo.get_or_load("mediainfo", ("k",), loader))
+        worker.start()
+        worker.join()
+
+    assert loader.call_count == 2
+
+
+def test_inspection_pass_without_memo_runs_directly():
+    """实例未配置备忘时装饰器直接执行巡检。"""
+    class Host:
+        @inspection_pass
+        def run(self):
+            return "done"
+
+    assert Host().run() == "done"
+
+
+def _sub(index):
+    return SimpleNamespace(id=index, name=f"剧集{index}", year="2026", media_source="themoviedb",
+                           media_id=str(1000 + index % 100), season=1 + index % 100 % 3, episode_group=None,
+                           type=MediaType.TV, state="R", best_version=0)
+
+
+def _plugin(subscribes):
+    """构造巡检插件：元数据巡检、完成验证与完成证据各自查询一次媒体识别和 TMDB 集信息。"""
+    plugin = SubscribeAssistantEnhanced()
+    plugin._config = SimpleNamespace(verify_enabled=True, best_version_type="no", download_monitor_enabled=False)
+    plugin.chain = MagicMock()
+    plugin.chain.recognize_media.side_effect = lambda **kwargs: SimpleNamespace(tmdb_id=int(kwargs["media_id"]))
+    plugin._tmdb_chain = MagicMock()
+    plugin._tmdb_chain.tmdb_episodes.side_effect = lambda **kwargs: [SimpleNamespace(episode_number=1)]
+    plugin._subscribe_oper = MagicMock()
+    plugin._subscribe_oper.list.side_effect = lambda state: subscribes if state == "N,R,P,S" else []
+
+    def inspect(subscribe):
+        mediainfo = plugin._recognize_mediainfo(subscribe)
+        plugin._tmdb_episodes(mediainfo.tmdb_id, subscribe.season, subscribe.episode_group)
+
+    lifecycle = MagicMock()
+    lifecycle.handle_meta_check_subscription.side_effect = lambda subscribe: [inspect(subscribe), inspect(subscribe)]
+    verifier = MagicMock()
+    verifier.verify_all.side_effect = lambda: [inspect(subscribe) for subscribe in subscribes]
+    plugin._modules = {"lifecycle": lifecycle, "verifier": verifier}
+    return plugin
+
+
+def test_run_all_checks_300_subscriptions_hits_tmdb_once_per_identity():
+    """300 个订阅一轮全量巡检：TMDB 请求数只取决于不同媒体身份，下一轮重新请求。"""
+    subscribes = [_sub(index) for index in range(300)]
+    plugin = _plugin(subscribes)
+    plugin._inspection_memo = None
+    plugin.run_all_checks()
+    unmemoized = plugin.chain.recognize_media.call_count + plugin._tmdb_chain.tmdb_episodes.call_count
+
+    plugin = _plugin(subscribes)
+    plugin.run_all_checks()
+    first_pass = plugin.chain.recognize_media.call_count + plugin._tmdb_chain.tmdb_episodes.call_count
+    plugin.run_all_checks()
+    second_pass = plugin.chain.recognize_media.call_count + plugin._tmdb_chain.tmdb_episodes.call_count - first_pass
+
+    assert unmemoized == 300 * 3 * 2
+    assert plugin.chain.recognize_media.call_count == 2 * 300
+    assert plugin._tmdb_chain.tmdb_episodes.call_count == 2 * 100
+    assert second_pass == first_pass
+
+
+def test_events_outside_inspection_pass_are_not_memoized():
+    """巡检轮次外的调用（如事件回调）每次都请求上游。"""
+    plugin = _plugin([])
+    plugin._tmdb_episodes(100, 1)
+    plugin._tmdb_episodes(100, 1)
+
+    assert plugin._tmdb_chain.tmdb_episodes.call_count == 2
@@ -0,0 +1,198 @@
+"""shared/scheduler.py 巡检子任务调度测试。"""
+import threading
+import time
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+
+from app.plugins.subscribeassistantenhanced import SubscribeAssistantEnhanced
+from app.plugins.subscribeassistantenhanced.shared import scheduler as scheduler_module
+from app.plugins.subscribeassistantenhanced.shared.memo import InspectionMemo
+from app.plugins.subscribeassistantenhanced.shared.scheduler import (
+    SUBSCRIPTION_STATE,
+    InspectionScheduler,
+    InspectionTask,
+)
+
+
+class Recorder:
+    """记录子任务开始 / 结束顺序与执行线程。"""
+
+    def __init__(self):
+        self.events = []
+        self.threads = {}
+        self._lock = threading.Lock()
+
+    def task(self, name, seconds=0.0, error=None):
+        def run():
+            with self._lock:
+                self.events.append(("start", name))
+                self.threads[name] = threading.current_thread().name
+            time.sleep(seconds)
+            with self._lock:
+                self.events.append(("end", name))
+            if error:
+                raise error
+        return run
+
+    def position(self, kind, name):
+        return self.events.index((kind, name))
+
+
+def test_conflicts_only_when_a_write_overlaps():
+    """写入对方读写的 key 时冲突，只读同一 key 不冲突。"""
+    writer = InspectionTask("写", lambda: None, writes=["subscribes"])
+    reader = InspectionTask("读", lambda: None, reads=["subscribes"])
+    other_reader = InspectionTask("另一读", lambda: None, reads=["subscribes"])
+    unrelated = InspectionTask("无关", lambda: None, writes=["deletes"])
+
+    assert writer.conflicts(reader) and reader.conflicts(writer)
+    assert writer.conflicts(InspectionTask("写2", lambda: None, writes={"subscribes"}))
+    assert not reader.conflicts(other_reader)
+    assert not writer.conflicts(unrelated)
+    assert isinstance(writer.writes, frozenset)
+
+
+def test_conflicting_tasks_keep_order_and_independent_tasks_overlap():
+    """冲突子任务按声明顺序串行，不冲突子任务并发执行。"""
+    recorder = Recorder()
+    tasks = [
+        InspectionTask("a", recorder.task("a", 0.05), writes={"subscribes"}),
+        InspectionTask("b", recorder.task("b", 0.05), reads={"subscribes"}),
+        InspectionTask("c", recorder.task("c", 0.05), writes={"deletes"}),
+        InspectionTask("d", recorder.task("d", 0.0), writes={"subscribes", "deletes"}),
+    ]
+
+    durations = InspectionScheduler("测试巡检").run(tasks)
+
+    assert recorder.position("end", "a") < recorder.position("start", "b")
+    assert recorder.position("start", "c") < recorder.position("end", "a")
+    assert recorder.position("end", "b") < recorder.position("start", "d")
+    assert recorder.position("end", "c") < recorder.position("start", "d")
+    assert set(durations) == {"a", "b", "c", "d"}
+    assert durations["a"] >= 0.05
+
+
+def test_failures_are_isolated_and_dependents_still_run():
+    """子任务失败只记录日志并计入耗时，依赖它的后续子任务照常执行。"""
+    recorder = Recorder()
+    scheduler = InspectionScheduler("测试巡检")
+    durations = scheduler.run([
+        InspectionTask("失败", recorder.task("失败", error=RuntimeError("boom")), writes={"subscribes"}),
+        InspectionTask("后续", recorder.task("后续"), writes={"subscribes"}),
+    ])
+
+    assert ("end", "后续") in recorder.events
+    assert set(durations) == {"失败", "后续"}
+    assert scheduler.durations == durations
+
+
+def test_single_worker_runs_in_caller_thread_in_order():
+    """并发上限为 1 时在调用线程内按声明顺序执行。"""
+    recorder = Recorder()
+    names = ["a", "b", "c"]
+    InspectionScheduler("测试巡检", max_workers=1).run(
+        [InspectionTask(name, recorder.task(name), writes={name}) for name in names])
+
+    assert [name for kind, name in recorder.events if kind == "start"] == names
+    assert set(recorder.threads.values()) == {threading.current_thread().name}
+    assert InspectionScheduler("测试巡检").run([]) == {}
+
+
+def test_memo_scope_is_propagated_to_workers():
+    """调用线程的巡检备忘带入工作线程，不同子任务共享同一轮查询结果。"""
+    memo = InspectionMemo()
+    loader = MagicMock(return_value=["episode"])
+    seen = []
+
+    def lookup():
+        seen.append(memo.active)
+        memo.get_or_load("tmdb_episodes", ("100", "1", None), loader)
+
+    with memo.scope():
+        InspectionScheduler("测试巡检", propagate_fn=memo.propagate).run(
+            [InspectionTask(f"t{index}", lookup, writes={f"k{index}"}) for index in range(4)])
+
+    assert seen == [True] * 4
+    assert loader.call_count == 1
+    assert memo.propagate(lookup) is lookup
+
+
+def _common_check_plugin(delays):
+    plugin = SubscribeAssistantEnhanced()
+    plugin._config = SimpleNamespace(download_monitor_enabled=True, verify_enabled=False)
+    recorder = Recorder()
+    for name, seconds in delays.items():
+        setattr(plugin, name, recorder.task(name, seconds))
+    return plugin, recorder
+
+
+COMMON_DELAYS = {
+    "run_pending_release": 0.05,
+    "run_pending_state_reconcile": 0.05,
+    "run_no_download_check": 0.2,
+    "run_paused_probe_check": 0.05,
+    "run_site_evidence_scan": 0.2,
+    "run_deletes_cleanup": 0.1,
+    "run_completion_snapshot_cleanup": 0.05,
+    "run_subscription_cleanup_expired": 0.1,
+}
+
+
+def test_common_check_declarations_keep_lifecycle_order():
+    """订阅状态相关子任务保持原顺序串行，站点证据与本地清理不等待无下载处理。"""
+    plugin, recorder = _common_check_plugin(COMMON_DELAYS)
+
+    plugin.run_common_check()
+
+    serial = ["run_pending_release", "run_pending_state_reconcile", "run_no_download_check", "run_paused_probe_check"]
+    for before, after in zip(serial, serial[1:]):
+        assert recorder.position("end", before) < recorder.position("start", after)
+    assert recorder.position("end", "run_pending_state_reconcile") < recorder.position("start", "run_site_evidence_scan")
+    assert recorder.position("start", "run_site_evidence_scan") < recorder.position("end", "run_no_download_check")
+    assert recorder.position("start", "run_deletes_cleanup") < recorder.position("end", "run_pending_release")
+    tasks = {task.name: task for task in plugin._common_check_tasks()}
+    assert SUBSCRIPTION_STATE not in tasks["站点证据采样"].reads | tasks["站点证据采样"].writes
+
+
+def test_common_check_critical_path_is_shorter_than_sequential_sum(monkeypatch):
+    """按声明的冲突关系计算，通用巡检关键路径只包含订阅状态串行链路，短于子任务耗时之和。"""
+    clock = SimpleNamespace(now=0.0)
+    plugin, _ = _common_check_plugin({})
+    for name, seconds in COMMON_DELAYS.items():
+        setattr(plugin, name, lambda seconds=seconds: setattr(clock, "now", clock.now + seconds))
+    monkeypatch.setattr(scheduler_module, "time", SimpleNamespace(perf_counter=lambda: clock.now))
+
+    scheduler = InspectionScheduler("通用巡检", max_workers=1)
+    scheduler.run(plugin._common_check_tasks())
+
+    assert sum(scheduler.durations.values()) == pytest.approx(sum(COMMON_DELAYS.values()))
+    assert scheduler.critical_path_seconds == pytest.approx(0.35)
+
+
+def test_run_all_checks_schedules_common_subtasks_with_lifecycle_tasks():
+    """全量巡检直接调度通用巡检子任务：订阅状态相关检查按原顺序串行，本地清理不等待状态链路，单项失败不阻断。"""
+    plugin, recorder = _common_check_plugin({
+        "run_meta_check": 0.1,
+        "run_best_version_check": 0.0,
+        "run_completion_verify": 0.0,
+        **COMMON_DELAYS,
+    })
+    plugin._config.verify_enabled = True
+    plugin.run_common_check = MagicMock()
+    plugin.run_download_timeout_check = MagicMock(side_effect=RuntimeError("downloader down"))
+
+    plugin.run_all_checks()
+
+    order = ["run_meta_check", "run_best_version_check", "run_completion_verify", "run_pending_release",
+             "run_pending_state_reconcile", "run_no_download_check", "run_paused_probe_check"]
+    for before, after in zip(order, order[1:]):
+        assert recorder.position("end", before) < recorder.position("start", after)
+    assert recorder.position("start", "run_site_evidence_scan") < recorder.position("end", "run_no_download_check")
+    assert recorder.position("start", "run_subscription_cleanup_expired") < recorder.position("end", "run_meta_check")
+    snapshot_cleanup = recorder.position("start", "run_completion_snapshot_cleanup")
+    assert recorder.position("end", "run_completion_verify") < snapshot_cleanup
+    plugin.run_download_timeout_check.assert_called_once_with()
+    plugin.run_common_check.assert_not_called()
+    assert ("end", "run_deletes_cleanup") in recorder.events
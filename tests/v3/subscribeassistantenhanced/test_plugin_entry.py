@@ -3,6 +3,7 @@
 这些断言保护"集成层"不被退回占位原型——继承缺失会导致数据层/生命周期全部失效；
 PriorityManager 缺 subscribe_oper 注入会让洗版优先级写入静默 no-op。
 """
+import threading
 from types import SimpleNamespace
 from unittest.mock import MagicMock
 
@@ -16,6 +17,8 @@ from app.plugins.subscribeassistantenhanced import SubscribeAssistantEnhanced
 from app.plugins.subscribeassistantenhanced.lifecycle import LifecycleResult
 from app.plugins.subscribeassistantenhanced.shared.config import PluginConfig
 from app.plugins.subscribeassistantenhanced.shared.subscribe import subscribe_from_source
+from app.plugins.subscribeassistantenhanced.shared.search_queue import DelayedSearchQueue
+from app.plugins.subscribeassistantenhanced.shared.task import TaskDataManager
 
 # 12 个事件处理器必须定义在插件类上（主程序按 __qualname__ 首段解析运行实例分发）
 _EVENT_HANDLERS = (
@@ -395,7 +398,7 @@ class TestEventRegistration:
         assert set(saved) == {
             "subscribes", "torrents", "blocks", "releases", "snapshots",
             "deletes", "volatility", "site_evidence",
-            "subscription_cleanup_histories",
+            "subscription_cleanup_histories", "delayed_searches",
         }
 
     def test_plugin_data_reset_event_logs_without_notify_when_nothing_recovered(self, monkeypatch):
@@ -425,6 +428,7 @@ class TestEventRegistration:
         plugin._config = PluginConfig({})
         coordinator = MagicMock()
         plugin._paused_probe_coordinator = coordinator
+        plugin._delayed_search_queue = MagicMock()
         lifecycle = MagicMock()
         lifecycle.restore_owned_states_before_reset.return_value = LifecycleResult()
         plugin._modules = {"lifecycle": lifecycle}
@@ -433,6 +437,7 @@ class TestEventRegistration:
         plugin._reset_task_data()
 
         coordinator.stop.assert_called_once_with()
+        plugin._delayed_search_queue.clear.assert_called_once_with()
         lifecycle.restore_owned_states_before_reset.assert_called_once_with()
 
     def test_stop_service_stops_paused_probe_coordinator(self):
@@ -446,36 +451,79 @@ class TestEventRegistration:
         coordinator.stop.assert_called_once_with()
         assert plugin._paused_probe_coordinator is None
 
-    def test_initial_pending_search_uses_timer_without_waiting(self, monkeypatch):
-        """新增待定补搜只安排 Timer；测试显式触发回调，不等待真实延迟。"""
-        timers = []
+    def test_initial_pending_search_enqueues_without_waiting(self, monkeypatch):
+        """新增待定补搜只写入延迟队列；推进注入的时钟后由队列自行执行，不等待真实延迟。"""
+        store = {}
+        clock = {"now": 1000.0}
+        searched = threading.Event()
 
-        class FakeTimer:
-            def __init__(self, delay, callback):
-                self.delay = delay
-                self.callback = callback
-                self.started = False
-                timers.append(self)
-
-            def start(self):
-                self.started = True
+        def update(key, updater):
+            store[key] = updater(dict(store.get(key, {})))
 
         monkeypatch.setattr(plugin_module.random, "uniform", lambda _start, _end: 3.25)
-        monkeypatch.setattr(plugin_module.threading, "Timer", FakeTimer)
         plugin = SubscribeAssistantEnhanced()
         plugin._subscribe_chain = MagicMock()
+        plugin._subscribe_chain.search.side_effect = lambda sid: searched.set()
+        plugin._delayed_search_queue = DelayedSearchQueue(
+            store.get, update,
+            search_fn=lambda sid: plugin._subscribe_chain.search(sid=sid),
+            now_fn=lambda: clock["now"],
+        )
         subscribe = SimpleNamespace(id=42, name="测试剧", season=1)
+        plugin._delayed_search_queue.start()
+        try:
+            delay = plugin._schedule_initial_pending_search(subscribe)
 
-        delay = plugin._schedule_initial_pending_search(subscribe)
-
-        assert delay == 195
-        assert timers[0].delay == 195
-        assert timers[0].started is True
-        plugin._subscribe_chain.search.assert_not_called()
+            assert delay == 195
+            assert store["delayed_searches"]["42"]["run_at"] == 1195
+            assert not searched.wait(0.2)
 
-        timers[0].callback()
+            clock["now"] += 195
+            assert searched.wait(3)
+        finally:
+            plugin._delayed_search_queue.stop()
 
         plugin._subscribe_chain.search.assert_called_once_with(sid=42)
+        assert store["delayed_searches"] == {}
+
+    def test_delayed_search_requires_started_queue(self):
+        """插件未初始化延迟队列时不安排补搜。"""
+        plugin = SubscribeAssistantEnhanced()
+        plugin._subscribe_chain = MagicMock()
+
+        assert plugin._search_subscribe(SimpleNamespace(id=42, name="测试剧", season=1)) is None
+
+    def test_stop_service_stops_delayed_search_queue(self):
+        plugin = SubscribeAssistantEnhanced()
+        queue = MagicMock()
+        plugin._delayed_search_queue = queue
+
+        plugin.stop_service()
+
+        queue.stop.assert_called_once_with()
+        assert plugin._delayed_search_queue is None
+
+    def test_cleared_subscription_cancels_delayed_search(self):
+        """订阅任务数据清理时取消该订阅尚未执行的延迟搜索。"""
+        plugin = SubscribeAssistantEnhanced()
+        plugin._delayed_search_queue = MagicMock()
+        store = {"delayed_searches": {"42": {"run_at": 1.0}, "7": {"run_at": 2.0}}}
+        tm = TaskDataManager(get_data_fn=store.get, save_data_fn=store.__setitem__,
+                             on_clear_fn=plugin._cancel_delayed_search)
+
+        tm.clear_tasks(42)
+
+        plugin._delayed_search_queue.cancel.assert_called_once_with("42")
+        assert store["delayed_searches"] == {"7": {"run_at": 2.0}}
+
+    def test_stop_service_flushes_recognition_cache(self):
+        plugin = SubscribeAssistantEnhanced()
+        guard = MagicMock()
+        plugin._modules = {"recognition_guard": guard}
+
+        plugin.stop_service()
+
+        guard.flush_cache.assert_called_once_with()
 
 
 class TestScheduler:
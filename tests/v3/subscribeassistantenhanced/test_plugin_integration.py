@@ -1841,12 +1841,13 @@ def test_run_all_checks_skips_verify_when_disabled():
     plugin = SubscribeAssistantEnhanced()
     plugin.init_plugin({"enabled": True})
     mocks = {}
-    for name in ("run_meta_check", "run_download_timeout_check", "run_best_version_check",
-                 "run_completion_verify", "run_common_check"):
+    for name in ["run_meta_check", "run_download_timeout_check", "run_best_version_check",
+                 "run_completion_verify"] + [task.fn.__name__ for task in plugin._common_check_tasks()]:
         mocks[name] = MagicMock()
         setattr(plugin, name, mocks[name])
     plugin.run_all_checks()
-    for name in ("run_meta_check", "run_download_timeout_check", "run_best_version_check", "run_common_check"):
+    for name in ("run_meta_check", "run_download_timeout_check", "run_best_version_check",
+                 "run_pending_release", "run_subscription_cleanup_expired"):
         mocks[name].assert_called_once()
     mocks["run_completion_verify"].assert_not_called()
 
@@ -1859,7 +1860,8 @@ def test_run_all_checks_invokes_verify_when_enabled():
     plugin.run_download_timeout_check = MagicMock()
     plugin.run_best_version_check = MagicMock()
     plugin.run_completion_verify = MagicMock()
-    plugin.run_common_check = MagicMock()
+    for name in [task.fn.__name__ for task in plugin._common_check_tasks()]:
+        setattr(plugin, name, MagicMock())
 
     plugin.run_all_checks()
 
@@ -0,0 +1,210 @@
+"""recognition/cache.py 二次识别缓存与持久化层单测。"""
+import time
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+from app.plugins.subscribeassistantenhanced.recognition.cache import SecondaryRecognitionCache
+from app.plugins.subscribeassistantenhanced.recognition.guard import RecognitionGuard
+from app.plugins.subscribeassistantenhanced.recognition.types import RecognitionRuntime, RecognitionSettings
+
+
+def _store():
+    store = {}
+    return store, (lambda: store.get("recognition_cache")), (lambda data: store.__setitem__("recognition_cache", data))
+
+
+def test_lru_evicts_oldest_and_counts_stats():
+    """超过容量淘汰最久未使用条目，并统计命中、未命中和淘汰。"""
+    cache = SecondaryRecognitionCache(maxsize=2)
+    cache.put("a", {"status": "recognized"})
+    cache.put("b", {"status": "empty"})
+    assert cache.get("a")["status"] == "recognized"
+    cache.put("c", {"status": "failed"})
+
+    assert "b" not in cache and "a" in cache and len(cache) == 2
+    assert cache.get("b") is None
+    assert cache.stats == {"hit": 1, "miss": 1, "evict": 1, "expired": 0, "persisted_hit": 0}
+    assert cache.summary() == "hit:1,miss:1,evict:1,expired:0,persisted_hit:0,size:2"
+
+
+def test_persistent_tier_survives_restart_and_skips_failures():
+    """确定结果写回持久化层，重启后直接命中；识别失败只保留在内存。"""
+    store, load_fn, save_fn = _store()
+    cache = SecondaryRecognitionCache(maxsize=10, version="v1", load_fn=load_fn, save_fn=save_fn)
+    cache.put("ok", {"status": "recognized", "tmdb_id": 1})
+    cache.put("bad", {"status": "failed", "failure": "timeout"})
+    cache.flush()
+    assert set(store["recognition_cache"]["entries"]) == {"ok"}
+
+    save_fn = MagicMock()
+    restarted = SecondaryRecognitionCache(maxsize=10, version="v1", load_fn=load_fn, save_fn=save_fn)
+    assert restarted.get("ok")["tmdb_id"] == 1
+    assert restarted.get("ok")["tmdb_id"] == 1
+    assert restarted.get("bad") is None
+    restarted.flush()
+
+    save_fn.assert_not_called()
+    assert restarted.stats["persisted_hit"] == 1
+
+
+def test_version_change_invalidates_persisted_entries():
+    """版本指纹变化时作废持久化结果，并在下次写回时覆盖旧数据。"""
+    store, load_fn, save_fn = _store()
+    store["recognition_cache"] = {"version": "old", "entries": {"k": {"status": "recognized", "at": time.time()}}}
+    logger_fn = MagicMock()
+    cache = SecondaryRecognitionCache(maxsize=10, version="new", load_fn=load_fn, save_fn=save_fn,
+                                      logger_fn=logger_fn)
+
+    assert cache.get("k") is None
+    cache.flush()
+
+    assert store["recognition_cache"] == {"version": "new", "entries": {}}
+    assert "版本已变化" in logger_fn.call_args.args[0]
+
+
+def test_ttl_expires_loaded_and_memory_entries():
+    """载入时丢弃过期条目，只保留最新的 maxsize 条；内存条目读取时同样按 TTL 过期。"""
+    store, load_fn, save_fn = _store()
+    now = time.time()
+    store["recognition_cache"] = {"version": "v1", "entries": {
+        "old": {"status": "recognized", "at": now - 7200},
+        "bad_at": {"status": "recognized", "at": "x"},
+        "mid": {"status": "recognized", "at": now - 20},
+        "new": {"status": "empty", "at": now - 10},
+        "junk": "not-a-dict",
+    }}
+    cache = SecondaryRecognitionCache(maxsize=1, ttl_seconds=3600, version="v1", load_fn=load_fn, save_fn=save_fn)
+
+    assert cache.get("new")["status"] == "empty"
+    assert "mid" not in cache
+    assert cache.stats["expired"] == 3
+    cache.flush()
+    assert set(store["recognition_cache"]["entries"]) == {"new"}
+
+    with patch("app.plugins.subscribeassistantenhanced.recognition.cache.time.time", return_value=now + 7200):
+        assert cache.get("new") is None
+    assert cache.stats["expired"] == 4
+
+
+def test_persisted_tier_keeps_recent_unexpired_entries_only():
+    """持久化层按最近使用保留 persist_maxsize 条，写回时跳过已过期条目，内存 LRU 不受影响。"""
+    store, load_fn, save_fn = _store()
+    cache = SecondaryRecognitionCache(maxsize=10, ttl_seconds=3600, version="v1", load_fn=load_fn, save_fn=save_fn,
+                                      persist_maxsize=2)
+    now = time.time()
+    with patch("app.plugins.subscribeassistantenhanced.recognition.cache.time.time", return_value=now - 7200):
+        cache.put("stale", {"status": "recognized"})
+    for key in ("a", "b", "c"):
+        cache.put(key, {"status": "recognized"})
+    cache.get("a")
+    cache.flush()
+
+    assert list(store["recognition_cache"]["entries"]) == ["c", "a"]
+    assert len(cache) == 4
+
+
+def test_flush_interval_merges_writes_until_forced():
+    """写回间隔内的重复 flush 不写，新结果保留待写；force 忽略间隔立即写回。"""
+    save_fn = MagicMock()
+    cache = SecondaryRecognitionCache(maxsize=10, version="v1", load_fn=lambda: None, save_fn=save_fn,
+                                      flush_interval=300)
+    cache.put("a", {"status": "recognized"})
+    cache.flush()
+    cache.put("b", {"status": "recognized"})
+    cache.flush()
+    assert save_fn.call_count == 1
+
+    cache.flush(force=True)
+    cache.flush(force=True)
+    assert save_fn.call_count == 2
+    assert set(save_fn.call_args.args[0]["entries"]) == {"a", "b"}
+
+
+def test_unreadable_or_unwritable_store_falls_back_to_memory():
+    """持久化层读写异常或格式异常时只使用内存缓存。"""
+    logger_fn = MagicMock()
+    cache = SecondaryRecognitionCache(maxsize=10, version="v1", load_fn=MagicMock(side_effect=RuntimeError("db")),
+                                      save_fn=MagicMock(side_effect=RuntimeError("db")), logger_fn=logger_fn)
+    cache.put("k", {"status": "recognized"})
+    cache.flush()
+
+    assert cache.get("k")["status"] == "recognized"
+    assert [call.args[0][:10] for call in logger_fn.call_args_list] == ["二次识别缓存读取失败", "二次识别缓存写入失败"]
+
+    malformed = SecondaryRecognitionCache(maxsize=10, load_fn=lambda: {"entries": []}, save_fn=MagicMock())
+    assert malformed.get("k") is None
+    malformed.flush()
+    malformed._save_fn.assert_not_called()
+
+
+def _context(title):
+    return SimpleNamespace(
+        torrent_info=SimpleNamespace(title=title, description="问心 第1集", site_name="站点"),
+        meta_info=SimpleNamespace(year=None, type=None, episode_list=[1], begin_season=1),
+        media_info=None,
+        candidate_recognized=False,
+        match_source="title",
+        media_info_is_target=True,
+    )
+
+
+def _subscribe():
+    return SimpleNamespace(id=1, name="问心", media_source="themoviedb", media_id="100", doubanid=None,
+                           year="2026", season=1, episode_group=None, type="电视剧", best_version=0,
+                           best_version_full=0, start_episode=1, total_episode=12, episode_priority={},
+                           custom_words="The Heart => 问心")
+
+
+def _guard(load_fn, save_fn, recognizer, **settings):
+    return RecognitionGuard(
+        RecognitionSettings(mode="strict", tmdb_recheck_mode="all", **settings),
+        runtime=RecognitionRuntime(secondary_recognizer=recognizer, secondary_cache_load_fn=load_fn,
+                                   secondary_cache_save_fn=save_fn),
+    )
+
+
+def test_guard_warm_restart_reuses_persisted_secondary_results():
+    """重启后的首轮过滤直接命中持久化结果，不再调用二次识别，审计摘要输出缓存统计。"""
+    store, load_fn, save_fn = _store()
+    recognizer = MagicMock(return_value=SimpleNamespace(tmdb_id=100, douban_id=None))
+    contexts = [_context(f"The Heart S01E0{index}") for index in range(1, 6)]
+
+    _guard(load_fn, save_fn, recognizer).filter(contexts, subscribe=_subscribe())
+    cold_calls = recognizer.call_count
+    restarted = _guard(load_fn, save_fn, recognizer)
+    restarted.filter(contexts, subscribe=_subscribe())
+
+    assert cold_calls == 10
+    assert recognizer.call_count == cold_calls
+    assert all(route.cache_hit for decision in restarted.last_batch.decisions
+               for route in decision.candidate.secondary_routes)
+    assert "cache_stats=hit:10,miss:0,evict:0,expired:0,persisted_hit:10,size:10" in restarted.last_audit_summary
+
+
+def test_guard_keyword_change_invalidates_persisted_results():
+    """关键字分组或策略版本变化后，持久化结果作废并重新识别。"""
+    store, load_fn, save_fn = _store()
+    recognizer = MagicMock(return_value=SimpleNamespace(tmdb_id=100, douban_id=None))
+    _guard(load_fn, save_fn, recognizer).filter([_context("The Heart S01E01")], subscribe=_subscribe())
+
+    _guard(load_fn, save_fn, recognizer, keyword_config="block:\n  - 'CAM'\n").filter(
+        [_context("The Heart S01E01")], subscribe=_subscribe())
+    _guard(load_fn, save_fn, recognizer, strategy_version="next").filter(
+        [_context("The Heart S01E01")], subscribe=_subscribe())
+
+    assert recognizer.call_count == 6
+
+
+def test_guard_filters_share_one_write_per_flush_interval():
+    """连续多轮过滤只写回一次持久化层，flush_cache 把剩余结果落盘。"""
+    save_fn = MagicMock()
+    recognizer = MagicMock(return_value=SimpleNamespace(tmdb_id=100, douban_id=None))
+    guard = _guard(lambda: None, save_fn, recognizer)
+    for index in range(1, 4):
+        guard.filter([_context(f"The Heart S01E0{index}")], subscribe=_subscribe())
+    assert save_fn.call_count == 1
+
+    guard.flush_cache()
+
+    assert save_fn.call_count == 2
+    assert len(save_fn.call_args.args[0]["entries"]) == 6
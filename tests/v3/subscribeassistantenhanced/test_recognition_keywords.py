@@ -1,8 +1,15 @@
 """识别增强关键字配置测试。"""
+import re
+
+import pytest
+
 import app.plugins.subscribeassistantenhanced.recognition as recognition
 from app.plugins.subscribeassistantenhanced.shared.config import DEFAULT_RECOGNITION_GUARD_CUSTOM_CONFIG
 from app.plugins.subscribeassistantenhanced.recognition.guard import RecognitionGuard
+from app.plugins.subscribeassistantenhanced.recognition import keywords as keywords_module
 from app.plugins.subscribeassistantenhanced.recognition.keywords import (
+    GROUP_KEYS,
+    KeywordMatcher,
     load_keyword_groups,
     match_first,
 )
@@ -69,6 +76,80 @@ def test_invalid_regex_is_ignored_without_blocking_other_patterns():
     assert match_first(["(", "真人版"], "凡人修仙传 真人版") == "真人版"
 
 
+def _legacy_match_first(patterns, text):
+    """预编译前的逐条 re.search 实现，作为等价性基准。"""
+    for pattern in patterns:
+        try:
+            if re.search(pattern, text or "", re.IGNORECASE):
+                return pattern
+        except re.error:
+            continue
+    return None
+
+
+def test_compiled_matcher_keeps_list_order_and_unmergeable_patterns():
+    """预筛命中后按关键字顺序返回；反向引用、行内全局标志和重名分组不参与合并但结果不变。"""
+    cases = [
+        (["剧场版", "动画"], "动画 剧场版"),
+        (["(", "真人版"], "凡人修仙传 真人版"),
+        ([r"(\w)\1", "真人版"], "aa 真人版"),
+        ([r"(\w)\1", "真人版"], "ab 真人版"),
+        ([r"(?x) 真 人 版", "电影版"], "真人版"),
+        ([r"(?P<n>A)(?P=n)", "zz"], "xaa"),
+        ([r"(?P<tag>movie)", r"(?P<tag>film)"], "A FILM"),
+        ([r"\bMovie\b", "剧场版"], "the movie"),
+        (["^S01", "E02$"], "x S01E02"),
+        ([], "任何标题"),
+        (["动画"], None),
+    ]
+    for patterns, text in cases:
+        matcher = KeywordMatcher(patterns)
+        assert matcher.match_first(text) == _legacy_match_first(patterns, text), (patterns, text)
+        assert match_first(patterns, text) == _legacy_match_first(patterns, text)
+        assert match_first(matcher, text) == matcher.match_first(text)
+
+
+def test_load_keyword_groups_precompiles_each_group_once(monkeypatch):
+    """加载关键字时为全部分组编译匹配器并存放在分组对象上，取匹配器不再查缓存或重新编译。"""
+    groups = load_keyword_groups("")
+    matchers = {key: groups.matcher(key) for key in GROUP_KEYS}
+    assert groups == load_keyword_groups("")
+
+    monkeypatch.setattr(keywords_module, "compile_keywords", lambda patterns: pytest.fail("不应重新编译"))
+    for key in GROUP_KEYS:
+        assert groups.matcher(key) is matchers[key]
+        assert matchers[key].patterns == tuple(getattr(groups, key))
+    assert groups.matcher("movie").match_first("某动画 剧场版") == "剧场版"
+    assert "KeywordMatcher" not in repr(groups)
+
+
+def _titles(count):
+    """模拟站点标题：多数不含关键字，少量命中剧集、电影版、真人版和动画信号。"""
+    templates = [
+        "The Heart {n} 2160p WEB-DL H265 DDP5.1-Group",
+        "Show.Name.{n}.1080p.BluRay.x264-GRP",
+        "问心 第{n}集 4K 高码",
+        "The Heart S01E{n:02d} 1080p",
+        "某动画 剧场版 {n} 1080p",
+        "凡人修仙传 真人版 全{n}集",
+        "Some Movie {n} 2026 UHD",
+        "纪录片 {n} 国语中字",
+    ]
+    return [templates[index % len(templates)].format(n=index % 40 + 1) for index in range(count)]
+
+
+def test_compiled_matcher_matches_legacy_on_10k_titles():
+    """默认关键字集 10k 标题：合并编译后的匹配结果与逐条 re.search 一致。"""
+    groups = load_keyword_groups("")
+    titles = _titles(10000)
+
+    legacy = [[_legacy_match_first(getattr(groups, key), title) for key in GROUP_KEYS] for title in titles]
+    matchers = [groups.matcher(key) for key in GROUP_KEYS]
+    compiled = [[matcher.match_first(title) for matcher in matchers] for title in titles]
+
+    assert compiled == legacy
+
+
 def test_default_strategy_inputs_parse_without_warnings():
     for text in ("", "# only comments\n", "actions:\nempty_pool:\nkeywords:\n",
                  DEFAULT_RECOGNITION_GUARD_CUSTOM_CONFIG):
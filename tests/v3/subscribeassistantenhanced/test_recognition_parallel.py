@@ -0,0 +1,133 @@
+"""识别增强二次识别并发评估测试。"""
+import threading
+import time
+from types import SimpleNamespace
+
+from app.plugins.subscribeassistantenhanced.recognition.guard import RecognitionGuard
+from app.plugins.subscribeassistantenhanced.recognition.types import RecognitionRuntime, RecognitionSettings
+
+
+class SlowRecognizer:
+    """模拟耗时识别，记录调用次数与同时在途的最大调用数。"""
+
+    def __init__(self, delay=0.02):
+        self.delay = delay
+        self.calls = 0
+        self.inflight = 0
+        self.max_inflight = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, meta):
+        with self._lock:
+            self.calls += 1
+            self.inflight += 1
+            self.max_inflight = max(self.max_inflight, self.inflight)
+        time.sleep(self.delay)
+        with self._lock:
+            self.inflight -= 1
+        title = getattr(meta, "title", "") or ""
+        if "Other" in title:
+            return SimpleNamespace(tmdb_id=200, douban_id=None)
+        return SimpleNamespace(tmdb_id=100, douban_id=None)
+
+
+def _context(title, description=""):
+    return SimpleNamespace(
+        torrent_info=SimpleNamespace(title=title, description=description, site_name="站点"),
+        meta_info=SimpleNamespace(title=title, year=None, type=None, episode_list=[1], begin_season=1),
+        media_info=None,
+        candidate_recognized=False,
+        match_source="title",
+        media_info_is_target=True,
+    )
+
+
+def _subscribe():
+    return SimpleNamespace(id=1, name="问心", media_source="themoviedb", media_id="100", doubanid=None,
+                           year="2026", season=1, episode_group=None, type="电视剧", best_version=0,
+                           best_version_full=0, start_episode=1, total_episode=12, episode_priority={},
+                           custom_words="")
+
+
+def _contexts(unique=20, copies=3):
+    """每个标题重复 copies 次并交错排列，模拟多站点返回相同资源。"""
+    titles = [f"{'Other' if index % 5 == 0 else 'The Heart'} S01E{index + 1:02d}" for index in range(unique)]
+    return [_context(title) for _ in range(copies) for title in titles]
+
+
+def _run(workers, contexts, recognizer):
+    guard = RecognitionGuard(
+        RecognitionSettings(mode="strict", tmdb_recheck_mode="all", secondary_workers=workers),
+        runtime=RecognitionRuntime(secondary_recognizer=recognizer),
+    )
+    retained = guard.filter(contexts, subscribe=_subscribe())
+    return guard, retained
+
+
+def _outcome(guard):
+    return [
+        (decision.candidate.order, decision.final_action, decision.code,
+         [(route.route, route.status, route.tmdb_id, route.cache_hit) for route in decision.candidate.secondary_routes])
+        for decision in guard.last_batch.decisions
+    ]
+
+
+def test_parallel_evaluation_matches_sequential_output():
+    """并发评估按原顺序合并，判定、路由状态和缓存命中与顺序执行一致。"""
+    contexts = _contexts()
+    sequential, sequential_retained = _run(1, contexts, SlowRecognizer(delay=0))
+    parallel, parallel_retained = _run(4, contexts, SlowRecognizer(delay=0))
+
+    assert _outcome(parallel) == _outcome(sequential)
+    assert parallel_retained == sequential_retained
+    assert [decision.candidate.order for decision in parallel.last_batch.decisions] == list(range(len(contexts)))
+
+
+def test_parallel_evaluation_dedupes_titles_and_caps_concurrency():
+    """重复标题只识别一次，同时在途识别调用不超过并发上限，串行配置不并发。"""
+    contexts = _contexts(unique=24, copies=4)
+    sequential_recognizer = SlowRecognizer()
+    parallel_recognizer = SlowRecognizer()
+
+    _run(1, contexts, sequential_recognizer)
+    _run(4, contexts, parallel_recognizer)
+
+    assert parallel_recognizer.calls == sequential_recognizer.calls == 24
+    assert 1 < parallel_recognizer.max_inflight <= 4
+    assert sequential_recognizer.max_inflight == 1
+
+
+def test_recognizer_cap_is_shared_across_concurrent_filters():
+    """多个事件线程同时过滤时，识别调用并发仍受同一上限约束。"""
+    recognizer = SlowRecognizer()
+    guard = RecognitionGuard(
+        RecognitionSettings(mode="strict", tmdb_recheck_mode="all", secondary_workers=3),
+        runtime=RecognitionRuntime(secondary_recognizer=recognizer),
+    )
+    threads = [
+        threading.Thread(target=guard.filter, args=([_context(f"Show{worker} S01E{index:02d}") for index in range(9)],),
+                         kwargs={"subscribe": _subscribe()})
+        for worker in range(3)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert recognizer.calls == 27
+    assert recognizer.max_inflight <= 3
+
+
+def test_single_worker_or_disabled_secondary_stays_sequential():
+    """并发为 1 或未开启二次识别时不创建线程池。"""
+    recognizer = SlowRecognizer(delay=0)
+    guard, _ = _run(1, _contexts(unique=3, copies=1), recognizer)
+    assert recognizer.max_inflight == 1
+
+    off = RecognitionGuard(
+        RecognitionSettings(mode="strict", tmdb_recheck_mode="off", secondary_workers=4),
+        runtime=RecognitionRuntime(secondary_recognizer=recognizer),
+    )
+    off.filter(_contexts(unique=3, copies=1), subscribe=_subscribe())
+    assert recognizer.calls == 3
+    assert all(not decision.candidate.secondary_routes for decision in off.last_batch.decisions)
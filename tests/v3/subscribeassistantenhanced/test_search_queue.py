@@ -0,0 +1,262 @@
+"""shared/search_queue.py 单订阅延迟搜索队列测试。"""
+import threading
+import time
+
+from app.plugins.subscribeassistantenhanced.shared.search_queue import DELAYED_SEARCH_KEY, DelayedSearchQueue
+
+
+class Store:
+    """模拟 TaskDataManager 的 read/update。"""
+
+    def __init__(self, data=None):
+        self.data = dict(data or {})
+        self._lock = threading.Lock()
+
+    def read(self, key):
+        with self._lock:
+            return dict(self.data.get(key) or {})
+
+    def update(self, key, updater):
+        with self._lock:
+            self.data[key] = updater(dict(self.data.get(key) or {}))
+
+
+class SlowSearch:
+    """记录搜索顺序与同时在途的最大搜索数。"""
+
+    def __init__(self, delay=0.0, fail_sids=()):
+        self.delay = delay
+        self.fail_sids = set(fail_sids)
+        self.calls = []
+        self.inflight = 0
+        self.max_inflight = 0
+        self.done = threading.Event()
+        self.expected = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, sid):
+        with self._lock:
+            self.inflight += 1
+            self.max_inflight = max(self.max_inflight, self.inflight)
+        time.sleep(self.delay)
+        with self._lock:
+            self.inflight -= 1
+            self.calls.append(sid)
+            if len(self.calls) >= self.expected:
+                self.done.set()
+        if sid in self.fail_sids:
+            raise RuntimeError("search failed")
+
+
+def _wait_for(predicate, timeout=3):
+    """搜索结束后才移除持久化条目，轮询等待搜索线程收尾。"""
+    deadline = time.time() + timeout
+    while not predicate():
+        if time.time() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+def _queue_threads():
+    return [thread for thread in threading.enumerate() if thread.name.startswith("subscribe-delayed-search")]
+
+
+def test_schedule_dedupes_per_subscription_and_keeps_earliest():
+    """同一订阅重复安排只保留最早的一次，并同步写入持久化数据。"""
+    store = Store()
+    now = {"value": 100.0}
+    queue = DelayedSearchQueue(store.read, store.update, search_fn=lambda sid: None, now_fn=lambda: now["value"])
+
+    assert queue.schedule(7, 300, "种子删除处理") == 300
+    assert queue.schedule(7, 240, "新增待定处理") == 240
+    now["value"] += 40
+    assert queue.schedule(7, 600, "种子删除处理") == 200
+
+    assert queue.pending_count == 1
+    assert store.data[DELAYED_SEARCH_KEY] == {"7": {"run_at": 340.0, "scene": "新增待定处理"}}
+
+
+def test_due_searches_run_in_time_order_and_skip_stale_heap_entries():
+    """出队按到期时间排序，被提前的旧堆项不会触发第二次搜索。"""
+    store = Store()
+    search = SlowSearch()
+    search.expected = 3
+    queue = DelayedSearchQueue(store.read, store.update, search_fn=search, max_concurrency=1)
+    queue.schedule(1, 0.15)
+    queue.schedule(2, 0.05)
+    queue.schedule(3, 0.3)
+    queue.schedule(3, 0.1)
+    queue.start()
+    try:
+        assert search.done.wait(3)
+        time.sleep(0.35)
+    finally:
+        queue.stop()
+
+    assert search.calls == [2, 3, 1]
+    assert store.data[DELAYED_SEARCH_KEY] == {}
+    assert queue.pending_count == 0
+
+
+def test_restart_restores_pending_searches():
+    """停止时未开始的搜索留在持久化数据中，新实例启动后继续执行。"""
+    store = Store()
+    first = DelayedSearchQueue(store.read, store.update, search_fn=lambda sid: None)
+    first.schedule(5, 3600, "新增待定处理")
+    first.schedule(6, 3600, "种子删除处理")
+    first.start()
+    first.stop()
+    assert set(store.data[DELAYED_SEARCH_KEY]) == {"5", "6"}
+
+    for entry in store.data[DELAYED_SEARCH_KEY].values():
+        entry["run_at"] = time.time() - 1
+    store.data[DELAYED_SEARCH_KEY]["bad"] = "corrupted"
+    search = SlowSearch()
+    search.expected = 2
+    second = DelayedSearchQueue(store.read, store.update, search_fn=search)
+    second.start()
+    second.start()
+    try:
+        assert search.done.wait(3)
+    finally:
+        second.stop()
+
+    assert sorted(search.calls) == [5, 6]
+    assert _wait_for(lambda: store.read(DELAYED_SEARCH_KEY) == {"bad": "corrupted"})
+
+
+def test_stop_after_dequeue_keeps_search_for_next_start():
+    """出队后发现队列已停止时放回内存堆，持久化条目保留到搜索真正执行。"""
+    store = Store()
+    search = SlowSearch()
+    queue = DelayedSearchQueue(store.read, store.update, search_fn=search)
+    queue.schedule(4, 0, "种子删除处理")
+
+    queue._dispatch_loop()
+
+    assert search.calls == []
+    assert queue.pending_count == 1
+    assert set(store.data[DELAYED_SEARCH_KEY]) == {"4"}
+
+
+def test_cancel_and_clear_drop_pending_searches():
+    """取消只影响尚未开始的搜索并移除持久化条目；clear 清空内存中的全部安排。"""
+    store = Store()
+    search = SlowSearch()
+    search.expected = 1
+    queue = DelayedSearchQueue(store.read, store.update, search_fn=search)
+    queue.schedule(1, 0.05)
+    queue.schedule(2, 0.05)
+
+    assert queue.cancel(1) is True
+    assert queue.cancel(1) is False
+    assert set(store.data[DELAYED_SEARCH_KEY]) == {"2"}
+    queue.start()
+    try:
+        assert search.done.wait(3)
+        assert _wait_for(lambda: store.read(DELAYED_SEARCH_KEY) == {})
+    finally:
+        queue.stop()
+    assert search.calls == [2]
+
+    queue.schedule(3, 3600)
+    queue.clear()
+    assert queue.pending_count == 0
+
+
+def test_burst_caps_concurrency_and_thread_count():
+    """一批删种补搜：线程数固定为调度线程加并发上限，同时在途搜索不超过上限。"""
+    store = Store()
+    search = SlowSearch(delay=0.02)
+    search.expected = 40
+    baseline = len(_queue_threads())
+    queue = DelayedSearchQueue(store.read, store.update, search_fn=search, max_concurrency=2)
+    queue.start()
+    try:
+        for sid in range(40):
+            queue.schedule(sid, 0)
+        assert search.done.wait(5)
+        peak_threads = len(_queue_threads()) - baseline
+    finally:
+        queue.stop()
+
+    assert sorted(search.calls) == list(range(40))
+    assert peak_threads <= 3
+    assert 1 <= search.max_inflight <= 2
+
+
+def test_search_errors_do_not_block_queue():
+    """单个搜索失败只记录日志，名额释放后继续执行后续搜索。"""
+    store = Store()
+    search = SlowSearch(fail_sids={1})
+    search.expected = 3
+    queue = DelayedSearchQueue(store.read, store.update, search_fn=search, max_concurrency=1)
+    queue.start()
+    try:
+        for sid in (1, 2, 3):
+            queue.schedule(sid, 0, "种子删除处理")
+        assert search.done.wait(3)
+    finally:
+        queue.stop()
+
+    assert sorted(search.calls) == [1, 2, 3]
+
+
+def test_stop_without_start_and_stop_while_waiting():
+    """未启动时 stop 无副作用；等待中的调度线程能被及时唤醒退出。"""
+    store = Store()
+    DelayedSearchQueue(store.read, store.update, search_fn=lambda sid: None).stop()
+
+    queue = DelayedSearchQueue(store.read, store.update, search_fn=lambda sid: None)
+    queue.start()
+    queue.schedule(9, 3600)
+    started = time.perf_counter()
+    queue.stop()
+
+    assert time.perf_counter() - started < 1
+    assert "9" in store.data[DELAYED_SEARCH_KEY]
+
+
+def test_stop_waits_for_in_flight_search():
+    """停止时在超时内等待执行中的搜索结束，持久化条目随之移除。"""
+    store = Store()
+    search = SlowSearch(delay=0.3)
+    queue = DelayedSearchQueue(store.read, store.update, search_fn=search)
+    queue.schedule(1, 0)
+    queue.start()
+    assert _wait_for(lambda: search.inflight == 1)
+
+    queue.stop(timeout=3)
+
+    assert search.calls == [1]
+    assert store.data[DELAYED_SEARCH_KEY] == {}
+
+
+def test_restart_skips_search_still_running_after_stop_timeout():
+    """停止超时后仍在执行的搜索不会被重新初始化的队列恢复并再执行一次。"""
+    store = Store()
+    release = threading.Event()
+    started = threading.Event()
+
+    def blocking_search(sid):
+        started.set()
+        release.wait(5)
+
+    first = DelayedSearchQueue(store.read, store.update, search_fn=blocking_search)
+    first.schedule(8, 0, "新增待定处理")
+    first.start()
+    assert started.wait(3)
+    first.stop(timeout=0.05)
+    assert "8" in store.data[DELAYED_SEARCH_KEY]
+
+    search = SlowSearch()
+    second = DelayedSearchQueue(store.read, store.update, search_fn=search)
+    second.start()
+    try:
+        assert second.pending_count == 0
+        release.set()
+        assert _wait_for(lambda: store.read(DELAYED_SEARCH_KEY) == {})
+    finally:
+        second.stop()
+    assert search.calls == []
@@ -7,7 +7,7 @@ import pytest
 
 from app.schemas.types import MediaType
 
-from app.plugins.subscribeassistantenhanced.cleanup.subscription import SubscriptionCleanup
+from app.plugins.subscribeassistantenhanced.cleanup.subscription import TORRENT_INDEX_MIN_HASHES, SubscriptionCleanup
 
 
 def _sub(**kwargs):
@@ -30,7 +30,7 @@ class TestHistoryClear:
     """订阅清理：源文件 / 媒体库文件删除经注入回调（mock 不触达真实文件系统）。"""
 
     def _orch_clear(self, store=None, cleanup_history_type="all", cleanup_history_scenes=None,
-                    torrent_exists_fn=None, sleep_fn=None):
+                    torrent_exists_fn=None, torrent_index_fn=None, sleep_fn=None):
         """构造可观测清理副作用的订阅清理编排器。"""
         store = store if store is not None else {}
         cleanup_history_scenes = ["best_version"] if cleanup_history_scenes is None else cleanup_history_scenes
@@ -47,6 +47,7 @@ class TestHistoryClear:
             cleanup_history_type=cleanup_history_type,
             cleanup_history_scenes=cleanup_history_scenes,
             torrent_exists_fn=torrent_exists_fn,
+            torrent_index_fn=torrent_index_fn,
             sleep_fn=sleep_fn,
         )
         return orch, store, deletes, events, hist_deletes
@@ -507,6 +508,89 @@ class TestHistoryClear:
         assert checks.count("hashA") == 2
         assert checks.count("hashB") == 3
 
+    def test_history_clear_rechecks_pending_hashes_by_ids(self):
+        """少量旧 hash 每轮按 ids 只查询仍未释放的 hash，剩余单个 hash 时回到逐个查询。"""
+        histories = [
+            self._history("1", {"path": "/src/a.mkv"}, None, "/src/a.mkv", "hashA"),
+            self._history("2", {"path": "/src/b.mkv"}, None, "/src/b.mkv", "hashB"),
+            self._history("3", {"path": "/src/c.mkv"}, None, "/src/c.mkv", "hashC"),
+        ]
+        rounds = iter([{"hashA", "hashB"}, {"hashB"}])
+        indexes = []
+        scopes = []
+
+        def torrent_index(hashes=None):
+            scopes.append(hashes)
+            present = next(rounds)
+            index = MagicMock()
+            index.exists.side_effect = lambda download_hash: download_hash in present
+            index.summary.return_value = "列种调用 3 次（失败 0 个），回退逐个查询 0 次"
+            indexes.append(index)
+            return index
+
+        single_checks = []
+        orch, _store, _deletes, _events, _hist_deletes = self._orch_clear(
+            torrent_exists_fn=lambda download_hash: single_checks.append(download_hash) or False,
+            torrent_index_fn=torrent_index,
+        )
+        orch._get_histories = MagicMock(return_value=histories)
+
+        result = orch.handle_resource_download_history_clear(_sub(), episodes=FULL_SEASON_EPISODES)
+
+        assert result is True
+        assert scopes == [{"hashA", "hashB", "hashC"}, {"hashA", "hashB"}]
+        assert indexes[0].exists.call_count == 3
+        assert indexes[1].exists.call_count == 2
+        assert single_checks == ["hashB"]
+
+    def test_history_clear_lists_downloaders_once_per_pass_for_many_hashes(self):
+        """大量旧 hash 只在首轮列出一次全部种子，之后按 ids 复查仍未释放的 hash。"""
+        hashes = [f"hash{index:03d}" for index in range(TORRENT_INDEX_MIN_HASHES)]
+        histories = [self._history(str(index), {"path": f"/src/{index}.mkv"}, None, f"/src/{index}.mkv", torrent_hash)
+                     for index, torrent_hash in enumerate(hashes)]
+        rounds = iter([set(hashes[:3]), set(hashes[:1]), set()])
+        scopes = []
+
+        def torrent_index(hashes=None):
+            scopes.append(None if hashes is None else len(hashes))
+            present = next(rounds)
+            index = MagicMock()
+            index.exists.side_effect = lambda download_hash: download_hash in present
+            return index
+
+        orch, _store, _deletes, _events, _hist_deletes = self._orch_clear(
+            torrent_exists_fn=lambda download_hash: False,
+            torrent_index_fn=torrent_index,
+        )
+        orch._get_histories = MagicMock(return_value=histories)
+
+        assert orch.handle_resource_download_history_clear(_sub(), episodes=FULL_SEASON_EPISODES) is True
+        assert scopes == [None, 3]
+
+    def test_history_clear_falls_back_to_per_hash_queries_without_index(self):
+        """无法建立索引时按逐 hash 查询确认；只注入索引且建立失败时按不可判定等待后放行。"""
+        histories = [
+            self._history("1", {"path": "/src/a.mkv"}, None, "/src/a.mkv", "hashA"),
+            self._history("2", {"path": "/src/b.mkv"}, None, "/src/b.mkv", "hashB"),
+        ]
+        checks = []
+        orch, _store, _deletes, _events, _hist_deletes = self._orch_clear(
+            torrent_exists_fn=lambda download_hash: checks.append(download_hash) or False,
+            torrent_index_fn=lambda hashes=None: None,
+        )
+        orch._get_histories = MagicMock(return_value=histories)
+        assert orch.handle_resource_download_history_clear(_sub(), episodes=FULL_SEASON_EPISODES) is True
+        assert sorted(checks) == ["hashA", "hashB"]
+
+        sleeps = []
+        orch, _store, _deletes, _events, _hist_deletes = self._orch_clear(
+            torrent_index_fn=lambda hashes=None: None,
+            sleep_fn=lambda seconds: sleeps.append(seconds),
+        )
+        orch._get_histories = MagicMock(return_value=histories[:1])
+        assert orch.handle_resource_download_history_clear(_sub(), episodes=FULL_SEASON_EPISODES) is True
+        assert len(sleeps) == 12
+
     def test_history_clear_always_waits_five_seconds_before_first_query(self):
         """即使旧种已不存在，也必须先等待删除事件处理 5 秒再查询。"""
         history = self._history("1", {"path": "/src/a.mkv"}, None, "/src/a.mkv", "hashA")
@@ -1,6 +1,13 @@
 """shared/task.py TaskDataManager 单测。"""
+import copy
+import json
 import threading
+import time
+from types import SimpleNamespace
+from unittest.mock import MagicMock
 
+from app.plugins.subscribeassistantenhanced.download.monitor import DownloadMonitor
+from app.plugins.subscribeassistantenhanced.download.torrent import TorrentInfo
 from app.plugins.subscribeassistantenhanced.shared.task import TaskDataManager
 
 
@@ -11,7 +18,8 @@ class TaskDataManagerTest:
         self.store = {}
 
         def get_fn(key):
-            return self.store.get(key)
+            # 与插件数据一致，每次读取得到新的对象
+            return copy.deepcopy(self.store.get(key))
 
         def save_fn(key, data):
             self.store[key] = data
@@ -105,3 +113,208 @@ class TaskDataManagerTest:
         self.mgr.clean_torrent_tasks("h1")
         assert self.mgr.read("torrents") == {"h2": {"y": 2}}
         assert self.mgr.read("subscribes")["1"]["torrent_tasks"] == [{"hash": "h2"}]
+
+    def test_record_get_put_delete(self):
+        """按条读写记录，删除不存在的记录不落盘。"""
+        self.mgr.put_record("torrents", "h1", {"x": 1})
+        record = self.mgr.get_record("torrents", "h1")
+        record["x"] = 2
+        assert self.mgr.get_record("torrents", "h1") == {"x": 1}
+        assert self.mgr.get_record("torrents", "h2", default={}) == {}
+        saves = self.mgr.save_count
+        assert self.mgr.delete_record("torrents", "h2") is False
+        assert self.mgr.save_count == saves
+        assert self.mgr.delete_record("torrents", "h1") is True
+        assert self.store["torrents"] == {}
+
+    def test_batch_coalesces_writes_per_key(self):
+        """batch 内多次修改每个 key 只落盘一次，读取看到缓冲中的最新数据。"""
+        self.mgr.write("torrents", {"h1": {"n": 0}})
+        saves = self.mgr.save_count
+        with self.mgr.batch():
+            for _ in range(50):
+                self.mgr.update("torrents", lambda d: {**d, "h1": {"n": d["h1"]["n"] + 1}})
+            with self.mgr.batch():
+                self.mgr.put_record("subscribes", "1", {"y": 1})
+            assert self.mgr.save_count == saves
+            assert self.mgr.read("torrents") == {"h1": {"n": 50}}
+            assert self.store["torrents"] == {"h1": {"n": 0}}
+            self.mgr.read("blocks")
+        assert self.mgr.save_count == saves + 2
+        assert self.store["torrents"] == {"h1": {"n": 50}}
+        assert self.store["subscribes"] == {"1": {"y": 1}}
+        assert "blocks" not in self.store
+
+    def test_batch_read_returns_copy_of_buffer(self):
+        """batch 期间读取结果被调用方修改时不污染缓冲。"""
+        self.mgr.write("torrents", {"h1": {"n": 0}})
+        with self.mgr.batch():
+            self.mgr.read("torrents")["h1"]["n"] = 9
+            assert self.mgr.get_record("torrents", "h1") == {"n": 0}
+        assert self.store["torrents"] == {"h1": {"n": 0}}
+
+    def test_batch_flushes_on_error(self):
+        """batch 内抛异常时已缓冲的修改仍落盘。"""
+        try:
+            with self.mgr.batch():
+                self.mgr.put_record("torrents", "h1", {"x": 1})
+                raise RuntimeError("boom")
+        except RuntimeError:
+            pass
+        assert self.store["torrents"] == {"h1": {"x": 1}}
+
+    def test_batch_buffer_belongs_to_opening_thread(self):
+        """batch 缓冲只属于开启它的线程：其他线程直接落盘，退出 batch 时按记录合并不覆盖。"""
+        self.mgr.write("torrents", {"h0": {"x": 0}})
+        with self.mgr.batch():
+            self.mgr.put_record("torrents", "h1", {"x": 1})
+            worker = threading.Thread(target=lambda: self.mgr.put_record("torrents", "h2", {"x": 2}))
+            worker.start()
+            worker.join()
+            assert self.store["torrents"] == {"h0": {"x": 0}, "h2": {"x": 2}}
+        assert self.store["torrents"] == {"h0": {"x": 0}, "h1": {"x": 1}, "h2": {"x": 2}}
+
+    def test_concurrent_batches_keep_each_others_records(self):
+        """两个线程各自的 batch 修改同一 key 的不同记录，先后落盘后都保留。"""
+        self.mgr.write("torrents", {"h0": {"x": 0}, "h9": {"x": 9}})
+        entered, release = threading.Event(), threading.Event()
+
+        def other_pass():
+            with self.mgr.batch():
+                self.mgr.put_record("torrents", "h2", {"x": 2})
+                self.mgr.delete_record("torrents", "h9")
+                entered.set()
+                release.wait(5)
+
+        worker = threading.Thread(target=other_pass)
+        worker.start()
+        entered.wait(5)
+        with self.mgr.batch():
+            self.mgr.update("torrents", lambda d: {**d, "h0": {"x": 10}})
+        release.set()
+        worker.join()
+        assert self.store["torrents"] == {"h0": {"x": 10}, "h2": {"x": 2}}
+
+    def test_update_in_batch_discards_partial_mutation_when_updater_raises(self):
+        """batch 内 updater 抛异常时，它对数据的就地修改不进入缓冲也不落盘。"""
+        self.mgr.write("torrents", {"h1": {"n": 0}})
+
+        def failing(data):
+            data["h1"]["n"] = 99
+            raise ValueError("boom")
+
+        with self.mgr.batch():
+            try:
+                self.mgr.update("torrents", failing)
+            except ValueError:
+                pass
+            assert self.mgr.get_record("torrents", "h1") == {"n": 0}
+        assert self.store["torrents"] == {"h1": {"n": 0}}
+
+    def test_reset_all_drops_changes_buffered_by_other_threads(self):
+        """重置期间其他线程 batch 中缓冲的修改作废，退出 batch 时不写回旧数据。"""
+        self.mgr.write("torrents", {"h1": {"x": 1}})
+        with self.mgr.batch():
+            self.mgr.put_record("torrents", "h2", {"x": 2})
+            worker = threading.Thread(target=lambda: self.mgr.reset_all(["torrents", "subscribes"]))
+            worker.start()
+            worker.join()
+        assert self.store["torrents"] == {}
+        assert self.store["subscribes"] == {}
+
+    def test_flush_failure_keeps_data_and_flushes_other_keys(self):
+        """单个 key 落盘失败时其他 key 照常落盘，失败的数据保留在内存中，下次写入时一并落盘。"""
+        failing = {"torrents"}
+
+        def save_fn(key, data):
+            if key in failing:
+                raise OSError("disk full")
+            self.store[key] = data
+
+        mgr = TaskDataManager(get_data_fn=lambda key: copy.deepcopy(self.store.get(key)), save_data_fn=save_fn)
+        try:
+            with mgr.batch():
+                mgr.put_record("torrents", "h1", {"x": 1})
+                mgr.put_record("blocks", "1", {"blocked_at": 1})
+        except OSError:
+            pass
+        else:
+            raise AssertionError("落盘失败应抛出异常")
+        assert self.store == {"blocks": {"1": {"blocked_at": 1}}}
+        assert mgr.get_record("torrents", "h1") == {"x": 1}
+
+        failing.clear()
+        mgr.put_record("torrents", "h2", {"x": 2})
+        assert self.store["torrents"] == {"h1": {"x": 1}, "h2": {"x": 2}}
+        with mgr.batch():
+            assert mgr.read("torrents") == {"h1": {"x": 1}, "h2": {"x": 2}}
+
+    def test_clear_tasks_only_saves_keys_holding_the_subscription(self):
+        """清理订阅只改写含该订阅记录的 key，每个 key 最多落盘一次。"""
+        self.mgr.write("subscribes", {"9": {"x": 1}, "10": {"y": 2}})
+        self.mgr.write("torrents", {"h1": {"subscribe_id": 9}, "h2": {"subscribe_id": 9}})
+        self.mgr.write("blocks", {"10": {"blocked_at": 2}})
+        saves = self.mgr.save_count
+        self.mgr.clear_tasks(9)
+        assert self.mgr.save_count == saves + 2
+        assert self.store["torrents"] == {}
+        assert self.store["blocks"] == {"10": {"blocked_at": 2}}
+
+
+def _json_manager(store: dict, stats: SimpleNamespace, serialize: bool = True) -> TaskDataManager:
+    """以 JSON 序列化模拟插件数据落盘，统计落盘次数与字节数；不序列化时只计次数。"""
+    def save_fn(key, data):
+        stats.saves += 1
+        if serialize:
+            payload = json.dumps(data, ensure_ascii=False)
+            stats.bytes += len(payload.encode("utf-8"))
+            data = json.loads(payload)
+        store[key] = data
+
+    def get_fn(key):
+        return json.loads(json.dumps(store.get(key))) if serialize else store.get(key)
+
+    return TaskDataManager(get_data_fn=get_fn, save_data_fn=save_fn)
+
+
+def _run_timeout_check(count: int, batched: bool, serialize: bool = True) -> SimpleNamespace:
+    """下载中种子各触发一次 miss 清零与基线刷新或排队宽限，统计一轮巡检的落盘。"""
+    now = time.time()
+    store = {"torrents": {f"h{index}": {"hash": f"h{index}", "downloader": "qb", "subscribe_id": index % 50,
+                                        "baseline_progress": 0.0, "baseline_at": now - 3600,
+                                        "missing_count": 1} for index in range(count)}}
+    stats = SimpleNamespace(saves=0, bytes=0)
+    tm = _json_manager(store, stats, serialize=serialize)
+    fetch_fn = lambda downloader, torrent_hash: TorrentInfo(
+        hash=torrent_hash, title=torrent_hash, progress=0.5 if int(torrent_hash[1:]) % 2 else 0.01,
+        state="downloading")
+    monitor = DownloadMonitor(tm.read, tm.update, fetch_fn=fetch_fn, timeout_minutes=180,
+                              task_data_record=tm.get_record if batched else None,
+                              task_data_batch=tm.batch if batched else None)
+    monitor.run_timeout_check(cleanup=MagicMock())
+    stats.store = store
+    return stats
+
+
+def test_batched_timeout_check_matches_unbatched_result():
+    """合并落盘不改变巡检结果。"""
+    unbatched = _run_timeout_check(200, batched=False)
+    batched = _run_timeout_check(200, batched=True)
+
+    strip = lambda store: {h: {k: v for k, v in task.items() if not k.endswith("_at")}
+                           for h, task in store["torrents"].items()}
+    assert strip(batched.store) == strip(unbatched.store)
+    assert batched.saves <= 2 < unbatched.saves
+
+
+def test_timeout_check_1k_torrents_flushes_once_per_key():
+    """1000 个下载任务一轮巡检：合并后每个修改过的 key 只落盘一次。
+
+    逐次落盘的字节数按落盘次数乘最终数据大小估算，避免基准本身序列化数百 MB。
+    """
+    unbatched = _run_timeout_check(1000, batched=False, serialize=False)
+    batched = _run_timeout_check(1000, batched=True)
+    unbatched_bytes = unbatched.saves * len(json.dumps(unbatched.store["torrents"], ensure_ascii=False))
+    assert unbatched.saves >= 2000
+    assert batched.saves <= 2
+    assert batched.bytes * 100 < unbatched_bytes